@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from analytics.rollup import rebuild_seller_rollups
+from sellers.models import SellerProfile
+
+
+class Command(BaseCommand):
+    help = "Rebuild SellerOrderDailyStats (seller dashboard rollup) from OrderProduct."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seller-id", type=int, action="append", dest="seller_ids", default=None)
+
+    def handle(self, *args, **options):
+        seller_ids = options.get("seller_ids")
+        if not seller_ids:
+            seller_ids = list(SellerProfile.objects.order_by("id").values_list("id", flat=True))
+
+        written = 0
+        for seller_id in seller_ids:
+            # One transaction per seller keeps the seller row lock short.
+            written += rebuild_seller_rollups(seller_id)
+            if options["verbosity"] > 1:
+                self.stdout.write(f"seller {seller_id}: {written} row(s) so far")
+
+        self.stdout.write(self.style.SUCCESS(f"SellerOrderDailyStats rows rebuilt: {written} ({len(seller_ids)} seller(s))"))
@@ -0,0 +1,36 @@
+# Generated by Django 5.1 on 2026-10-18 16:57
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('sellers', '0012_seller_stock_import_job'),
+        ('warehouses', '0006_seed_stock_reservation_metrics'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SellerOrderDailyStats',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('basis', models.CharField(choices=[('ordered', 'Order date'), ('delivered', 'Delivery date')], max_length=16)),
+                ('day', models.DateField()),
+                ('status', models.CharField(choices=[('awaiting_assembly', 'Awaiting assembly'), ('awaiting_shipment', 'Awaiting shipment'), ('deliverable', 'Deliverable'), ('delivered', 'Delivered'), ('canceled', 'Canceled'), ('controversial', 'Controversial')], max_length=30)),
+                ('quantity', models.PositiveBigIntegerField(default=0)),
+                ('amount', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('seller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='sellers.sellerprofile')),
+                ('warehouse', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='warehouses.warehouse')),
+            ],
+            options={
+                'verbose_name': 'Seller order daily stats',
+                'verbose_name_plural': 'Seller order daily stats',
+                'indexes': [models.Index(fields=['seller', 'basis', 'day'], name='sellerstats_seller_day_idx')],
+            },
+        ),
+    ]
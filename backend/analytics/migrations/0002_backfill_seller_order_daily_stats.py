@@ -0,0 +1,63 @@
+# Backfill SellerOrderDailyStats from existing OrderProducts.
+#
+# Uses historical models only; live maintenance happens in analytics/signals.py.
+# Re-run at any time with `manage.py rebuild_order_stats`.
+
+from django.db import migrations, models
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+
+BATCH_SIZE = 1000
+
+
+def backfill_seller_order_daily_stats(apps, schema_editor):
+    OrderProduct = apps.get_model('order', 'OrderProduct')
+    SellerOrderDailyStats = apps.get_model('analytics', 'SellerOrderDailyStats')
+
+    sources = (
+        ('ordered', OrderProduct.objects.annotate(day=TruncDate('order__order_date'))),
+        (
+            'delivered',
+            OrderProduct.objects.filter(order__delivery_date__isnull=False)
+            .annotate(day=F('order__delivery_date')),
+        ),
+    )
+    rows = []
+    for basis, qs in sources:
+        grouped = (
+            qs.values('seller_profile_id', 'warehouse_id', 'day', 'status')
+            .annotate(
+                total_quantity=Sum('quantity'),
+                total_amount=Sum(
+                    F('product_price') * F('quantity'),
+                    output_field=models.DecimalField(max_digits=14, decimal_places=2),
+                ),
+            )
+            .order_by()
+        )
+        for row in grouped.iterator():
+            rows.append(SellerOrderDailyStats(
+                seller_id=row['seller_profile_id'],
+                warehouse_id=row['warehouse_id'],
+                basis=basis,
+                day=row['day'],
+                status=row['status'],
+                quantity=row['total_quantity'] or 0,
+                amount=row['total_amount'] or 0,
+            ))
+            if len(rows) >= BATCH_SIZE:
+                SellerOrderDailyStats.objects.bulk_create(rows)
+                rows = []
+    SellerOrderDailyStats.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('analytics', '0001_seller_order_daily_stats'),
+        ('order', '0009_order_consistency'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_seller_order_daily_stats, migrations.RunPython.noop),
+    ]
@@ -1,3 +1,39 @@
 from django.db import models
 
-# Create your models here.
+from order.models import ProductStatus
+
+
+class SellerOrderDailyStats(models.Model):
+    """
+    Daily OrderProduct rollup per seller, warehouse and item status (analytics/rollup.py).
+
+    ``basis=ordered`` rows are bucketed by the order date, ``basis=delivered``
+    rows by ``Order.delivery_date``.  ``quantity`` is the sum of
+    ``OrderProduct.quantity`` and ``amount`` the sum of ``product_price * quantity``.
+    Days are local dates (TIME_ZONE).  A bucket is always recomputed from
+    OrderProduct as a whole, never incremented.
+    """
+
+    class Basis(models.TextChoices):
+        ORDERED = "ordered", "Order date"
+        DELIVERED = "delivered", "Delivery date"
+
+    seller = models.ForeignKey("sellers.SellerProfile", on_delete=models.CASCADE, related_name="+")
+    warehouse = models.ForeignKey("warehouses.Warehouse", on_delete=models.CASCADE, null=True, blank=True,
+                                  related_name="+")
+    basis = models.CharField(max_length=16, choices=Basis.choices)
+    day = models.DateField()
+    status = models.CharField(max_length=30, choices=ProductStatus.choices)
+    quantity = models.PositiveBigIntegerField(default=0)
+    amount = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Seller order daily stats"
+        verbose_name_plural = "Seller order daily stats"
+        indexes = [
+            models.Index(fields=("seller", "basis", "day"), name="sellerstats_seller_day_idx"),
+        ]
+
+    def __str__(self) -> str:
+        return f"{self.seller_id}/{self.warehouse_id} {self.basis} {self.day} {self.status}: {self.quantity}"
@@ -0,0 +1,167 @@
+"""
+Precomputed order statistics for seller dashboards.
+
+``SellerOrderDailyStats`` holds one row per (seller, warehouse, basis, day,
+status) with the summed quantity and amount of the seller's OrderProducts.
+Dashboards (analytics/services.py, sellers/services.py) answer from a single
+grouped read of this table and do not scan OrderProduct.
+
+Maintenance
+-----------
+A bucket is (seller, basis, day).  When an OrderProduct is saved or deleted, or
+an Order changes its delivery date, the affected buckets are recomputed from
+OrderProduct after the transaction commits (analytics/signals.py).  A bucket is
+always rebuilt whole, so a missed refresh is repaired by the next one.  The
+buckets of one seller are refreshed under a row lock on the SellerProfile, so
+concurrent refreshes cannot interleave their delete and insert.
+
+``QuerySet.update()`` bypasses the signals; callers that bulk-update
+OrderProducts call ``schedule_order_refresh`` themselves.  ``manage.py
+rebuild_order_stats`` recomputes everything (or a single seller).
+"""
+from __future__ import annotations
+
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta
+from typing import Iterable
+
+from django.db import models, transaction
+from django.db.models import F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from order.models import Order, OrderProduct
+from sellers.models import SellerProfile
+
+from .models import SellerOrderDailyStats
+
+logger = logging.getLogger(__name__)
+
+ORDERED = SellerOrderDailyStats.Basis.ORDERED
+DELIVERED = SellerOrderDailyStats.Basis.DELIVERED
+
+# (seller_id, basis, day)
+Bucket = tuple[int, str, date]
+
+
+def _day_start(day: date) -> datetime:
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def _grouped(seller_id: int, basis: str, days: set[date] | None):
+    qs = OrderProduct.objects.filter(seller_profile_id=seller_id)
+    if basis == ORDERED:
+        qs = qs.annotate(day=TruncDate("order__order_date"))
+        if days is not None:
+            # Range on the indexed order_date first, exact local days second.
+            qs = qs.filter(
+                order__order_date__gte=_day_start(min(days)),
+                order__order_date__lt=_day_start(max(days) + timedelta(days=1)),
+                day__in=days,
+            )
+    else:
+        qs = qs.filter(order__delivery_date__isnull=False).annotate(day=F("order__delivery_date"))
+        if days is not None:
+            qs = qs.filter(order__delivery_date__in=days)
+    return (
+        qs.values("warehouse_id", "day", "status")
+        .annotate(
+            total_quantity=Sum("quantity"),
+            total_amount=Sum(
+                F("product_price") * F("quantity"),
+                output_field=models.DecimalField(max_digits=14, decimal_places=2),
+            ),
+        )
+        .order_by()
+    )
+
+
+def _rebuild(seller_id: int, basis: str, days: set[date] | None) -> int:
+    rows = [
+        SellerOrderDailyStats(
+            seller_id=seller_id,
+            warehouse_id=row["warehouse_id"],
+            basis=basis,
+            day=row["day"],
+            status=row["status"],
+            quantity=row["total_quantity"] or 0,
+            amount=row["total_amount"] or 0,
+        )
+        for row in _grouped(seller_id, basis, days)
+    ]
+    stale = SellerOrderDailyStats.objects.filter(seller_id=seller_id, basis=basis)
+    if days is not None:
+        stale = stale.filter(day__in=days)
+    stale.delete()
+    SellerOrderDailyStats.objects.bulk_create(rows, batch_size=1000)
+    return len(rows)
+
+
+def _lock_seller(seller_id: int) -> bool:
+    return bool(list(SellerProfile.objects.select_for_update().filter(pk=seller_id).values_list("pk", flat=True)))
+
+
+def refresh_order_rollups(buckets: Iterable[Bucket]) -> int:
+    """Recompute ``buckets`` from OrderProduct; returns rows written."""
+    wanted: dict[int, dict[str, set[date]]] = defaultdict(lambda: defaultdict(set))
+    for seller_id, basis, day in buckets:
+        if seller_id and day:
+            wanted[seller_id][basis].add(day)
+
+    written = 0
+    for seller_id in sorted(wanted):
+        with transaction.atomic():
+            if not _lock_seller(seller_id):
+                continue
+            for basis, days in sorted(wanted[seller_id].items()):
+                written += _rebuild(seller_id, basis, days)
+    return written
+
+
+def rebuild_seller_rollups(seller_id: int) -> int:
+    """Recompute every bucket of one seller; returns rows written."""
+    with transaction.atomic():
+        if not _lock_seller(seller_id):
+            return 0
+        return sum(_rebuild(seller_id, basis, None) for basis in (ORDERED, DELIVERED))
+
+
+def buckets_for_order_product(item: OrderProduct, order: Order | None = None) -> list[Bucket]:
+    order = order or item.order
+    buckets = [(item.seller_profile_id, ORDERED, timezone.localdate(order.order_date))]
+    if order.delivery_date:
+        buckets.append((item.seller_profile_id, DELIVERED, order.delivery_date))
+    return buckets
+
+
+def buckets_for_order(
+    order: Order,
+    delivery_dates: Iterable[date | None] = (),
+    *,
+    ordered: bool = True,
+) -> list[Bucket]:
+    """Buckets of every seller in ``order``: its order day and ``delivery_dates``."""
+    seller_ids = set(order.order_products.values_list("seller_profile_id", flat=True))
+    buckets: list[Bucket] = []
+    if ordered:
+        order_day = timezone.localdate(order.order_date)
+        buckets.extend((seller_id, ORDERED, order_day) for seller_id in seller_ids)
+    for day in {d for d in delivery_dates if d}:
+        buckets.extend((seller_id, DELIVERED, day) for seller_id in seller_ids)
+    return buckets
+
+
+def schedule_order_refresh(buckets: Iterable[Bucket]) -> None:
+    """Refresh ``buckets`` after the current transaction commits."""
+    buckets = list(buckets)
+    if not buckets:
+        return
+
+    def refresh():
+        try:
+            refresh_order_rollups(buckets)
+        except Exception:  # noqa: BLE001 — dashboards must not fail order writes
+            logger.exception("schedule_order_refresh: failed to refresh %d bucket(s)", len(buckets))
+
+    transaction.on_commit(refresh)
@@ -1,10 +1,14 @@
+from collections import defaultdict
 from datetime import timedelta
-from django.utils import timezone
+
 from django.db.models import Sum
+from django.utils import timezone
 
-from order.models import OrderProduct, ProductStatus
+from order.models import ProductStatus
 from warehouses.models import Warehouse
 
+from .models import SellerOrderDailyStats
+
 VENDOR_WAREHOUSE_NAME = "Vendor warehouse"
 RELI_WAREHOUSE_NAME = "Reli warehouse"
 
@@ -34,71 +38,75 @@ def _warehouse_by_canonical_name(name):
         return None
 
 
-def get_warehouse_orders_stats(warehouse, seller_profile, days=15):
+def stats_window_start(days):
     """
-    Считает статистику заказов (OrderProduct) для ОДНОГО склада (warehouse),
-    за последние N дней (days), но ТОЛЬКО по товарам данного продавца (seller_profile).
+    Первый день окна «последние N дней» для дашбордов (локальная дата, TIME_ZONE).
 
-    1. Фильтр по дате (order_date >= cutoff_date).
-    2. Фильтр по warehouse=...
-    3. Фильтр по seller_profile=...
-    4. Группируем по статусам и суммируем quantity.
+    Роллап хранит дни, поэтому граница окна — начало суток, а не момент now - N дней.
+    Окно включает сегодня: N дней — это start .. start + N - 1 (фильтр day__gte=start).
     """
-    now = timezone.now()
-    cutoff_date = now - timedelta(days=days)
+    return timezone.localdate() - timedelta(days=days - 1)
+
+
+def _status_totals(quantities):
+    """Ключи zero_warehouse_order_stats из словаря status -> quantity."""
+    stats = zero_warehouse_order_stats()
+    for status_value, key in (
+        (ProductStatus.AWAITING_ASSEMBLY, "awaiting_assembly"),
+        (ProductStatus.AWAITING_SHIPMENT, "awaiting_shipment"),
+        (ProductStatus.DELIVERABLE, "deliverable"),
+        (ProductStatus.DELIVERED, "delivered"),
+        (ProductStatus.CANCELED, "canceled"),
+        (ProductStatus.CONTROVERSIAL, "controversial"),
+    ):
+        stats[key] = quantities.get(status_value, 0)
 
-    qs = OrderProduct.objects.filter(
-        order__order_date__gte=cutoff_date,
-        warehouse=warehouse,
-        seller_profile=seller_profile
+    # Суммируем «Awaiting assembly» + «Awaiting shipment»
+    stats["awaiting_assembly_and_shipment"] = stats["awaiting_assembly"] + stats["awaiting_shipment"]
+    stats["all"] = (
+        stats["awaiting_assembly_and_shipment"]
+        + stats["deliverable"]
+        + stats["delivered"]
+        + stats["canceled"]
+        + stats["controversial"]
     )
+    return stats
 
-    awaiting_assembly_qty = qs.filter(
-        status=ProductStatus.AWAITING_ASSEMBLY
-    ).aggregate(Sum('quantity'))['quantity__sum'] or 0
-
-    awaiting_shipment_qty = qs.filter(
-        status=ProductStatus.AWAITING_SHIPMENT
-    ).aggregate(Sum('quantity'))['quantity__sum'] or 0
 
-    deliverable_qty = qs.filter(
-        status=ProductStatus.DELIVERABLE
-    ).aggregate(Sum('quantity'))['quantity__sum'] or 0
-
-    delivered_qty = qs.filter(
-        status=ProductStatus.DELIVERED
-    ).aggregate(Sum('quantity'))['quantity__sum'] or 0
-
-    canceled_qty = qs.filter(
-        status=ProductStatus.CANCELED
-    ).aggregate(Sum('quantity'))['quantity__sum'] or 0
+def get_orders_stats_by_warehouse(warehouses, seller_profile, days=15):
+    """
+    Статистика заказов продавца по нескольким складам одним сгруппированным запросом
+    к SellerOrderDailyStats (analytics/rollup.py): warehouse_id -> набор ключей
+    zero_warehouse_order_stats.
+    """
+    warehouse_ids = [warehouse.pk for warehouse in warehouses]
+    quantities = defaultdict(dict)
+    if warehouse_ids:
+        rows = (
+            SellerOrderDailyStats.objects
+            .filter(
+                seller=seller_profile,
+                basis=SellerOrderDailyStats.Basis.ORDERED,
+                warehouse_id__in=warehouse_ids,
+                day__gte=stats_window_start(days),
+            )
+            .values("warehouse_id", "status")
+            .annotate(total=Sum("quantity"))
+            .values_list("warehouse_id", "status", "total")
+        )
+        for warehouse_id, status_value, total in rows:
+            quantities[warehouse_id][status_value] = total
+    return {warehouse_id: _status_totals(quantities[warehouse_id]) for warehouse_id in warehouse_ids}
 
-    controversial_qty = qs.filter(
-        status=ProductStatus.CONTROVERSIAL
-    ).aggregate(Sum('quantity'))['quantity__sum'] or 0
 
-    # Суммируем «Awaiting assembly» + «Awaiting shipment»
-    awaiting_assembly_and_shipment_qty = awaiting_assembly_qty + awaiting_shipment_qty
-
-    # Общая сумма
-    total_qty = (
-        awaiting_assembly_and_shipment_qty
-        + deliverable_qty
-        + delivered_qty
-        + canceled_qty
-        + controversial_qty
-    )
+def get_warehouse_orders_stats(warehouse, seller_profile, days=15):
+    """
+    Считает статистику заказов (OrderProduct) для ОДНОГО склада (warehouse),
+    за последние N дней (days), но ТОЛЬКО по товарам данного продавца (seller_profile).
 
-    return {
-        "awaiting_assembly": awaiting_assembly_qty,
-        "awaiting_shipment": awaiting_shipment_qty,
-        "controversial": controversial_qty,
-        "awaiting_assembly_and_shipment": awaiting_assembly_and_shipment_qty,
-        "deliverable": deliverable_qty,
-        "delivered": delivered_qty,
-        "canceled": canceled_qty,
-        "all": total_qty,
-    }
+    Читает дневной роллап SellerOrderDailyStats (по дате заказа), а не OrderProduct.
+    """
+    return get_orders_stats_by_warehouse([warehouse], seller_profile, days=days)[warehouse.pk]
 
 
 def get_stats_for_two_warehouses(seller_profile, days=15):
@@ -110,21 +118,17 @@ def get_stats_for_two_warehouses(seller_profile, days=15):
 
     Склады резолвятся по историческим именам. Если склад отсутствует или переименован —
     возвращается нулевая статистика с тем же набором полей для соответствующей стороны.
-    Формат ответа и ключи статистики не меняются.
+    Формат ответа и ключи статистики не меняются. Обе стороны считаются одним
+    сгруппированным запросом к роллапу.
     """
     vendor_wh = _warehouse_by_canonical_name(VENDOR_WAREHOUSE_NAME)
     reli_wh = _warehouse_by_canonical_name(RELI_WAREHOUSE_NAME)
     tmpl = zero_warehouse_order_stats()
+    stats = get_orders_stats_by_warehouse(
+        [wh for wh in (vendor_wh, reli_wh) if wh is not None], seller_profile, days=days,
+    )
 
     return {
-        "vendor_warehouse": (
-            get_warehouse_orders_stats(vendor_wh, seller_profile, days=days)
-            if vendor_wh is not None
-            else {**tmpl}
-        ),
-        "reli_warehouse": (
-            get_warehouse_orders_stats(reli_wh, seller_profile, days=days)
-            if reli_wh is not None
-            else {**tmpl}
-        ),
+        "vendor_warehouse": stats[vendor_wh.pk] if vendor_wh is not None else {**tmpl},
+        "reli_warehouse": stats[reli_wh.pk] if reli_wh is not None else {**tmpl},
     }
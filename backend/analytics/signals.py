@@ -0,0 +1,48 @@
+from django.db.models.signals import post_save, pre_delete, pre_save
+from django.dispatch import receiver
+
+from order.models import Order, OrderProduct
+
+from .rollup import buckets_for_order, buckets_for_order_product, schedule_order_refresh
+
+
+# ---------------------------------------------------------------------------
+# SellerOrderDailyStats maintenance (analytics/rollup.py)
+#
+# Buckets are refreshed after commit.  Deletes are handled in pre_delete
+# because during a cascade delete of an Order the parent row may already be
+# gone by post_delete.
+# ---------------------------------------------------------------------------
+
+
+@receiver(post_save, sender=OrderProduct)
+def refresh_order_stats_on_item_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    schedule_order_refresh(buckets_for_order_product(instance))
+
+
+@receiver(pre_delete, sender=OrderProduct)
+def refresh_order_stats_on_item_delete(sender, instance, **kwargs):
+    schedule_order_refresh(buckets_for_order_product(instance))
+
+
+@receiver(pre_save, sender=Order)
+def remember_order_delivery_date(sender, instance, raw=False, update_fields=None, **kwargs):
+    if raw or instance.pk is None:
+        return
+    if update_fields is not None and "delivery_date" not in update_fields:
+        return
+    instance._stats_previous_delivery_date = (
+        Order.objects.filter(pk=instance.pk).values_list("delivery_date", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=Order)
+def refresh_order_stats_on_delivery_date(sender, instance, created, raw=False, **kwargs):
+    if raw or created or not hasattr(instance, "_stats_previous_delivery_date"):
+        return
+    previous = instance.__dict__.pop("_stats_previous_delivery_date")
+    if previous == instance.delivery_date:
+        return
+    schedule_order_refresh(buckets_for_order(instance, (previous, instance.delivery_date), ordered=False))
@@ -1,6 +1,12 @@
-"""Тесты analytics: fallback складской статистики (Task 009 Step 4)."""
+"""Тесты analytics: fallback складской статистики (Task 009 Step 4) и дневной роллап заказов."""
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
 from unittest.mock import patch
 
+from django.core.management import call_command
+from django.utils import timezone
+
 from django.test import TestCase
 from django.urls import reverse
 from rest_framework import status as http_status
@@ -9,8 +15,14 @@ from rest_framework.test import APIClient
 from accounts.choices import UserRole
 from accounts.models import CustomUser
 from analytics import services as analytics_services
+from analytics.models import SellerOrderDailyStats
 from analytics.services import get_stats_for_two_warehouses, zero_warehouse_order_stats
+from order.models import Order, OrderProduct, OrderStatus, ProductStatus
+from order.order_status_names import OrderStatusName
+from order.services.seller_order_actions import SellerOrderActionsService
+from product.models import BaseProduct, ProductStatus as CatalogStatus, ProductVariant
 from sellers.models import SellerProfile
+from sellers.services import get_seller_sales_statistics
 from warehouses.models import Warehouse
 
 
@@ -78,7 +90,7 @@ class AnalyticsWarehouseStatsServiceTest(TestCase):
             zip_code="10000",
             country="CZ",
         )
-        reli = Warehouse.objects.create(
+        Warehouse.objects.create(
             name="Reli warehouse",
             street="S",
             city="Praha",
@@ -86,25 +98,10 @@ class AnalyticsWarehouseStatsServiceTest(TestCase):
             country="CZ",
         )
 
-        stats = get_stats_for_two_warehouses(self.seller_profile)
-        self.assert_zero_bucket(stats["vendor_warehouse"])
-
-        tracked = []
-
-        real = analytics_services.get_warehouse_orders_stats
-
-        def recording(warehouse, seller_profile, days=15):
-            tracked.append((warehouse.pk, warehouse.name))
-            return real(warehouse, seller_profile, days=days)
-
-        with patch.object(
-            analytics_services,
-            "get_warehouse_orders_stats",
-            side_effect=recording,
-        ):
+        # Two canonical-name lookups and one grouped read of the rollup.
+        with self.assertNumQueries(3):
             out = get_stats_for_two_warehouses(self.seller_profile)
 
-        self.assertEqual(tracked, [(reli.pk, "Reli warehouse")])
         self.assert_zero_bucket(out["vendor_warehouse"])
         self.assertEqual(set(out["reli_warehouse"].keys()), _EXPECTED_KEYS)
 
@@ -135,3 +132,149 @@ class WarehouseOrdersStatsHttpTest(TestCase):
         self.assertEqual(resp.status_code, http_status.HTTP_200_OK)
         self.assertIn("vendor_warehouse", resp.data)
         self.assertIn("reli_warehouse", resp.data)
+
+
+class SellerOrderDailyStatsTest(TestCase):
+    """Роллап SellerOrderDailyStats поддерживается сигналами и читается дашбордами."""
+
+    @classmethod
+    def setUpTestData(cls):
+        seller_user = CustomUser.objects.create_user(
+            email="analytics-rollup@example.com",
+            password="pass12345",
+            first_name="R",
+            last_name="U",
+            role=UserRole.SELLER,
+            phone_number="+420730000014",
+        )
+        cls.seller_profile = SellerProfile.objects.get(user=seller_user)
+        cls.admin = CustomUser.objects.create_user(
+            email="analytics-rollup-admin@example.com",
+            password="pass12345",
+            first_name="A",
+            last_name="D",
+            phone_number="+420730000015",
+            is_staff=True,
+        )
+        cls.vendor_wh = Warehouse.objects.create(
+            name="Vendor warehouse", street="S", city="Praha", zip_code="10000", country="CZ",
+        )
+        cls.reli_wh = Warehouse.objects.create(
+            name="Reli warehouse", street="S", city="Praha", zip_code="10001", country="CZ",
+        )
+        product = BaseProduct.objects.create(
+            name="Rollup Product",
+            product_description="D",
+            seller=cls.seller_profile,
+            vat_rate=Decimal("21.00"),
+            status=CatalogStatus.APPROVED,
+            is_active=True,
+        )
+        cls.variant = ProductVariant.objects.create(
+            product=product, name="V", text="r", price=Decimal("10.00"), weight_grams=100,
+        )
+
+    def _order(self, **extra):
+        return Order.objects.create(
+            first_name="Jan",
+            last_name="Novak",
+            customer_email="rollup-customer@example.com",
+            total_amount=Decimal("100.00"),
+            **extra,
+        )
+
+    def _item(self, order, warehouse, quantity, status=ProductStatus.AWAITING_ASSEMBLY):
+        with self.captureOnCommitCallbacks(execute=True):
+            return OrderProduct.objects.create(
+                order=order,
+                product=self.variant,
+                quantity=quantity,
+                status=status,
+                seller_profile=self.seller_profile,
+                warehouse=warehouse,
+                product_price=Decimal("10.00"),
+            )
+
+    def test_item_changes_maintain_warehouse_stats(self):
+        order = self._order()
+        item = self._item(order, self.vendor_wh, 2)
+        self._item(order, self.reli_wh, 3, status=ProductStatus.DELIVERED)
+
+        stats = get_stats_for_two_warehouses(self.seller_profile)
+        self.assertEqual(stats["vendor_warehouse"]["awaiting_assembly"], 2)
+        self.assertEqual(stats["vendor_warehouse"]["all"], 2)
+        self.assertEqual(stats["reli_warehouse"]["delivered"], 3)
+
+        item.status = ProductStatus.AWAITING_SHIPMENT
+        with self.captureOnCommitCallbacks(execute=True):
+            item.save()
+        stats = get_stats_for_two_warehouses(self.seller_profile)["vendor_warehouse"]
+        self.assertEqual((stats["awaiting_assembly"], stats["awaiting_shipment"]), (0, 2))
+        self.assertEqual(stats["awaiting_assembly_and_shipment"], 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item.delete()
+        self.assert_vendor_all(0)
+
+    def assert_vendor_all(self, expected):
+        self.assertEqual(get_stats_for_two_warehouses(self.seller_profile)["vendor_warehouse"]["all"], expected)
+
+    def test_admin_cancel_refreshes_rollup(self):
+        order = self._order()
+        self._item(order, self.vendor_wh, 4)
+        OrderStatus.objects.get_or_create(name=OrderStatusName.CANCELLED)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            SellerOrderActionsService.cancel_order(user=self.admin, order_id=order.pk)
+
+        stats = get_stats_for_two_warehouses(self.seller_profile)["vendor_warehouse"]
+        self.assertEqual((stats["canceled"], stats["awaiting_assembly"]), (4, 0))
+
+    def test_sales_statistics_read_rollup(self):
+        order = self._order()
+        self._item(order, self.vendor_wh, 2)
+        today = timezone.localdate()
+
+        order.delivery_date = today
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save(update_fields=["delivery_date"])
+
+        with self.assertNumQueries(1):
+            data = get_seller_sales_statistics(self.seller_profile, days=5)
+
+        self.assertEqual(len(data["chartData"]), 5)
+        self.assertEqual(data["chartData"][-1]["date"], str(today))
+        self.assertEqual(data["chartData"][-1]["ordered_count"], 2)
+        self.assertEqual(Decimal(data["ordered_period"]["amount"]), Decimal("20.00"))
+        self.assertEqual(data["ordered_period"]["count"], 2)
+        self.assertEqual(Decimal(data["delivered_period"]["amount"]), Decimal("20.00"))
+        self.assertEqual(data["delivered_period"]["count"], 2)
+
+        order.delivery_date = today - timedelta(days=30)
+        with self.captureOnCommitCallbacks(execute=True):
+            order.save(update_fields=["delivery_date"])
+        data = get_seller_sales_statistics(self.seller_profile, days=5)
+        self.assertEqual(data["delivered_period"], {"amount": "0", "count": 0})
+
+        # Five days are today and the four before it, the same days the chart shows.
+        for days_ago, count in ((5, 0), (4, 2)):
+            order.delivery_date = today - timedelta(days=days_ago)
+            with self.captureOnCommitCallbacks(execute=True):
+                order.save(update_fields=["delivery_date"])
+            data = get_seller_sales_statistics(self.seller_profile, days=5)
+            self.assertEqual(data["delivered_period"]["count"], count)
+            self.assertEqual(data["chartData"][0]["delivered_count"], count)
+        self.assertEqual(data["chartData"][0]["date"], str(today - timedelta(days=4)))
+        self.assertEqual(data["today"], str(today))
+
+    def test_rebuild_command_repairs_rollup(self):
+        order = self._order()
+        self._item(order, self.vendor_wh, 2)
+        SellerOrderDailyStats.objects.all().delete()
+        self.assert_vendor_all(0)
+
+        out = StringIO()
+        call_command("rebuild_order_stats", "--seller-id", str(self.seller_profile.pk), stdout=out)
+
+        self.assertIn("rows rebuilt: 1", out.getvalue())
+        self.assert_vendor_all(2)
@@ -41,10 +41,37 @@ DEBUG = os.getenv("DEBUG", "False").lower() in ("1", "true", "yes")
 ENABLE_DELIVERY_DEV_ENDPOINTS = os.getenv(
     "ENABLE_DELIVERY_DEV_ENDPOINTS", "False"
 ).lower() in ("1", "true", "yes")
+# In-memory ShippingRate card (delivery/services/rate_card.py): how often a process
+# checks the shared version for rate changes made by other processes.
+SHIPPING_RATE_CARD_CHECK_SECONDS = int(os.getenv("SHIPPING_RATE_CARD_CHECK_SECONDS", "30"))
+
+# Concurrent courier/channel quotes (delivery/services/quote_orchestrator.py):
+# pool size per process (0 = compute inline) and how long a quote waits for one courier.
+SHIPPING_QUOTE_WORKERS = int(os.getenv("SHIPPING_QUOTE_WORKERS", "8"))
+SHIPPING_QUOTE_TIMEOUT_SECONDS = float(os.getenv("SHIPPING_QUOTE_TIMEOUT_SECONDS", "10"))
 
 # Task 013: stock reservation at checkout session creation (Phase 3+).
 # Default False — deploy code/migrations without changing checkout behaviour.
 STOCK_RESERVATION_ENABLED = str_to_bool(os.getenv("STOCK_RESERVATION_ENABLED", "False"))
+# How reservations split cart lines across warehouses (warehouses/services/allocation.py):
+# fewest_shipments | nearest | balance_stock | warehouse_order, or a dotted class path.
+STOCK_ALLOCATION_STRATEGY = os.getenv("STOCK_ALLOCATION_STRATEGY", "fewest_shipments")
+# Row lock wait policy for checkout reservations (warehouses/services/locking.py):
+# wait (unbounded) | timeout (lock_timeout) | nowait (SELECT ... FOR UPDATE NOWAIT).
+# Bounded modes retry with jittered backoff, then checkout answers 503 "try again".
+STOCK_LOCK_MODE = os.getenv("STOCK_LOCK_MODE", "timeout")
+STOCK_LOCK_TIMEOUT_MS = int(os.getenv("STOCK_LOCK_TIMEOUT_MS", "2000"))
+STOCK_LOCK_RETRIES = int(os.getenv("STOCK_LOCK_RETRIES", "2"))
+STOCK_LOCK_BACKOFF_MS = int(os.getenv("STOCK_LOCK_BACKOFF_MS", "50"))
+STOCK_LOCK_WAIT_THRESHOLD_MS = int(os.getenv("STOCK_LOCK_WAIT_THRESHOLD_MS", "50"))
+# Rolling reservation metrics served at /metrics/stock-reservations/ (warehouses/services/metrics.py).
+# Scrapers send "Authorization: Bearer <token>"; without a token only staff sessions may read them.
+STOCK_METRICS_TOKEN = os.getenv("STOCK_METRICS_TOKEN", "")
+STOCK_METRICS_RETENTION_HOURS = int(os.getenv("STOCK_METRICS_RETENTION_HOURS", "24"))
+# Per-SKU lock contention is reported for the SKUs with the most contention over the last
+# STOCK_METRICS_LOCK_WINDOW_MINUTES (at most the retention); the rest are summed as sku="__other__".
+STOCK_METRICS_LOCK_TOP_SKUS = int(os.getenv("STOCK_METRICS_LOCK_TOP_SKUS", "20"))
+STOCK_METRICS_LOCK_WINDOW_MINUTES = int(os.getenv("STOCK_METRICS_LOCK_WINDOW_MINUTES", "60"))
 
 # E2E test helpers. NEVER enable in production. Default False.
 # STRIPE_WEBHOOK_SKIP_SIGNATURE — skip Stripe signature verification in webhook view.
@@ -444,7 +471,32 @@ CACHES = {
         "LOCATION": "conv-local-cache",
         "TIMEOUT": 60 * 60 * 24,  # час, можно None
     },
+    # Ответы публичного каталога (product/response_cache.py). Версии инвалидации
+    # хранятся в БД, поэтому локальный кэш в каждом воркере безопасен.
+    "catalog": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "catalog-response-cache",
+        "TIMEOUT": 60 * 15,
+        "OPTIONS": {"MAX_ENTRIES": 5000},
+    },
+    # Котировки доставки (delivery/services/quote_cache.py): ключ — отпечаток корзины,
+    # тарифов и курса, поэтому инвалидация не нужна. Кэш общий для всех воркеров
+    # gunicorn (таблица django_cache, `manage.py createcachetable`), чтобы checkout
+    # на любом воркере получил ту же котировку, что видел покупатель.
+    "shipping": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "django_cache",
+        "KEY_PREFIX": "shipping",
+        "TIMEOUT": 60 * 10,
+        "OPTIONS": {"MAX_ENTRIES": 10000},
+    },
 }
+CATALOG_RESPONSE_CACHE_ALIAS = "catalog"
+CATALOG_RESPONSE_CACHE_TIMEOUT = 60 * 15
+# Кэш count в cursor-режиме пагинации каталога (product/pagination.py)
+CATALOG_COUNT_CACHE_TIMEOUT = 60
+SHIPPING_QUOTE_CACHE_ALIAS = "shipping"
+SHIPPING_QUOTE_CACHE_TIMEOUT = int(os.getenv("SHIPPING_QUOTE_CACHE_TIMEOUT", str(60 * 10)))
 
 os.makedirs(os.path.join(BASE_DIR, "logs"), exist_ok=True)
 
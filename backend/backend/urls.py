@@ -29,6 +29,7 @@ def health_check(request):
 
 urlpatterns = [
     path("health/", health_check, name="health"),
+    path("metrics/", include("warehouses.urls")),
     path('admin/', admin.site.urls),
     path('reports/', include('reports.urls')),
     path('api/accounts/', include('accounts.urls')),
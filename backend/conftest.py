@@ -10,6 +10,8 @@ from __future__ import annotations
 from decimal import Decimal
 
 import pytest
+from django.conf import settings
+from django.core.cache import caches
 
 from accounts.choices import UserRole
 from accounts.models import CustomUser
@@ -21,6 +23,37 @@ from sellers.models import SellerProfile
 from warehouses.models import Warehouse
 
 
+# ---------------------------------------------------------------------------
+# Caches
+# ---------------------------------------------------------------------------
+
+
+def _uses_database(request) -> bool:
+    databases = getattr(request.instance, "databases", None)
+    if databases is not None:
+        return bool(databases)
+    return request.node.get_closest_marker("django_db") is not None or bool(
+        {"db", "transactional_db"} & set(request.fixturenames)
+    )
+
+
+@pytest.fixture(autouse=True)
+def _clear_caches(request):
+    """
+    Start every test (TestCase ones included) with empty caches: catalog
+    response keys embed version rows that are rolled back with each test,
+    DRF throttling counts anonymous requests in the default cache, and shipping
+    quotes would outlive the patched calculators that produced them. The
+    shipping cache is a database table, so it is cleared only for tests that
+    may use the database.
+    """
+    caches["default"].clear()
+    caches[settings.CATALOG_RESPONSE_CACHE_ALIAS].clear()
+    if _uses_database(request):
+        caches[settings.SHIPPING_QUOTE_CACHE_ALIAS].clear()
+    yield
+
+
 # ---------------------------------------------------------------------------
 # Users
 # ---------------------------------------------------------------------------
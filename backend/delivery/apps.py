@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class DeliveryConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = "delivery"
+
+    def ready(self):
+        # delivery/signals.py is not wired up; only the rate card receivers are.
+        import delivery.services.rate_card  # noqa: F401 — registers @receiver decorators
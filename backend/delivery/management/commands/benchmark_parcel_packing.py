@@ -0,0 +1,60 @@
+"""
+Compare the native parcel packer with py3dbp and print a JSON report.
+
+Example:
+  python manage.py benchmark_parcel_packing --courier gls --service HD \\
+    --units 10 50 200 --skus 5 --carts 3 --seed 1 --output packing.json
+"""
+from __future__ import annotations
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from delivery.packing_benchmark import COURIERS, PackingBenchmarkConfig, run_packing_benchmark
+
+
+class Command(BaseCommand):
+    help = "Benchmark GLS/DPD parcel packing: native packer vs py3dbp (parcel count and runtime, JSON report)."
+
+    def add_arguments(self, parser):
+        defaults = PackingBenchmarkConfig()
+        parser.add_argument("--courier", choices=COURIERS, default=defaults.courier)
+        parser.add_argument("--service", default=defaults.service, help="HD, PUDO, BOX (GLS) or S2S/S2H (DPD).")
+        parser.add_argument("--units", type=int, nargs="+", default=list(defaults.units), help="Units per cart.")
+        parser.add_argument("--skus", type=int, default=defaults.skus, help="Distinct SKUs per cart.")
+        parser.add_argument("--carts", type=int, default=defaults.carts, help="Carts per unit count.")
+        parser.add_argument("--repeat", type=int, default=defaults.repeat, help="Runs per cart; the best is kept.")
+        parser.add_argument(
+            "--py3dbp-max-units",
+            type=int,
+            default=defaults.py3dbp_max_units,
+            help="Skip py3dbp for larger carts.",
+        )
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--output", default=None, help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        config = PackingBenchmarkConfig(
+            courier=options["courier"],
+            service=options["service"],
+            units=options["units"],
+            skus=options["skus"],
+            carts=options["carts"],
+            repeat=options["repeat"],
+            py3dbp_max_units=options["py3dbp_max_units"],
+            seed=options["seed"],
+        )
+        try:
+            config.validate()
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+
+        report = run_packing_benchmark(config)
+        payload = json.dumps(report, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(payload + "\n")
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(payload)
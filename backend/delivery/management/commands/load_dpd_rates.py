@@ -7,6 +7,7 @@ from django.core.management.base import BaseCommand, CommandError
 
 from order.models import CourierService
 from delivery.models import ShippingRate
+from delivery.services.rate_card import deferred_rate_card_bump
 
 
 def q2(x) -> Decimal:
@@ -96,6 +97,7 @@ class Command(BaseCommand):
         )
 
     @transaction.atomic
+    @deferred_rate_card_bump()
     def handle(self, *args, **options):
         path = Path(options["path"])
         if not path.exists():
@@ -11,6 +11,7 @@ from django.db import transaction
 
 from order.models import CourierService
 from delivery.models import ShippingRate
+from delivery.services.rate_card import deferred_rate_card_bump
 
 
 """
@@ -153,6 +154,7 @@ class Command(BaseCommand):
         )
 
     @transaction.atomic
+    @deferred_rate_card_bump()
     def handle(self, *args, **opts):
         path = Path(opts["json"])
         data = _read_json(path)
@@ -0,0 +1,184 @@
+"""
+Benchmark of the parcel packer (delivery/services/packing.py) against py3dbp.
+
+Used by ``python manage.py benchmark_parcel_packing``. Builds seeded synthetic
+carts of ``units`` units over ``skus`` SKUs (sizes and weights drawn so that
+every unit fits the service's cartons) and packs each cart twice, into the
+GLS or DPD cartons of the chosen service:
+
+    native  ``packing.pack``, as used by the GLS/DPD splits
+    py3dbp  the previous split loop: every unit is a separate py3dbp item,
+            one bin of each carton per round until everything is placed
+
+The report lists, per cart, the parcel count and the best of ``repeat`` run
+times of both engines, plus totals. py3dbp time grows much faster than
+linearly with the unit count, so carts above ``py3dbp_max_units`` are packed
+by the native engine only.
+"""
+from __future__ import annotations
+
+import random
+import time
+from dataclasses import asdict, dataclass
+from decimal import Decimal
+from typing import Callable, Sequence
+
+from delivery.services.dpd_split import LIMITS_BY_SERVICE, _cartons_for_service, _cartons_to_pack
+from delivery.services.gls_split import LIMITS_BY_SERVICE_GLS, _cartons_for_service_gls, _cartons_to_pack_gls
+from delivery.services.packing import Carton, PackItem, pack
+
+COURIERS = ("gls", "dpd")
+
+
+@dataclass
+class PackingBenchmarkConfig:
+    courier: str = "gls"
+    service: str = "HD"
+    units: Sequence[int] = (10, 50, 200)
+    skus: int = 5
+    carts: int = 3
+    repeat: int = 3
+    py3dbp_max_units: int = 200
+    seed: int | None = None
+
+    def validate(self) -> None:
+        if self.courier not in COURIERS:
+            raise ValueError(f"courier must be one of {', '.join(COURIERS)}")
+        limits = LIMITS_BY_SERVICE_GLS if self.courier == "gls" else LIMITS_BY_SERVICE
+        if self.service.upper() not in limits:
+            raise ValueError(f"Unknown {self.courier.upper()} service: {self.service!r}")
+        if not self.units or min(self.units) < 1:
+            raise ValueError("units must be positive")
+        for name in ("skus", "carts", "repeat"):
+            if getattr(self, name) < 1:
+                raise ValueError(f"{name} must be >= 1")
+        if self.py3dbp_max_units < 0:
+            raise ValueError("py3dbp_max_units must be >= 0")
+
+
+def service_cartons(courier: str, service: str) -> list[Carton]:
+    svc = service.upper()
+    if courier == "gls":
+        limits = LIMITS_BY_SERVICE_GLS[svc]
+        return _cartons_to_pack_gls(svc, _cartons_for_service_gls(svc, limits), limits)
+    return _cartons_to_pack(svc, _cartons_for_service(svc), LIMITS_BY_SERVICE[svc])
+
+
+def synthetic_cart(rng: random.Random, cartons: Sequence[Carton], units: int, skus: int) -> list[PackItem]:
+    """``units`` units over at most ``skus`` SKUs, each unit fitting the smallest carton."""
+    smallest = min(cartons, key=lambda c: c.volume)
+    bound = sorted(smallest.dims)
+    max_weight = max(min(c.max_weight_g for c in cartons) // 4, 1)
+
+    skus = min(skus, units)
+    quantities = [1] * skus
+    for _ in range(units - skus):
+        quantities[rng.randrange(skus)] += 1
+
+    items = []
+    for idx, quantity in enumerate(quantities):
+        dims = sorted(rng.randint(max(side // 10, 10), max(side // 2, 10)) for side in bound)
+        items.append(
+            PackItem(
+                sku=f"BENCH-{idx}",
+                length_mm=dims[2],
+                width_mm=dims[1],
+                height_mm=dims[0],
+                weight_g=rng.randint(50, max_weight),
+                quantity=quantity,
+            )
+        )
+    return items
+
+
+def pack_with_py3dbp(items: Sequence[PackItem], cartons: Sequence[Carton]) -> int:
+    """Parcel count of the previous py3dbp-based split loop (sizes in cm, weights in kg)."""
+    from py3dbp import Bin, Item, Packer
+
+    remaining = [
+        (f"{item.sku}#{n}", item)
+        for item in items
+        for n in range(item.quantity)
+    ]
+    parcels = 0
+    while remaining:
+        packer = Packer()
+        for carton in sorted(cartons, key=lambda c: c.volume):
+            packer.add_bin(Bin(
+                carton.name,
+                carton.length_mm / 10,
+                carton.width_mm / 10,
+                carton.height_mm / 10,
+                carton.max_weight_g / 1000,
+            ))
+        for name, item in remaining:
+            packer.add_item(Item(
+                name=name,
+                width=item.length_mm / 10,
+                height=item.width_mm / 10,
+                depth=item.height_mm / 10,
+                weight=item.weight_g / 1000,
+            ))
+        packer.pack(bigger_first=True, distribute_items=True, number_of_decimals=2)
+
+        packed = set()
+        for bin_ in packer.bins:
+            if bin_.items:
+                parcels += 1
+                packed.update(it.name for it in bin_.items)
+        if not packed:
+            raise ValueError(f"py3dbp could not place {remaining[0][0]}")
+        remaining = [(name, item) for name, item in remaining if name not in packed]
+    return parcels
+
+
+def _best_ms(fn: Callable[[], int], repeat: int) -> tuple[int, float]:
+    best = None
+    result = 0
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        elapsed = (time.perf_counter() - started) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return result, round(best, 3)
+
+
+def run_packing_benchmark(config: PackingBenchmarkConfig) -> dict:
+    config.validate()
+    rng = random.Random(config.seed)
+    cartons = service_cartons(config.courier, config.service)
+
+    scenarios = []
+    totals = {"native_parcels": 0, "native_ms": 0.0, "py3dbp_parcels": 0, "py3dbp_ms": 0.0, "compared": 0}
+    for units in config.units:
+        for cart in range(config.carts):
+            items = synthetic_cart(rng, cartons, units, config.skus)
+            native_parcels, native_ms = _best_ms(lambda: len(pack(items, cartons)), config.repeat)
+            row = {
+                "units": units,
+                "cart": cart,
+                "skus": len(items),
+                "native_parcels": native_parcels,
+                "native_ms": native_ms,
+                "py3dbp_parcels": None,
+                "py3dbp_ms": None,
+            }
+            if units <= config.py3dbp_max_units:
+                row["py3dbp_parcels"], row["py3dbp_ms"] = _best_ms(
+                    lambda: pack_with_py3dbp(items, cartons), config.repeat
+                )
+                totals["compared"] += 1
+                for key in ("native_parcels", "native_ms", "py3dbp_parcels", "py3dbp_ms"):
+                    totals[key] += row[key]
+            scenarios.append(row)
+
+    totals["native_ms"] = round(totals["native_ms"], 3)
+    totals["py3dbp_ms"] = round(totals["py3dbp_ms"], 3)
+    return {
+        "config": {**asdict(config), "units": list(config.units)},
+        "cartons": [asdict(carton) for carton in cartons],
+        "scenarios": scenarios,
+        # Over the carts packed by both engines.
+        "totals": totals,
+        "speedup": round(totals["py3dbp_ms"] / totals["native_ms"], 1) if totals["native_ms"] else None,
+    }
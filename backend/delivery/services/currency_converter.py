@@ -43,6 +43,14 @@ def get_czk_to_eur_rate_cached() -> Decimal:
         return FALLBACK_CZK_PER_EUR
 
 
+def peek_czk_to_eur_rate() -> str | None:
+    """
+    Закешированный CZK_per_EUR без запроса к CNB (None, если курса в кеше нет).
+    """
+    rate = cache.get(CACHE_KEY)
+    return None if rate is None else str(rate)
+
+
 def convert_czk_to_eur(amount_czk: Decimal) -> Decimal:
     """
     Конвертирует сумму из CZK в EUR:
@@ -2,6 +2,7 @@ from __future__ import annotations
 
 import logging
 from decimal import Decimal, ROUND_HALF_UP
+from functools import partial
 from typing import Any, Dict, List, Optional
 
 from django.conf import settings
@@ -10,6 +11,10 @@ from product.models import ProductVariant
 from delivery.models import ShippingRate
 from delivery.services.currency_converter import convert_czk_to_eur
 from delivery.services.dpd_split import split_items_into_parcels_dpd
+from delivery.services.quote_cache import mark_quote_partial
+from delivery.services.quote_orchestrator import run_quotes
+from delivery.services.rate_card import get_rate_card
+from delivery.services.shipping_profile import shipping_profile, to_kg
 
 
 logger = logging.getLogger(__name__)
@@ -52,14 +57,7 @@ def _resolve_channel_for(country: str, delivery_type: str) -> str:
 
 def _resolve_weight_tag_for_country(*, country: str, channel: str, chargeable_kg: Decimal) -> Optional[str]:
     needed = _needed_threshold(chargeable_kg)
-    existing = list(
-        ShippingRate.objects.filter(
-            courier_service__code__iexact=COURIER_CODE_DPD,
-            country=country.upper(),
-            channel__in=["PUDO", "HD"],
-            weight_limit__in=list(TAG_THRESH.keys()),
-        ).values_list("weight_limit", flat=True)
-    )
+    existing = get_rate_card().weight_limits(COURIER_CODE_DPD, country, ["PUDO", "HD"]) & TAG_THRESH.keys()
     existing_sorted = sorted(existing, key=lambda t: TAG_THRESH[t])
     for t in existing_sorted:
         if TAG_THRESH[t] >= needed:
@@ -68,54 +66,31 @@ def _resolve_weight_tag_for_country(*, country: str, channel: str, chargeable_kg
 
 
 def _calc_parcel_chargeable(items: List[Dict[str, Any]], variant_map: Dict[str, ProductVariant]):
-    total_weight_kg = Decimal("0")
-    total_volume_cm3 = Decimal("0")
+    total_weight_g = 0
+    total_volume_mm3 = 0
     for it in items:
-        v = variant_map[it["sku"]]
+        p = shipping_profile(variant_map[it["sku"]])
         qty = int(it["quantity"])
-        w_kg = Decimal(v.weight_grams or 0) / Decimal("1000")
-        vol_cm3 = (
-            (Decimal(v.length_mm or 0) / 10)
-            * (Decimal(v.width_mm or 0) / 10)
-            * (Decimal(v.height_mm or 0) / 10)
-        )
-        total_weight_kg += w_kg * qty
-        total_volume_cm3 += vol_cm3 * qty
-    volumetric = (total_volume_cm3 / VOLUME_FACTOR).quantize(Decimal("0.01"))
+        total_weight_g += p.weight_g * qty
+        total_volume_mm3 += p.volume_mm3 * qty
+    total_weight_kg = to_kg(total_weight_g)
+    volumetric = (Decimal(total_volume_mm3) / 1000 / VOLUME_FACTOR).quantize(Decimal("0.01"))
     chargeable = max(total_weight_kg, volumetric).quantize(Decimal("0.01"))
     return total_weight_kg.quantize(Decimal("0.01")), volumetric, chargeable
 
 
 def _pick_rate_dpd(*, country: str, channel: str, weight_tag: str, category: Optional[str] = None) -> ShippingRate:
     channel_db = "PUDO" if channel == "S2S" else "HD"
+    card = get_rate_card()
 
-    qs = ShippingRate.objects.select_related("courier_service").filter(
-        courier_service__code__iexact=COURIER_CODE_DPD,
-        country=country.upper(),
-        channel=channel_db,
-        weight_limit=weight_tag,
-    )
-    if category:
-        qs = qs.filter(category=category)
-
-    rate = qs.order_by("price").first()
-    if rate:
-        return rate
-
-    rate = (
-        ShippingRate.objects.select_related("courier_service")
-        .filter(
-            courier_service__code__iexact=COURIER_CODE_DPD,
-            country=country.upper(),
-            channel=channel_db,
-            weight_limit="over_limit",
-        )
-        .order_by("price")
-        .first()
-    )
-    if not rate:
+    rates = card.find(COURIER_CODE_DPD, country, channel_db, category=category or None, weight_limit=weight_tag)
+    if rates:
+        return rates[0]
+
+    rates = card.find(COURIER_CODE_DPD, country, channel_db, weight_limit="over_limit")
+    if not rates:
         raise ValueError(f"No DPD rate for {channel_db} {country.upper()} tag={weight_tag}")
-    return rate
+    return rates[0]
 
 
 def _format_option_totals(*, rate: ShippingRate, net_total_eur: Decimal, parcels_count: int, label: str) -> Dict[str, Any]:
@@ -169,79 +144,91 @@ def calculate_dpd_shipping_options(
 
     results: List[Dict[str, Any]] = []
     errors: List[str] = []
-    produced_channels: set[str] = set()
+    c = country.upper()
 
-    def process_channel(delivery_type: str):
-        c = country.upper()
+    # Каналы определяем заранее: PUDO и HD могут свестись к одному каналу (classic HD)
+    channels: Dict[str, str] = {}
+    for delivery_type in ("PUDO", "HD"):
         if delivery_type == "PUDO" and c in PICKUP_BLOCKED:
             logger.info("DPD PUDO not available for %s", c)
-            return
-
-        try:
-            channel = _resolve_channel_for(c, delivery_type)
-            logger.info("DPD channel resolved: req=%s -> channel=%s", delivery_type, channel)
-
-            if channel in produced_channels:
-                logger.info("DPD skip %s: resolved channel %s already produced", delivery_type, channel)
-                return
-            produced_channels.add(channel)
-
-            parcels = split_items_into_parcels_dpd(items, variant_map, service=delivery_type)
-            logger.info("DPD parcels count for %s/%s: %d", c, channel, len(parcels))
-
-            net_total_eur = Decimal("0.00")
-            last_rate: Optional[ShippingRate] = None
-            label = ""
-
-            for idx, parcel in enumerate(parcels, start=1):
-                gross_kg, vol_kg, chargeable = _calc_parcel_chargeable(parcel, variant_map)
-
-                if channel in ("S2S", "S2H") and chargeable > MAX_HANDIN_WEIGHT:
-                    logger.warning("DPD parcel #%d chargeable %.2f kg exceeds 20 kg -> capped", idx, chargeable)
-                    chargeable = MAX_HANDIN_WEIGHT
-
-                tag = _resolve_weight_tag_for_country(country=c, channel=channel, chargeable_kg=chargeable)
-                if not tag:
-                    raise ValueError(f"No tier for {c}/{channel} at {chargeable} kg")
-
-                rate = _pick_rate_dpd(country=c, channel=channel, weight_tag=tag, category=category)
-                cod_fee = rate.cod_fee if cod else Decimal("0.00")
-                base_czk = rate.price + cod_fee
-
-                label = {"S2S": "Shop2Shop (Pickup point)",
-                         "S2H": "Shop2Home (Home delivery)",
-                         "HD":  "Home Delivery (Classic export)"}[channel]
-
-                # Конвертируем И СУММИРУЕМ только net (EUR) по всем посылкам
-                net_eur = convert_czk_to_eur(base_czk).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
-                net_total_eur += net_eur
-                last_rate = rate
-
-                logger.info(
-                    "DPD parcel #%d: gross=%.2f kg, volumetric=%.2f kg, chargeable=%.2f kg, tag=%s, czk=%s -> net_eur=%s",
-                    idx, gross_kg, vol_kg, chargeable, tag, base_czk, net_eur
-                )
-
-            if last_rate:
-                # Итог по опции: VAT считаем ОДИН раз от общей net суммы
-                results.append(
-                    _format_option_totals(
-                        rate=last_rate,
-                        net_total_eur=net_total_eur,
-                        parcels_count=len(parcels),
-                        label=label,
-                    )
-                )
-
-        except Exception as e:
-            errors.append(f"{delivery_type}: {e}")
-            logger.exception("DPD %s failed for %s: %s", delivery_type, country, e)
-
-    process_channel("PUDO")
-    process_channel("HD")
+            continue
+        channel = _resolve_channel_for(c, delivery_type)
+        logger.info("DPD channel resolved: req=%s -> channel=%s", delivery_type, channel)
+        if channel in channels.values():
+            logger.info("DPD skip %s: resolved channel %s already produced", delivery_type, channel)
+            continue
+        channels[delivery_type] = channel
+
+    def process_channel(delivery_type: str, channel: str) -> Optional[Dict[str, Any]]:
+        parcels = split_items_into_parcels_dpd(items, variant_map, service=delivery_type)
+        logger.info("DPD parcels count for %s/%s: %d", c, channel, len(parcels))
+
+        net_total_eur = Decimal("0.00")
+        last_rate: Optional[ShippingRate] = None
+        label = ""
+
+        for idx, parcel in enumerate(parcels, start=1):
+            gross_kg, vol_kg, chargeable = _calc_parcel_chargeable(parcel, variant_map)
+
+            if channel in ("S2S", "S2H") and chargeable > MAX_HANDIN_WEIGHT:
+                logger.warning("DPD parcel #%d chargeable %.2f kg exceeds 20 kg -> capped", idx, chargeable)
+                chargeable = MAX_HANDIN_WEIGHT
+
+            tag = _resolve_weight_tag_for_country(country=c, channel=channel, chargeable_kg=chargeable)
+            if not tag:
+                raise ValueError(f"No tier for {c}/{channel} at {chargeable} kg")
+
+            rate = _pick_rate_dpd(country=c, channel=channel, weight_tag=tag, category=category)
+            cod_fee = rate.cod_fee if cod else Decimal("0.00")
+            base_czk = rate.price + cod_fee
+
+            label = {"S2S": "Shop2Shop (Pickup point)",
+                     "S2H": "Shop2Home (Home delivery)",
+                     "HD":  "Home Delivery (Classic export)"}[channel]
+
+            # Конвертируем И СУММИРУЕМ только net (EUR) по всем посылкам
+            net_eur = convert_czk_to_eur(base_czk).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+            net_total_eur += net_eur
+            last_rate = rate
+
+            logger.info(
+                "DPD parcel #%d: gross=%.2f kg, volumetric=%.2f kg, chargeable=%.2f kg, tag=%s, czk=%s -> net_eur=%s",
+                idx, gross_kg, vol_kg, chargeable, tag, base_czk, net_eur
+            )
+
+        if not last_rate:
+            return None
+        # Итог по опции: VAT считаем ОДИН раз от общей net суммы
+        return _format_option_totals(
+            rate=last_rate,
+            net_total_eur=net_total_eur,
+            parcels_count=len(parcels),
+            label=label,
+        )
+
+    # Каналы независимы — считаем параллельно (services/quote_orchestrator.py), порядок PUDO, HD сохраняется
+    outcomes = run_quotes({
+        delivery_type: partial(process_channel, delivery_type, channel)
+        for delivery_type, channel in channels.items()
+    })
+    incomplete = False
+    for delivery_type, outcome in outcomes.items():
+        # Таймаут или сбой (не ValueError «канал недоступен») — отдаём остальные каналы,
+        # но такой итог неполный и не кэшируется (services/quote_cache.py)
+        if outcome.timed_out or (outcome.error is not None and not isinstance(outcome.error, ValueError)):
+            incomplete = True
+            errors.append(f"{delivery_type}: {outcome.error}")
+            logger.warning("DPD %s quote incomplete for %s: %s", delivery_type, country, outcome.error)
+        elif outcome.error is not None:
+            errors.append(f"{delivery_type}: {outcome.error}")
+            logger.error("DPD %s failed for %s: %s", delivery_type, country, outcome.error, exc_info=outcome.error)
+        elif outcome.value:
+            results.append(outcome.value)
 
     if not results:
         raise ValueError(f"DPD: no available options for {country.upper()} ({'; '.join(errors)})")
+    if incomplete:
+        mark_quote_partial()
 
     logger.info("DPD rates done: %s", results)
     return results
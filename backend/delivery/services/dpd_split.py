@@ -4,7 +4,9 @@ import logging
 from dataclasses import dataclass
 from decimal import Decimal
 from typing import Dict, List, Tuple, Optional
-from py3dbp import Packer, Bin, Item
+
+from delivery.services.packing import Carton, PackingError, PackItem, pack
+from delivery.services.shipping_profile import g_limit
 
 
 logger = logging.getLogger(__name__)
@@ -47,8 +49,8 @@ def _girth(l_cm: Decimal, w_cm: Decimal, h_cm: Decimal) -> Decimal:
 
 def _variant_dims_weight(variant) -> Tuple[Decimal, Decimal, Decimal, Decimal]:
     """
-    Возвращает (L, W, H, kg) в сантиметрах/килограммах.
-    Минимальная грань 0.1 см чтобы py3dbp не «съедал» нулевые размеры.
+    Возвращает (L, W, H, kg) в сантиметрах/килограммах — для сообщений об ошибках.
+    Минимальная грань 0.1 см (как PackItem.from_variant: 1 мм / 1 г).
     """
     def _cm(x): return max(Decimal(x or 0) / 10, Decimal("0.1"))
     l = _cm(variant.length_mm)
@@ -84,19 +86,13 @@ def _cartons_for_service(service: str) -> List[Tuple[Decimal, Decimal, Decimal]]
     return cartons_sorted
 
 
-def _fits_any_carton(l: Decimal, w: Decimal, h: Decimal, cartons: List[Tuple[Decimal, Decimal, Decimal]]) -> bool:
-    dims = sorted([l, w, h], reverse=True)  # L >= W >= H
-    for Lc, Wc, Hc in cartons:
-        box = sorted([Lc, Wc, Hc], reverse=True)
-        if dims[0] <= box[0] and dims[1] <= box[1] and dims[2] <= box[2]:
-            return True
-    return False
-
-
-def _mk_bin(name: str, L: Decimal, W: Decimal, H: Decimal, limits: DpdLimits) -> Bin:
-    eff_cap = float(min(limits.max_weight_kg, GLOBAL_PARCEL_WEIGHT_CAP_KG))
-    logger.debug("DPD split: add bin %s size=%sx%sx%s cm, cap=%.3f kg", name, L, W, H, eff_cap)
-    return Bin(name, float(L), float(W), float(H), eff_cap)
+def _cartons_to_pack(svc: str, cartons: List[Tuple[Decimal, Decimal, Decimal]], limits: DpdLimits) -> List[Carton]:
+    """Коробки для packing.pack (мм / граммы); вес — min(лимит сервиса, глобальный cap)."""
+    max_weight_g = int(min(limits.max_weight_kg, GLOBAL_PARCEL_WEIGHT_CAP_KG) * 1000)
+    return [
+        Carton(f"{svc}-bin-{idx}", int(Lc * 10), int(Wc * 10), int(Hc * 10), max_weight_g)
+        for idx, (Lc, Wc, Hc) in enumerate(cartons)
+    ]
 
 
 def split_items_into_parcels_dpd(
@@ -113,119 +109,57 @@ def split_items_into_parcels_dpd(
     logger.info("DPD split start: service=%s, country=%s, items=%s", svc, country, items)
 
     cartons = _cartons_for_service(svc)
+    pack_cartons = _cartons_to_pack(svc, cartons, limits)
+    unit_cap_g = g_limit(GLOBAL_PARCEL_WEIGHT_CAP_KG)
 
-    # Подготовим атомарные единицы
-    atomics: List[Tuple[str, Decimal, Decimal, Decimal, Decimal]] = []
+    # Группы одинаковых SKU (packing.pack укладывает их блоками, а не поштучно).
+    # Проверки — в целых мм/граммах; Decimal (см/кг) — только для текста ошибки.
+    quantities: Dict[str, int] = {}
     for it in items:
         sku = it["sku"]
         qty = int(it.get("quantity", 0))
         if qty <= 0:
             continue
         v = variant_map[sku]
-        l, w, h, kg = _variant_dims_weight(v)
-        logger.debug("DPD split item: sku=%s qty=%s dims=%sx%sx%s cm weight=%s kg", sku, qty, l, w, h, kg)
-
-        if kg > GLOBAL_PARCEL_WEIGHT_CAP_KG:
+        unit = PackItem.from_variant(sku, v, qty)
+        logger.debug(
+            "DPD split item: sku=%s qty=%s dims=%sx%sx%s mm weight=%s g",
+            sku, qty, unit.length_mm, unit.width_mm, unit.height_mm, unit.weight_g,
+        )
+
+        if unit.weight_g > unit_cap_g:
+            kg = _variant_dims_weight(v)[3]
             raise ValueError(f"DPD: SKU {sku} weighs {kg} kg > {GLOBAL_PARCEL_WEIGHT_CAP_KG} kg (per-unit)")
 
-        if not _fits_any_carton(l, w, h, cartons):
+        if not any(carton.holds(unit) for carton in pack_cartons):
+            l, w, h, _kg = _variant_dims_weight(v)
             raise ValueError(
                 f"DPD: SKU {sku} size {l}×{w}×{h} cm doesn't fit any {svc} carton "
                 f"(max length={limits.max_length_cm} cm, max girth={limits.max_girth_cm} cm)"
             )
 
-        for _ in range(qty):
-            atomics.append((sku, l, w, h, kg))
+        quantities[sku] = quantities.get(sku, 0) + qty
 
-    if not atomics:
+    if not quantities:
         logger.info("DPD split: no atomics (empty items)")
         return []
 
-    parcels: List[List[Tuple[str, Decimal, Decimal, Decimal, Decimal]]] = []
-    remaining = list(atomics)
-    safety_counter = 0
-
-    while remaining:
-        safety_counter += 1
-        if safety_counter > 1000:
-            raise RuntimeError("DPD packing: safety guard triggered")
-        logger.debug("DPD split loop #%d: remaining items=%d", safety_counter, len(remaining))
-
-        packer = Packer()
-
-        # Партия коробок (по одной каждого типоразмера)
-        for idx, (Lc, Wc, Hc) in enumerate(cartons):
-            packer.add_bin(_mk_bin(f"{svc}-bin-{idx}", Lc, Wc, Hc, limits))
-
-        # Все оставшиеся предметы
-        for i, (sku, l, w, h, kg) in enumerate(remaining):
-            packer.add_item(Item(
-                name=f"{sku}#{i}",
-                width=float(l),
-                height=float(w),
-                depth=float(h),
-                weight=float(kg),
-            ))
-
-        packer.pack(bigger_first=True, distribute_items=True, number_of_decimals=2)
-
-        packed_names = set()
-        used_bins = 0
-
-        for b in packer.bins:
-            if not b.items:
-                continue
-            used_bins += 1
-            bin_weight = sum(Decimal(str(it.weight)) for it in b.items)
-            L = Decimal(str(b.width))
-            W = Decimal(str(b.height))
-            H = Decimal(str(b.depth))
-            g = _girth(L, W, H)
-            logger.info(
-                "DPD split bin: %s items=%d weight=%.3f kg size=%sx%sx%s cm girth=%.1f (limits: L<=%s, girth<=%s, weight<=%s)",
-                b.name, len(b.items), bin_weight, L, W, H, g,
-                limits.max_length_cm, limits.max_girth_cm, min(limits.max_weight_kg, GLOBAL_PARCEL_WEIGHT_CAP_KG)
-            )
-
-            # страховка от перенабора по весу
-            while bin_weight > min(limits.max_weight_kg, GLOBAL_PARCEL_WEIGHT_CAP_KG) + Decimal("0.001") and b.items:
-                b.items.sort(key=lambda it: Decimal(str(it.weight)), reverse=True)
-                itm = b.items.pop(0)
-                packer.unfit_items.append(itm)
-                bin_weight = sum(Decimal(str(x.weight)) for x in b.items)
-                logger.debug("DPD split: pop overweight item %s, new bin_weight=%.3f", itm.name, bin_weight)
-
-            packed_names.update(x.name for x in b.items)
-            parcels.append([(x.name.split("#")[0], Decimal(str(x.width)),
-                             Decimal(str(x.height)), Decimal(str(x.depth)),
-                             Decimal(str(x.weight))) for x in b.items])
-
-        logger.debug("DPD split: used_bins=%d, packed_names=%d", used_bins, len(packed_names))
-
-        name_to_atom = {f"{sku}#{i}": (sku, l, w, h, kg)
-                        for i, (sku, l, w, h, kg) in enumerate(remaining)}
-        new_remaining: List[Tuple[str, Decimal, Decimal, Decimal, Decimal]] = [
-            atom for nm, atom in name_to_atom.items() if nm not in packed_names
-        ]
-
-        if len(new_remaining) == len(remaining):
-            bad = new_remaining[0]
-            sku, l, w, h, kg = bad
-            logger.error("DPD packing error: can't place %s (dims %sx%sx%s cm, %s kg)", sku, l, w, h, kg)
-            raise ValueError(
-                f"DPD packing error: SKU {sku} (size {l}×{w}×{h} cm, {kg} kg) "
-                f"couldn't be placed into any {svc} carton."
-            )
-
-        remaining = new_remaining
+    pack_items = [PackItem.from_variant(sku, variant_map[sku], qty) for sku, qty in quantities.items()]
+    try:
+        packed = pack(pack_items, pack_cartons)
+    except PackingError as e:
+        logger.error("DPD packing error: can't place %s", e.sku)
+        raise ValueError(f"DPD packing error: SKU {e.sku} couldn't be placed into any {svc} carton.") from e
 
     # Агрегация {sku, quantity}
     result: List[List[Dict[str, int]]] = []
-    for idx, packed in enumerate(parcels, start=1):
-        counter: Dict[str, int] = {}
-        for sku, *_ in packed:
-            counter[sku] = counter.get(sku, 0) + 1
-        result.append([{"sku": s, "quantity": q} for s, q in counter.items()])
+    for idx, parcel in enumerate(packed, start=1):
+        logger.info(
+            "DPD split bin: %s items=%d weight=%.3f kg fill=%.1f%% (limits: L<=%s, girth<=%s, weight<=%s)",
+            parcel.carton.name, sum(parcel.contents.values()), Decimal(parcel.weight_g) / 1000, parcel.fill,
+            limits.max_length_cm, limits.max_girth_cm, min(limits.max_weight_kg, GLOBAL_PARCEL_WEIGHT_CAP_KG)
+        )
+        result.append([{"sku": s, "quantity": q} for s, q in parcel.contents.items()])
         logger.info("DPD split parcel #%d contents: %s", idx, result[-1])
 
     logger.info("DPD split done: parcels=%d", len(result))
@@ -11,6 +11,7 @@ from product.models import ProductVariant
 from delivery.models import ShippingRate
 from delivery.services.currency_converter import convert_czk_to_eur
 from delivery.services.gls_split import split_items_into_parcels_gls
+from delivery.services.rate_card import get_rate_card
 
 logger = logging.getLogger(__name__)
 
@@ -108,25 +109,15 @@ def _pick_rate_HD(
     address_bundle: str,
 ) -> ShippingRate:
     """
-    Берём тариф HD из БД (BusinessParcel / EuroBusinessParcel).
+    Берём тариф HD из rate card (BusinessParcel / EuroBusinessParcel).
     """
-    try:
-        return (
-            ShippingRate.objects.select_related("courier_service")
-            .get(
-                courier_service__code__iexact=COURIER_CODE_GLS,
-                country=country.upper(),
-                channel="HD",
-                category=category,
-                weight_limit=weight_tag,
-                address_bundle=address_bundle,
-            )
-        )
-    except ShippingRate.DoesNotExist as e:
+    rate = get_rate_card().get(COURIER_CODE_GLS, country, "HD", category, weight_tag, address_bundle)
+    if rate is None:
         raise ValueError(
             f"No GLS HD rate for {country.upper()} cat={category} "
             f"tag={weight_tag} bundle={address_bundle}"
-        ) from e
+        )
+    return rate
 
 
 # --------------------------------------------------------------------------
@@ -490,3 +481,34 @@ def calculate_gls_shipping_options(
 
     logger.info("GLS aggregate done: options=%s, totals=%s", options, total_parcels)
     return {"options": options, "total_parcels": total_parcels}
+
+
+def calculate_order_shipping_gls(
+    *,
+    country: str,
+    items: List[Dict[str, Any]],
+    currency: str,
+    cod: bool = False,
+    variant_map: Optional[Dict[str, ProductVariant]] = None,
+) -> Dict[str, Any]:
+    """
+    Опции GLS для заказа: address_bundle по HD-сплиту ("one" для одной посылки,
+    иначе "multi"), затем calculate_gls_shipping_options.
+
+    Одна и та же функция для оценки продавца и для checkout (ключ "gls"
+    в services/quote_cache.py).
+    """
+    if variant_map is None:
+        skus = [str(it["sku"]) for it in items]
+        variant_map = {v.sku: v for v in ProductVariant.objects.filter(sku__in=skus)}
+
+    parcels = split_items_into_parcels_gls(items, variant_map=variant_map, service="HD", country=country)
+    address_bundle = "one" if len(parcels) == 1 else "multi"
+    return calculate_gls_shipping_options(
+        country=country,
+        items=items,
+        currency=currency,
+        cod=cod,
+        variant_map=variant_map,
+        address_bundle=address_bundle,
+    )
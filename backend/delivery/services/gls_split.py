@@ -6,7 +6,8 @@ from dataclasses import dataclass
 from decimal import Decimal
 from typing import Any, Dict, List, Tuple, Optional
 
-from py3dbp import Packer, Bin, Item
+from delivery.services.packing import Carton, PackingError, PackItem, pack
+from delivery.services.shipping_profile import g_limit
 
 logger = logging.getLogger(__name__)
 
@@ -63,10 +64,10 @@ def _girth(l_cm: Decimal, w_cm: Decimal, h_cm: Decimal) -> Decimal:
 
 def _variant_dims_weight(variant) -> Tuple[Decimal, Decimal, Decimal, Decimal]:
     """
-    Преобразует размеры варианта:
+    Преобразует размеры варианта (для сообщений об ошибках):
       • мм → см
       • граммы → килограммы
-    Минимум 0.1 см по каждой стороне, чтобы py3dbp не падал.
+    Минимум 0.1 см по каждой стороне (как PackItem.from_variant: 1 мм / 1 г).
     """
 
     def _cm(x) -> Decimal:
@@ -149,58 +150,21 @@ def _cartons_for_service_gls(service: str, limits: GlsLimits) -> List[Tuple[Deci
     return filtered
 
 
-def _fits_any_carton(
-    l: Decimal,
-    w: Decimal,
-    h: Decimal,
-    cartons: List[Tuple[Decimal, Decimal, Decimal]],
-) -> bool:
-    """Проверка, что единица товара влезает хотя бы в одну коробку."""
-    dims = sorted([l, w, h], reverse=True)
-    for Lc, Wc, Hc in cartons:
-        box = sorted([Lc, Wc, Hc], reverse=True)
-        if dims[0] <= box[0] and dims[1] <= box[1] and dims[2] <= box[2]:
-            return True
-    return False
-
-
-def _mk_bin_gls(name: str, L: Decimal, W: Decimal, H: Decimal, limits: GlsLimits) -> Bin:
-    """Создаёт Bin для py3dbp с ограничением по весу из лимитов сервиса."""
-    eff_cap = float(limits.max_weight_kg)
-    logger.debug(
-        "GLS split: add bin %s size=%sx%sx%s cm, cap=%.3f kg",
-        name,
-        L,
-        W,
-        H,
-        eff_cap,
-    )
-    return Bin(name, float(L), float(W), float(H), eff_cap)
-
-
-def _calc_fill_efficiency(bin_obj: Bin) -> Decimal:
-    """
-    Рассчитывает процент заполнения коробки (fill efficiency).
-    = (сумма объёмов предметов / объём коробки) * 100
-    """
-    if not bin_obj.items:
-        return Decimal("0.0")
-
-    total_item_volume = sum(
-        Decimal(str(it.width)) * Decimal(str(it.height)) * Decimal(str(it.depth))
-        for it in bin_obj.items
-    )
-    bin_volume = (
-        Decimal(str(bin_obj.width))
-        * Decimal(str(bin_obj.height))
-        * Decimal(str(bin_obj.depth))
-    )
+def _mm(cm: Decimal) -> int:
+    return int(cm * 10)
 
-    if bin_volume == 0:
-        return Decimal("0.0")
 
-    efficiency = (total_item_volume / bin_volume) * Decimal("100")
-    return efficiency.quantize(Decimal("0.1"))
+def _cartons_to_pack_gls(
+    svc: str,
+    cartons: List[Tuple[Decimal, Decimal, Decimal]],
+    limits: GlsLimits,
+) -> List[Carton]:
+    """Коробки сервиса для packing.pack (мм / граммы) с весовым лимитом сервиса."""
+    max_weight_g = int(limits.max_weight_kg * 1000)
+    return [
+        Carton(f"{svc}-bin-{idx}", _mm(Lc), _mm(Wc), _mm(Hc), max_weight_g)
+        for idx, (Lc, Wc, Hc) in enumerate(cartons)
+    ]
 
 
 def split_items_into_parcels_gls(
@@ -244,9 +208,12 @@ def split_items_into_parcels_gls(
     logger.info("GLS split start: service=%s, country=%s, items=%s", svc, country, items)
 
     cartons = _cartons_for_service_gls(svc, limits)
+    pack_cartons = _cartons_to_pack_gls(svc, cartons, limits)
+    unit_cap_g = g_limit(limits.max_weight_kg)
 
-    # Подготовим атомарные юниты: поштучно каждая единица товара
-    atomics: List[Tuple[str, Decimal, Decimal, Decimal, Decimal]] = []
+    # Группы одинаковых SKU (packing.pack укладывает их блоками, а не поштучно).
+    # Проверки — в целых мм/граммах; Decimal (см/кг) — только для текста ошибки.
+    quantities: Dict[str, int] = {}
     for it in items:
         sku = str(it["sku"])
         qty = int(it.get("quantity", 0))
@@ -254,190 +221,85 @@ def split_items_into_parcels_gls(
             continue
 
         v = variant_map[sku]
-        l, w, h, kg = _variant_dims_weight(v)
+        unit = PackItem.from_variant(sku, v, qty)
         logger.debug(
-            "GLS split item: sku=%s qty=%s dims=%sx%sx%s cm weight=%s kg",
+            "GLS split item: sku=%s qty=%s dims=%sx%sx%s mm weight=%s g",
             sku,
             qty,
-            l,
-            w,
-            h,
-            kg,
+            unit.length_mm,
+            unit.width_mm,
+            unit.height_mm,
+            unit.weight_g,
         )
 
         # Жёстная проверка веса на уровне юнита
-        if kg > limits.max_weight_kg:
+        if unit.weight_g > unit_cap_g:
+            kg = _variant_dims_weight(v)[3]
             raise ValueError(
                 f"GLS {svc}: SKU {sku} weighs {kg} kg > {limits.max_weight_kg} kg (per-unit)"
             )
 
         # Проверка влезания в любую коробку данного сервиса
-        if not _fits_any_carton(l, w, h, cartons):
+        if not any(carton.holds(unit) for carton in pack_cartons):
+            l, w, h, _kg = _variant_dims_weight(v)
             raise ValueError(
                 f"GLS {svc}: SKU {sku} size {l}×{w}×{h} cm doesn't fit any carton "
                 f"(max length={limits.max_length_cm} cm, max girth={limits.max_girth_cm} cm)"
             )
 
-        for _ in range(qty):
-            atomics.append((sku, l, w, h, kg))
+        quantities[sku] = quantities.get(sku, 0) + qty
 
-    if not atomics:
+    if not quantities:
         logger.info("GLS split: no atomics (empty items)")
         return []
 
-    parcels: List[Dict[str, Any]] = []
-    remaining = list(atomics)
-    safety_counter = 0
-
-    while remaining:
-        safety_counter += 1
-        if safety_counter > 1000:
-            raise RuntimeError(f"GLS {svc} packing: safety guard triggered")
+    pack_items = [PackItem.from_variant(sku, variant_map[sku], qty) for sku, qty in quantities.items()]
+    try:
+        packed = pack(pack_items, pack_cartons)
+    except PackingError as e:
+        logger.error("GLS packing error (%s): can't place %s", svc, e.sku)
+        raise ValueError(
+            f"GLS packing error ({svc}): SKU {e.sku} couldn't be placed into any carton."
+        ) from e
 
-        logger.debug(
-            "GLS split loop #%d (service=%s): remaining items=%d",
-            safety_counter,
+    parcels: List[Dict[str, Any]] = []
+    for parcel in packed:
+        carton = parcel.carton
+        L = Decimal(carton.length_mm) / 10
+        W = Decimal(carton.width_mm) / 10
+        H = Decimal(carton.height_mm) / 10
+        g = _girth(L, W, H)
+        weight_kg = (Decimal(parcel.weight_g) / 1000).quantize(Decimal("0.001"))
+
+        logger.info(
+            "GLS split bin (%s): %s items=%d weight=%.3f kg "
+            "size=%sx%sx%s cm girth=%.1f (fill=%.1f%%, limits: L<=%s, girth<=%s, weight<=%s)",
             svc,
-            len(remaining),
+            carton.name,
+            sum(parcel.contents.values()),
+            weight_kg,
+            L,
+            W,
+            H,
+            g,
+            parcel.fill,
+            limits.max_length_cm,
+            limits.max_girth_cm,
+            limits.max_weight_kg,
         )
 
-        packer = Packer()
-
-        # Добавляем все коробки для сервиса
-        for idx, (Lc, Wc, Hc) in enumerate(cartons):
-            packer.add_bin(_mk_bin_gls(f"{svc}-bin-{idx}", Lc, Wc, Hc, limits))
-
-        # Добавляем все оставшиеся предметы
-        for i, (sku, l, w, h, kg) in enumerate(remaining):
-            packer.add_item(
-                Item(
-                    name=f"{sku}#{i}",
-                    width=float(l),
-                    height=float(w),
-                    depth=float(h),
-                    weight=float(kg),
-                )
-            )
-
-        packer.pack(bigger_first=True, distribute_items=True, number_of_decimals=2)
-
-        packed_names = set()
-
-        for b in packer.bins:
-            if not b.items:
-                continue
-
-            bin_weight = sum(Decimal(str(it.weight)) for it in b.items)
-            L = Decimal(str(b.width))
-            W = Decimal(str(b.height))
-            H = Decimal(str(b.depth))
-            g = _girth(L, W, H)
-            fill_eff = _calc_fill_efficiency(b)
-
-            logger.info(
-                "GLS split bin (%s): %s items=%d weight=%.3f kg "
-                "size=%sx%sx%s cm girth=%.1f (fill=%.1f%%, limits: L<=%s, girth<=%s, weight<=%s)",
-                svc,
-                b.name,
-                len(b.items),
-                bin_weight,
-                L,
-                W,
-                H,
-                g,
-                fill_eff,
-                limits.max_length_cm,
-                limits.max_girth_cm,
-                limits.max_weight_kg,
-            )
-
-            # Проверка/коррекция веса: если перевес — выкидываем самые тяжёлые элементы обратно
-            while bin_weight > limits.max_weight_kg + Decimal("0.001") and b.items:
-                b.items.sort(key=lambda it: Decimal(str(it.weight)), reverse=True)
-                itm = b.items.pop(0)
-                packer.unfit_items.append(itm)
-                bin_weight = sum(Decimal(str(x.weight)) for x in b.items)
-                logger.debug(
-                    "GLS split (%s): pop overweight item %s, new bin_weight=%.3f",
-                    svc,
-                    itm.name,
-                    bin_weight,
-                )
-
-            if not b.items:
-                # Если всё выкинули из-за веса — этот bin пропускаем
-                continue
-
-            # Базовая проверка лимитов коробки (на случай патологий)
-            if g > limits.max_girth_cm or max(L, W, H) > limits.max_length_cm:
-                logger.error(
-                    "GLS packing error (%s): bin %s exceeds limits "
-                    "(size=%sx%sx%s cm, girth=%.1f, limits: L<=%s, girth<=%s)",
-                    svc,
-                    b.name,
-                    L,
-                    W,
-                    H,
-                    g,
-                    limits.max_length_cm,
-                    limits.max_girth_cm,
-                )
-                raise ValueError(
-                    f"GLS packing error ({svc}): bin {b.name} exceeds GLS limits "
-                    f"(size {L}×{W}×{H} cm, girth {g})"
-                )
-
-            # Собираем имена упакованных юнитов
-            packed_names.update(x.name for x in b.items)
-
-            # Агрегируем по SKU внутри посылки
-            sku_counter: Dict[str, int] = {}
-            for x in b.items:
-                sku_name = x.name.split("#")[0]
-                sku_counter[sku_name] = sku_counter.get(sku_name, 0) + 1
-
-            items_list = [{"sku": s, "quantity": q} for s, q in sku_counter.items()]
-
-            parcel_info: Dict[str, Any] = {
-                "items": items_list,
-                "weight_kg": bin_weight.quantize(Decimal("0.001")),
+        parcels.append(
+            {
+                "items": [{"sku": s, "quantity": q} for s, q in parcel.contents.items()],
+                "weight_kg": weight_kg,
                 "length_cm": L,
                 "width_cm": W,
                 "height_cm": H,
                 "sum_sides": L + W + H,
                 "girth_cm": g,
-                "fill": fill_eff,
+                "fill": parcel.fill,
             }
-            parcels.append(parcel_info)
-
-        # Пересобираем remaining, выбрасывая уже упакованные
-        name_to_atom = {
-            f"{sku}#{i}": (sku, l, w, h, kg)
-            for i, (sku, l, w, h, kg) in enumerate(remaining)
-        }
-        new_remaining: List[Tuple[str, Decimal, Decimal, Decimal, Decimal]] = [
-            atom for nm, atom in name_to_atom.items() if nm not in packed_names
-        ]
-
-        if len(new_remaining) == len(remaining):
-            # Ничего не упаковали — тупик, вываливаем ошибку
-            bad = new_remaining[0]
-            sku, l, w, h, kg = bad
-            logger.error(
-                "GLS packing error (%s): can't place %s (dims %sx%sx%s cm, %s kg)",
-                svc,
-                sku,
-                l,
-                w,
-                h,
-                kg,
-            )
-            raise ValueError(
-                f"GLS packing error ({svc}): SKU {sku} (size {l}×{w}×{h} cm, {kg} kg) "
-                f"couldn't be placed into any carton."
-            )
-
-        remaining = new_remaining
+        )
 
     # Финальный лог по посылкам
     for idx, parcel in enumerate(parcels, start=1):
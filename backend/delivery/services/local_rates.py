@@ -7,6 +7,8 @@ from django.conf import settings
 from product.models import ProductVariant
 from delivery.models import ShippingRate
 from delivery.services.currency_converter import convert_czk_to_eur
+from delivery.services.rate_card import get_rate_card
+from delivery.services.shipping_profile import shipping_profile, to_cm, to_kg
 
 logger = logging.getLogger(__name__)
 
@@ -19,16 +21,17 @@ VAT_RATE = Decimal(str(getattr(settings, "VAT_RATE", Decimal("0.21"))))
 
 COURIER_CODE_ZASILKOVNA = "zasilkovna"
 
+# Категории по прайсу: (категория, max вес г, max сторона мм, max сумма сторон мм)
+PUDO_CATEGORIES: Tuple[Tuple[str, int, int, int], ...] = (
+    ("standard", 5_000, 700, 1_200),
+    ("oversized", 15_000, 1_200, 1_500),
+)
+HD_CATEGORIES: Tuple[Tuple[str, int, int, int], ...] = PUDO_CATEGORIES + (
+    ("extended", 30_000, 1_200, 9_990),
+)
 
-# === Вспомогательные функции ===
-
-def _to_cm(mm: Optional[int]) -> Decimal:
-    return (Decimal(mm or 0) / Decimal("10")).quantize(Decimal("0.01"))
-
-
-def _to_kg(grams: Optional[int]) -> Decimal:
-    return (Decimal(grams or 0) / Decimal("1000")).quantize(Decimal("0.001"))
 
+# === Вспомогательные функции ===
 
 def _round2(x: Decimal) -> Decimal:
     return x.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
@@ -80,30 +83,20 @@ def _weight_tag(channel: str, weight_kg: Decimal) -> str:
 
 def _pick_rate(country: str, channel: str, category: str, weight_kg: Decimal) -> ShippingRate:
     """
-    Достаём ставку из БД по (courier, country, channel, category, weight_tag).
+    Достаём ставку из rate card по (courier, country, channel, category, weight_tag).
     Если точного коридора нет — пробуем 'over_limit' в рамках того же channel/category.
     """
     tag = _weight_tag(channel, weight_kg)
-    base_qs = (
-        ShippingRate.objects
-        .select_related("courier_service")
-        .filter(
-            courier_service__code__iexact=COURIER_CODE_ZASILKOVNA,
-            country=country.upper(),
-            channel=channel,
-            category=category,
-        )
+    card = get_rate_card()
+    rate = (
+        card.get(COURIER_CODE_ZASILKOVNA, country, channel, category, tag)
+        or card.get(COURIER_CODE_ZASILKOVNA, country, channel, category, "over_limit")
     )
-
-    try:
-        return base_qs.get(weight_limit=tag)
-    except ShippingRate.DoesNotExist:
-        try:
-            return base_qs.get(weight_limit="over_limit")
-        except ShippingRate.DoesNotExist:
-            raise ValueError(
-                f"No Zásilkovna rate for {country}/{channel}/{category} with weight_tag={tag}"
-            )
+    if rate is None:
+        raise ValueError(
+            f"No Zásilkovna rate for {country}/{channel}/{category} with weight_tag={tag}"
+        )
+    return rate
 
 
 def _format_option(rate_obj: ShippingRate, total_czk: Decimal, is_oversize: bool = False) -> Dict:
@@ -131,37 +124,32 @@ def _format_option(rate_obj: ShippingRate, total_czk: Decimal, is_oversize: bool
 def _stack_dims_by_height(
     items: List[Dict],
     variant_map: Dict[str, ProductVariant],
-) -> Tuple[Decimal, Decimal, Decimal]:
+) -> Tuple[int, int, int]:
     """
-    Ровно та же эвристика, что использует сплит Packeta:
+    Ровно та же эвристика, что использует сплит Packeta (в мм):
       L = max(length_i)
       W = max(width_i)
       H = sum(height_i)  (укладка «по высоте»)
     """
-    max_L = Decimal("0")
-    max_W = Decimal("0")
-    sum_H = Decimal("0")
+    max_L = 0
+    max_W = 0
+    sum_H = 0
 
     for it in items:
-        v = variant_map[str(it["sku"])]
-        l = _to_cm(v.length_mm)
-        w = _to_cm(v.width_mm)
-        h = _to_cm(v.height_mm)
-        qty = int(it["quantity"])
-
-        if l > max_L:
-            max_L = l
-        if w > max_W:
-            max_W = w
+        p = shipping_profile(variant_map[str(it["sku"])])
+        max_L = max(max_L, p.length_mm)
+        max_W = max(max_W, p.width_mm)
         # высота суммируется по количеству
-        sum_H += (h * qty)
+        sum_H += p.height_mm * int(it["quantity"])
 
-    # Округлим до сотых, чтобы избежать «лежака» 120.0000001
-    return (
-        max_L.quantize(Decimal("0.01")),
-        max_W.quantize(Decimal("0.01")),
-        sum_H.quantize(Decimal("0.01")),
-    )
+    return max_L, max_W, sum_H
+
+
+def _category(categories, weight_g: int, max_side_mm: int, sum_sides_mm: int) -> Optional[str]:
+    for name, max_g, max_side, max_sum in categories:
+        if weight_g <= max_g and max_side_mm <= max_side and sum_sides_mm <= max_sum:
+            return name
+    return None
 
 
 # === Основная функция расчёта ДЛЯ ОДНОЙ «МАЛОЙ» ПОСЫЛКИ ===
@@ -199,9 +187,9 @@ def calculate_shipping_options(
         skus = [it["sku"] for it in items]
         variant_map = {v.sku: v for v in ProductVariant.objects.filter(sku__in=skus)}
 
-    # 2) Масса и объём
-    total_weight_kg = Decimal("0.000")
-    total_volume_cm3 = Decimal("0.00")
+    # 2) Масса и объём (целые граммы/мм³; в Decimal — только итог для тарифа)
+    total_weight_g = 0
+    total_volume_mm3 = 0
 
     for it in items:
         v = variant_map.get(str(it["sku"]))
@@ -209,16 +197,15 @@ def calculate_shipping_options(
             raise ValueError(f"ProductVariant with sku={it['sku']} not found")
 
         qty = int(it["quantity"])
-        lw = _to_cm(v.length_mm)
-        ww = _to_cm(v.width_mm)
-        hh = _to_cm(v.height_mm)
-        wg = _to_kg(v.weight_grams)
-
-        total_weight_kg += (wg * qty)
-        total_volume_cm3 += (lw * ww * hh) * qty
+        p = shipping_profile(v)
+        total_weight_g += p.weight_g * qty
+        total_volume_mm3 += p.volume_mm3 * qty
 
-    volumetric_weight = _round2(total_volume_cm3 / VOLUME_FACTOR)
+    total_weight_kg = to_kg(total_weight_g).quantize(Decimal("0.001"))
+    volumetric_weight = _round2(Decimal(total_volume_mm3) / 1000 / VOLUME_FACTOR)
     chargeable_weight = max(total_weight_kg, volumetric_weight)
+    # вес с точностью до грамма — для целочисленных категорий
+    chargeable_g = int(chargeable_weight * 1000)
 
     logger.info(
         "Zásilkovna weights %s: total=%s kg volumetric=%s kg chargeable=%s kg",
@@ -227,35 +214,23 @@ def calculate_shipping_options(
 
     # 3) Габариты посылки — ТА ЖЕ ЛОГИКА, ЧТО В СПЛИТЕ (без py3dbp)
     L, W, H = _stack_dims_by_height(items, variant_map)
-    sum_sides = L + W + H
-    max_side = max(L, W, H)
+    sum_sides_mm = L + W + H
+    max_side_mm = max(L, W, H)
+    sum_sides = to_cm(sum_sides_mm)
+    max_side = to_cm(max_side_mm)
 
     logger.info(
         "Zásilkovna dims %s: L=%s W=%s H=%s sum=%s max=%s",
-        country, L, W, H, sum_sides, max_side
+        country, to_cm(L), to_cm(W), to_cm(H), sum_sides, max_side
     )
 
-    # 4) Категории (по прайсу)
-    def cat_pudo(w: Decimal, mx: Decimal, sm: Decimal) -> Optional[str]:
-        if w <= Decimal("5") and mx <= Decimal("70") and sm <= Decimal("120"):
-            return "standard"
-        if w <= Decimal("15") and mx <= Decimal("120") and sm <= Decimal("150"):
-            return "oversized"
-        return None
-
-    def cat_hd(w: Decimal, mx: Decimal, sm: Decimal) -> Optional[str]:
-        if w <= Decimal("5") and mx <= Decimal("70") and sm <= Decimal("120"):
-            return "standard"
-        if w <= Decimal("15") and mx <= Decimal("120") and sm <= Decimal("150"):
-            return "oversized"
-        if w <= Decimal("30") and mx <= Decimal("120") and sm <= Decimal("999"):
-            return "extended"
-        return None
+    # 4) Категории (по прайсу: PUDO_CATEGORIES / HD_CATEGORIES)
+    is_oversize = chargeable_g > 5_000 or sum_sides_mm > 1_200
 
     options: List[Dict] = []
 
     # 5) PUDO
-    pudo_cat = cat_pudo(chargeable_weight, max_side, sum_sides)
+    pudo_cat = _category(PUDO_CATEGORIES, chargeable_g, max_side_mm, sum_sides_mm)
     if pudo_cat:
         try:
             rate = _pick_rate(country, "PUDO", pudo_cat, chargeable_weight)
@@ -267,7 +242,7 @@ def calculate_shipping_options(
 
             logger.debug("Zásilkovna PUDO: base=%s fuel=%s toll=%s cod=%s total=%s",
                          base, fuel, toll, cod_fee, total_czk)
-            options.append(_format_option(rate, total_czk, is_oversize=(chargeable_weight > 5 or sum_sides > 120)))
+            options.append(_format_option(rate, total_czk, is_oversize=is_oversize))
         except Exception as e:
             logger.info("Zásilkovna PUDO skipped: %s", e)
     else:
@@ -275,7 +250,7 @@ def calculate_shipping_options(
                     chargeable_weight, sum_sides, max_side)
 
     # 6) HD
-    hd_cat = cat_hd(chargeable_weight, max_side, sum_sides)
+    hd_cat = _category(HD_CATEGORIES, chargeable_g, max_side_mm, sum_sides_mm)
     if hd_cat:
         try:
             rate = _pick_rate(country, "HD", hd_cat, chargeable_weight)
@@ -287,7 +262,7 @@ def calculate_shipping_options(
 
             logger.debug("Zásilkovna HD: base=%s fuel=%s toll=%s cod=%s total=%s",
                          base, fuel, toll, cod_fee, total_czk)
-            options.append(_format_option(rate, total_czk, is_oversize=(chargeable_weight > 5 or sum_sides > 120)))
+            options.append(_format_option(rate, total_czk, is_oversize=is_oversize))
         except Exception as e:
             logger.info("Zásilkovna HD skipped: %s", e)
     else:
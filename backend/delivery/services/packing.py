@@ -0,0 +1,282 @@
+"""
+3D bin packing for courier parcel splits (GLS, DPD).
+
+Sizes are integer millimetres, weights integer grams. All units of one SKU
+form one ``PackItem`` and are placed as rectangular blocks of copies, so the
+cost grows with the number of placements, not with the number of units.
+
+Algorithm (extreme points, first fit decreasing):
+
+1. SKU groups are sorted by unit volume, largest first.
+2. Each group goes into the open parcels in turn. A placement is the
+   largest block of copies (nx × ny × nz, in any of the six orientations)
+   that fits at the lowest extreme point of the parcel that can take one.
+   The block must not overlap placed blocks, and the carton's weight limit
+   must hold. Each placement adds three extreme points at the block's far
+   faces.
+3. Units that fit nowhere open a new parcel in the largest carton that
+   can hold one unit.
+4. Each parcel then moves to the smallest carton that can hold all of its
+   content.
+
+``delivery/packing_benchmark.py`` compares the engine with the previous
+py3dbp-based split (``manage.py benchmark_parcel_packing``).
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from decimal import Decimal
+from itertools import permutations
+from typing import Iterable, Sequence
+
+from delivery.services.shipping_profile import shipping_profile
+
+# (x0, y0, z0, x1, y1, z1)
+Box = tuple[int, int, int, int, int, int]
+Point = tuple[int, int, int]
+
+
+class PackingError(ValueError):
+    """A unit does not fit any carton (size or weight)."""
+
+    def __init__(self, message: str, *, sku: str):
+        super().__init__(message)
+        self.sku = sku
+
+
+@dataclass(frozen=True)
+class PackItem:
+    sku: str
+    length_mm: int
+    width_mm: int
+    height_mm: int
+    weight_g: int
+    quantity: int
+
+    @classmethod
+    def from_variant(cls, sku: str, variant, quantity: int) -> "PackItem":
+        """Missing sizes count as 1 mm and missing weight as 1 g."""
+        profile = shipping_profile(variant)
+        return cls(
+            sku=sku,
+            length_mm=max(profile.length_mm, 1),
+            width_mm=max(profile.width_mm, 1),
+            height_mm=max(profile.height_mm, 1),
+            weight_g=max(profile.weight_g, 1),
+            quantity=quantity,
+        )
+
+    @property
+    def dims(self) -> tuple[int, int, int]:
+        return self.length_mm, self.width_mm, self.height_mm
+
+    @property
+    def volume(self) -> int:
+        return self.length_mm * self.width_mm * self.height_mm
+
+
+@dataclass(frozen=True)
+class Carton:
+    name: str
+    length_mm: int
+    width_mm: int
+    height_mm: int
+    max_weight_g: int
+
+    @property
+    def dims(self) -> tuple[int, int, int]:
+        return self.length_mm, self.width_mm, self.height_mm
+
+    @property
+    def volume(self) -> int:
+        return self.length_mm * self.width_mm * self.height_mm
+
+    def holds(self, item: PackItem) -> bool:
+        """One unit of ``item`` fits (any orientation, within the weight limit)."""
+        return item.weight_g <= self.max_weight_g and all(
+            a <= b for a, b in zip(sorted(item.dims), sorted(self.dims))
+        )
+
+
+@dataclass
+class PackedParcel:
+    carton: Carton
+    contents: dict[str, int] = field(default_factory=dict)
+    weight_g: int = 0
+    items_volume: int = 0
+
+    @property
+    def fill(self) -> Decimal:
+        """Share of the carton volume taken by the items, in percent."""
+        if not self.carton.volume:
+            return Decimal("0.0")
+        return (Decimal(self.items_volume) * 100 / Decimal(self.carton.volume)).quantize(Decimal("0.1"))
+
+
+def _orientations(dims: tuple[int, int, int]) -> list[tuple[int, int, int]]:
+    return sorted(set(permutations(dims)))
+
+
+class _Bin:
+    __slots__ = ("carton", "boxes", "points", "weight_g", "used_volume", "contents")
+
+    def __init__(self, carton: Carton):
+        self.carton = carton
+        self.boxes: list[Box] = []
+        self.points: list[Point] = [(0, 0, 0)]
+        self.weight_g = 0
+        self.used_volume = 0
+        self.contents: dict[str, int] = {}
+
+    def _free(self, origin: Point, size: list[int], axis: int) -> int:
+        """Free length along ``axis`` from ``origin`` for a block of cross-section ``size``."""
+        start = origin[axis]
+        extent = self.carton.dims[axis] - start
+        a, b = (axis + 1) % 3, (axis + 2) % 3
+        for box in self.boxes:
+            if (
+                box[axis + 3] > start
+                and box[a] < origin[a] + size[a] and box[a + 3] > origin[a]
+                and box[b] < origin[b] + size[b] and box[b + 3] > origin[b]
+            ):
+                if box[axis] <= start:
+                    return 0
+                extent = min(extent, box[axis] - start)
+        return extent
+
+    def _block(self, origin: Point, dims: tuple[int, int, int], limit: int) -> tuple[int, list[int]]:
+        """Largest block of at most ``limit`` copies at ``origin``: (count, [nx, ny, nz])."""
+        size = list(dims)
+        counts = [1, 1, 1]
+        room = limit
+        for axis in range(3):
+            fit = self._free(origin, size, axis) // dims[axis]
+            if fit <= 0:
+                return 0, counts
+            counts[axis] = min(fit, room)
+            size[axis] = counts[axis] * dims[axis]
+            room //= counts[axis]
+        return counts[0] * counts[1] * counts[2], counts
+
+    def place(self, item: PackItem, remaining: int) -> int:
+        """Place one block of ``item`` at the lowest feasible point; returns the copies placed."""
+        limit = min(remaining, (self.carton.max_weight_g - self.weight_g) // item.weight_g)
+        if limit <= 0 or self.carton.volume - self.used_volume < item.volume:
+            return 0
+
+        orientations = _orientations(item.dims)
+        for point in self.points:
+            best_count, best = 0, None
+            for dims in orientations:
+                count, counts = self._block(point, dims, limit)
+                if count > best_count:
+                    best_count, best = count, (dims, counts)
+                    if count == limit:
+                        break
+            if best is None:
+                continue
+
+            dims, counts = best
+            size = [dims[i] * counts[i] for i in range(3)]
+            self._add(point, size)
+            self.weight_g += best_count * item.weight_g
+            self.used_volume += best_count * item.volume
+            self.contents[item.sku] = self.contents.get(item.sku, 0) + best_count
+            return best_count
+        return 0
+
+    def _add(self, origin: Point, size: list[int]) -> None:
+        x, y, z = origin
+        box = (x, y, z, x + size[0], y + size[1], z + size[2])
+        self.boxes.append(box)
+        L, W, H = self.carton.dims
+        points = {
+            p
+            for p in self.points
+            if p != origin
+            and not (box[0] <= p[0] < box[3] and box[1] <= p[1] < box[4] and box[2] <= p[2] < box[5])
+        }
+        for p in ((box[3], y, z), (x, box[4], z), (x, y, box[5])):
+            if p[0] < L and p[1] < W and p[2] < H:
+                points.add(p)
+        # Lowest first, then towards the back-left corner.
+        self.points = sorted(points, key=lambda p: (p[2], p[1], p[0]))
+
+    def fill(self, item: PackItem, quantity: int) -> int:
+        """Place as many of ``quantity`` copies as fit; returns the copies placed."""
+        placed = 0
+        while placed < quantity:
+            count = self.place(item, quantity - placed)
+            if not count:
+                break
+            placed += count
+        return placed
+
+
+def _sorted_items(items: Iterable[PackItem]) -> list[PackItem]:
+    return sorted(
+        (item for item in items if item.quantity > 0),
+        key=lambda item: (-item.volume, -item.weight_g, item.sku),
+    )
+
+
+def _repack(contents: dict[str, int], by_sku: dict[str, PackItem], carton: Carton) -> _Bin | None:
+    bin_ = _Bin(carton)
+    for item in _sorted_items(by_sku[sku] for sku in contents):
+        if bin_.fill(item, contents[item.sku]) < contents[item.sku]:
+            return None
+    return bin_
+
+
+def pack(items: Sequence[PackItem], cartons: Sequence[Carton]) -> list[PackedParcel]:
+    """
+    Pack ``items`` into as few parcels as the heuristic finds.
+
+    Every unit must fit at least one carton, otherwise ``PackingError`` is
+    raised before anything is packed. Parcels are returned in opening order,
+    with ``contents`` in packing order.
+    """
+    cartons_by_volume = sorted(cartons, key=lambda c: (c.volume, c.dims))
+    ordered = _sorted_items(items)
+    for item in ordered:
+        if not any(carton.holds(item) for carton in cartons_by_volume):
+            raise PackingError(f"SKU {item.sku} does not fit any carton", sku=item.sku)
+
+    bins: list[_Bin] = []
+    for item in ordered:
+        remaining = item.quantity
+        for bin_ in bins:
+            remaining -= bin_.fill(item, remaining)
+            if not remaining:
+                break
+        while remaining:
+            carton = next(c for c in reversed(cartons_by_volume) if c.holds(item))
+            bin_ = _Bin(carton)
+            bins.append(bin_)
+            placed = bin_.fill(item, remaining)
+            if not placed:  # pragma: no cover — holds() guarantees one unit fits an empty carton
+                raise PackingError(f"SKU {item.sku} could not be placed", sku=item.sku)
+            remaining -= placed
+
+    by_sku = {item.sku: item for item in ordered}
+    parcels: list[PackedParcel] = []
+    for bin_ in bins:
+        best = bin_
+        for carton in cartons_by_volume:
+            if carton.volume >= bin_.carton.volume:
+                break
+            if carton.volume < bin_.used_volume or carton.max_weight_g < bin_.weight_g:
+                continue
+            smaller = _repack(bin_.contents, by_sku, carton)
+            if smaller is not None:
+                best = smaller
+                break
+        parcels.append(
+            PackedParcel(
+                carton=best.carton,
+                contents=dict(best.contents),
+                weight_g=best.weight_g,
+                items_volume=best.used_volume,
+            )
+        )
+    return parcels
@@ -0,0 +1,192 @@
+"""
+Shipping quote cache shared by the seller quote endpoint and checkout.
+
+SellerShippingOptionsView and the Stripe/PayPal checkout session builders price
+the same carts: split into parcels, then rate every parcel. Both go through
+``get_or_compute_quote``, so a repeated request for the same cart skips the
+calculation. Each courier key has a single compute function that both callers
+pass in:
+
+    zasilkovna  shipping_split.calculate_order_shipping
+    dpd         dpd_rates.calculate_order_shipping_dpd
+    gls         gls_rates.calculate_order_shipping_gls
+
+A compute function raises instead of returning an underpriced total (a parcel
+it could not price), so such a total is never stored. A quote that is right
+but missing some options (a DPD channel timed out or failed) is returned, but
+the compute function calls ``mark_quote_partial()`` so that it is not cached.
+
+A quote is keyed by a fingerprint of everything its price depends on:
+
+    courier and pricing parameters (currency, address_bundle, ...)
+    destination country and COD flag
+    sku -> quantity, sorted, duplicate lines summed
+    weight and dimensions of every variant in the cart
+    rate card digest (delivery/services/rate_card.py)
+    cached CZK/EUR rate
+
+A change to any of these produces a new key, so entries are never invalidated,
+they just stop being read; ``SHIPPING_QUOTE_CACHE_TIMEOUT`` bounds how long
+they stay. Failed calculations are not cached, and a failing cache (or rate
+card load) falls back to computing the quote.
+
+The "shipping" alias is a DatabaseCache (the ``django_cache`` table made by
+``manage.py createcachetable``), shared by all gunicorn workers: checkout gets
+the quote the customer was shown whichever worker serves it.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+from contextvars import ContextVar
+from typing import Any, Callable, Iterable, Mapping, TypeVar
+
+from django.conf import settings
+from django.core.cache import caches
+
+from delivery.services.currency_converter import peek_czk_to_eur_rate
+from delivery.services.rate_card import get_rate_card
+from product.models import ProductVariant
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+_DEFAULT_TIMEOUT = 60 * 10
+_DIMENSION_FIELDS = ("weight_grams", "length_mm", "width_mm", "height_mm")
+
+# Set by get_or_compute_quote around compute(); compute marks a partial quote in it.
+_partial_marks: ContextVar[list | None] = ContextVar("shipping_quote_partial_marks", default=None)
+
+
+def mark_quote_partial() -> None:
+    """Keep the quote being computed out of the cache; a no-op outside ``get_or_compute_quote``."""
+    marks = _partial_marks.get()
+    if marks is not None:
+        marks.append(True)
+
+
+def _cache():
+    return caches[getattr(settings, "SHIPPING_QUOTE_CACHE_ALIAS", "default")]
+
+
+def _cart(items: Iterable[Mapping[str, Any]]) -> list[tuple[str, int]]:
+    quantities: dict[str, int] = {}
+    for item in items:
+        sku = str(item["sku"])
+        quantities[sku] = quantities.get(sku, 0) + int(item["quantity"])
+    return sorted(quantities.items())
+
+
+def _dimensions(skus: list[str], variant_map: Mapping[str, ProductVariant] | None) -> list:
+    variant_map = variant_map or {}
+    missing = [sku for sku in skus if sku not in variant_map]
+    loaded = {}
+    if missing:
+        loaded = {
+            row["sku"]: row
+            for row in ProductVariant.objects.filter(sku__in=missing).values("sku", *_DIMENSION_FIELDS)
+        }
+
+    dimensions = []
+    for sku in skus:
+        variant = variant_map.get(sku)
+        if variant is not None:
+            dimensions.append([getattr(variant, field) for field in _DIMENSION_FIELDS])
+        else:
+            row = loaded.get(sku)
+            dimensions.append([row[field] for field in _DIMENSION_FIELDS] if row else None)
+    return dimensions
+
+
+def _payload(
+    *,
+    courier: str,
+    country: str,
+    items: Iterable[Mapping[str, Any]],
+    cod: Any,
+    variant_map: Mapping[str, ProductVariant] | None,
+    params: Mapping[str, Any] | None,
+) -> dict:
+    cart = _cart(items)
+    return {
+        "courier": courier.lower(),
+        "country": country.upper(),
+        "cod": bool(cod),
+        "params": dict(sorted((params or {}).items())),
+        "cart": cart,
+        "dimensions": _dimensions([sku for sku, _ in cart], variant_map),
+        "rates": get_rate_card().digest,
+    }
+
+
+def _key(payload: dict, fx_rate: str | None) -> str:
+    raw = json.dumps({**payload, "fx": fx_rate or ""}, sort_keys=True, default=str, separators=(",", ":"))
+    return f"shipping-quote:{hashlib.sha256(raw.encode()).hexdigest()}"
+
+
+def quote_fingerprint(
+    *,
+    courier: str,
+    country: str,
+    items: Iterable[Mapping[str, Any]],
+    cod: Any = False,
+    variant_map: Mapping[str, ProductVariant] | None = None,
+    params: Mapping[str, Any] | None = None,
+) -> str:
+    """Cache key of a quote under the currently cached FX rate."""
+    payload = _payload(courier=courier, country=country, items=items, cod=cod, variant_map=variant_map, params=params)
+    return _key(payload, peek_czk_to_eur_rate())
+
+
+def get_or_compute_quote(
+    *,
+    courier: str,
+    country: str,
+    items: Iterable[Mapping[str, Any]],
+    compute: Callable[[], T],
+    cod: Any = False,
+    variant_map: Mapping[str, ProductVariant] | None = None,
+    params: Mapping[str, Any] | None = None,
+) -> T:
+    """
+    Return the cached quote for this cart, or ``compute()`` it and cache it.
+
+    The quote is stored under the FX rate cached after ``compute()`` ran: the
+    first calculation of the day may be the one that fetches the rate. A quote
+    marked with ``mark_quote_partial()`` is returned without being stored.
+    """
+    try:
+        payload = _payload(
+            courier=courier, country=country, items=items, cod=cod, variant_map=variant_map, params=params
+        )
+        cached = _cache().get(_key(payload, peek_czk_to_eur_rate()))
+    except Exception:  # noqa: BLE001 — the cache must not block pricing
+        logger.exception("Shipping quote cache lookup failed: courier=%s country=%s", courier, country)
+        return compute()
+
+    if cached is not None:
+        logger.debug("Shipping quote cache hit: courier=%s country=%s", courier, country)
+        return cached
+
+    token = _partial_marks.set([])
+    try:
+        quote = compute()
+        partial = bool(_partial_marks.get())
+    finally:
+        _partial_marks.reset(token)
+    if partial:
+        logger.info("Shipping quote is partial, not cached: courier=%s country=%s", courier, country)
+        mark_quote_partial()  # an enclosing computation is partial too
+        return quote
+
+    try:
+        _cache().set(
+            _key(payload, peek_czk_to_eur_rate()),
+            quote,
+            getattr(settings, "SHIPPING_QUOTE_CACHE_TIMEOUT", _DEFAULT_TIMEOUT),
+        )
+    except Exception:  # noqa: BLE001
+        logger.exception("Shipping quote cache store failed: courier=%s country=%s", courier, country)
+    return quote
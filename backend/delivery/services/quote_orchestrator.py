@@ -0,0 +1,147 @@
+"""
+Concurrent shipping quote computation.
+
+``SellerShippingOptionsView`` prices Zásilkovna, DPD and GLS, and DPD prices
+its PUDO and HD channels. The branches are independent, so ``run_quotes``
+runs them on a bounded, process-wide thread pool and waits for each branch
+at most ``SHIPPING_QUOTE_TIMEOUT_SECONDS``. A branch that is still running
+at the deadline is reported as timed out, and the caller answers with the
+other branches. The branch keeps running in the background, so a quote cached
+on completion (delivery/services/quote_cache.py) serves the next request.
+
+Threads pay off on the I/O part of a quote: variant and rate card reads, the
+FX fetch and cache round-trips. The pure-Python splits still take turns on
+the GIL.
+
+Branches run inline, one after another and without timeouts, when:
+
+    SHIPPING_QUOTE_WORKERS is 0
+    there is a single branch
+    the caller is inside a transaction (other threads use their own
+    database connections and would not see its uncommitted rows)
+
+Nested calls (DPD channels inside the DPD branch) share the pool. The calling
+thread takes back branches that no worker has started and runs them itself,
+so a full pool slows a nested call down but never deadlocks it.
+"""
+from __future__ import annotations
+
+import logging
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Any, Callable, Mapping
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_WORKERS = 8
+DEFAULT_TIMEOUT_SECONDS = 10.0
+
+_pool_lock = threading.Lock()
+_pool: dict = {"executor": None, "workers": 0}
+
+
+@dataclass
+class QuoteOutcome:
+    value: Any = None
+    error: BaseException | None = None
+    timed_out: bool = False
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None and not self.timed_out
+
+
+def _workers() -> int:
+    return int(getattr(settings, "SHIPPING_QUOTE_WORKERS", DEFAULT_WORKERS))
+
+
+def _timeout() -> float:
+    return float(getattr(settings, "SHIPPING_QUOTE_TIMEOUT_SECONDS", DEFAULT_TIMEOUT_SECONDS))
+
+
+def _executor(workers: int) -> ThreadPoolExecutor:
+    with _pool_lock:
+        if _pool["executor"] is None or _pool["workers"] != workers:
+            if _pool["executor"] is not None:
+                _pool["executor"].shutdown(wait=False)
+            _pool.update(
+                executor=ThreadPoolExecutor(max_workers=workers, thread_name_prefix="shipping-quote"),
+                workers=workers,
+            )
+        return _pool["executor"]
+
+
+def _run(name: str, fn: Callable[[], Any]) -> QuoteOutcome:
+    started = time.perf_counter()
+    try:
+        outcome = QuoteOutcome(value=fn())
+    except Exception as exc:  # noqa: BLE001 — reported per branch, the caller decides
+        outcome = QuoteOutcome(error=exc)
+    outcome.seconds = time.perf_counter() - started
+    logger.debug("Shipping quote branch %s: ok=%s %.3fs", name, outcome.ok, outcome.seconds)
+    return outcome
+
+
+def _run_in_worker(name: str, fn: Callable[[], Any]) -> QuoteOutcome:
+    # Pool threads outlive requests: drop broken/expired connections like request_finished does.
+    close_old_connections()
+    try:
+        return _run(name, fn)
+    finally:
+        close_old_connections()
+
+
+def run_quotes(
+    tasks: Mapping[str, Callable[[], Any]],
+    *,
+    timeout: float | None = None,
+) -> dict[str, QuoteOutcome]:
+    """
+    Run ``tasks`` (name -> callable) concurrently; returns name -> QuoteOutcome
+    in the order of ``tasks``.
+
+    Exceptions are captured in ``QuoteOutcome.error``. A branch still running
+    ``timeout`` seconds after the start (default ``SHIPPING_QUOTE_TIMEOUT_SECONDS``)
+    comes back with ``timed_out=True``.
+    """
+    workers = _workers()
+    if workers <= 0 or len(tasks) <= 1 or transaction.get_connection().in_atomic_block:
+        return {name: _run(name, fn) for name, fn in tasks.items()}
+
+    deadline = time.monotonic() + (_timeout() if timeout is None else timeout)
+    pool = _executor(workers)
+    futures: dict[str, Future] = {name: pool.submit(_run_in_worker, name, fn) for name, fn in tasks.items()}
+    outcomes: dict[str, QuoteOutcome] = {}
+    pending = set(futures.values())
+
+    while pending:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        # Take back one branch no worker has started (last submitted first).
+        stolen = next(
+            (name for name in reversed(futures) if futures[name] in pending and futures[name].cancel()),
+            None,
+        )
+        if stolen is not None:
+            outcomes[stolen] = _run(stolen, tasks[stolen])
+            pending = {future for future in pending if not future.done()}
+            continue
+        _done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+
+    for name, future in futures.items():
+        if name in outcomes:
+            continue
+        if future.done() and not future.cancelled():
+            outcomes[name] = future.result()
+        else:
+            future.cancel()  # not started yet: do not run it after the deadline
+            logger.warning("Shipping quote branch %s timed out", name)
+            outcomes[name] = QuoteOutcome(error=TimeoutError(f"{name} quote timed out"), timed_out=True)
+    return {name: outcomes[name] for name in tasks}
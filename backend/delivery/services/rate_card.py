@@ -0,0 +1,177 @@
+"""
+In-memory rate card for courier pricing.
+
+All ShippingRate rows (with their CourierService) are loaded with one query
+and kept per process, indexed by (courier code, country, channel, category,
+weight_limit, address_bundle). Zásilkovna, GLS and DPD pricing read rates from
+here and never query ShippingRate per parcel.
+
+Freshness: the card is stamped with the ``shipping-rates`` CatalogCacheVersion.
+Saving or deleting a ShippingRate or CourierService (admin, ``load_*_rates``)
+drops the local card straight away and bumps the version on commit, so other
+processes reload it. The version is read at most once per
+``SHIPPING_RATE_CARD_CHECK_SECONDS``; between checks pricing runs without
+database access. ``load_*_rates`` wrap their bulk writes in
+``deferred_rate_card_bump()`` so that a whole load bumps the version once.
+"""
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from decimal import Decimal
+from typing import Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from delivery.models import ShippingRate
+from order.models import CourierService
+from product.response_cache import bump_catalog_versions, get_catalog_versions
+
+SHIPPING_RATES_SCOPE = "shipping-rates"
+
+_DEFAULT_CHECK_SECONDS = 30
+
+# (courier code, country, channel, category, weight_limit, address_bundle)
+RateKey = tuple[str, str, str, str, str, str]
+
+
+def _key(courier: str, country: str, channel: str, category: str, weight_limit: str, address_bundle: str) -> RateKey:
+    return courier.lower(), country.upper(), channel, category, weight_limit, address_bundle
+
+
+class RateCard:
+    """Immutable snapshot of ShippingRate. Returned rates must not be modified."""
+
+    def __init__(self, rates: Iterable[ShippingRate]):
+        self._rates: dict[RateKey, ShippingRate] = {}
+        groups: dict[tuple[str, str, str], list[ShippingRate]] = defaultdict(list)
+        for rate in rates:
+            courier = rate.courier_service.code or ""
+            self._rates[
+                _key(courier, rate.country, rate.channel, rate.category, rate.weight_limit, rate.address_bundle)
+            ] = rate
+            groups[(courier.lower(), rate.country.upper(), rate.channel)].append(rate)
+        # Content hash: equal in every process that loaded the same rates
+        # (part of the shipping quote fingerprint, delivery/services/quote_cache.py).
+        self.digest = hashlib.sha256(
+            repr(sorted(
+                (key, str(rate.price), str(rate.cod_fee), rate.estimate, rate.courier_service.name)
+                for key, rate in self._rates.items()
+            )).encode()
+        ).hexdigest()[:16]
+        # Per (courier, country, channel), cheapest first (ties by pk).
+        self._groups = {
+            key: tuple(sorted(group, key=lambda r: (Decimal(r.price), r.pk)))
+            for key, group in groups.items()
+        }
+
+    @classmethod
+    def load(cls) -> "RateCard":
+        return cls(ShippingRate.objects.select_related("courier_service").order_by("pk"))
+
+    def __len__(self) -> int:
+        return len(self._rates)
+
+    def get(
+        self,
+        courier: str,
+        country: str,
+        channel: str,
+        category: str,
+        weight_limit: str,
+        address_bundle: str = "one",
+    ) -> ShippingRate | None:
+        return self._rates.get(_key(courier, country, channel, category, weight_limit, address_bundle))
+
+    def find(
+        self,
+        courier: str,
+        country: str,
+        channel: str,
+        *,
+        category: str | None = None,
+        weight_limit: str | None = None,
+    ) -> list[ShippingRate]:
+        """Rates of one courier/country/channel, cheapest first, optionally narrowed."""
+        return [
+            rate
+            for rate in self._groups.get((courier.lower(), country.upper(), channel), ())
+            if (category is None or rate.category == category)
+            and (weight_limit is None or rate.weight_limit == weight_limit)
+        ]
+
+    def weight_limits(self, courier: str, country: str, channels: Iterable[str]) -> set[str]:
+        return {
+            rate.weight_limit
+            for channel in channels
+            for rate in self._groups.get((courier.lower(), country.upper(), channel), ())
+        }
+
+
+_lock = threading.Lock()
+_local: dict = {"card": None, "version": None, "checked_at": 0.0}
+_deferred = threading.local()
+
+
+def _check_seconds() -> float:
+    return float(getattr(settings, "SHIPPING_RATE_CARD_CHECK_SECONDS", _DEFAULT_CHECK_SECONDS))
+
+
+def _current_version():
+    return get_catalog_versions([SHIPPING_RATES_SCOPE]).get(SHIPPING_RATES_SCOPE)
+
+
+def get_rate_card() -> RateCard:
+    now = time.monotonic()
+    with _lock:
+        card = _local["card"]
+        if card is not None and now - _local["checked_at"] < _check_seconds():
+            return card
+
+    version = _current_version()
+    with _lock:
+        if _local["card"] is not None and _local["version"] == version:
+            _local["checked_at"] = now
+            return _local["card"]
+
+    card = RateCard.load()
+    with _lock:
+        _local.update(card=card, version=version, checked_at=now)
+    return card
+
+
+def invalidate_rate_card() -> None:
+    with _lock:
+        _local.update(card=None, version=None, checked_at=0.0)
+
+
+def bump_rate_card_version() -> None:
+    bump_catalog_versions([SHIPPING_RATES_SCOPE])
+
+
+@contextmanager
+def deferred_rate_card_bump():
+    """Collapse the per-row version bumps of a bulk rate load into one, sent on commit."""
+    _deferred.depth = getattr(_deferred, "depth", 0) + 1
+    try:
+        yield
+    finally:
+        _deferred.depth -= 1
+        invalidate_rate_card()
+    transaction.on_commit(bump_rate_card_version)
+
+
+@receiver(post_save, sender=ShippingRate)
+@receiver(post_delete, sender=ShippingRate)
+@receiver(post_save, sender=CourierService)
+@receiver(post_delete, sender=CourierService)
+def invalidate_rate_card_on_change(sender, raw=False, **kwargs):
+    invalidate_rate_card()
+    if not raw and not getattr(_deferred, "depth", 0):
+        transaction.on_commit(bump_rate_card_version)
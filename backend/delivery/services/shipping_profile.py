@@ -0,0 +1,87 @@
+"""
+Integer shipping profile of a product variant.
+
+Splits and rate calculations compare a variant's size and weight against
+courier limits once per unit or per cart line. ``ShippingProfile`` keeps the
+values as stored on ProductVariant (integer millimetres and grams) together
+with the derived volume, longest side and sum of sides. The checks in the
+split and categorisation loops compare integers, and the ``Decimal`` cm/kg
+values are built only where a price or an error message needs them.
+
+``shipping_profile(variant)`` memoises the profile on the variant instance.
+ProductVariant has no version column, so the four source fields serve as
+the version: if any of them changed on the instance, the profile is rebuilt.
+
+Limits written in cm/kg are turned into mm/g with ``mm_limit``/``g_limit``.
+They round down, so ``value_mm <= mm_limit(limit_cm)`` gives the same
+answer as ``value_mm / 10 <= limit_cm``.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from decimal import ROUND_FLOOR, Decimal
+
+_ATTR = "_shipping_profile"
+
+
+@dataclass(frozen=True, slots=True)
+class ShippingProfile:
+    """Size in mm and weight in g; a missing value counts as 0."""
+
+    length_mm: int
+    width_mm: int
+    height_mm: int
+    weight_g: int
+    volume_mm3: int
+    max_side_mm: int
+    sum_sides_mm: int
+
+    @classmethod
+    def build(cls, length_mm: int, width_mm: int, height_mm: int, weight_g: int) -> "ShippingProfile":
+        return cls(
+            length_mm=length_mm,
+            width_mm=width_mm,
+            height_mm=height_mm,
+            weight_g=weight_g,
+            volume_mm3=length_mm * width_mm * height_mm,
+            max_side_mm=max(length_mm, width_mm, height_mm),
+            sum_sides_mm=length_mm + width_mm + height_mm,
+        )
+
+    @property
+    def source(self) -> tuple[int, int, int, int]:
+        return self.length_mm, self.width_mm, self.height_mm, self.weight_g
+
+
+def _source(variant) -> tuple[int, int, int, int]:
+    return (
+        int(variant.length_mm or 0),
+        int(variant.width_mm or 0),
+        int(variant.height_mm or 0),
+        int(variant.weight_grams or 0),
+    )
+
+
+def shipping_profile(variant) -> ShippingProfile:
+    source = _source(variant)
+    profile = variant.__dict__.get(_ATTR)
+    if profile is None or profile.source != source:
+        profile = ShippingProfile.build(*source)
+        variant.__dict__[_ATTR] = profile
+    return profile
+
+
+def mm_limit(cm: Decimal) -> int:
+    return int((Decimal(cm) * 10).to_integral_value(rounding=ROUND_FLOOR))
+
+
+def g_limit(kg: Decimal) -> int:
+    return int((Decimal(kg) * 1000).to_integral_value(rounding=ROUND_FLOOR))
+
+
+def to_cm(mm: int) -> Decimal:
+    return Decimal(mm) / 10
+
+
+def to_kg(grams: int) -> Decimal:
+    return Decimal(grams) / 1000
@@ -4,6 +4,7 @@ from typing import List, Dict, Tuple
 
 from product.models import ProductVariant
 from .local_rates import calculate_shipping_options  # Packeta (Zásilkovna)
+from .shipping_profile import g_limit, mm_limit, shipping_profile
 
 logger = logging.getLogger(__name__)
 
@@ -18,9 +19,14 @@ EXT_MAX_WEIGHT_KG = Decimal("30.00")
 EXT_MAX_SIDE_CM = Decimal("120.00")
 EXT_MAX_SUM_SIDES_CM = Decimal("999.00")  # крупногабарит Packeta (только HD)
 
+# Те же лимиты в целых мм/граммах (проверки в циклах сплита без Decimal)
+NORMAL_LIMITS = (g_limit(NORMAL_MAX_WEIGHT_KG), mm_limit(NORMAL_MAX_SIDE_CM), mm_limit(NORMAL_MAX_SUM_SIDES_CM))
+EXT_LIMITS = (g_limit(EXT_MAX_WEIGHT_KG), mm_limit(EXT_MAX_SIDE_CM), mm_limit(EXT_MAX_SUM_SIDES_CM))
+
 # Тип для состояния «ящика» (внутренний контейнер в процессе упаковки)
-# (L, W, H, weight, items)
-ParcelState = Tuple[Decimal, Decimal, Decimal, Decimal, List[Dict]]
+# (L мм, W мм, H мм, вес г, items)
+ParcelState = Tuple[int, int, int, int, List[Dict]]
+Limits = Tuple[int, int, int]  # (max_g, max_side_mm, max_sum_mm)
 
 
 # ===================== ВСПОМОГАТЕЛЬНЫЕ =====================
@@ -31,54 +37,36 @@ def _get_variant_map(skus: List[str]):
     return {str(v.sku): v for v in variants}
 
 
-def _dims_kg(v: ProductVariant):
-    """Возвращает (L, W, H, KG) в сантиметрах и килограммах из миллиметров/граммов."""
-    L = (Decimal(v.length_mm or 0) / Decimal("10"))
-    W = (Decimal(v.width_mm or 0) / Decimal("10"))
-    H = (Decimal(v.height_mm or 0) / Decimal("10"))
-    KG = (Decimal(v.weight_grams or 0) / Decimal("1000"))
-    return L, W, H, KG
-
-
-def _fits(l: Decimal, w: Decimal, h: Decimal, kg: Decimal,
-          max_kg: Decimal, max_side: Decimal, max_sum: Decimal) -> bool:
-    """Проверка лимитов: вес, максимальная сторона и сумма сторон."""
-    sum_sides = l + w + h
-    max_s = max(l, w, h)
-    return (kg <= max_kg) and (max_s <= max_side) and (sum_sides <= max_sum)
+def _fits(l: int, w: int, h: int, g: int, limits: Limits) -> bool:
+    """Проверка лимитов (мм/граммы): вес, максимальная сторона и сумма сторон."""
+    max_g, max_side, max_sum = limits
+    return (g <= max_g) and (max(l, w, h) <= max_side) and (l + w + h <= max_sum)
 
 
 def _try_place_into_bins(unit: Dict,
                          bins: List[ParcelState],
                          vmap,
-                         max_kg: Decimal,
-                         max_side: Decimal,
-                         max_sum: Decimal) -> bool:
+                         limits: Limits) -> bool:
     """
     Пытается положить юнит в существующие «ящики» (посылки) по жадной стратегии «рост по высоте».
     Если помещается — обновляет габариты/вес и добавляет юнит, возвращает True.
     """
-    v = vmap[unit["sku"]]
-    l, w, h, kg = _dims_kg(v)
+    p = shipping_profile(vmap[unit["sku"]])
 
-    for idx, (bl, bw, bh, bkg, items_list) in enumerate(bins):
-        nl = max(bl, l)
-        nw = max(bw, w)
-        nh = bh + h
-        nkw = bkg + kg
+    for idx, (bl, bw, bh, bg, items_list) in enumerate(bins):
+        nl = max(bl, p.length_mm)
+        nw = max(bw, p.width_mm)
+        nh = bh + p.height_mm
+        ng = bg + p.weight_g
 
-        if _fits(nl, nw, nh, nkw, max_kg, max_side, max_sum):
-            bins[idx] = (nl, nw, nh, nkw, items_list + [unit])
+        if _fits(nl, nw, nh, ng, limits):
+            bins[idx] = (nl, nw, nh, ng, items_list + [unit])
             return True
 
     return False
 
 
-def _pack_units(units: List[Dict],
-                vmap,
-                max_kg: Decimal,
-                max_side: Decimal,
-                max_sum: Decimal) -> List[List[Dict]]:
+def _pack_units(units: List[Dict], vmap, limits: Limits) -> List[List[Dict]]:
     """
     Упаковка юнитов в несколько посылок с заданными лимитами.
     Эвристика:
@@ -86,26 +74,25 @@ def _pack_units(units: List[Dict],
       - кладём в первый «ящик», куда влезает; иначе открываем новый.
     """
     def _key(u: Dict):
-        vv = vmap[u["sku"]]
-        L, W, H, KG = _dims_kg(vv)
-        return (-(L * W * H), -KG)
+        p = shipping_profile(vmap[u["sku"]])
+        return (-p.volume_mm3, -p.weight_g)
 
     units_sorted = sorted(units, key=_key)
 
-    bins: List[ParcelState] = []  # (L, W, H, kg, items)
+    bins: List[ParcelState] = []  # (L, W, H, g, items)
     for u in units_sorted:
-        placed = _try_place_into_bins(u, bins, vmap, max_kg, max_side, max_sum)
+        placed = _try_place_into_bins(u, bins, vmap, limits)
         if not placed:
-            L, W, H, KG = _dims_kg(vmap[u["sku"]])
+            p = shipping_profile(vmap[u["sku"]])
             # открываем новый «ящик»
-            bins.append((L, W, H, KG, [u]))
+            bins.append((p.length_mm, p.width_mm, p.height_mm, p.weight_g, [u]))
 
     parcels: List[List[Dict]] = []
-    for i, (l, w, h, kg, items_list) in enumerate(bins, start=1):
+    for i, (l, w, h, g, items_list) in enumerate(bins, start=1):
         parcels.append(items_list)
         logger.info(
             "shipping_split Packeta pack parcel #%d: %d items weight=%.3f kg size=%.1fx%.1fx%.1f cm (sum=%.1f, max=%.1f)",
-            i, len(items_list), kg, l, w, h, (l + w + h), max(l, w, h)
+            i, len(items_list), g / 1000, l / 10, w / 10, h / 10, (l + w + h) / 10, max(l, w, h) / 10
         )
     return parcels
 
@@ -147,9 +134,8 @@ def split_items_into_parcels(country: str, items: List[Dict], cod: bool, currenc
     extended_units: List[Dict] = []
 
     for u in units:
-        v = vmap[u["sku"]]
-        L, W, H, KG = _dims_kg(v)
-        if _fits(L, W, H, KG, NORMAL_MAX_WEIGHT_KG, NORMAL_MAX_SIDE_CM, NORMAL_MAX_SUM_SIDES_CM):
+        p = shipping_profile(vmap[u["sku"]])
+        if _fits(p.length_mm, p.width_mm, p.height_mm, p.weight_g, NORMAL_LIMITS):
             normal_units.append(u)
         else:
             extended_units.append(u)
@@ -157,18 +143,12 @@ def split_items_into_parcels(country: str, items: List[Dict], cod: bool, currenc
     # 3) упаковываем normal
     normal_parcels: List[List[Dict]] = []
     if normal_units:
-        normal_parcels = _pack_units(
-            normal_units, vmap,
-            NORMAL_MAX_WEIGHT_KG, NORMAL_MAX_SIDE_CM, NORMAL_MAX_SUM_SIDES_CM
-        )
+        normal_parcels = _pack_units(normal_units, vmap, NORMAL_LIMITS)
 
     # 4) упаковываем extended
     ext_parcels: List[List[Dict]] = []
     if extended_units:
-        ext_parcels = _pack_units(
-            extended_units, vmap,
-            EXT_MAX_WEIGHT_KG, EXT_MAX_SIDE_CM, EXT_MAX_SUM_SIDES_CM
-        )
+        ext_parcels = _pack_units(extended_units, vmap, EXT_LIMITS)
 
     parcels = normal_parcels + ext_parcels
 
@@ -265,20 +245,25 @@ def calculate_order_shipping(country: str, items: List[Dict], cod: bool, currenc
     """
     Главная обёртка для Packeta: делает сплит и считает стоимость каждой посылки
     через local_rates.calculate_shipping_options, после чего агрегирует.
+
+    Одна и та же функция для оценки продавца и для checkout (ключ "zasilkovna"
+    в services/quote_cache.py). Если хотя бы одна посылка не посчиталась —
+    ValueError: сумма без неё была бы занижена и попала бы в кэш.
     """
-    parcels = split_items_into_parcels(country, items, cod, currency)
+    parcels = split_items_into_parcels(country=country, items=items, cod=cod, currency=currency)
 
     # !!! КЛЮЧЕВОЕ: гарантируем, что передаём в local_rates список «малых» посылок,
     #     где каждая посылка — это List[Dict], а не List[List[...]].
     per_parcel_opts: List[List[Dict]] = []
     for idx, parcel in enumerate(parcels, start=1):
         if not isinstance(parcel, list) or (parcel and isinstance(parcel[0], list)):
-            logger.error("shipping_split Packeta: parcel #%d has wrong shape, skipping: %r", idx, type(parcel))
-            continue
+            logger.error("shipping_split Packeta: parcel #%d has wrong shape: %r", idx, type(parcel))
+            raise ValueError(f"Packeta: parcel #{idx} has wrong shape")
         try:
             opts = calculate_shipping_options(country=country, items=parcel, cod=cod, currency=currency)
-            per_parcel_opts.append(opts)
         except Exception as e:
             logger.exception("Packeta parcel calculation failed: %s", e)
+            raise ValueError(f"Packeta: parcel #{idx} calculation failed: {e}") from e
+        per_parcel_opts.append(opts)
 
     return combine_parcel_options(per_parcel_opts)
@@ -0,0 +1,121 @@
+"""
+Parcel packer (delivery/services/packing.py) and the GLS/DPD splits built on it.
+"""
+import json
+import time
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from delivery.services.dpd_split import split_items_into_parcels_dpd
+from delivery.services.gls_split import split_items_into_parcels_gls
+from delivery.services.packing import Carton, PackingError, PackItem, pack
+from product.models import ProductVariant
+
+SMALL = Carton("small", 300, 200, 100, 10_000)
+LARGE = Carton("large", 600, 400, 400, 20_000)
+LONG = Carton("long", 1500, 200, 200, 20_000)
+
+
+def _item(sku, dims, weight_g, quantity):
+    return PackItem(sku, *dims, weight_g=weight_g, quantity=quantity)
+
+
+class PackTests(SimpleTestCase):
+    def test_identical_units_are_placed_as_blocks(self):
+        parcels = pack([_item("A", (100, 100, 100), 100, 96)], [LARGE])
+
+        self.assertEqual(len(parcels), 1)
+        self.assertEqual(parcels[0].contents, {"A": 96})
+        self.assertEqual(parcels[0].weight_g, 9_600)
+        self.assertEqual(parcels[0].fill, Decimal("100.0"))
+
+    def test_weight_limit_opens_new_parcels(self):
+        parcels = pack([_item("A", (100, 100, 100), 6_000, 7)], [LARGE])
+
+        self.assertEqual([p.contents["A"] for p in parcels], [3, 3, 1])
+        self.assertTrue(all(p.weight_g <= LARGE.max_weight_g for p in parcels))
+
+    def test_long_unit_goes_to_the_long_carton_and_parcels_shrink(self):
+        parcels = pack(
+            [_item("ROD", (1400, 50, 50), 1_000, 1), _item("A", (100, 100, 50), 200, 2)],
+            [SMALL, LARGE, LONG],
+        )
+
+        self.assertEqual(len(parcels), 1)
+        self.assertEqual(parcels[0].carton, LONG)
+        self.assertEqual(parcels[0].contents, {"ROD": 1, "A": 2})
+
+        self.assertEqual(pack([_item("A", (100, 100, 50), 200, 4)], [LARGE, SMALL])[0].carton, SMALL)
+
+    def test_unit_that_fits_no_carton_is_rejected(self):
+        with self.assertRaises(PackingError) as ctx:
+            pack([_item("A", (100, 100, 100), 100, 1), _item("HEAVY", (100, 100, 100), 30_000, 1)], [LARGE])
+        self.assertEqual(ctx.exception.sku, "HEAVY")
+
+    def test_large_mixed_cart_is_fast(self):
+        items = [_item(f"S{i}", (80 + 10 * i, 60 + 5 * i, 40 + 3 * i), 150 + 20 * i, 20) for i in range(10)]
+
+        started = time.perf_counter()
+        parcels = pack(items, [SMALL, LARGE])
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(sum(sum(p.contents.values()) for p in parcels), 200)
+        self.assertLess(elapsed, 2)
+
+
+class CourierSplitTests(SimpleTestCase):
+    variant_map = {
+        "A": ProductVariant(sku="A", weight_grams=400, length_mm=150, width_mm=100, height_mm=80),
+        "B": ProductVariant(sku="B", weight_grams=3_000, length_mm=1_000, width_mm=100, height_mm=80),
+    }
+    items = [{"sku": "A", "quantity": 120}, {"sku": "B", "quantity": 2}]
+
+    def test_gls_parcels_respect_service_limits(self):
+        parcels = split_items_into_parcels_gls(self.items, variant_map=self.variant_map, service="HD")
+
+        quantities = {}
+        for parcel in parcels:
+            self.assertLessEqual(parcel["weight_kg"], Decimal("31.5"))
+            self.assertEqual(
+                parcel["girth_cm"], parcel["length_cm"] + 2 * (parcel["width_cm"] + parcel["height_cm"])
+            )
+            for line in parcel["items"]:
+                quantities[line["sku"]] = quantities.get(line["sku"], 0) + line["quantity"]
+        self.assertEqual(quantities, {"A": 120, "B": 2})
+
+    def test_dpd_parcels_hold_every_unit(self):
+        parcels = split_items_into_parcels_dpd(self.items, self.variant_map, service="HD")
+
+        quantities = {}
+        for parcel in parcels:
+            weight = sum(self.variant_map[line["sku"]].weight_grams * line["quantity"] for line in parcel)
+            self.assertLessEqual(weight, 20_000)
+            for line in parcel:
+                quantities[line["sku"]] = quantities.get(line["sku"], 0) + line["quantity"]
+        self.assertEqual(quantities, {"A": 120, "B": 2})
+
+    def test_unit_too_long_for_service_keeps_the_error(self):
+        with self.assertRaisesMessage(ValueError, "doesn't fit any PUDO carton"):
+            split_items_into_parcels_dpd(
+                [{"sku": "ROD", "quantity": 1}],
+                {"ROD": ProductVariant(sku="ROD", weight_grams=900, length_mm=1_200, width_mm=50, height_mm=50)},
+                service="PUDO",
+            )
+
+
+class PackingBenchmarkCommandTests(SimpleTestCase):
+    def test_reports_both_engines(self):
+        out = StringIO()
+        call_command(
+            "benchmark_parcel_packing", "--units", "5", "--carts", "1", "--repeat", "1", "--seed", "1", stdout=out
+        )
+
+        report = json.loads(out.getvalue())
+        (row,) = report["scenarios"]
+        self.assertEqual(row["units"], 5)
+        self.assertGreaterEqual(row["native_parcels"], 1)
+        self.assertGreaterEqual(row["py3dbp_parcels"], 1)
+        self.assertEqual(report["totals"]["compared"], 1)
@@ -0,0 +1,156 @@
+"""
+Shipping quote cache keyed by cart fingerprint (delivery/services/quote_cache.py).
+"""
+from decimal import Decimal
+from unittest.mock import Mock, patch
+
+from django.conf import settings
+from django.db import connection
+from django.test import TestCase
+
+from delivery.models import ShippingRate
+from delivery.services import rate_card
+from delivery.services.dpd_rates import calculate_order_shipping_dpd
+from delivery.services.quote_cache import get_or_compute_quote, mark_quote_partial
+from delivery.services.quote_orchestrator import QuoteOutcome
+from order.models import CourierService
+from product.models import ProductVariant
+
+
+class ShippingQuoteCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.rate = ShippingRate.objects.create(
+            courier_service=CourierService.objects.create(name="DPD", code="dpd"),
+            country="CZ",
+            channel="HD",
+            category="standard",
+            weight_limit="3",
+            price=Decimal("130.00"),
+        )
+
+    def setUp(self):
+        rate_card.invalidate_rate_card()
+        self.variant_map = {
+            "A": ProductVariant(sku="A", weight_grams=500, length_mm=100, width_mm=100, height_mm=100),
+            "B": ProductVariant(sku="B", weight_grams=900, length_mm=300, width_mm=200, height_mm=100),
+        }
+
+    def _quote(self, compute, items=None, **kwargs):
+        return get_or_compute_quote(
+            courier="dpd",
+            country=kwargs.pop("country", "cz"),
+            items=items or [{"sku": "A", "quantity": 1}, {"sku": "B", "quantity": 2}],
+            compute=compute,
+            variant_map=self.variant_map,
+            params={"currency": "EUR"},
+            **kwargs,
+        )
+
+    def test_same_cart_is_computed_once(self):
+        compute = Mock(return_value={"options": [{"price": Decimal("5.00")}]})
+
+        first = self._quote(compute)
+        # Line order, duplicate lines, sku types and a falsy Decimal COD do not matter.
+        second = self._quote(
+            compute,
+            items=[{"sku": "B", "quantity": 1}, {"sku": "A", "quantity": "1"}, {"sku": "B", "quantity": 1}],
+            cod=Decimal("0.00"),
+            country="CZ",
+        )
+
+        compute.assert_called_once()
+        self.assertEqual(first, second)
+
+    def test_quotes_are_stored_in_the_database_shared_by_workers(self):
+        self._quote(Mock(return_value={"options": []}))
+
+        table = connection.ops.quote_name(settings.CACHES[settings.SHIPPING_QUOTE_CACHE_ALIAS]["LOCATION"])
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT cache_key FROM {table}")
+            keys = [key for (key,) in cursor.fetchall()]
+        self.assertEqual(len(keys), 1)
+        self.assertTrue(keys[0].startswith("shipping:1:shipping-quote:"), keys)
+
+    def test_inputs_of_the_price_change_the_key(self):
+        compute = Mock(return_value={"options": []})
+        self._quote(compute)
+
+        self._quote(compute, cod=True)
+        self._quote(compute, country="SK")
+        self._quote(compute, items=[{"sku": "A", "quantity": 2}, {"sku": "B", "quantity": 2}])
+        self.variant_map["B"].weight_grams = 1500
+        self._quote(compute)
+        self.assertEqual(compute.call_count, 5)
+
+        self.rate.price = Decimal("140.00")
+        self.rate.save()
+        self._quote(compute)
+        with patch("delivery.services.quote_cache.peek_czk_to_eur_rate", return_value="24.50"):
+            self._quote(compute)
+        self.assertEqual(compute.call_count, 7)
+
+    def test_quote_is_stored_under_the_fx_rate_fetched_by_the_calculation(self):
+        compute = Mock(return_value={"options": []})
+        with patch("delivery.services.quote_cache.peek_czk_to_eur_rate", side_effect=[None, "25.00", "25.00"]):
+            self._quote(compute)
+            self._quote(compute)
+        compute.assert_called_once()
+
+    def test_failures_are_not_cached(self):
+        compute = Mock(side_effect=[ValueError("no rate"), {"options": []}])
+        with self.assertRaises(ValueError):
+            self._quote(compute)
+        self.assertEqual(self._quote(compute), {"options": []})
+        self.assertEqual(compute.call_count, 2)
+
+    def test_partial_quotes_are_returned_but_not_cached(self):
+        def compute():
+            compute.calls += 1
+            if compute.calls == 1:
+                mark_quote_partial()
+                return {"options": ["HD"]}
+            return {"options": ["PUDO", "HD"]}
+
+        compute.calls = 0
+
+        self.assertEqual(self._quote(compute), {"options": ["HD"]})
+        self.assertEqual(self._quote(compute), {"options": ["PUDO", "HD"]})
+        self.assertEqual(self._quote(compute), {"options": ["PUDO", "HD"]})
+        self.assertEqual(compute.calls, 2)
+
+    def test_dpd_quote_with_a_timed_out_channel_is_not_cached(self):
+        hd = {"service": "HD", "priceWithVat": Decimal("6.00")}
+        timed_out = {
+            "PUDO": QuoteOutcome(error=TimeoutError("PUDO quote timed out"), timed_out=True),
+            "HD": QuoteOutcome(value=hd),
+        }
+        complete = {"PUDO": QuoteOutcome(value={**hd, "service": "PUDO"}), "HD": QuoteOutcome(value=hd)}
+
+        def compute():
+            return calculate_order_shipping_dpd(
+                country="CZ", items=[{"sku": "A", "quantity": 1}], cod=False, currency="EUR",
+                variant_map=self.variant_map,
+            )
+
+        items = [{"sku": "A", "quantity": 1}]
+        with patch("delivery.services.dpd_rates.run_quotes", side_effect=[timed_out, complete]) as run:
+            partial = self._quote(compute, items=items)
+            quote = self._quote(compute, items=items)
+            self.assertEqual(self._quote(compute, items=items), quote)
+
+        self.assertEqual(run.call_count, 2)
+        self.assertEqual([o["service"] for o in partial["options"]], ["HD"])
+        self.assertEqual([o["service"] for o in quote["options"]], ["PUDO", "HD"])
+
+    def test_dpd_quote_without_any_channel_raises(self):
+        failed = {
+            "PUDO": QuoteOutcome(error=TimeoutError("PUDO quote timed out"), timed_out=True),
+            "HD": QuoteOutcome(error=RuntimeError("boom")),
+        }
+        with patch("delivery.services.dpd_rates.run_quotes", return_value=failed):
+            with self.assertRaisesMessage(ValueError, "DPD: no available options for CZ"):
+                calculate_order_shipping_dpd(
+                    country="CZ", items=[{"sku": "A", "quantity": 1}], cod=False, currency="EUR",
+                    variant_map=self.variant_map,
+                )
@@ -0,0 +1,69 @@
+"""
+Concurrent shipping quote branches (delivery/services/quote_orchestrator.py).
+"""
+import threading
+import time
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from delivery.services.quote_orchestrator import run_quotes
+
+
+def _sleep(seconds, value):
+    def task():
+        time.sleep(seconds)
+        return value
+    return task
+
+
+def _fail():
+    raise ValueError("no rate")
+
+
+@override_settings(SHIPPING_QUOTE_WORKERS=4, SHIPPING_QUOTE_TIMEOUT_SECONDS=5)
+class RunQuotesTests(SimpleTestCase):
+    def test_branches_run_concurrently_in_order(self):
+        started = time.perf_counter()
+        outcomes = run_quotes({name: _sleep(0.2, name) for name in ("zasilkovna", "dpd", "gls")})
+        elapsed = time.perf_counter() - started
+
+        self.assertEqual(list(outcomes), ["zasilkovna", "dpd", "gls"])
+        self.assertEqual([o.value for o in outcomes.values()], ["zasilkovna", "dpd", "gls"])
+        self.assertLess(elapsed, 0.5)
+
+    def test_slow_branch_times_out_without_delaying_the_others(self):
+        release = threading.Event()
+        self.addCleanup(release.set)
+
+        started = time.perf_counter()
+        outcomes = run_quotes(
+            {"dpd": lambda: release.wait(5), "gls": _sleep(0.05, "gls"), "zasilkovna": _fail},
+            timeout=0.3,
+        )
+        elapsed = time.perf_counter() - started
+
+        self.assertTrue(outcomes["dpd"].timed_out)
+        self.assertIn("timed out", str(outcomes["dpd"].error))
+        self.assertEqual(outcomes["gls"].value, "gls")
+        self.assertIsInstance(outcomes["zasilkovna"].error, ValueError)
+        self.assertFalse(outcomes["zasilkovna"].ok)
+        self.assertLess(elapsed, 1)
+
+    @override_settings(SHIPPING_QUOTE_WORKERS=1)
+    def test_nested_calls_do_not_deadlock_a_full_pool(self):
+        def courier(name):
+            return lambda: run_quotes({"PUDO": lambda: f"{name}-PUDO", "HD": lambda: f"{name}-HD"})
+
+        outcomes = run_quotes({name: courier(name) for name in ("dpd", "gls")})
+
+        self.assertEqual(
+            {name: [o.value for o in outcome.value.values()] for name, outcome in outcomes.items()},
+            {"dpd": ["dpd-PUDO", "dpd-HD"], "gls": ["gls-PUDO", "gls-HD"]},
+        )
+
+
+class RunQuotesInTransactionTests(TestCase):
+    def test_branches_run_inline_inside_a_transaction(self):
+        outcomes = run_quotes({"dpd": threading.current_thread, "gls": threading.current_thread})
+
+        self.assertEqual({o.value for o in outcomes.values()}, {threading.current_thread()})
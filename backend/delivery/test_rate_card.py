@@ -0,0 +1,126 @@
+"""
+In-memory ShippingRate card (delivery/services/rate_card.py).
+"""
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+
+from delivery.models import ShippingRate
+from delivery.services import rate_card
+from delivery.services.dpd_rates import _pick_rate_dpd, _resolve_weight_tag_for_country, calculate_dpd_shipping_options
+from delivery.services.gls_rates import _pick_rate_HD, calculate_gls_shipping_options
+from delivery.services.local_rates import _pick_rate, calculate_shipping_options
+from order.models import CourierService
+from product.models import ProductVariant
+from product.response_cache import bump_catalog_versions
+
+
+def _identity(amount):
+    return Decimal(amount)
+
+
+@patch("delivery.services.dpd_rates.convert_czk_to_eur", _identity)
+@patch("delivery.services.gls_rates.convert_czk_to_eur", _identity)
+@patch("delivery.services.local_rates.convert_czk_to_eur", _identity)
+class RateCardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.packeta = CourierService.objects.create(name="Zásilkovna", code="zasilkovna")
+        cls.gls = CourierService.objects.create(name="GLS", code="gls")
+        cls.dpd = CourierService.objects.create(name="DPD", code="dpd")
+
+        cls.packeta_pudo = cls._rate(cls.packeta, "PUDO", "standard", "5", "70.00")
+        cls._rate(cls.packeta, "HD", "standard", "1", "90.00")
+        cls._rate(cls.packeta, "HD", "standard", "over_limit", "150.00")
+        cls._rate(cls.gls, "HD", "standard", "5", "120.00")
+        cls._rate(cls.gls, "HD", "standard", "5", "110.00", address_bundle="multi")
+        cls._rate(cls.dpd, "HD", "standard", "3", "130.00")
+        cls._rate(cls.dpd, "HD", "oversized", "3", "125.00")
+        cls._rate(cls.dpd, "PUDO", "standard", "10", "95.00")
+
+        cls.variant = ProductVariant(
+            sku="RATECARD-1", weight_grams=800, length_mm=200, width_mm=150, height_mm=100,
+        )
+
+    @staticmethod
+    def _rate(courier, channel, category, weight_limit, price, *, address_bundle="one"):
+        return ShippingRate.objects.create(
+            courier_service=courier,
+            country="CZ",
+            channel=channel,
+            category=category,
+            weight_limit=weight_limit,
+            price=Decimal(price),
+            address_bundle=address_bundle,
+        )
+
+    def setUp(self):
+        rate_card.invalidate_rate_card()
+
+    def test_lookups_match_the_database_rules(self):
+        self.assertEqual(_pick_rate("cz", "PUDO", "standard", Decimal("4")).price, Decimal("70.00"))
+        # No 2 kg HD band: falls back to over_limit.
+        self.assertEqual(_pick_rate("CZ", "HD", "standard", Decimal("1.5")).price, Decimal("150.00"))
+        with self.assertRaises(ValueError):
+            _pick_rate("SK", "HD", "standard", Decimal("1"))
+
+        self.assertEqual(_pick_rate_HD("CZ", "standard", "5", "multi").price, Decimal("110.00"))
+        with self.assertRaises(ValueError):
+            _pick_rate_HD("CZ", "oversized", "5", "one")
+
+        self.assertEqual(_pick_rate_dpd(country="CZ", channel="S2H", weight_tag="3").price, Decimal("125.00"))
+        self.assertEqual(
+            _pick_rate_dpd(country="CZ", channel="S2H", weight_tag="3", category="standard").price,
+            Decimal("130.00"),
+        )
+        self.assertEqual(_resolve_weight_tag_for_country(country="CZ", channel="HD", chargeable_kg=Decimal("2")), "3")
+        self.assertEqual(_resolve_weight_tag_for_country(country="CZ", channel="HD", chargeable_kg=Decimal("15")), "10")
+        self.assertIsNone(_resolve_weight_tag_for_country(country="DE", channel="HD", chargeable_kg=Decimal("1")))
+
+    def test_pricing_runs_without_queries_once_loaded(self):
+        rate_card.get_rate_card()
+        items = [{"sku": self.variant.sku, "quantity": 1}]
+        variant_map = {self.variant.sku: self.variant}
+
+        with self.assertNumQueries(0):
+            packeta = calculate_shipping_options("CZ", items, cod=False, currency="EUR", variant_map=variant_map)
+            gls = calculate_gls_shipping_options(country="CZ", items=items, currency="EUR", variant_map=variant_map)
+            dpd = calculate_dpd_shipping_options(country="CZ", items=items, currency="EUR", variant_map=variant_map)
+
+        self.assertEqual([option["channel"] for option in packeta], ["PUDO", "HD"])
+        self.assertTrue(gls["options"])
+        self.assertTrue(dpd)
+
+    def test_rate_edit_reloads_the_card(self):
+        self.assertEqual(_pick_rate("CZ", "PUDO", "standard", Decimal("1")).price, Decimal("70.00"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            rate = ShippingRate.objects.get(pk=self.packeta_pudo.pk)
+            rate.price = Decimal("75.00")
+            rate.save()
+
+        self.assertEqual(_pick_rate("CZ", "PUDO", "standard", Decimal("1")).price, Decimal("75.00"))
+        self.assertIsNotNone(rate_card._current_version())
+
+    def test_other_process_changes_are_picked_up_on_the_next_check(self):
+        card = rate_card.get_rate_card()
+        ShippingRate.objects.filter(pk=self.packeta_pudo.pk).update(price=Decimal("80.00"))
+        bump_catalog_versions([rate_card.SHIPPING_RATES_SCOPE])
+
+        with self.assertNumQueries(0):
+            self.assertIs(rate_card.get_rate_card(), card)
+
+        with override_settings(SHIPPING_RATE_CARD_CHECK_SECONDS=0):
+            self.assertEqual(_pick_rate("CZ", "PUDO", "standard", Decimal("1")).price, Decimal("80.00"))
+
+    def test_bulk_load_bumps_the_version_once(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            with rate_card.deferred_rate_card_bump():
+                self._rate(self.gls, "PUDO", "standard", "5", "90.00")
+                self._rate(self.gls, "PUDO", "standard", "10", "99.00")
+                ShippingRate.objects.filter(courier_service=self.dpd).delete()
+
+        self.assertEqual(callbacks, [rate_card.bump_rate_card_version])
+        with self.assertRaises(ValueError):
+            _pick_rate_dpd(country="CZ", channel="S2H", weight_tag="3")
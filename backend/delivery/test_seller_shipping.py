@@ -2,7 +2,7 @@
 Регрессия: seller shipping estimate вызывает Packeta pipeline (split + calc), не ходит в реальные API.
 """
 from decimal import Decimal
-from unittest.mock import patch
+from unittest.mock import Mock, patch
 
 from django.test import TestCase
 from django.urls import reverse
@@ -11,6 +11,7 @@ from rest_framework.test import APIClient
 
 from accounts.choices import UserRole
 from accounts.models import CustomUser
+from delivery.services.quote_cache import get_or_compute_quote
 from product.models import BaseProduct, ProductStatus, ProductVariant
 from sellers.models import SellerProfile
 from warehouses.models import Warehouse, WarehouseItem
@@ -65,10 +66,10 @@ class SellerShippingOptionsPacketaTests(TestCase):
     def setUp(self):
         self.client = APIClient()
 
-    @patch("delivery.views.calculate_gls_shipping_options")
+    @patch("delivery.views.calc_gls_wrap")
     @patch("delivery.views.calc_dpd_wrap")
-    @patch("delivery.views.calc_packeta")
-    @patch("delivery.views.split_packeta")
+    @patch("delivery.services.shipping_split.calculate_shipping_options")
+    @patch("delivery.services.shipping_split.split_items_into_parcels")
     def test_invokes_packeta_split_and_rate_for_zasilkovna_block(
         self,
         mock_split,
@@ -151,3 +152,52 @@ class SellerShippingOptionsPacketaTests(TestCase):
 
         self.assertIn("couriers", response.data)
         self.assertIn("zasilkovna", response.data["couriers"])
+
+    @patch("delivery.views.calc_gls_wrap", return_value={"options": []})
+    @patch("delivery.views.calc_dpd_wrap", return_value={"total_parcels": {"HD": 1}, "options": []})
+    @patch("delivery.services.shipping_split.calculate_shipping_options", return_value=[])
+    @patch("delivery.services.shipping_split.split_items_into_parcels")
+    def test_repeated_estimate_is_served_from_quote_cache(self, mock_split, mock_calc_packeta, mock_dpd, mock_gls):
+        items = [{"sku": self.variant.sku, "quantity": 2}]
+        mock_split.return_value = [items]
+        url = reverse("seller-shipping-options")
+        body = {"seller_id": self.seller_profile.id, "destination_country": "cz", "items": items}
+
+        first = self.client.post(url, body, format="json")
+        second = self.client.post(url, body, format="json")
+
+        self.assertEqual(first.data, second.data)
+        mock_split.assert_called_once()
+        mock_dpd.assert_called_once()
+        mock_gls.assert_called_once()
+
+        # Checkout prices the same cart through the same cache entry.
+        checkout_compute = Mock()
+        get_or_compute_quote(
+            courier="dpd",
+            country="CZ",
+            items=[{"sku": self.variant.sku, "quantity": 2}],
+            cod=False,
+            variant_map={self.variant.sku: self.variant},
+            params={"currency": "EUR"},
+            compute=checkout_compute,
+        )
+        checkout_compute.assert_not_called()
+
+    @patch("delivery.views.calc_gls_wrap", return_value={"options": []})
+    @patch("delivery.views.calc_dpd_wrap", return_value={"total_parcels": {"HD": 1}, "options": []})
+    @patch("delivery.services.shipping_split.calculate_shipping_options")
+    @patch("delivery.services.shipping_split.split_items_into_parcels")
+    def test_failed_packeta_parcel_is_reported_and_not_cached(self, mock_split, mock_calc_packeta, mock_dpd, mock_gls):
+        items = [{"sku": self.variant.sku, "quantity": 2}]
+        mock_split.return_value = [items[:1], items[:1]]
+        mock_calc_packeta.side_effect = [[], ValueError("no rate"), [], []]
+        url = reverse("seller-shipping-options")
+        body = {"seller_id": self.seller_profile.id, "destination_country": "cz", "items": items}
+
+        first = self.client.post(url, body, format="json")
+        self.assertIn("parcel #2 calculation failed", first.data["couriers"]["zasilkovna"]["error"])
+
+        second = self.client.post(url, body, format="json")
+        self.assertNotIn("error", second.data["couriers"]["zasilkovna"])
+        self.assertEqual(mock_split.call_count, 2)
@@ -0,0 +1,55 @@
+"""
+Integer shipping profiles (delivery/services/shipping_profile.py) in the split/rate loops.
+"""
+from decimal import Decimal
+
+from django.test import SimpleTestCase
+
+from delivery.services.dpd_rates import _calc_parcel_chargeable
+from delivery.services.local_rates import HD_CATEGORIES, PUDO_CATEGORIES, _category, _stack_dims_by_height
+from delivery.services.shipping_profile import g_limit, mm_limit, shipping_profile
+from delivery.services.shipping_split import NORMAL_LIMITS, _pack_units
+from product.models import ProductVariant
+
+
+class ShippingProfileTests(SimpleTestCase):
+    def test_profile_is_memoised_until_a_source_field_changes(self):
+        variant = ProductVariant(sku="P1", weight_grams=1200, length_mm=300, width_mm=200, height_mm=None)
+
+        profile = shipping_profile(variant)
+        self.assertEqual(profile.source, (300, 200, 0, 1200))
+        self.assertEqual((profile.volume_mm3, profile.max_side_mm, profile.sum_sides_mm), (0, 300, 500))
+        self.assertIs(shipping_profile(variant), profile)
+
+        variant.height_mm = 100
+        self.assertEqual(shipping_profile(variant).volume_mm3, 6_000_000)
+
+    def test_limits_round_down_to_whole_units(self):
+        self.assertEqual(mm_limit(Decimal("120.00")), 1200)
+        self.assertEqual(mm_limit(Decimal("12.35")), 123)
+        self.assertEqual(g_limit(Decimal("31.5")), 31_500)
+        self.assertEqual(NORMAL_LIMITS, (15_000, 1200, 1500))
+
+    def test_categories_keep_the_price_list_boundaries(self):
+        self.assertEqual(_category(PUDO_CATEGORIES, 5_000, 700, 1_200), "standard")
+        self.assertEqual(_category(PUDO_CATEGORIES, 5_001, 700, 1_200), "oversized")
+        self.assertIsNone(_category(PUDO_CATEGORIES, 15_000, 1_200, 1_501))
+        self.assertEqual(_category(HD_CATEGORIES, 30_000, 1_200, 1_501), "extended")
+
+    def test_split_and_rates_agree_on_stacked_dimensions(self):
+        vmap = {
+            "A": ProductVariant(sku="A", weight_grams=4_000, length_mm=600, width_mm=400, height_mm=200),
+            "B": ProductVariant(sku="B", weight_grams=500, length_mm=300, width_mm=300, height_mm=150),
+        }
+        units = [{"sku": "A", "quantity": 1}] * 4 + [{"sku": "B", "quantity": 1}]
+
+        parcels = _pack_units(units, vmap, NORMAL_LIMITS)
+
+        for parcel in parcels:
+            length, width, height = _stack_dims_by_height(parcel, vmap)
+            self.assertLessEqual(length + width + height, 1500)
+            self.assertLessEqual(sum(vmap[u["sku"]].weight_grams for u in parcel), 15_000)
+        self.assertEqual(sum(len(p) for p in parcels), 5)
+
+        gross, volumetric, chargeable = _calc_parcel_chargeable([{"sku": "A", "quantity": 2}], vmap)
+        self.assertEqual((gross, volumetric, chargeable), (Decimal("8.00"), Decimal("13.71"), Decimal("13.71")))
@@ -15,18 +15,21 @@ from .serializers import (
 from .validators.zip_utils import uppercase_zip
 from .validators.zip_validator import ZipCodeValidator
 from .services.shipping_split import (
-    split_items_into_parcels as split_packeta,
-    combine_parcel_options,
+    calculate_order_shipping as calc_packeta_wrap,  # Packeta wrapper: split + per-parcel + aggregate
+)
+from .services.gls_rates import (
+    calculate_order_shipping_gls as calc_gls_wrap,  # GLS wrapper: split -> address_bundle -> aggregate
 )
-from .services.local_rates import calculate_shipping_options as calc_packeta
-from .services.gls_split import split_items_into_parcels_gls as split_gls
-from .services.gls_rates import calculate_gls_shipping_options
 from .services.dpd_rates import (
     calculate_order_shipping_dpd as calc_dpd_wrap,  # DPD wrapper: split + aggregate
 )
+from .services.quote_cache import get_or_compute_quote
+from .services.quote_orchestrator import run_quotes
 
 logger = logging.getLogger(__name__)
 
+COURIER_LABELS = {"zasilkovna": "Zásilkovna", "dpd": "DPD", "gls": "GLS"}
+
 
 @extend_schema(
     operation_id="seller_shipping_options",
@@ -201,46 +204,55 @@ class SellerShippingOptionsView(APIView):
             "meta": {"country": country, "currency": currency},
         }
 
-        # 3) Zásilkovna: split -> per-parcel -> aggregate
-        try:
-            packeta_parcels = split_packeta(country=country, items=items, cod=cod, currency=currency)
-            packeta_per_parcel = [
-                calc_packeta(country=country, items=p, cod=cod, currency=currency)
-                for p in packeta_parcels
-            ]
-            payload["couriers"]["zasilkovna"] = combine_parcel_options(packeta_per_parcel)
-        except Exception as e:
-            logger.exception("Zásilkovna calculation failed: country=%s", country)
-            payload["couriers"]["zasilkovna"] = {"error": str(e)}
+        # 3) Zásilkovna and GLS: the same order-level calculations as checkout, so the
+        #    shared quote cache entries hold the same thing (services/quote_cache.py).
+        def packeta_quote():
+            return calc_packeta_wrap(country=country, items=items, cod=cod, currency=currency)
+
+        def gls_quote():
+            return calc_gls_wrap(country=country, items=items, currency=currency, cod=cod, variant_map=vmap)
+
+        # Quotes are cached by cart fingerprint and reused by checkout (services/quote_cache.py).
+        quote_args = {"country": country, "items": items, "cod": cod, "variant_map": vmap}
 
         # 4) DPD: wrapper handles split & aggregation internally (PUDO + HD)
-        try:
-            dpd_summary = calc_dpd_wrap(
-                country=country, items=items, cod=cod, currency=currency, variant_map=vmap
+        def dpd_quote():
+            dpd_summary = get_or_compute_quote(
+                courier="dpd",
+                params={"currency": currency},
+                compute=lambda: calc_dpd_wrap(
+                    country=country, items=items, cod=cod, currency=currency, variant_map=vmap
+                ),
+                **quote_args,
             )
             totals = dpd_summary.get("total_parcels") or {}
             total_parcels_unified = max(totals.values()) if totals else 0  # single int for UI
-            payload["couriers"]["dpd"] = {
+            return {
                 "total_parcels": total_parcels_unified,
                 "options": dpd_summary.get("options", []),
             }
-        except Exception as e:
-            logger.exception("DPD calculation failed: country=%s", country)
-            payload["couriers"]["dpd"] = {"error": str(e)}
 
-        # 5) GLS: split -> address_bundle -> per-parcel -> aggregate
-        try:
-            gls_summary = calculate_gls_shipping_options(
-                country=country,
-                items=items,
-                currency=currency,
-                cod=cod,
-                variant_map=vmap
-            )
-            payload["couriers"]["gls"] = gls_summary
-        except Exception as e:
-            logger.exception("GLS calculation failed: country=%s", country)
-            payload["couriers"]["gls"] = {"error": str(e)}
+        # 5) Couriers are independent: computed concurrently, each bounded by
+        # SHIPPING_QUOTE_TIMEOUT_SECONDS; a failed or slow courier gets {"error": ...}
+        # (services/quote_orchestrator.py).
+        outcomes = run_quotes({
+            "zasilkovna": lambda: get_or_compute_quote(
+                courier="zasilkovna", params={"currency": currency}, compute=packeta_quote, **quote_args
+            ),
+            "dpd": dpd_quote,
+            "gls": lambda: get_or_compute_quote(
+                courier="gls", params={"currency": currency}, compute=gls_quote, **quote_args
+            ),
+        })
+        for courier, outcome in outcomes.items():
+            if outcome.ok:
+                payload["couriers"][courier] = outcome.value
+            else:
+                logger.error(
+                    "%s calculation failed: country=%s", COURIER_LABELS[courier], country,
+                    exc_info=None if outcome.timed_out else outcome.error,
+                )
+                payload["couriers"][courier] = {"error": str(outcome.error)}
         return Response(payload, status=status.HTTP_200_OK)
 
 
@@ -0,0 +1,17 @@
+from django.db.models import BooleanField, Exists, OuterRef, Value
+
+from .models import Favorite
+
+
+def annotate_is_favorite(qs, user):
+    """
+    Annotate a BaseProduct queryset with ``is_favorite`` for ``user``.
+
+    Product serializers read the annotation instead of querying Favorite per
+    row, so a page costs one query regardless of its size.
+    """
+    if user is None or not user.is_authenticated:
+        return qs.annotate(is_favorite=Value(False, output_field=BooleanField()))
+    return qs.annotate(
+        is_favorite=Exists(Favorite.objects.filter(user=user, product=OuterRef("pk")))
+    )
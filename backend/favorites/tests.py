@@ -1,3 +1,108 @@
+from decimal import Decimal
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.choices import UserRole
+from accounts.models import CustomUser
+from product.models import BaseProduct, Category, ProductStatus, ProductVariant
+from sellers.models import SellerProfile
+
+from .models import Favorite
+
+
+class IsFavoriteAnnotationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller_user = CustomUser.objects.create_user(
+            email="seller-favorite-flag@example.com",
+            password="pass12345",
+            first_name="S",
+            last_name="F",
+            role=UserRole.SELLER,
+            phone_number="+420730000511",
+        )
+        cls.seller_profile = SellerProfile.objects.get(user=seller_user)
+        cls.customer = CustomUser.objects.create_user(
+            email="customer-favorite-flag@example.com",
+            password="pass12345",
+            first_name="C",
+            last_name="F",
+            role=UserRole.CUSTOMER,
+            phone_number="+420730000512",
+        )
+        cls.category = Category.objects.create(name="FavoriteFlagCategory")
+        cls.liked = cls._product("Liked", "3300000001")
+        cls.other = cls._product("Other", "3300000002")
+        Favorite.objects.create(user=cls.customer, product=cls.liked)
+
+    @classmethod
+    def _product(cls, name, article):
+        product = BaseProduct.objects.create(
+            name=name,
+            product_description="d",
+            seller=cls.seller_profile,
+            category=cls.category,
+            article=article,
+            vat_rate=Decimal("21.00"),
+            status=ProductStatus.APPROVED,
+            is_active=True,
+        )
+        ProductVariant.objects.create(
+            product=product,
+            name="V",
+            text="t",
+            price=Decimal("10.00"),
+            weight_grams=100,
+            length_mm=50,
+            width_mm=50,
+            height_mm=50,
+        )
+        return product
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.customer)
+
+    def _flags(self, url):
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return {row["id"]: row["is_favorite"] for row in response.data["results"]}
+
+    def test_list_endpoints_flag_favorites(self):
+        expected = {self.liked.id: True, self.other.id: False}
+        self.assertEqual(
+            self._flags(reverse("category-products", kwargs={"category_id": self.category.id})),
+            expected,
+        )
+        self.assertEqual(
+            self._flags(reverse("seller-products", kwargs={"seller_id": self.seller_profile.id})),
+            expected,
+        )
+        self.assertEqual(self._flags(reverse("favorite-products")), {self.liked.id: True})
+
+        response = self.client.get(reverse("product-detail", kwargs={"id": self.liked.id}))
+        self.assertTrue(response.data["is_favorite"])
+
+    def test_anonymous_user_sees_no_favorites(self):
+        self.client.force_authenticate(None)
+        flags = self._flags(reverse("category-products", kwargs={"category_id": self.category.id}))
+        self.assertEqual(set(flags.values()), {False})
+
+    def test_query_count_does_not_grow_with_page_size(self):
+        url = reverse("category-products", kwargs={"category_id": self.category.id})
+        with CaptureQueriesContext(connection) as before:
+            self.client.get(url)
+
+        for index in range(5):
+            product = self._product(f"Extra {index}", f"33000001{index:02d}")
+            Favorite.objects.create(user=self.customer, product=product)
 
-# Create your tests here.
+        with CaptureQueriesContext(connection) as after:
+            response = self.client.get(url)
+        self.assertEqual(len(response.data["results"]), 7)
+        self.assertEqual(len(after), len(before))
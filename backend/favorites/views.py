@@ -1,13 +1,13 @@
+from django.db.models import BooleanField, Value
 from rest_framework import status
 from rest_framework.views import APIView
 from rest_framework.generics import ListAPIView
 from rest_framework.response import Response
 from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter, extend_schema_view
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Min, F, ExpressionWrapper, DecimalField
 
 from .models import Favorite
-from product.constants import ACQUIRING_RATE
+from product.catalog_listing import annotate_with_catalog_listing
 from product.models import BaseProduct
 from product.serializers import BaseProductListSerializer
 from product.pagination import StandardResultsSetPagination
@@ -96,29 +96,25 @@ class FavoriteProductListAPIView(ListAPIView):
         user = self.request.user
         sort_by = self.request.query_params.get('sort_by', None)
 
-        # Расчёт min цены с эквайрингом (ACQUIRING_RATE)
-        products = BaseProduct.objects.filter(
-            favorite__user=user
-        ).annotate(
-            raw_min_price=Min('variants__price'),
-            annotated_min_price_with_acquiring=ExpressionWrapper(
-                F('raw_min_price') * ACQUIRING_RATE,
-                output_field=DecimalField(max_digits=10, decimal_places=2)
-            )
-        ).filter(
-            raw_min_price__isnull=False
+        # Цены/остатки читаются из CatalogListing; (user, product) уникальны,
+        # поэтому distinct не нужен.
+        products = annotate_with_catalog_listing(
+            BaseProduct.objects.filter(favorite__user=user)
+        ).select_related(
+            'seller',
         ).prefetch_related(
-            'images',
-            'variants',
             'product_parameters',
-        ).distinct()
+        ).annotate(
+            # Все товары списка — избранное пользователя.
+            is_favorite=Value(True, output_field=BooleanField()),
+        )
 
         if sort_by == 'popular':
             products = products.order_by('-rating')
         elif sort_by == 'price_asc':
-            products = products.order_by('annotated_min_price_with_acquiring')
+            products = products.order_by('final_min_price')
         elif sort_by == 'price_desc':
-            products = products.order_by('-annotated_min_price_with_acquiring')
+            products = products.order_by('-final_min_price')
         else:
             products = products.order_by('-favorite__added_at')
 
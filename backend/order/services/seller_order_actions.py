@@ -6,6 +6,7 @@ from django.db import transaction
 from django.http import Http404
 from rest_framework.exceptions import PermissionDenied, ValidationError
 
+from analytics.rollup import buckets_for_order, schedule_order_refresh
 from delivery.models import DeliveryParcel
 from order.models import (
     Order,
@@ -204,6 +205,8 @@ class SellerOrderActionsService:
             order.save(update_fields=["order_status"])
 
             order.order_products.update(status=ProductStatus.CANCELED)
+            # QuerySet.update() skips the OrderProduct signals that keep the dashboard rollup current.
+            schedule_order_refresh(buckets_for_order(order, (order.delivery_date,)))
 
             OrderEvent.objects.create(
                 order=order,
@@ -98,12 +98,13 @@ def create_checkout_stock_reservation_if_enabled(
     Reserve stock after checkout validation, before PSP session creation.
 
     No-op when ``STOCK_RESERVATION_ENABLED`` is False (preserves legacy behaviour).
-    Maps ``InsufficientStockError.detail`` to HTTP 409 via ``error_cls``.
+    Maps ``InsufficientStockError.detail`` to HTTP 409 and
+    ``StockLockTimeoutError`` (stock rows busy) to HTTP 503 via ``error_cls``.
     """
     if not getattr(settings, "STOCK_RESERVATION_ENABLED", False):
         return
 
-    from warehouses.exceptions import InsufficientStockError
+    from warehouses.exceptions import InsufficientStockError, StockLockTimeoutError
     from warehouses.services.reservation import StockReservationService
 
     try:
@@ -115,6 +116,16 @@ def create_checkout_stock_reservation_if_enabled(
         )
     except InsufficientStockError as exc:
         raise error_cls({"stock": exc.detail}, http_status=409) from exc
+    except StockLockTimeoutError as exc:
+        raise error_cls(
+            {
+                "stock": {
+                    "detail": "Stock is busy, please try again.",
+                    "retry_after": exc.detail.get("retry_after", 1),
+                },
+            },
+            http_status=503,
+        ) from exc
 
 
 def confirm_checkout_stock_reservation_if_enabled(session_key: str) -> None:
@@ -21,8 +21,8 @@ from typing import Optional
 
 from delivery.helpers import resolve_country_code_from_group
 from delivery.services.dpd_rates import calculate_order_shipping_dpd
-from delivery.services.gls_rates import calculate_gls_shipping_options
-from delivery.services.gls_split import split_items_into_parcels_gls
+from delivery.services.gls_rates import calculate_order_shipping_gls
+from delivery.services.quote_cache import get_or_compute_quote
 from delivery.services.shipping_split import calculate_order_shipping
 from delivery.validators.validators import validate_phone_matches_country
 from delivery.validators.zip_utils import uppercase_zip
@@ -220,36 +220,61 @@ def build_stripe_checkout_context(
         items_for_calc = [{"sku": p["sku"], "quantity": p["quantity"]} for p in products]
         cod = Decimal("0.00")
 
-        if courier_code == "gls":
-            gls_blocks = split_items_into_parcels_gls(items_for_calc)
-            address_bundle = "one" if len(gls_blocks) == 1 else "multi"
-            shipping_result = calculate_gls_shipping_options(
-                country=country_code,
-                items=items_for_calc,
-                cod=cod,
-                currency="EUR",
-                address_bundle=address_bundle,
-            )
-            logger.info("[GLS] group=%s seller=%s result=%s", idx, seller_id, shipping_result)
-
-        elif courier_code == "dpd":
-            shipping_result = calculate_order_shipping_dpd(
-                country=country_code,
-                items=items_for_calc,
-                cod=False,
-                currency="EUR",
-                variant_map=variant_map,
-            )
-            logger.info("[DPD] Shipping result for group %s: %s", idx, shipping_result)
+        # Same cache as the seller quote endpoint (delivery/services/quote_cache.py).
+        quote_args = {
+            "country": country_code,
+            "items": items_for_calc,
+            "cod": cod,
+            "variant_map": variant_map,
+            "params": {"currency": "EUR"},
+        }
+
+        try:
+            if courier_code == "gls":
+                shipping_result = get_or_compute_quote(
+                    courier="gls",
+                    compute=lambda: calculate_order_shipping_gls(
+                        country=country_code,
+                        items=items_for_calc,
+                        cod=cod,
+                        currency="EUR",
+                        variant_map=variant_map,
+                    ),
+                    **quote_args,
+                )
+                logger.info("[GLS] group=%s seller=%s result=%s", idx, seller_id, shipping_result)
+
+            elif courier_code == "dpd":
+                shipping_result = get_or_compute_quote(
+                    courier="dpd",
+                    compute=lambda: calculate_order_shipping_dpd(
+                        country=country_code,
+                        items=items_for_calc,
+                        cod=False,
+                        currency="EUR",
+                        variant_map=variant_map,
+                    ),
+                    **quote_args,
+                )
+                logger.info("[DPD] Shipping result for group %s: %s", idx, shipping_result)
 
-        else:
-            shipping_result = calculate_order_shipping(
-                country=country_code,
-                items=items_for_calc,
-                cod=cod,
-                currency="EUR",
-            )
-            logger.info("[Packeta] Shipping result for group %s: %s", idx, shipping_result)
+            else:
+                shipping_result = get_or_compute_quote(
+                    courier="zasilkovna",
+                    compute=lambda: calculate_order_shipping(
+                        country=country_code,
+                        items=items_for_calc,
+                        cod=cod,
+                        currency="EUR",
+                    ),
+                    **quote_args,
+                )
+                logger.info("[Packeta] Shipping result for group %s: %s", idx, shipping_result)
+        except ValueError as exc:
+            logger.warning("Shipping calculation failed for group %s (%s): %s", idx, courier_code, exc)
+            raise StripeSessionBuildError(
+                {"error": f"Group {idx}: shipping calculation failed: {exc}"},
+            ) from exc
 
         # Канал доставки
         channel = _CHANNEL_MAP.get(delivery_type)
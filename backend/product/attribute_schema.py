@@ -1,12 +1,15 @@
 from __future__ import annotations
 
+import threading
 from dataclasses import dataclass
 from decimal import Decimal, InvalidOperation
-from typing import Iterable
+from types import MappingProxyType
+from typing import Iterable, Mapping
 
 from django.db.models import Prefetch
 from rest_framework import serializers
 
+from .category_tree import get_category_tree
 from .models import (
     BaseProduct,
     Category,
@@ -14,6 +17,8 @@ from .models import (
     CategoryAttributeOption,
     ProductAttributeValue,
 )
+from .response_cache import ATTRIBUTE_SCHEMA_SCOPE, CATEGORY_TREE_SCOPE, get_catalog_versions
+from .search_index import refresh_search_documents
 
 
 @dataclass(frozen=True)
@@ -23,6 +28,27 @@ class EffectiveAttribute:
     is_inherited: bool
 
 
+@dataclass(frozen=True)
+class CategoryAttributeSchema:
+    """
+    Resolved, memoized attribute schema of one category.
+
+    Shared between requests: treat definitions and their prefetched active
+    ``options`` as read-only.
+    """
+
+    category_id: int
+    attributes: tuple[EffectiveAttribute, ...]
+    by_code: Mapping[str, CategoryAttributeDefinition]
+    by_id: Mapping[int, CategoryAttributeDefinition]
+
+    def __iter__(self):
+        return iter(self.attributes)
+
+    def __len__(self):
+        return len(self.attributes)
+
+
 def category_allows_products(category: Category | None) -> bool:
     if category is None:
         return False
@@ -32,11 +58,43 @@ def category_allows_products(category: Category | None) -> bool:
 def get_effective_attribute_schema(category: Category | None) -> list[EffectiveAttribute]:
     if category is None:
         return []
+    return list(get_category_attribute_schema(category).attributes)
+
+
+# Memo of resolved schemas per category. Entries are keyed by the versions of
+# the category tree and of attribute definitions/options (CatalogCacheVersion,
+# bumped on commit for other processes); signals in this process also clear
+# the memo immediately via invalidate_attribute_schemas().
+_schema_lock = threading.Lock()
+_schema_memo: dict[int, tuple[tuple, CategoryAttributeSchema]] = {}
 
-    categories = list(category.get_ancestors(include_self=True))
+_SCHEMA_VERSION_SCOPES = [CATEGORY_TREE_SCOPE, ATTRIBUTE_SCHEMA_SCOPE]
+
+
+def get_category_attribute_schema(category: Category) -> CategoryAttributeSchema:
+    versions = get_catalog_versions(_SCHEMA_VERSION_SCOPES)
+    key = tuple(versions.get(scope) for scope in _SCHEMA_VERSION_SCOPES)
+    with _schema_lock:
+        memo = _schema_memo.get(category.pk)
+        if memo is not None and memo[0] == key:
+            return memo[1]
+
+    schema = _build_category_attribute_schema(category)
+    with _schema_lock:
+        _schema_memo[category.pk] = (key, schema)
+    return schema
+
+
+def invalidate_attribute_schemas() -> None:
+    with _schema_lock:
+        _schema_memo.clear()
+
+
+def _build_category_attribute_schema(category: Category) -> CategoryAttributeSchema:
+    category_ids = get_category_tree().ancestor_ids(category.pk, include_self=True)
     definitions = (
         CategoryAttributeDefinition.objects.filter(
-            category__in=categories,
+            category_id__in=category_ids,
             is_active=True,
         )
         .select_related('category')
@@ -59,9 +117,15 @@ def get_effective_attribute_schema(category: Category | None) -> list[EffectiveA
             is_inherited=definition.category_id != category.id,
         )
 
-    return sorted(
+    attributes = tuple(sorted(
         by_code.values(),
         key=lambda item: (item.definition.sort_order, item.definition.id),
+    ))
+    return CategoryAttributeSchema(
+        category_id=category.pk,
+        attributes=attributes,
+        by_code=MappingProxyType({item.definition.code: item.definition for item in attributes}),
+        by_id=MappingProxyType({item.definition.id: item.definition for item in attributes}),
     )
 
 
@@ -69,8 +133,11 @@ def validate_product_attribute_payload(
     product: BaseProduct,
     payload: Iterable[dict],
 ) -> list[dict]:
-    effective_schema = get_effective_attribute_schema(product.category)
-    definitions_by_id = {item.definition.id: item.definition for item in effective_schema}
+    if product.category is None:
+        effective_schema, definitions_by_id = (), {}
+    else:
+        effective_schema = get_category_attribute_schema(product.category)
+        definitions_by_id = effective_schema.by_id
     required_ids = {item.definition.id for item in effective_schema if item.definition.is_required}
 
     normalized_values = []
@@ -142,11 +209,11 @@ def _normalize_attribute_value(definition: CategoryAttributeDefinition, item: di
 
     if data_type == CategoryAttributeDefinition.DataType.ENUM:
         option_id = item.get('value_option')
-        option = CategoryAttributeOption.objects.filter(
-            pk=option_id,
-            attribute_definition=definition,
-            is_active=True,
-        ).first()
+        # Active options are prefetched with the schema definitions.
+        option = next(
+            (option for option in definition.options.all() if option.is_active and option.pk == option_id),
+            None,
+        )
         if option is None:
             raise serializers.ValidationError({'value_option': ['Option is not valid for this attribute.']})
         normalized['value_option'] = option
@@ -163,4 +230,7 @@ def replace_product_attribute_values(product: BaseProduct, payload: Iterable[dic
         ProductAttributeValue(product=product, **value)
         for value in normalized_values
     ]
-    return ProductAttributeValue.objects.bulk_create(created_values)
+    created = ProductAttributeValue.objects.bulk_create(created_values)
+    # bulk_create bypasses post_save, so refresh the search document explicitly.
+    refresh_search_documents([product.pk])
+    return created
@@ -0,0 +1,214 @@
+"""
+Catalog listing read model (CatalogListing) maintenance and read helpers.
+
+Public list endpoints (category, search, seller, favorites) read prices, order
+counts, stock totals and the cover image from ``CatalogListing`` instead of
+recomputing ``Min(variants__price)`` and the OrderProduct / WarehouseItem
+subqueries on every request.
+
+Write paths call ``refresh_catalog_listings(product_ids)`` (via product/signals.py);
+the refresh itself reuses the same aggregate expressions as the old per-request
+queryset, so values are identical — they are just computed once per write.
+"""
+from __future__ import annotations
+
+from decimal import Decimal, ROUND_HALF_UP
+from typing import Iterable
+
+from django.db.models import F, Min, OuterRef, QuerySet, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+from .constants import ACQUIRING_RATE
+from .models import BaseProduct, BaseProductImage, CatalogListing, Category, ProductVariant
+from .stock_availability import annotate_products_with_total_available
+
+CATALOG_LISTING_FIELDS = (
+    "base_min_price",
+    "final_min_price",
+    "ordered_quantity",
+    "total_available_quantity",
+    "cover_image_url",
+    "category_path",
+)
+
+_REFRESH_BATCH_SIZE = 500
+
+_UPDATE_FIELDS = [
+    "base_min_price",
+    "final_min_price",
+    "ordered_quantity",
+    "total_available_quantity",
+    "cover_image_url",
+    "brand",
+    "category",
+    "category_path",
+    "status",
+    "is_active",
+    "updated_at",
+]
+
+
+def compute_final_min_price(base_min_price: Decimal | None) -> Decimal | None:
+    if base_min_price is None:
+        return None
+    return (base_min_price * ACQUIRING_RATE).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+
+
+def build_category_path(category: Category | None) -> str:
+    if category is None:
+        return ""
+    return " > ".join(c.name for c in category.get_ancestors(include_self=True))
+
+
+def _annotate_listing_sources(qs: QuerySet) -> QuerySet:
+    # Imported lazily: order.models imports product.models.
+    from order.models import OrderProduct
+
+    min_price_sq = (
+        ProductVariant.objects.filter(product_id=OuterRef("pk"))
+        .values("product_id")
+        .annotate(min_price=Min("price"))
+        .values("min_price")[:1]
+    )
+    ordered_total_sq = (
+        OrderProduct.objects
+        .filter(product__product=OuterRef("pk"))
+        .values("product__product")
+        .annotate(total=Sum("quantity"))
+        .values("total")[:1]
+    )
+    cover_image_sq = (
+        BaseProductImage.objects.filter(product_id=OuterRef("pk"))
+        .order_by("id")
+        .values("image")[:1]
+    )
+    qs = qs.annotate(
+        listing_base_min_price=Subquery(min_price_sq),
+        listing_ordered_quantity=Coalesce(Subquery(ordered_total_sq), 0),
+        listing_cover_image=Subquery(cover_image_sq),
+    )
+    return annotate_products_with_total_available(qs)
+
+
+def _cover_image_url(name: str | None) -> str:
+    if not name:
+        return ""
+    storage = BaseProductImage._meta.get_field("image").storage
+    return storage.url(name)
+
+
+def refresh_catalog_listings(product_ids: Iterable[int]) -> int:
+    """
+    Recompute and upsert CatalogListing rows for the given products.
+
+    Unknown / deleted product IDs are ignored (their rows cascade away).
+    Returns the number of rows written.
+    """
+    ids = sorted({int(pk) for pk in product_ids if pk is not None})
+    written = 0
+    for start in range(0, len(ids), _REFRESH_BATCH_SIZE):
+        written += _refresh_batch(ids[start:start + _REFRESH_BATCH_SIZE])
+    return written
+
+
+def _refresh_batch(product_ids: list[int]) -> int:
+    products = list(
+        _annotate_listing_sources(BaseProduct.objects.filter(pk__in=product_ids))
+        .select_related("category")
+        .only("id", "brand_id", "category", "status", "is_active")
+    )
+    if not products:
+        return 0
+
+    category_paths: dict[int, str] = {}
+    rows = []
+    for product in products:
+        category_id = product.category_id
+        if category_id is not None and category_id not in category_paths:
+            category_paths[category_id] = build_category_path(product.category)
+
+        base_min_price = product.listing_base_min_price
+        rows.append(
+            CatalogListing(
+                product_id=product.pk,
+                base_min_price=base_min_price,
+                final_min_price=compute_final_min_price(base_min_price),
+                ordered_quantity=max(0, int(product.listing_ordered_quantity or 0)),
+                total_available_quantity=max(0, int(product.total_available_quantity or 0)),
+                cover_image_url=_cover_image_url(product.listing_cover_image),
+                brand_id=product.brand_id,
+                category_id=category_id,
+                category_path=category_paths.get(category_id, ""),
+                status=product.status,
+                is_active=product.is_active,
+            )
+        )
+
+    CatalogListing.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["product"],
+        update_fields=_UPDATE_FIELDS,
+    )
+    return len(rows)
+
+
+def refresh_catalog_listings_for_variants(variant_ids: Iterable[int]) -> int:
+    product_ids = (
+        ProductVariant.objects.filter(pk__in=list(variant_ids))
+        .values_list("product_id", flat=True)
+        .distinct()
+    )
+    return refresh_catalog_listings(list(product_ids))
+
+
+def _listing_visibility(product_ids: list[int]) -> dict[int, tuple[bool, Decimal | None]]:
+    rows = CatalogListing.objects.filter(product_id__in=product_ids).values_list(
+        "product_id", "total_available_quantity", "base_min_price"
+    )
+    return {product_id: (quantity > 0, price) for product_id, quantity, price in rows}
+
+
+def refresh_catalog_listings_for_stock(variant_ids: Iterable[int]) -> tuple[list[int], list[int]]:
+    """
+    Refresh listings after stock or sales of ``variant_ids`` changed.
+
+    Returns ``(product_ids, visibility_changed)``: the refreshed products and
+    those whose state in category lists changed (availability crossed zero or
+    the min price moved). Exact counts alone do not count as a change.
+    """
+    product_ids = sorted(
+        ProductVariant.objects.filter(pk__in=list(variant_ids))
+        .values_list("product_id", flat=True)
+        .distinct()
+    )
+    before = _listing_visibility(product_ids)
+    refresh_catalog_listings(product_ids)
+    after = _listing_visibility(product_ids)
+    return product_ids, [pk for pk in product_ids if before.get(pk) != after.get(pk)]
+
+
+def refresh_catalog_listings_for_categories(category_ids: Iterable[int]) -> int:
+    """Refresh every product under the given categories (including descendants)."""
+    categories = Category.objects.filter(pk__in=list(category_ids))
+    subtree_ids: set[int] = set()
+    for category in categories:
+        subtree_ids.update(category.get_descendants(include_self=True).values_list("id", flat=True))
+    if not subtree_ids:
+        return 0
+    product_ids = BaseProduct.objects.filter(category_id__in=subtree_ids).values_list("id", flat=True)
+    return refresh_catalog_listings(list(product_ids))
+
+
+def annotate_with_catalog_listing(qs: QuerySet) -> QuerySet:
+    """
+    Expose CatalogListing columns under the names list serializers/filters expect
+    (``base_min_price``, ``final_min_price``, ``ordered_quantity``,
+    ``total_available_quantity``, ``cover_image_url``, ``category_path``).
+
+    Products without a listing row or without variants are excluded, matching the
+    old ``base_min_price__isnull=False`` behaviour.
+    """
+    return qs.filter(catalog_listing__base_min_price__isnull=False).annotate(
+        **{field: F(f"catalog_listing__{field}") for field in CATALOG_LISTING_FIELDS}
+    )
@@ -0,0 +1,157 @@
+"""
+In-memory category tree.
+
+The whole MPTT tree is loaded with one query and kept per process, together
+with ancestor chains and " > " breadcrumb paths. It backs CategoryListView,
+the effective attribute schema and the GMC feed's ``product_type``.
+
+Freshness is checked with one aggregate over Category (row count and latest
+``updated_at``). Any save or delete changes that key, including uncommitted
+writes seen by the same connection. Built trees are also stored in the shared
+catalog cache under that key, so other processes skip the build. The
+Category save/delete signals drop the local copy straight away.
+"""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import Count, Max
+
+from .models import Category
+
+BREADCRUMB_SEPARATOR = " > "
+
+_CACHE_TIMEOUT = 60 * 60
+
+
+@dataclass(frozen=True)
+class CategoryNode:
+    id: int
+    name: str
+    parent_id: int | None
+    image: str
+    allows_product_assignment: bool
+    tree_id: int
+    lft: int
+    rght: int
+    level: int
+    ancestor_ids: tuple[int, ...]
+    path: str
+    children_ids: tuple[int, ...] = ()
+
+
+@dataclass
+class CategoryTree:
+    nodes: dict[int, CategoryNode] = field(default_factory=dict)
+    root_ids: tuple[int, ...] = ()
+
+    @classmethod
+    def build(cls, rows) -> "CategoryTree":
+        """``rows`` are Category value dicts ordered by (tree_id, lft)."""
+        partial: dict[int, dict] = {}
+        children: dict[int | None, list[int]] = {}
+        for row in rows:
+            parent = partial.get(row["parent_id"])
+            ancestor_ids = (*parent["ancestor_ids"], parent["id"]) if parent else ()
+            path = (
+                f"{parent['path']}{BREADCRUMB_SEPARATOR}{row['name']}" if parent else row["name"]
+            )
+            partial[row["id"]] = {**row, "ancestor_ids": ancestor_ids, "path": path}
+            children.setdefault(row["parent_id"], []).append(row["id"])
+
+        nodes = {
+            pk: CategoryNode(
+                id=pk,
+                name=row["name"],
+                parent_id=row["parent_id"],
+                image=row["image"] or "",
+                allows_product_assignment=row["allows_product_assignment"],
+                tree_id=row["tree_id"],
+                lft=row["lft"],
+                rght=row["rght"],
+                level=row["level"],
+                ancestor_ids=row["ancestor_ids"],
+                path=row["path"],
+                children_ids=tuple(children.get(pk, ())),
+            )
+            for pk, row in partial.items()
+        }
+        return cls(nodes=nodes, root_ids=tuple(children.get(None, ())))
+
+    def get(self, category_id) -> CategoryNode | None:
+        return self.nodes.get(category_id)
+
+    def children(self, category_id) -> list[CategoryNode]:
+        node = self.nodes.get(category_id)
+        return [self.nodes[pk] for pk in node.children_ids] if node else []
+
+    def ancestor_ids(self, category_id, include_self: bool = False) -> list[int]:
+        node = self.nodes[category_id]
+        return [*node.ancestor_ids, node.id] if include_self else list(node.ancestor_ids)
+
+    def descendant_ids(self, category_id, include_self: bool = False) -> list[int]:
+        node = self.nodes[category_id]
+        return [
+            other.id
+            for other in self.nodes.values()
+            if other.tree_id == node.tree_id
+            and node.lft <= other.lft <= node.rght
+            and (include_self or other.id != node.id)
+        ]
+
+    def path(self, category_id) -> str | None:
+        node = self.nodes.get(category_id)
+        return node.path if node else None
+
+
+_lock = threading.Lock()
+_local: dict = {"key": None, "tree": None}
+
+
+def _cache():
+    return caches[getattr(settings, "CATALOG_RESPONSE_CACHE_ALIAS", "default")]
+
+
+def _current_key() -> tuple:
+    stats = Category.objects.aggregate(count=Count("pk"), latest=Max("updated_at"))
+    latest = stats["latest"].isoformat() if stats["latest"] else ""
+    return stats["count"], latest
+
+
+def get_category_tree() -> CategoryTree:
+    key = _current_key()
+    with _lock:
+        if _local["key"] == key and _local["tree"] is not None:
+            return _local["tree"]
+
+    cache_key = f"category-tree:{key[0]}:{key[1]}"
+    tree = _cache().get(cache_key)
+    if tree is None:
+        tree = CategoryTree.build(
+            Category.objects.order_by("tree_id", "lft").values(
+                "id",
+                "name",
+                "parent_id",
+                "image",
+                "allows_product_assignment",
+                "tree_id",
+                "lft",
+                "rght",
+                "level",
+            )
+        )
+        _cache().set(cache_key, tree, _CACHE_TIMEOUT)
+
+    with _lock:
+        _local["key"] = key
+        _local["tree"] = tree
+    return tree
+
+
+def invalidate_category_tree() -> None:
+    with _lock:
+        _local["key"] = None
+        _local["tree"] = None
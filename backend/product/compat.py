@@ -25,11 +25,17 @@ def get_product_cover_image(product):
 
 
 def get_product_cover_image_url(product, *, request=None, absolute: bool = True) -> Optional[str]:
-    image = get_product_cover_image(product)
-    if not image or not getattr(image, "image", None):
+    # Querysets annotated from CatalogListing carry the cover URL already
+    # ("" means "no image"); skip the images prefetch/query in that case.
+    url = getattr(product, "cover_image_url", None)
+    if url is None:
+        image = get_product_cover_image(product)
+        if not image or not getattr(image, "image", None):
+            return None
+        url = image.image.url
+    elif not url:
         return None
 
-    url = image.image.url
     if absolute and request is not None:
         return request.build_absolute_uri(url)
     return url
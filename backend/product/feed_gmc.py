@@ -1,8 +1,12 @@
 from __future__ import annotations
 
+import gzip
+import os
+import tempfile
 from dataclasses import dataclass
 from decimal import Decimal
-from typing import Optional
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
 from xml.sax.saxutils import escape as xml_escape
 
 
@@ -82,8 +86,7 @@ def build_item_xml(
     return "\n".join(parts)
 
 
-def wrap_feed_xml(*, cfg: GMCFeedConfig, items_xml: list[str]) -> str:
-    items_block = "\n".join(items_xml)
+def feed_header_xml(*, cfg: GMCFeedConfig) -> str:
     return (
         '<?xml version="1.0" encoding="UTF-8"?>\n'
         '<rss version="2.0" xmlns:g="http://base.google.com/ns/1.0">\n'
@@ -91,7 +94,61 @@ def wrap_feed_xml(*, cfg: GMCFeedConfig, items_xml: list[str]) -> str:
         "    <title>Reli.one product feed</title>\n"
         f"    <link>{xml_escape(cfg.public_domain)}</link>\n"
         "    <description>Google Merchant Center feed</description>\n"
-        f"{items_block}\n"
-        "  </channel>\n"
-        "</rss>\n"
     )
+
+
+FEED_FOOTER_XML = "  </channel>\n</rss>\n"
+
+
+def iter_feed_xml(*, cfg: GMCFeedConfig, items_xml: Iterable[str]) -> Iterator[str]:
+    """Yield the feed document piece by piece; ``items_xml`` is consumed lazily."""
+    yield feed_header_xml(cfg=cfg)
+    for item_xml in items_xml:
+        yield item_xml
+        yield "\n"
+    yield FEED_FOOTER_XML
+
+
+def wrap_feed_xml(*, cfg: GMCFeedConfig, items_xml: list[str]) -> str:
+    return "".join(iter_feed_xml(cfg=cfg, items_xml=items_xml))
+
+
+def write_feed_file(path: Path, chunks: Iterable[str], *, compress: bool = False) -> None:
+    """
+    Stream ``chunks`` into a temporary file next to ``path`` and rename it over
+    ``path`` once complete, so readers never see a half-written feed.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with open(fd, "wb") as raw:
+            if compress:
+                with gzip.GzipFile(fileobj=raw, mode="wb", mtime=0) as stream:
+                    _write_chunks(stream, chunks)
+            else:
+                _write_chunks(raw, chunks)
+            raw.flush()
+            os.fsync(raw.fileno())
+        # mkstemp creates 0600 files; the feed is served as public media.
+        os.chmod(tmp_name, 0o644)
+        os.replace(tmp_name, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except FileNotFoundError:
+            pass
+        raise
+
+
+def _write_chunks(stream, chunks: Iterable[str], buffer_size: int = 1 << 16) -> None:
+    buffer: list[str] = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= buffer_size:
+            stream.write("".join(buffer).encode("utf-8"))
+            buffer.clear()
+            size = 0
+    if buffer:
+        stream.write("".join(buffer).encode("utf-8"))
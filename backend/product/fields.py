@@ -0,0 +1,17 @@
+from django.contrib.postgres.search import SearchVectorField
+
+
+class SearchVectorColumn(SearchVectorField):
+    """
+    ``tsvector`` column on PostgreSQL, plain text elsewhere.
+
+    ``SearchVectorField`` alone cannot be created on SQLite (tests/dev); this
+    keeps one model definition for both backends while preserving the ``@@``
+    lookup on PostgreSQL. The column is only written with database expressions
+    on PostgreSQL (see product/search_index.py) and stays NULL elsewhere.
+    """
+
+    def db_type(self, connection):
+        if connection.vendor == "postgresql":
+            return "tsvector"
+        return "text"
@@ -1,15 +1,35 @@
 from __future__ import annotations
 
+import hashlib
+import json
+from collections import Counter
+from itertools import islice
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Iterator, Optional
 
 from django.conf import settings
-from django.core.management.base import BaseCommand
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 from django.db.models import Prefetch
+from django.utils import timezone
 
+from product.category_tree import CategoryTree, get_category_tree
 from product.compat import get_gmc_product_identifiers, get_product_cover_image_url
-from product.feed_gmc import GMCFeedConfig, build_item_xml, wrap_feed_xml
-from product.models import BaseProduct, ProductVariant, ProductStatus
+from product.feed_gmc import GMCFeedConfig, build_item_xml, iter_feed_xml, write_feed_file
+from product.models import (
+    BaseProduct,
+    CatalogCacheVersion,
+    GMCFeedItem,
+    GMCFeedState,
+    ProductStatus,
+    ProductVariant,
+)
+from product.response_cache import CATEGORY_TREE_SCOPE, product_scope
+
+FEED_STATE_KEY = "google"
+# Bump when build_item_xml output changes so incremental runs rebuild everything.
+ITEM_FORMAT_VERSION = 1
+BATCH_SIZE = 200
 
 
 def _get_public_domain() -> str:
@@ -35,25 +55,136 @@ def _pick_main_image_abs(public_domain: str, product: BaseProduct) -> Optional[s
     return public_domain.rstrip("/") + image_url
 
 
-def _product_type_from_category(product: BaseProduct) -> Optional[str]:
-    c = getattr(product, "category", None)
-    if not c:
+def _product_type_from_category(product: BaseProduct, tree: CategoryTree) -> Optional[str]:
+    if not product.category_id:
         return None
+    return tree.path(product.category_id) or None
 
-    name = getattr(c, "name", None)
-    if not name:
-        return None
 
-    parts = [str(name)]
-    parent = getattr(c, "parent", None)
-    while parent:
-        pname = getattr(parent, "name", None)
-        if pname:
-            parts.append(str(pname))
-        parent = getattr(parent, "parent", None)
+def _get_only_seller_ids() -> list[int]:
+    # ---- IMPORTANT: filter ONLY selected sellers (Nutristar) ----
+    # Safe default: if not configured, do NOT filter
+    return list(getattr(settings, "GMC_ONLY_SELLER_IDS", None) or [])
+
+
+def _feed_queryset(only_seller_ids: list[int]):
+    qs = (
+        BaseProduct.objects.filter(status=ProductStatus.APPROVED, is_active=True)
+        .select_related("seller")
+        .prefetch_related(
+            "images",
+            Prefetch("variants", queryset=ProductVariant.objects.all().order_by("id")),
+        )
+        .order_by("id")
+    )
+    if only_seller_ids:
+        qs = qs.filter(seller_id__in=only_seller_ids)
+    return qs
+
+
+def _config_hash(cfg: GMCFeedConfig, only_seller_ids: list[int]) -> str:
+    static_brands = getattr(settings, "GMC_STATIC_BRANDS", None) or {}
+    payload = [
+        ITEM_FORMAT_VERSION,
+        cfg.public_domain,
+        cfg.currency,
+        cfg.product_path_tpl,
+        cfg.variant_param_name,
+        sorted(only_seller_ids),
+        sorted((str(key), value) for key, value in static_brands.items()),
+    ]
+    return hashlib.sha256(json.dumps(payload, separators=(",", ":")).encode()).hexdigest()
+
+
+def _iter_product_items(
+    product: BaseProduct,
+    cfg: GMCFeedConfig,
+    tree: CategoryTree,
+    stats: Counter,
+) -> Iterator[tuple[ProductVariant, str]]:
+    image_abs = _pick_main_image_abs(cfg.public_domain, product)
+    if not image_abs:
+        stats["skipped_no_image"] += 1
+        return
+
+    identifiers = get_gmc_product_identifiers(product)
+
+    product_type = _product_type_from_category(product, tree)
+
+    for v in product.variants.all():
+        price = getattr(v, "price_with_acquiring", None)
+        if price is None:
+            stats["skipped_no_price"] += 1
+            continue
+
+        t = (product.name or "").strip()
+        vtxt = (getattr(v, "text", None) or getattr(v, "name", None) or "").strip()
+        title = f"{t} – {vtxt}" if (t and vtxt) else (t or vtxt)
+
+        yield v, build_item_xml(
+            cfg=cfg,
+            variant_sku=str(v.sku),
+            title=title,
+            description=getattr(product, "product_description", "") or "",
+            product_id=product.id,
+            image_url_abs=image_abs,
+            price=price,
+            availability="in stock",
+            brand=identifiers.brand,
+            gtin=identifiers.gtin,
+            mpn=identifiers.mpn,
+            identifier_exists=identifiers.identifier_exists,
+            item_group_id=str(product.id),
+            product_type=product_type,
+        )
+
+
+def _batched(iterable: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _store_items(products: list[BaseProduct], cfg: GMCFeedConfig, tree: CategoryTree, stats: Counter) -> None:
+    """Upsert changed items of ``products`` and drop items of variants no longer emitted."""
+    rows = [
+        GMCFeedItem(
+            variant=variant,
+            product_id=product.id,
+            content_hash=hashlib.sha256(item_xml.encode("utf-8")).hexdigest(),
+            item_xml=item_xml,
+            updated_at=timezone.now(),
+        )
+        for product in products
+        for variant, item_xml in _iter_product_items(product, cfg, tree, stats)
+    ]
+    product_ids = [product.id for product in products]
+    known = dict(
+        GMCFeedItem.objects.filter(product_id__in=product_ids).values_list("variant_id", "content_hash")
+    )
+    changed = [row for row in rows if known.get(row.variant_id) != row.content_hash]
+    stats["items_written"] += len(changed)
+
+    with transaction.atomic():
+        if changed:
+            GMCFeedItem.objects.bulk_create(
+                changed,
+                update_conflicts=True,
+                unique_fields=["variant"],
+                update_fields=["product", "content_hash", "item_xml", "updated_at"],
+            )
+        stale = set(known) - {row.variant_id for row in rows}
+        if stale:
+            GMCFeedItem.objects.filter(variant_id__in=stale).delete()
+
 
-    parts.reverse()
-    return " > ".join(parts)
+def _changed_product_ids(since) -> list[int]:
+    prefix = product_scope("")
+    scopes = CatalogCacheVersion.objects.filter(
+        scope__startswith=prefix,
+        updated_at__gte=since,
+    ).values_list("scope", flat=True)
+    return sorted(int(scope[len(prefix):]) for scope in scopes.iterator(chunk_size=2000))
 
 
 class Command(BaseCommand):
@@ -62,11 +193,23 @@ class Command(BaseCommand):
     def add_arguments(self, parser):
         parser.add_argument("--category-id", type=int, default=None)
         parser.add_argument("--limit", type=int, default=None)
+        parser.add_argument(
+            "--incremental",
+            action="store_true",
+            help="Rebuild only products changed since the previous incremental run.",
+        )
+        parser.add_argument(
+            "--gzip",
+            action="store_true",
+            help="Write a gzip-compressed feed (output path gets a .gz suffix).",
+        )
 
     def handle(self, *args, **options):
         public_domain = _get_public_domain()
         currency = _get_currency()
         output_path = _get_output_path()
+        if options["gzip"]:
+            output_path = output_path.with_name(output_path.name + ".gz")
 
         cfg = GMCFeedConfig(
             public_domain=public_domain,
@@ -75,82 +218,84 @@ class Command(BaseCommand):
             variant_param_name="variant",
         )
 
-        # ---- IMPORTANT: filter ONLY selected sellers (Nutristar) ----
-        only_seller_ids = getattr(settings, "GMC_ONLY_SELLER_IDS", None)
-        if not only_seller_ids:
-            # Safe default: if not configured, do NOT filter
-            only_seller_ids = []
-
-        qs = (
-            BaseProduct.objects.filter(status=ProductStatus.APPROVED, is_active=True)
-            .select_related("category", "seller")
-            .prefetch_related(
-                "images",
-                Prefetch("variants", queryset=ProductVariant.objects.all().order_by("id")),
-            )
-            .order_by("id")
-        )
+        only_seller_ids = _get_only_seller_ids()
+        qs = _feed_queryset(only_seller_ids)
+        category_tree = get_category_tree()
+        stats: Counter = Counter()
+
+        if options["incremental"]:
+            if options.get("category_id") or options.get("limit"):
+                raise CommandError("--incremental cannot be combined with --category-id or --limit.")
+            self._refresh_item_store(qs, cfg, category_tree, _config_hash(cfg, only_seller_ids), stats)
+            items_xml = self._iter_stored_items(stats)
+        else:
+            if options.get("category_id"):
+                qs = qs.filter(category_id=options["category_id"])
+
+            if options.get("limit"):
+                qs = qs[: options["limit"]]
 
-        if only_seller_ids:
-            qs = qs.filter(seller_id__in=only_seller_ids)
-
-        if options.get("category_id"):
-            qs = qs.filter(category_id=options["category_id"])
-
-        if options.get("limit"):
-            qs = qs[: options["limit"]]
-
-        items_xml: list[str] = []
-        skipped_no_image = 0
-        skipped_no_price = 0
-
-        for product in qs.iterator(chunk_size=200):
-            image_abs = _pick_main_image_abs(public_domain, product)
-            if not image_abs:
-                skipped_no_image += 1
-                continue
-
-            identifiers = get_gmc_product_identifiers(product)
-
-            product_type = _product_type_from_category(product)
-
-            for v in product.variants.all():
-                price = getattr(v, "price_with_acquiring", None)
-                if price is None:
-                    skipped_no_price += 1
-                    continue
-
-                t = (product.name or "").strip()
-                vtxt = (getattr(v, "text", None) or getattr(v, "name", None) or "").strip()
-                title = f"{t} – {vtxt}" if (t and vtxt) else (t or vtxt)
-
-                item_xml = build_item_xml(
-                    cfg=cfg,
-                    variant_sku=str(v.sku),
-                    title=title,
-                    description=getattr(product, "product_description", "") or "",
-                    product_id=product.id,
-                    image_url_abs=image_abs,
-                    price=price,
-                    availability="in stock",
-                    brand=identifiers.brand,
-                    gtin=identifiers.gtin,
-                    mpn=identifiers.mpn,
-                    identifier_exists=identifiers.identifier_exists,
-                    item_group_id=str(product.id),
-                    product_type=product_type,
-                )
-                items_xml.append(item_xml)
-
-        xml = wrap_feed_xml(cfg=cfg, items_xml=items_xml)
-
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        output_path.write_text(xml, encoding="utf-8")
+            items_xml = self._iter_generated_items(qs, cfg, category_tree, stats)
+
+        write_feed_file(output_path, iter_feed_xml(cfg=cfg, items_xml=items_xml), compress=options["gzip"])
 
         self.stdout.write(self.style.SUCCESS(f"Feed generated: {output_path}"))
         self.stdout.write(
-            f"Items: {len(items_xml)} | Skipped(no image): {skipped_no_image} | Skipped(no price): {skipped_no_price}"
+            f"Items: {stats['items']} | Skipped(no image): {stats['skipped_no_image']} "
+            f"| Skipped(no price): {stats['skipped_no_price']}"
         )
+        if options["incremental"]:
+            self.stdout.write(
+                f"Rebuilt products: {stats['products_rebuilt']} | Items rewritten: {stats['items_written']}"
+            )
         self.stdout.write(
             f"Public URL should be: {public_domain}/media/{output_path.relative_to(settings.MEDIA_ROOT)}"
         )
+
+    @staticmethod
+    def _iter_generated_items(qs, cfg, category_tree, stats) -> Iterator[str]:
+        for product in qs.iterator(chunk_size=BATCH_SIZE):
+            for _variant, item_xml in _iter_product_items(product, cfg, category_tree, stats):
+                stats["items"] += 1
+                yield item_xml
+
+    @staticmethod
+    def _iter_stored_items(stats) -> Iterator[str]:
+        rows = GMCFeedItem.objects.order_by("product_id", "variant_id").values_list("item_xml", flat=True)
+        for item_xml in rows.iterator(chunk_size=2000):
+            stats["items"] += 1
+            yield item_xml
+
+    @staticmethod
+    def _refresh_item_store(qs, cfg, category_tree, config_hash, stats) -> None:
+        # Taken before reading: writes racing with this run are picked up again next time.
+        started_at = timezone.now()
+        state = GMCFeedState.objects.filter(feed=FEED_STATE_KEY).first()
+        full = (
+            state is None
+            or state.config_hash != config_hash
+            or CatalogCacheVersion.objects.filter(
+                scope=CATEGORY_TREE_SCOPE,
+                updated_at__gte=state.last_run_at,
+            ).exists()
+        )
+
+        if full:
+            for products in _batched(qs.iterator(chunk_size=BATCH_SIZE), BATCH_SIZE):
+                _store_items(products, cfg, category_tree, stats)
+                stats["products_rebuilt"] += len(products)
+            GMCFeedItem.objects.exclude(product_id__in=qs.values("pk")).delete()
+        else:
+            for product_ids in _batched(_changed_product_ids(state.last_run_at), BATCH_SIZE):
+                products = list(qs.filter(pk__in=product_ids))
+                _store_items(products, cfg, category_tree, stats)
+                stats["products_rebuilt"] += len(products)
+                # Products that left the feed (unapproved, deactivated, other seller).
+                GMCFeedItem.objects.filter(product_id__in=product_ids).exclude(
+                    product_id__in=[product.id for product in products],
+                ).delete()
+
+        GMCFeedState.objects.update_or_create(
+            feed=FEED_STATE_KEY,
+            defaults={"config_hash": config_hash, "last_run_at": started_at},
+        )
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from product.models import BaseProduct
+from product.search_index import refresh_search_documents
+
+
+class Command(BaseCommand):
+    help = "Rebuild ProductSearchDocument rows (and tsvectors on PostgreSQL) for all or selected products."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--product-id", type=int, action="append", dest="product_ids", default=None)
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        product_ids = options.get("product_ids")
+        batch_size = max(1, options["batch_size"])
+
+        if not product_ids:
+            product_ids = list(BaseProduct.objects.order_by("id").values_list("id", flat=True))
+
+        written = 0
+        for start in range(0, len(product_ids), batch_size):
+            written += refresh_search_documents(product_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f"Search documents refreshed: {written}"))
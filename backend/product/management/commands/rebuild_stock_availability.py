@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand
+
+from product.models import ProductVariant
+from product.stock_availability import refresh_variant_availability
+
+
+class Command(BaseCommand):
+    help = "Rebuild VariantAvailability rows (stock availability snapshot) from WarehouseItem."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--variant-id", type=int, action="append", dest="variant_ids", default=None)
+        parser.add_argument("--batch-size", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        variant_ids = options.get("variant_ids")
+        batch_size = max(1, options["batch_size"])
+
+        if not variant_ids:
+            variant_ids = list(ProductVariant.objects.order_by("id").values_list("id", flat=True))
+
+        written = 0
+        for start in range(0, len(variant_ids), batch_size):
+            written += refresh_variant_availability(variant_ids[start:start + batch_size])
+
+        self.stdout.write(self.style.SUCCESS(f"VariantAvailability rows refreshed: {written}"))
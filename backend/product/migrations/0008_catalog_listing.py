@@ -0,0 +1,34 @@
+# Generated by Django 5.1 on 2026-10-18 15:14
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0007_baseproduct_country_of_origin_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogListing',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='catalog_listing', serialize=False, to='product.baseproduct')),
+                ('base_min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('final_min_price', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('ordered_quantity', models.PositiveIntegerField(default=0)),
+                ('total_available_quantity', models.PositiveIntegerField(default=0)),
+                ('cover_image_url', models.CharField(blank=True, max_length=500)),
+                ('category_path', models.CharField(blank=True, max_length=500)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('rejected', 'Rejected')], default='pending', max_length=20)),
+                ('is_active', models.BooleanField(default=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('brand', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='product.brand')),
+                ('category', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='+', to='product.category')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['category', 'final_min_price'], name='cl_category_price_idx'), models.Index(fields=['status', 'is_active'], name='cl_visibility_idx')],
+            },
+        ),
+    ]
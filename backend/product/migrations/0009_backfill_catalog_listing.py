@@ -0,0 +1,91 @@
+# Backfill CatalogListing for existing products.
+#
+# Uses historical models only; live maintenance happens in product/signals.py.
+# Re-run at any time with `manage.py rebuild_catalog_listing`.
+
+from decimal import Decimal, ROUND_HALF_UP
+
+from django.db import migrations
+from django.db.models import F, Min, Sum
+from django.db.models.functions import Greatest
+
+ACQUIRING_RATE = Decimal("1.04")
+BATCH_SIZE = 500
+
+
+def backfill_catalog_listing(apps, schema_editor):
+    BaseProduct = apps.get_model('product', 'BaseProduct')
+    BaseProductImage = apps.get_model('product', 'BaseProductImage')
+    CatalogListing = apps.get_model('product', 'CatalogListing')
+    Category = apps.get_model('product', 'Category')
+    ProductVariant = apps.get_model('product', 'ProductVariant')
+    OrderProduct = apps.get_model('order', 'OrderProduct')
+    WarehouseItem = apps.get_model('warehouses', 'WarehouseItem')
+
+    min_prices = dict(
+        ProductVariant.objects.values('product_id')
+        .annotate(min_price=Min('price'))
+        .values_list('product_id', 'min_price')
+    )
+    ordered = dict(
+        OrderProduct.objects.values('product__product_id')
+        .annotate(total=Sum('quantity'))
+        .values_list('product__product_id', 'total')
+    )
+    available = dict(
+        WarehouseItem.objects.values('product_variant__product_id')
+        .annotate(total=Sum(Greatest(F('quantity_in_stock') - F('reserved_quantity'), 0)))
+        .values_list('product_variant__product_id', 'total')
+    )
+    covers = {}
+    for product_id, image in BaseProductImage.objects.order_by('product_id', 'id').values_list('product_id', 'image'):
+        covers.setdefault(product_id, image)
+
+    categories = {c['id']: c for c in Category.objects.values('id', 'name', 'parent_id')}
+
+    def category_path(category_id):
+        parts = []
+        while category_id is not None and category_id in categories:
+            parts.append(categories[category_id]['name'])
+            category_id = categories[category_id]['parent_id']
+        return " > ".join(reversed(parts))
+
+    storage = BaseProductImage._meta.get_field('image').storage
+
+    rows = []
+    for product in BaseProduct.objects.values('id', 'brand_id', 'category_id', 'status', 'is_active').iterator():
+        base_min = min_prices.get(product['id'])
+        final_min = None
+        if base_min is not None:
+            final_min = (base_min * ACQUIRING_RATE).quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        cover = covers.get(product['id'])
+        rows.append(
+            CatalogListing(
+                product_id=product['id'],
+                base_min_price=base_min,
+                final_min_price=final_min,
+                ordered_quantity=max(0, int(ordered.get(product['id']) or 0)),
+                total_available_quantity=max(0, int(available.get(product['id']) or 0)),
+                cover_image_url=storage.url(cover) if cover else "",
+                brand_id=product['brand_id'],
+                category_id=product['category_id'],
+                category_path=category_path(product['category_id']),
+                status=product['status'],
+                is_active=product['is_active'],
+            )
+        )
+
+    CatalogListing.objects.bulk_create(rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0008_catalog_listing'),
+        ('order', '0009_order_consistency'),
+        ('warehouses', '0003_stockreservation_provider_checkout_id'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_catalog_listing, migrations.RunPython.noop),
+    ]
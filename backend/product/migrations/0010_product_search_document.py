@@ -0,0 +1,135 @@
+# Generated by Django 5.1 on 2026-10-18 15:19
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+import product.fields
+from django.db import migrations, models
+
+GIN_INDEX_NAME = 'psd_search_vector_gin_idx'
+TABLE = 'product_productsearchdocument'
+
+# Frozen copy of product/search_text.py as of this migration, so that the
+# backfill does not change with the live tokenizer. Documents are rebuilt
+# from the live one whenever a product is saved.
+MIN_STEM_LENGTH = 3
+TOKEN_RE = re.compile(r'[0-9a-z]+')
+CZECH_SUFFIXES = (
+    'atech', 'etem', 'atum',
+    'ech', 'ich', 'emi', 'ami', 'emu', 'ete', 'eti', 'iho', 'imu', 'ata', 'aty', 'ovi',
+    'mi', 'em', 'es', 'im', 'om', 'os', 'us', 'ym', 'am', 'ou', 'ho', 'mu',
+    'a', 'e', 'i', 'o', 'u', 'y',
+)
+CZECH_POSSESSIVE = ('ov', 'in', 'uv')
+ENGLISH_SUFFIXES = ('ingly', 'ing', 'edly', 'ed', 'ies', 'es', 'ly', 's')
+STOP_WORDS = frozenset({
+    'a', 'an', 'and', 'for', 'in', 'of', 'on', 'or', 'the', 'to', 'with',
+    'i', 'k', 'na', 'o', 'od', 'po', 'pro', 's', 'se', 'v', 've', 'z', 'za', 'ze',
+})
+
+
+def strip_suffix(word, suffixes):
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[: -len(suffix)]
+    return word
+
+
+def stem(word):
+    if word.isdigit() or len(word) <= MIN_STEM_LENGTH:
+        return word
+    english = strip_suffix(word, ENGLISH_SUFFIXES)
+    if english != word:
+        return english
+    return strip_suffix(strip_suffix(word, CZECH_SUFFIXES), CZECH_POSSESSIVE)
+
+
+def tokenize(value):
+    if not value:
+        return []
+    decomposed = unicodedata.normalize('NFKD', str(value))
+    normalized = ''.join(ch for ch in decomposed if not unicodedata.combining(ch)).lower()
+    return [stem(token) for token in TOKEN_RE.findall(normalized) if token not in STOP_WORDS]
+
+
+def tokens_to_text(tokens):
+    return ' '.join(tokens)
+
+
+def create_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(
+        f'CREATE INDEX IF NOT EXISTS {GIN_INDEX_NAME} ON {TABLE} USING gin (search_vector)'
+    )
+
+
+def drop_gin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {GIN_INDEX_NAME}')
+
+
+def backfill_search_documents(apps, schema_editor):
+    BaseProduct = apps.get_model('product', 'BaseProduct')
+    ProductAttributeValue = apps.get_model('product', 'ProductAttributeValue')
+    ProductParameter = apps.get_model('product', 'ProductParameter')
+    ProductSearchDocument = apps.get_model('product', 'ProductSearchDocument')
+
+    keywords = {}
+    for product_id, name, value in ProductParameter.objects.values_list('product_id', 'name', 'value'):
+        keywords.setdefault(product_id, []).extend(tokenize(name) + tokenize(value))
+    attribute_values = ProductAttributeValue.objects.filter(
+        attribute_definition__is_active=True,
+        attribute_definition__is_public=True,
+    ).values_list('product_id', 'value_text', 'value_option__value', 'value_option__label', 'value_option__is_active')
+    for product_id, text, option_value, option_label, option_active in attribute_values:
+        tokens = tokenize(text)
+        if option_value and option_active:
+            tokens += tokenize(option_value.replace('-', ' ')) + tokenize(option_label)
+        keywords.setdefault(product_id, []).extend(tokens)
+
+    documents = []
+    products = BaseProduct.objects.values_list('id', 'name', 'product_description', 'category__name')
+    for product_id, name, description, category_name in products.iterator():
+        documents.append(
+            ProductSearchDocument(
+                product_id=product_id,
+                title_tokens=tokens_to_text(tokenize(name)),
+                keyword_tokens=tokens_to_text(tokenize(category_name) + keywords.get(product_id, [])),
+                body_tokens=tokens_to_text(tokenize(description)),
+            )
+        )
+    ProductSearchDocument.objects.bulk_create(documents, batch_size=500, ignore_conflicts=True)
+
+    if schema_editor.connection.vendor == 'postgresql':
+        schema_editor.execute(
+            f"UPDATE {TABLE} SET search_vector = "
+            "setweight(to_tsvector('simple', title_tokens), 'A') || "
+            "setweight(to_tsvector('simple', keyword_tokens), 'B') || "
+            "setweight(to_tsvector('simple', body_tokens), 'C')"
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0009_backfill_catalog_listing'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductSearchDocument',
+            fields=[
+                ('product', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_document', serialize=False, to='product.baseproduct')),
+                ('title_tokens', models.TextField(blank=True)),
+                ('keyword_tokens', models.TextField(blank=True)),
+                ('body_tokens', models.TextField(blank=True)),
+                ('search_vector', product.fields.SearchVectorColumn(blank=True, editable=False, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.RunPython(create_gin_index, drop_gin_index),
+        migrations.RunPython(backfill_search_documents, migrations.RunPython.noop),
+    ]
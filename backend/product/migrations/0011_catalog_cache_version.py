@@ -0,0 +1,20 @@
+# Generated by Django 5.1 on 2026-10-18 15:31
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0010_product_search_document'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogCacheVersion',
+            fields=[
+                ('scope', models.CharField(max_length=64, primary_key=True, serialize=False)),
+                ('updated_at', models.DateTimeField()),
+            ],
+        ),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1 on 2026-10-18 16:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0012_category_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GMCFeedState',
+            fields=[
+                ('feed', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('config_hash', models.CharField(max_length=64)),
+                ('last_run_at', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='GMCFeedItem',
+            fields=[
+                ('variant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='+', serialize=False, to='product.productvariant')),
+                ('content_hash', models.CharField(max_length=64)),
+                ('item_xml', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='product.baseproduct')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'variant'], name='gmc_item_order_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 5.1 on 2026-10-18 16:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0013_gmc_feed_item'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VariantAvailability',
+            fields=[
+                ('variant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='availability_snapshot', serialize=False, to='product.productvariant')),
+                ('available_quantity', models.PositiveIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to='product.baseproduct')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['product', 'available_quantity'], name='variant_avail_product_idx')],
+            },
+        ),
+    ]
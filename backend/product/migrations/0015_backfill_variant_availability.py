@@ -0,0 +1,54 @@
+# Backfill VariantAvailability for existing variants.
+#
+# Uses historical models only; live maintenance happens in product/signals.py
+# and warehouses/services/reservation.py.
+# Re-run at any time with `manage.py rebuild_stock_availability`.
+
+from collections import defaultdict
+
+from django.db import migrations
+from django.db.models import Sum
+
+BATCH_SIZE = 500
+
+
+def backfill_variant_availability(apps, schema_editor):
+    ProductVariant = apps.get_model('product', 'ProductVariant')
+    VariantAvailability = apps.get_model('product', 'VariantAvailability')
+    WarehouseItem = apps.get_model('warehouses', 'WarehouseItem')
+    WarehouseItemShard = apps.get_model('warehouses', 'WarehouseItemShard')
+
+    shard_reserved = dict(
+        WarehouseItemShard.objects.values('warehouse_item_id')
+        .annotate(total=Sum('reserved_quantity'))
+        .values_list('warehouse_item_id', 'total')
+    )
+    available = defaultdict(int)
+    items = WarehouseItem.objects.values_list(
+        'id', 'product_variant_id', 'quantity_in_stock', 'reserved_quantity', 'shard_count',
+    )
+    for pk, variant_id, in_stock, reserved, shard_count in items.iterator():
+        held = (shard_reserved.get(pk) or 0) if shard_count else 0
+        available[variant_id] += max(0, in_stock - reserved - held)
+
+    rows = [
+        VariantAvailability(
+            variant_id=variant_id,
+            product_id=product_id,
+            available_quantity=available.get(variant_id, 0),
+        )
+        for variant_id, product_id in ProductVariant.objects.values_list('id', 'product_id').iterator()
+    ]
+    VariantAvailability.objects.bulk_create(rows, batch_size=BATCH_SIZE, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('product', '0014_variant_availability'),
+        ('warehouses', '0004_stock_shards'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_variant_availability, migrations.RunPython.noop),
+    ]
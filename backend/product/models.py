@@ -15,6 +15,7 @@ from django.db.models.functions import Lower
 from sellers.models import SellerProfile
 
 from .constants import ACQUIRING_RATE
+from .fields import SearchVectorColumn
 
 
 class ProductStatus(models.TextChoices):
@@ -64,6 +65,8 @@ class Category(MPTTModel):
         default=False,
         help_text="Разрешает создавать товары прямо в non-leaf категории.",
     )
+    # Версия дерева для product.category_tree (переименования, перемещения).
+    updated_at = models.DateTimeField(auto_now=True)
 
     class MPTTMeta:
         order_insertion_by = ['name']
@@ -652,3 +655,176 @@ class ProductDocument(models.Model):
 
     def __str__(self):
         return f"{self.product_id}: {self.document_type} {self.name or self.file}"
+
+
+class CatalogListing(models.Model):
+    """
+    Denormalized read model for public product lists (one row per BaseProduct).
+
+    Maintained by ``product.catalog_listing.refresh_catalog_listings`` from the
+    variant, image, order, stock and product write paths (see product/signals.py).
+    Rebuild from scratch with ``manage.py rebuild_catalog_listing``.
+    """
+
+    product = models.OneToOneField(
+        BaseProduct,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='catalog_listing',
+    )
+    base_min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    final_min_price = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    ordered_quantity = models.PositiveIntegerField(default=0)
+    total_available_quantity = models.PositiveIntegerField(default=0)
+    cover_image_url = models.CharField(max_length=500, blank=True)
+    brand = models.ForeignKey(
+        Brand,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
+    category = models.ForeignKey(
+        Category,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='+',
+    )
+    category_path = models.CharField(max_length=500, blank=True)
+    status = models.CharField(
+        max_length=20,
+        choices=ProductStatus.choices,
+        default=ProductStatus.PENDING,
+    )
+    is_active = models.BooleanField(default=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['category', 'final_min_price'], name='cl_category_price_idx'),
+            models.Index(fields=['status', 'is_active'], name='cl_visibility_idx'),
+        ]
+
+    def __str__(self):
+        return f"CatalogListing {self.product_id}"
+
+
+class ProductSearchDocument(models.Model):
+    """
+    Search document per BaseProduct, maintained by product/search_index.py.
+
+    ``title_tokens`` / ``keyword_tokens`` / ``body_tokens`` hold stemmed tokens
+    (product.search_text.tokenize) with weights A / B / C: name; category,
+    parameters and public attribute values; description. On PostgreSQL the same
+    tokens are written into the GIN-indexed ``search_vector``.
+    """
+
+    product = models.OneToOneField(
+        BaseProduct,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='search_document',
+    )
+    title_tokens = models.TextField(blank=True)
+    keyword_tokens = models.TextField(blank=True)
+    body_tokens = models.TextField(blank=True)
+    search_vector = SearchVectorColumn(null=True, blank=True, editable=False)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"ProductSearchDocument {self.product_id}"
+
+
+class CatalogCacheVersion(models.Model):
+    """
+    Invalidation version of a cached catalog response scope.
+
+    ``scope`` is ``category-tree``, ``category:<id>`` or ``product:<id>``;
+    ``updated_at`` is bumped from product/signals.py and doubles as the
+    Last-Modified of responses built from that scope (product/response_cache.py).
+    Kept in the database so that all application processes agree on it.
+    """
+
+    scope = models.CharField(max_length=64, primary_key=True)
+    updated_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.scope} @ {self.updated_at.isoformat()}"
+
+
+class GMCFeedItem(models.Model):
+    """
+    Last generated ``<item>`` of the Google Merchant Center feed per variant.
+
+    Written by ``generate_gmc_feed --incremental``: only products whose
+    ``product:<id>`` cache version moved since the previous run are rebuilt, and
+    a row is rewritten only when ``content_hash`` (sha256 of ``item_xml``)
+    changes. The feed file is then streamed from this table.
+    """
+
+    variant = models.OneToOneField(
+        ProductVariant,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='+',
+    )
+    product = models.ForeignKey(BaseProduct, on_delete=models.CASCADE, related_name='+')
+    content_hash = models.CharField(max_length=64)
+    item_xml = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'variant'], name='gmc_item_order_idx'),
+        ]
+
+    def __str__(self):
+        return f"GMCFeedItem {self.variant_id}"
+
+
+class GMCFeedState(models.Model):
+    """
+    Bookkeeping of the last incremental GMC feed run.
+
+    ``config_hash`` covers the feed settings and item format; when it differs
+    (or no row exists) the next incremental run rebuilds every item.
+    """
+
+    feed = models.CharField(max_length=32, primary_key=True)
+    config_hash = models.CharField(max_length=64)
+    last_run_at = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.feed} @ {self.last_run_at.isoformat()}"
+
+
+class VariantAvailability(models.Model):
+    """
+    Snapshot of the public available quantity of a variant.
+
+    ``available_quantity`` is the sum over the variant's WarehouseItems of
+    ``quantity_in_stock - reserved_quantity - shard reservations`` (clamped at
+    0 per row).  Product totals are sums over ``product``.  Maintained by
+    ``product.stock_availability.refresh_variant_availability`` from the
+    WarehouseItem signals and StockReservationService; rebuild with
+    ``manage.py rebuild_stock_availability``.  A variant without a row has no stock.
+    """
+
+    variant = models.OneToOneField(
+        ProductVariant,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='availability_snapshot',
+    )
+    product = models.ForeignKey(BaseProduct, on_delete=models.CASCADE, related_name='+')
+    available_quantity = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['product', 'available_quantity'], name='variant_avail_product_idx'),
+        ]
+
+    def __str__(self):
+        return f"VariantAvailability {self.variant_id}: {self.available_quantity}"
@@ -1,7 +1,157 @@
+import base64
+import hashlib
+import json
+from collections import OrderedDict
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db.models import F, Q
+from rest_framework.exceptions import NotFound
 from rest_framework.pagination import PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
 
 
 class StandardResultsSetPagination(PageNumberPagination):
     page_size = 35
     page_size_query_param = 'page_size'
     max_page_size = 100
+
+
+class CatalogPagination(StandardResultsSetPagination):
+    """
+    Page-number pagination with an opt-in keyset ("cursor") mode.
+
+    ``?pagination=cursor`` (first page) or ``?cursor=<token>`` switch to keyset
+    pagination when the view orders by one of ``KEYSET_FIELDS``: the next page is
+    selected with ``WHERE (field, id) < (last_field, last_id)`` instead of
+    ``OFFSET``, so deep pages cost the same as the first one. ``count`` is
+    then served from a short-lived cache (per filter set) instead of running
+    ``COUNT(*)`` on every page; ``previous`` is always null.
+
+    Views provide ``get_keyset_ordering() -> (db_field, descending)``. Other
+    orderings (e.g. search relevance) keep page-number behaviour.
+    """
+
+    cursor_query_param = 'cursor'
+    mode_query_param = 'pagination'
+    KEYSET_FIELDS = ('final_min_price', 'base_min_price', 'rating')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        ordering = self._get_keyset_ordering(request, view)
+        if ordering is None:
+            return super().paginate_queryset(queryset, request, view)
+
+        field, descending = ordering
+        self.request = request
+        self.keyset = ordering
+        page_size = self.get_page_size(request)
+
+        self.count = self._get_cached_count(queryset, request, view)
+
+        queryset = queryset.order_by(*self._keyset_order_by(field, descending))
+        cursor = self._decode_cursor(request.query_params.get(self.cursor_query_param))
+        if cursor is not None:
+            queryset = queryset.filter(self._keyset_condition(field, descending, *cursor))
+
+        rows = list(queryset[:page_size + 1])
+        self.has_next = len(rows) > page_size
+        self.page_rows = rows[:page_size]
+        return self.page_rows
+
+    def get_paginated_response(self, data):
+        if self.keyset is None:
+            return super().get_paginated_response(data)
+        return Response(OrderedDict([
+            ('count', self.count),
+            ('next', self._get_next_link()),
+            ('previous', None),
+            ('results', data),
+        ]))
+
+    def get_paginated_response_schema(self, schema):
+        response_schema = super().get_paginated_response_schema(schema)
+        response_schema['properties']['count']['description'] = (
+            'Exact in page mode; cached for up to a minute in cursor mode.'
+        )
+        return response_schema
+
+    # ------------------------------------------------------------------
+    # keyset helpers
+    # ------------------------------------------------------------------
+
+    def _get_keyset_ordering(self, request, view):
+        params = request.query_params
+        if params.get(self.mode_query_param) != 'cursor' and self.cursor_query_param not in params:
+            return None
+        get_ordering = getattr(view, 'get_keyset_ordering', None)
+        ordering = get_ordering() if get_ordering else None
+        if ordering is None or ordering[0] not in self.KEYSET_FIELDS:
+            return None
+        return ordering
+
+    @staticmethod
+    def _keyset_order_by(field, descending):
+        if descending:
+            return [F(field).desc(nulls_last=True), F('id').desc()]
+        return [F(field).asc(nulls_last=True), F('id').asc()]
+
+    @staticmethod
+    def _keyset_condition(field, descending, value, last_id):
+        # NULLs sort last in both directions; within equal values id breaks ties.
+        id_lookup = 'id__lt' if descending else 'id__gt'
+        if value is None:
+            return Q(**{f'{field}__isnull': True, id_lookup: last_id})
+        value_lookup = f'{field}__lt' if descending else f'{field}__gt'
+        return (
+            Q(**{value_lookup: value})
+            | Q(**{field: value, id_lookup: last_id})
+            | Q(**{f'{field}__isnull': True})
+        )
+
+    def _get_next_link(self):
+        if not self.has_next or not self.page_rows:
+            return None
+        field, _ = self.keyset
+        last = self.page_rows[-1]
+        url = remove_query_param(self.request.build_absolute_uri(), self.page_query_param)
+        return replace_query_param(
+            url,
+            self.cursor_query_param,
+            self._encode_cursor(getattr(last, field), last.pk),
+        )
+
+    @staticmethod
+    def _encode_cursor(value, last_id):
+        payload = json.dumps([None if value is None else str(value), last_id], separators=(',', ':'))
+        return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+    @staticmethod
+    def _decode_cursor(token):
+        if not token:
+            return None
+        try:
+            padded = token + '=' * (-len(token) % 4)
+            value, last_id = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+            return (None if value is None else Decimal(value)), int(last_id)
+        except (ValueError, TypeError, InvalidOperation, UnicodeDecodeError):
+            raise NotFound('Invalid cursor.')
+
+    def _get_cached_count(self, queryset, request, view):
+        params = sorted(
+            (key, sorted(request.query_params.getlist(key)))
+            for key in request.query_params
+            if key not in (self.cursor_query_param, self.page_query_param, self.page_size_query_param)
+        )
+        is_staff_like = getattr(view, 'is_staff_like_request', None)
+        audience = 'staff' if is_staff_like and is_staff_like() else 'public'
+        fingerprint = json.dumps([type(view).__name__, audience, request.path, params], separators=(',', ':'))
+        key = 'catalog-count:' + hashlib.sha256(fingerprint.encode()).hexdigest()
+        cache = caches[getattr(settings, 'CATALOG_RESPONSE_CACHE_ALIAS', 'default')]
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, getattr(settings, 'CATALOG_COUNT_CACHE_TIMEOUT', 60))
+        return count
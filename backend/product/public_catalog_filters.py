@@ -1,11 +1,12 @@
 from __future__ import annotations
 
+from dataclasses import dataclass, field
 from decimal import Decimal, InvalidOperation
 
-from django.db.models import Count, Max, Min, Q
+from django.db.models import Count, Exists, Max, Min, OuterRef, Q
 
-from .attribute_schema import get_effective_attribute_schema
-from .models import Brand, Category, CategoryAttributeDefinition, ProductStatus
+from .attribute_schema import get_category_attribute_schema
+from .models import Brand, Category, CategoryAttributeDefinition, ProductAttributeValue, ProductStatus
 from .stock_availability import (
     STOCK_FEW_LEFT_THRESHOLD,
     STOCK_STATUS_FEW_LEFT,
@@ -22,23 +23,63 @@ def apply_public_catalog_filters(qs, query_params, category: Category | None = N
     qs = _apply_brand_filters(qs, query_params)
     qs = _apply_rating_filter(qs, query_params)
     qs = _apply_stock_filters(qs, query_params)
-    qs = _apply_attribute_filters(qs, query_params, category)
-    return qs.distinct()
-
+    # Attribute filters are EXISTS subqueries and every other filter is on a
+    # single-valued relation, so no extra DISTINCT is needed here.
+    return _apply_attribute_filters(qs, query_params, category)
+
+
+def build_category_facets(category: Category, products_qs, query_params=None) -> dict:
+    """
+    Facet metadata for the public listing of ``category``.
+
+    ``products_qs`` is the visible, listing-annotated product queryset. When
+    ``query_params`` carry listing filters the counts are disjunctive: each
+    facet is computed over products matching every *other* active filter, so
+    selecting an option keeps its siblings' counts meaningful.
+
+    The number of queries does not grow with the number of attributes: one
+    aggregate for the price/rating ranges, one grouped brand count and one
+    grouped query over ProductAttributeValue for all enum counts, boolean
+    counts and number ranges (plus one per attribute that is itself filtered).
+    """
+    query_params = query_params or {}
+
+    effective_attributes = [
+        item
+        for item in get_category_attribute_schema(category)
+        if _is_public_filterable_definition(item.definition)
+    ]
+    definitions_by_code = {item.definition.code: item.definition for item in effective_attributes}
+    attribute_filters = _extract_attribute_filters(query_params)
+
+    def narrowed(*, skip_brand=False, skip_price=False, skip_rating=False, skip_attribute=None):
+        qs = products_qs
+        if not skip_brand:
+            qs = _apply_brand_filters(qs, query_params)
+        if not skip_price:
+            qs = qs.filter(_price_condition(query_params))
+        if not skip_rating:
+            qs = qs.filter(_rating_condition(query_params))
+        qs = _apply_stock_filters(qs, query_params)
+        return _apply_attribute_filter_map(
+            qs,
+            {code: filters for code, filters in attribute_filters.items() if code != skip_attribute},
+            definitions_by_code,
+        )
 
-def build_category_facets(category: Category, products_qs) -> dict:
-    price_range = products_qs.aggregate(
-        min=Min("final_min_price"),
-        max=Max("final_min_price"),
-    )
-    rating_range = products_qs.aggregate(
-        min=Min("rating"),
-        max=Max("rating"),
+    # Price and rating ranges share one aggregate; each ignores its own filter.
+    price_condition = _price_condition(query_params) or None
+    rating_condition = _rating_condition(query_params) or None
+    ranges = narrowed(skip_price=True, skip_rating=True).aggregate(
+        price_min=Min("final_min_price", filter=rating_condition),
+        price_max=Max("final_min_price", filter=rating_condition),
+        rating_min=Min("rating", filter=price_condition),
+        rating_max=Max("rating", filter=price_condition),
     )
 
     brand_rows = (
         Brand.objects.filter(
-            products__in=products_qs,
+            products__in=narrowed(skip_brand=True).values("pk"),
             status=ProductStatus.APPROVED,
         )
         .values("id", "name", "slug")
@@ -46,12 +87,22 @@ def build_category_facets(category: Category, products_qs) -> dict:
         .order_by("name", "id")
     )
 
-    attributes = []
-    for effective_attribute in get_effective_attribute_schema(category):
-        definition = effective_attribute.definition
-        if not _is_public_filterable_definition(definition):
-            continue
-        attributes.append(_build_attribute_facet(definition, products_qs, effective_attribute.is_inherited))
+    aggregated_ids = [
+        item.definition.id
+        for item in effective_attributes
+        if item.definition.data_type in _AGGREGATED_DATA_TYPES
+    ]
+    filtered_ids = {
+        definitions_by_code[code].id: code
+        for code in attribute_filters
+        if code in definitions_by_code and definitions_by_code[code].id in aggregated_ids
+    }
+    stats = _attribute_value_stats(
+        narrowed(),
+        [definition_id for definition_id in aggregated_ids if definition_id not in filtered_ids],
+    )
+    for definition_id, code in filtered_ids.items():
+        stats.update(_attribute_value_stats(narrowed(skip_attribute=code), [definition_id]))
 
     return {
         "category": {
@@ -59,8 +110,8 @@ def build_category_facets(category: Category, products_qs) -> dict:
             "name": category.name,
         },
         "price": {
-            "min": _decimal_to_string(price_range["min"]),
-            "max": _decimal_to_string(price_range["max"]),
+            "min": _decimal_to_string(ranges["price_min"]),
+            "max": _decimal_to_string(ranges["price_max"]),
         },
         "brands": list(brand_rows),
         "stock": {
@@ -71,10 +122,17 @@ def build_category_facets(category: Category, products_qs) -> dict:
             ],
         },
         "rating": {
-            "min": _decimal_to_string(rating_range["min"]),
-            "max": _decimal_to_string(rating_range["max"]),
+            "min": _decimal_to_string(ranges["rating_min"]),
+            "max": _decimal_to_string(ranges["rating_max"]),
         },
-        "attributes": attributes,
+        "attributes": [
+            _build_attribute_facet(
+                item.definition,
+                stats.get(item.definition.id, _AttributeValueStats()),
+                item.is_inherited,
+            )
+            for item in effective_attributes
+        ],
     }
 
 
@@ -142,12 +200,18 @@ def _apply_attribute_filters(qs, query_params, category: Category | None):
     if not filters_by_code:
         return qs
 
+    if category is None:
+        return qs.none()
+
     definitions_by_code = {
-        item.definition.code: item.definition
-        for item in get_effective_attribute_schema(category)
-        if _is_public_filterable_definition(item.definition)
+        code: definition
+        for code, definition in get_category_attribute_schema(category).by_code.items()
+        if _is_public_filterable_definition(definition)
     }
+    return _apply_attribute_filter_map(qs, filters_by_code, definitions_by_code)
 
+
+def _apply_attribute_filter_map(qs, filters_by_code: dict, definitions_by_code: dict):
     for code, filters in filters_by_code.items():
         definition = definitions_by_code.get(code)
         if definition is None:
@@ -157,61 +221,104 @@ def _apply_attribute_filters(qs, query_params, category: Category | None):
     return qs
 
 
+def _price_condition(query_params) -> Q:
+    """``min_price``/``max_price`` as handled by BaseProductFilter, as a Q."""
+    condition = Q()
+    for param, lookup in (("min_price", "final_min_price__gte"), ("max_price", "final_min_price__lte")):
+        value = query_params.get(param)
+        if value in (None, ""):
+            continue
+        parsed = _parse_decimal(value)
+        if parsed is None:
+            return Q(pk__in=[])
+        condition &= Q(**{lookup: parsed})
+    return condition
+
+
+def _rating_condition(query_params) -> Q:
+    """``min_rating`` (and BaseProductFilter's ``rating`` alias) as a Q."""
+    condition = Q()
+    for param in ("min_rating", "rating"):
+        value = query_params.get(param)
+        if value in (None, ""):
+            continue
+        parsed = _parse_decimal(value)
+        if parsed is None:
+            return Q(pk__in=[])
+        condition &= Q(rating__gte=parsed)
+    return condition
+
+
 def _apply_single_attribute_filter(qs, definition: CategoryAttributeDefinition, filters: dict):
+    """
+    Restrict ``qs`` to products whose value of ``definition`` matches ``filters``.
+
+    Each attribute becomes one correlated ``EXISTS`` over ProductAttributeValue
+    (served by the ``pav_attr_*`` indexes), so combining attributes never
+    multiplies the rows of the main query.
+    """
+    condition = _attribute_value_condition(definition, filters)
+    if condition is None:
+        return qs.none()
+    return qs.filter(
+        Exists(
+            ProductAttributeValue.objects.filter(
+                condition,
+                product_id=OuterRef("pk"),
+                attribute_definition_id=definition.id,
+            )
+        )
+    )
+
+
+def _attribute_value_condition(definition: CategoryAttributeDefinition, filters: dict) -> Q | None:
+    """Q over ProductAttributeValue for one attribute filter; None when nothing can match."""
     data_type = definition.data_type
     exact = filters.get("exact")
 
     if data_type == CategoryAttributeDefinition.DataType.ENUM:
         if exact in (None, ""):
-            return qs.none()
-        option_filter = Q(attribute_values__value_option__value=exact) | Q(attribute_values__value_option__label__iexact=exact)
-        try:
-            option_filter |= Q(attribute_values__value_option_id=int(exact))
-        except (TypeError, ValueError):
-            pass
-        return qs.filter(
-            Q(attribute_values__attribute_definition=definition)
-            & Q(attribute_values__value_option__is_active=True)
-            & option_filter
-        )
+            return None
+        option_ids = _matching_option_ids(definition, str(exact))
+        if not option_ids:
+            return None
+        return Q(value_option_id__in=option_ids)
 
     if data_type == CategoryAttributeDefinition.DataType.BOOLEAN:
         parsed = _parse_bool(exact)
         if parsed is None:
-            return qs.none()
-        return qs.filter(
-            attribute_values__attribute_definition=definition,
-            attribute_values__value_boolean=parsed,
-        )
+            return None
+        return Q(value_boolean=parsed)
 
     if data_type == CategoryAttributeDefinition.DataType.NUMBER:
-        qs = qs.filter(attribute_values__attribute_definition=definition)
-        if exact not in (None, ""):
-            exact_value = _parse_decimal(exact)
-            if exact_value is None:
-                return qs.none()
-            qs = qs.filter(attribute_values__value_number=exact_value)
-        if filters.get("min") not in (None, ""):
-            min_value = _parse_decimal(filters["min"])
-            if min_value is None:
-                return qs.none()
-            qs = qs.filter(attribute_values__value_number__gte=min_value)
-        if filters.get("max") not in (None, ""):
-            max_value = _parse_decimal(filters["max"])
-            if max_value is None:
-                return qs.none()
-            qs = qs.filter(attribute_values__value_number__lte=max_value)
-        return qs
+        condition = Q()
+        for key, lookup in (("exact", "value_number"), ("min", "value_number__gte"), ("max", "value_number__lte")):
+            if filters.get(key) in (None, ""):
+                continue
+            value = _parse_decimal(filters[key])
+            if value is None:
+                return None
+            condition &= Q(**{lookup: value})
+        return condition
 
     if data_type == CategoryAttributeDefinition.DataType.TEXT:
         if exact in (None, ""):
-            return qs.none()
-        return qs.filter(
-            attribute_values__attribute_definition=definition,
-            attribute_values__value_text__iexact=exact,
-        )
+            return None
+        return Q(value_text__iexact=exact)
+
+    return None
+
 
-    return qs.none()
+def _matching_option_ids(definition: CategoryAttributeDefinition, raw: str) -> list[int]:
+    # Active options come prefetched with the attribute schema; resolving the
+    # value/label/id here keeps the option table out of the product query.
+    normalized = raw.strip().lower()
+    return [
+        option.id
+        for option in definition.options.all()
+        if option.is_active
+        and (option.value == raw or option.label.lower() == normalized or str(option.id) == raw.strip())
+    ]
 
 
 def _extract_attribute_filters(query_params) -> dict[str, dict]:
@@ -240,7 +347,66 @@ def _extract_attribute_filters(query_params) -> dict[str, dict]:
     return filters_by_code
 
 
-def _build_attribute_facet(definition: CategoryAttributeDefinition, products_qs, is_inherited: bool) -> dict:
+_AGGREGATED_DATA_TYPES = (
+    CategoryAttributeDefinition.DataType.ENUM,
+    CategoryAttributeDefinition.DataType.BOOLEAN,
+    CategoryAttributeDefinition.DataType.NUMBER,
+)
+
+
+@dataclass
+class _AttributeValueStats:
+    option_counts: dict = field(default_factory=dict)
+    boolean_counts: dict = field(default_factory=dict)
+    min: Decimal | None = None
+    max: Decimal | None = None
+
+
+def _attribute_value_stats(products_qs, definition_ids: list[int]) -> dict[int, _AttributeValueStats]:
+    """
+    One grouped query over ProductAttributeValue for all ``definition_ids``.
+
+    Rows are grouped by (definition, option, boolean): enum definitions yield a
+    row per option, boolean definitions a row per value and number definitions
+    a single row carrying min/max. A product has at most one value per
+    definition, so the row count is the product count.
+    """
+    if not definition_ids:
+        return {}
+
+    rows = (
+        ProductAttributeValue.objects.filter(
+            attribute_definition_id__in=definition_ids,
+            product__in=products_qs.values("pk"),
+        )
+        .values("attribute_definition_id", "value_option_id", "value_boolean")
+        .annotate(
+            count=Count("product_id"),
+            min=Min("value_number"),
+            max=Max("value_number"),
+        )
+        .order_by()
+    )
+
+    stats: dict[int, _AttributeValueStats] = {}
+    for row in rows:
+        entry = stats.setdefault(row["attribute_definition_id"], _AttributeValueStats())
+        if row["value_option_id"] is not None:
+            entry.option_counts[row["value_option_id"]] = row["count"]
+        if row["value_boolean"] is not None:
+            entry.boolean_counts[row["value_boolean"]] = row["count"]
+        if row["min"] is not None and (entry.min is None or row["min"] < entry.min):
+            entry.min = row["min"]
+        if row["max"] is not None and (entry.max is None or row["max"] > entry.max):
+            entry.max = row["max"]
+    return stats
+
+
+def _build_attribute_facet(
+    definition: CategoryAttributeDefinition,
+    stats: _AttributeValueStats,
+    is_inherited: bool,
+) -> dict:
     facet = {
         "id": definition.id,
         "code": definition.code,
@@ -252,40 +418,25 @@ def _build_attribute_facet(definition: CategoryAttributeDefinition, products_qs,
     }
 
     if definition.data_type == CategoryAttributeDefinition.DataType.ENUM:
-        counts = {
-            row["value_option_id"]: row["count"]
-            for row in definition.product_values.filter(product__in=products_qs)
-            .values("value_option_id")
-            .annotate(count=Count("product_id", distinct=True))
-        }
+        # ``options`` is prefetched (active only, ordered) with the attribute schema.
         facet["options"] = [
             {
                 "id": option.id,
                 "value": option.value,
                 "label": option.label,
                 "sort_order": option.sort_order,
-                "count": counts.get(option.id, 0),
+                "count": stats.option_counts.get(option.id, 0),
             }
-            for option in definition.options.filter(is_active=True).order_by("sort_order", "id")
+            for option in definition.options.all()
         ]
     elif definition.data_type == CategoryAttributeDefinition.DataType.BOOLEAN:
-        counts = {
-            row["value_boolean"]: row["count"]
-            for row in definition.product_values.filter(product__in=products_qs)
-            .values("value_boolean")
-            .annotate(count=Count("product_id", distinct=True))
-        }
         facet["options"] = [
-            {"value": True, "label": "Yes", "count": counts.get(True, 0)},
-            {"value": False, "label": "No", "count": counts.get(False, 0)},
+            {"value": True, "label": "Yes", "count": stats.boolean_counts.get(True, 0)},
+            {"value": False, "label": "No", "count": stats.boolean_counts.get(False, 0)},
         ]
     elif definition.data_type == CategoryAttributeDefinition.DataType.NUMBER:
-        value_range = definition.product_values.filter(product__in=products_qs).aggregate(
-            min=Min("value_number"),
-            max=Max("value_number"),
-        )
-        facet["min"] = _decimal_to_string(value_range["min"])
-        facet["max"] = _decimal_to_string(value_range["max"])
+        facet["min"] = _decimal_to_string(stats.min)
+        facet["max"] = _decimal_to_string(stats.max)
     elif definition.data_type == CategoryAttributeDefinition.DataType.TEXT:
         facet["aggregation"] = "not_available"
 
@@ -0,0 +1,235 @@
+"""
+Versioned response cache for public catalog endpoints.
+
+Each cached view declares the scopes its response is built from:
+
+    category-tree      CategoryListView
+    category:<id>      CategoryBaseProductListView, CategoryFacetMetadataView
+    product:<id>       BaseProductDetailAPIView
+
+Every scope has a ``CatalogCacheVersion`` row whose ``updated_at`` is bumped
+by product/signals.py after commit whenever something the scope depends on
+changes (bumping after commit keeps the version rows out of the writers' lock
+set, and a reader that sees the new version also sees the new data). Cache keys embed those versions, so a bump makes all older entries
+unreachable. The TTL only bounds how long orphaned entries stay in memory.
+
+Stock and sales change on every checkout, so they bump only product scopes.
+A category scope is bumped only when a product's place in the list changes:
+availability crossing zero or a new min price. Exact stock and order counts in
+a cached category page may lag by up to ``CATALOG_RESPONSE_CACHE_TIMEOUT``.
+
+The same versions produce ``ETag`` / ``Last-Modified``, and conditional GETs
+are answered with 304 before any catalog query runs.
+
+Responses that embed per-user fields (``is_favorite``, ``can_review``) are only
+cached for anonymous requests.
+"""
+from __future__ import annotations
+
+import hashlib
+import json
+from functools import wraps
+from typing import Iterable
+
+from django.conf import settings
+from django.core.cache import caches
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from .models import BaseProduct, CatalogCacheVersion, Category, CategoryAttributeDefinition
+
+CATEGORY_TREE_SCOPE = "category-tree"
+# Not a response scope: versions product.attribute_schema memo entries.
+ATTRIBUTE_SCHEMA_SCOPE = "attribute-schema"
+
+_DEFAULT_TIMEOUT = 60 * 15
+
+
+def category_scope(category_id) -> str:
+    return f"category:{category_id}"
+
+
+def product_scope(product_id) -> str:
+    return f"product:{product_id}"
+
+
+def _cache():
+    return caches[getattr(settings, "CATALOG_RESPONSE_CACHE_ALIAS", "default")]
+
+
+# ---------------------------------------------------------------------------
+# Versions
+# ---------------------------------------------------------------------------
+
+
+def bump_catalog_versions(scopes: Iterable[str]) -> None:
+    """Mark scopes as changed (one upsert)."""
+    scopes = sorted(set(scopes))
+    if not scopes:
+        return
+    now = timezone.now()
+    CatalogCacheVersion.objects.bulk_create(
+        [CatalogCacheVersion(scope=scope, updated_at=now) for scope in scopes],
+        update_conflicts=True,
+        unique_fields=["scope"],
+        update_fields=["updated_at"],
+    )
+
+
+def scopes_for_products(product_ids: Iterable[int]) -> list[str]:
+    """Product scopes plus the category scopes listing those products."""
+    ids = {int(pk) for pk in product_ids if pk is not None}
+    if not ids:
+        return []
+    category_ids = (
+        BaseProduct.objects.filter(pk__in=ids, category_id__isnull=False)
+        .values_list("category_id", flat=True)
+        .distinct()
+    )
+    return [product_scope(pk) for pk in ids] + [category_scope(pk) for pk in category_ids]
+
+
+def scopes_for_categories(category_ids: Iterable[int]) -> list[str]:
+    """Category scopes including descendants (attribute schema is inherited)."""
+    ids = {int(pk) for pk in category_ids if pk is not None}
+    if not ids:
+        return []
+    scopes = {category_scope(pk) for pk in ids}
+    for category in Category.objects.filter(pk__in=ids):
+        scopes.update(
+            category_scope(pk)
+            for pk in category.get_descendants().values_list("pk", flat=True)
+        )
+    return sorted(scopes)
+
+
+def bump_product_versions(product_ids: Iterable[int]) -> None:
+    bump_catalog_versions(scopes_for_products(product_ids))
+
+
+def bump_stock_versions(product_ids: Iterable[int], visibility_changed: Iterable[int] = ()) -> None:
+    """
+    Stock and sales changes: product scopes, plus the category scopes of the
+    products in ``visibility_changed`` (see refresh_catalog_listings_for_stock).
+    """
+    scopes = [product_scope(pk) for pk in {int(pk) for pk in product_ids}]
+    changed = {int(pk) for pk in visibility_changed}
+    if changed:
+        scopes += [
+            category_scope(pk)
+            for pk in BaseProduct.objects.filter(pk__in=changed, category_id__isnull=False)
+            .values_list("category_id", flat=True)
+            .distinct()
+        ]
+    bump_catalog_versions(scopes)
+
+
+def bump_category_versions(category_ids: Iterable[int]) -> None:
+    bump_catalog_versions(scopes_for_categories(category_ids))
+
+
+def bump_definition_versions(definition_ids: Iterable[int]) -> None:
+    category_ids = CategoryAttributeDefinition.objects.filter(
+        pk__in=list(definition_ids),
+    ).values_list("category_id", flat=True)
+    bump_category_versions(list(category_ids))
+
+
+def get_catalog_versions(scopes: list[str]) -> dict:
+    return dict(
+        CatalogCacheVersion.objects.filter(scope__in=scopes).values_list("scope", "updated_at")
+    )
+
+
+# ---------------------------------------------------------------------------
+# View decorator
+# ---------------------------------------------------------------------------
+
+
+def _normalized_query(request) -> str:
+    items = []
+    for key in sorted(request.query_params):
+        values = sorted(value for value in request.query_params.getlist(key) if value != "")
+        if values:
+            items.append((key, values))
+    return json.dumps(items, separators=(",", ":"))
+
+
+def _audience(view, request) -> str:
+    is_staff_like = getattr(view, "is_staff_like_request", None)
+    return "staff" if is_staff_like and is_staff_like() else "public"
+
+
+def versioned_response_cache(*, personalized: bool = False):
+    """
+    Cache a view's GET handler by scheme, host, path, normalized query,
+    audience and the versions of ``view.get_response_cache_scopes()``.
+    """
+
+    def decorator(handler):
+        @wraps(handler)
+        def wrapper(view, request, *args, **kwargs):
+            if personalized and request.user.is_authenticated:
+                return handler(view, request, *args, **kwargs)
+
+            scopes = sorted(view.get_response_cache_scopes())
+            versions = get_catalog_versions(scopes)
+            audience = _audience(view, request)
+            fingerprint = "|".join([
+                type(view).__name__,
+                audience,
+                request.accepted_renderer.format or "",
+                # Serializers build absolute media URLs from the request.
+                request.scheme,
+                request.get_host(),
+                request.path,
+                _normalized_query(request),
+                *(f"{scope}={versions[scope].timestamp() if scope in versions else 0}" for scope in scopes),
+            ])
+            digest = hashlib.sha256(fingerprint.encode()).hexdigest()
+            etag = quote_etag(digest[:32])
+            # HTTP dates have second precision; Last-Modified is only known once
+            # every scope has been bumped at least once.
+            last_modified = (
+                int(max(versions.values()).timestamp())
+                if versions and len(versions) == len(scopes)
+                else None
+            )
+
+            not_modified = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if not_modified is not None:
+                return _with_validators(not_modified, etag, last_modified, audience, request)
+
+            cache_key = f"catalog-response:{digest}"
+            cached = _cache().get(cache_key)
+            if cached is not None:
+                response = Response(cached)
+            else:
+                response = handler(view, request, *args, **kwargs)
+                if response.status_code == 200:
+                    _cache().set(
+                        cache_key,
+                        json.loads(json.dumps(response.data, cls=JSONEncoder)),
+                        getattr(settings, "CATALOG_RESPONSE_CACHE_TIMEOUT", _DEFAULT_TIMEOUT),
+                    )
+                else:
+                    return response
+            return _with_validators(response, etag, last_modified, audience, request)
+
+        return wrapper
+
+    return decorator
+
+
+def _with_validators(response, etag, last_modified, audience, request):
+    response["ETag"] = etag
+    if last_modified is not None:
+        response["Last-Modified"] = http_date(last_modified)
+    if audience == "public" and not request.user.is_authenticated:
+        patch_cache_control(response, public=True, max_age=0, must_revalidate=True)
+    else:
+        patch_cache_control(response, private=True, max_age=0, must_revalidate=True)
+    return response
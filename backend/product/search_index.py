@@ -0,0 +1,293 @@
+"""
+Product full-text search.
+
+Documents
+---------
+One ``ProductSearchDocument`` per BaseProduct with stemmed tokens in three
+weight classes (see product/search_text.py for normalization):
+
+    A  name
+    B  category name, legacy ProductParameter name/value, public typed
+       attribute values (text, option value and label)
+    C  product_description
+
+``refresh_search_documents(product_ids)`` rebuilds documents incrementally and
+is called from product/signals.py and from bulk write paths that bypass signals.
+
+Query
+-----
+``search_products(qs, query)`` filters a BaseProduct queryset to matching
+products and annotates ``search_rank``. Every query token must match (AND) and
+is matched as a prefix of an indexed token.
+
+- PostgreSQL: GIN-indexed ``tsvector`` + ``to_tsquery('simple', 'tok:* & ...')``
+  ranked with ``ts_rank``.
+- Other backends (SQLite in tests/dev): an in-process inverted index built
+  from the same documents and reused until the document table changes.
+"""
+from __future__ import annotations
+
+import threading
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Iterable
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection
+from django.db.models import Case, Count, F, FloatField, Max, Prefetch, QuerySet, Value, When
+
+from .models import BaseProduct, ProductAttributeValue, ProductSearchDocument
+from .search_text import tokenize, tokens_to_text
+
+# ts_rank default weights {D, C, B, A}; mirrored by the fallback index.
+RANK_WEIGHTS = (0.1, 0.2, 0.4, 1.0)
+_WEIGHT_A = RANK_WEIGHTS[3]
+_WEIGHT_B = RANK_WEIGHTS[2]
+_WEIGHT_C = RANK_WEIGHTS[1]
+
+_REFRESH_BATCH_SIZE = 500
+
+_DOCUMENT_FIELDS = ["title_tokens", "keyword_tokens", "body_tokens", "updated_at"]
+
+
+def _uses_postgres_search() -> bool:
+    return connection.vendor == "postgresql"
+
+
+# ---------------------------------------------------------------------------
+# Document building
+# ---------------------------------------------------------------------------
+
+
+def _public_attribute_values_prefetch() -> Prefetch:
+    return Prefetch(
+        "attribute_values",
+        queryset=ProductAttributeValue.objects.filter(
+            attribute_definition__is_active=True,
+            attribute_definition__is_public=True,
+        ).select_related("value_option"),
+        to_attr="search_attribute_values",
+    )
+
+
+def build_document_tokens(product: BaseProduct) -> tuple[list[str], list[str], list[str]]:
+    """Return (title, keyword, body) token lists for a product with prefetches applied."""
+    title = tokenize(product.name)
+
+    keywords: list[str] = []
+    if product.category_id and product.category is not None:
+        keywords += tokenize(product.category.name)
+    for parameter in product.product_parameters.all():
+        keywords += tokenize(parameter.name)
+        keywords += tokenize(parameter.value)
+    for value in getattr(product, "search_attribute_values", []):
+        if value.value_text:
+            keywords += tokenize(value.value_text)
+        option = value.value_option
+        if option is not None and option.is_active:
+            keywords += tokenize(option.value.replace("-", " "))
+            keywords += tokenize(option.label)
+
+    body = tokenize(product.product_description)
+    return title, keywords, body
+
+
+def refresh_search_documents(product_ids: Iterable[int]) -> int:
+    """Rebuild search documents for the given products. Returns rows written."""
+    ids = sorted({int(pk) for pk in product_ids if pk is not None})
+    written = 0
+    for start in range(0, len(ids), _REFRESH_BATCH_SIZE):
+        written += _refresh_batch(ids[start:start + _REFRESH_BATCH_SIZE])
+    return written
+
+
+def _refresh_batch(product_ids: list[int]) -> int:
+    products = list(
+        BaseProduct.objects.filter(pk__in=product_ids)
+        .select_related("category")
+        .prefetch_related("product_parameters", _public_attribute_values_prefetch())
+    )
+    if not products:
+        return 0
+
+    documents = []
+    for product in products:
+        title, keywords, body = build_document_tokens(product)
+        documents.append(
+            ProductSearchDocument(
+                product_id=product.pk,
+                title_tokens=tokens_to_text(title),
+                keyword_tokens=tokens_to_text(keywords),
+                body_tokens=tokens_to_text(body),
+            )
+        )
+
+    ProductSearchDocument.objects.bulk_create(
+        documents,
+        update_conflicts=True,
+        unique_fields=["product"],
+        update_fields=_DOCUMENT_FIELDS,
+    )
+    if _uses_postgres_search():
+        _write_search_vectors([doc.product_id for doc in documents])
+    return len(documents)
+
+
+def _write_search_vectors(product_ids: list[int]) -> None:
+    ProductSearchDocument.objects.filter(product_id__in=product_ids).update(
+        search_vector=(
+            SearchVector("title_tokens", weight="A", config="simple")
+            + SearchVector("keyword_tokens", weight="B", config="simple")
+            + SearchVector("body_tokens", weight="C", config="simple")
+        )
+    )
+
+
+def refresh_search_documents_for_categories(category_ids: Iterable[int]) -> int:
+    product_ids = BaseProduct.objects.filter(category_id__in=list(category_ids)).values_list("id", flat=True)
+    return refresh_search_documents(list(product_ids))
+
+
+def refresh_search_documents_for_definitions(definition_ids: Iterable[int]) -> int:
+    product_ids = (
+        ProductAttributeValue.objects.filter(attribute_definition_id__in=list(definition_ids))
+        .values_list("product_id", flat=True)
+        .distinct()
+    )
+    return refresh_search_documents(list(product_ids))
+
+
+def refresh_search_documents_for_options(option_ids: Iterable[int]) -> int:
+    product_ids = (
+        ProductAttributeValue.objects.filter(value_option_id__in=list(option_ids))
+        .values_list("product_id", flat=True)
+        .distinct()
+    )
+    return refresh_search_documents(list(product_ids))
+
+
+# ---------------------------------------------------------------------------
+# Query
+# ---------------------------------------------------------------------------
+
+
+def parse_search_query(query: str | None) -> list[str]:
+    """Stemmed, de-duplicated query tokens in input order."""
+    seen = set()
+    tokens = []
+    for token in tokenize(query):
+        if token not in seen:
+            seen.add(token)
+            tokens.append(token)
+    return tokens
+
+
+def search_products(qs: QuerySet, query: str | None) -> QuerySet:
+    """
+    Restrict a BaseProduct queryset to products matching ``query`` and annotate
+    ``search_rank`` (float, higher is better). Empty/stop-word-only queries
+    return ``qs.none()``.
+    """
+    tokens = parse_search_query(query)
+    if not tokens:
+        return qs.none()
+
+    if _uses_postgres_search():
+        return _search_postgres(qs, tokens)
+    return _search_fallback(qs, tokens)
+
+
+def _search_postgres(qs: QuerySet, tokens: list[str]) -> QuerySet:
+    ts_query = SearchQuery(
+        " & ".join(f"{token}:*" for token in tokens),
+        search_type="raw",
+        config="simple",
+    )
+    return qs.filter(search_document__search_vector=ts_query).annotate(
+        search_rank=SearchRank(
+            F("search_document__search_vector"),
+            ts_query,
+            weights=list(RANK_WEIGHTS),
+        )
+    )
+
+
+def _search_fallback(qs: QuerySet, tokens: list[str]) -> QuerySet:
+    ranked = get_fallback_index().search(tokens)
+    if not ranked:
+        return qs.none()
+    return qs.filter(pk__in=list(ranked)).annotate(
+        search_rank=Case(
+            *[When(pk=pk, then=Value(score)) for pk, score in ranked.items()],
+            default=Value(0.0),
+            output_field=FloatField(),
+        )
+    )
+
+
+# ---------------------------------------------------------------------------
+# Pure-Python inverted index (non-PostgreSQL fallback)
+# ---------------------------------------------------------------------------
+
+
+@dataclass
+class InvertedIndex:
+    """token -> {product_id: best weight}; vocabulary kept sorted for prefix scans."""
+
+    postings: dict[str, dict[int, float]] = field(default_factory=dict)
+    vocabulary: list[str] = field(default_factory=list)
+
+    @classmethod
+    def build(cls, rows: Iterable[tuple[int, str, str, str]]) -> "InvertedIndex":
+        postings: dict[str, dict[int, float]] = {}
+        for product_id, title, keywords, body in rows:
+            for text, weight in ((title, _WEIGHT_A), (keywords, _WEIGHT_B), (body, _WEIGHT_C)):
+                for token in (text or "").split():
+                    bucket = postings.setdefault(token, {})
+                    if bucket.get(product_id, 0.0) < weight:
+                        bucket[product_id] = weight
+        return cls(postings=postings, vocabulary=sorted(postings))
+
+    def _prefix_matches(self, prefix: str) -> dict[int, float]:
+        matches: dict[int, float] = {}
+        start = bisect_left(self.vocabulary, prefix)
+        for token in self.vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            for product_id, weight in self.postings[token].items():
+                if matches.get(product_id, 0.0) < weight:
+                    matches[product_id] = weight
+        return matches
+
+    def search(self, tokens: list[str]) -> dict[int, float]:
+        """AND over tokens; score is the sum of each token's best weight."""
+        scores: dict[int, float] | None = None
+        for token in tokens:
+            matches = self._prefix_matches(token)
+            if scores is None:
+                scores = matches
+            else:
+                scores = {pk: scores[pk] + weight for pk, weight in matches.items() if pk in scores}
+            if not scores:
+                return {}
+        return scores or {}
+
+
+_fallback_lock = threading.Lock()
+_fallback_state: dict = {"key": None, "index": None}
+
+
+def get_fallback_index() -> InvertedIndex:
+    """Build (or reuse) the in-process index; rebuilt when documents change."""
+    stats = ProductSearchDocument.objects.aggregate(count=Count("pk"), latest=Max("updated_at"))
+    key = (stats["count"], stats["latest"])
+    with _fallback_lock:
+        if _fallback_state["key"] == key and _fallback_state["index"] is not None:
+            return _fallback_state["index"]
+    index = InvertedIndex.build(
+        ProductSearchDocument.objects.values_list("product_id", "title_tokens", "keyword_tokens", "body_tokens")
+    )
+    with _fallback_lock:
+        _fallback_state["key"] = key
+        _fallback_state["index"] = index
+    return index
@@ -0,0 +1,77 @@
+"""
+Text normalization for product search (no Django imports).
+
+Both the index (ProductSearchDocument) and incoming queries go through
+``tokenize`` so that stemming is identical on PostgreSQL and in the SQLite
+fallback. PostgreSQL ships no Czech snowball config, so stemming is done here
+and the database only stores pre-stemmed tokens under the ``simple`` config.
+
+The stemmer is a light suffix stripper:
+- diacritics are removed first ("dveře" and "dvere" index the same);
+- Czech case/possessive endings follow the light stemmer of Dolamic & Savoy;
+- a few English inflections (-s, -es, -ing, -ed, -ly) are removed.
+It deliberately under-stems; queries use prefix matching on top of it.
+"""
+from __future__ import annotations
+
+import re
+import unicodedata
+
+MIN_STEM_LENGTH = 3
+
+_TOKEN_RE = re.compile(r"[0-9a-z]+")
+
+# Longest suffixes first; each entry is tried only if the remaining stem is long enough.
+_CZECH_SUFFIXES = (
+    "atech", "etem", "atum",
+    "ech", "ich", "emi", "ami", "emu", "ete", "eti", "iho", "imu", "ata", "aty", "ovi",
+    "mi", "em", "es", "im", "om", "os", "us", "ym", "am", "ou", "ho", "mu",
+    "a", "e", "i", "o", "u", "y",
+)
+_CZECH_POSSESSIVE = ("ov", "in", "uv")
+_ENGLISH_SUFFIXES = ("ingly", "ing", "edly", "ed", "ies", "es", "ly", "s")
+
+STOP_WORDS = frozenset({
+    # en
+    "a", "an", "and", "for", "in", "of", "on", "or", "the", "to", "with",
+    # cs (after diacritics removal)
+    "a", "i", "k", "na", "o", "od", "po", "pro", "s", "se", "v", "ve", "z", "za", "ze",
+})
+
+
+def strip_diacritics(value: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", value)
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch))
+
+
+def _strip_suffix(word: str, suffixes) -> str:
+    for suffix in suffixes:
+        if word.endswith(suffix) and len(word) - len(suffix) >= MIN_STEM_LENGTH:
+            return word[: -len(suffix)]
+    return word
+
+
+def stem(word: str) -> str:
+    if word.isdigit() or len(word) <= MIN_STEM_LENGTH:
+        return word
+    english = _strip_suffix(word, _ENGLISH_SUFFIXES)
+    if english != word:
+        return english
+    word = _strip_suffix(word, _CZECH_SUFFIXES)
+    return _strip_suffix(word, _CZECH_POSSESSIVE)
+
+
+def tokenize(value: str | None) -> list[str]:
+    """Lowercase, strip diacritics, split, drop stop words and stem."""
+    if not value:
+        return []
+    normalized = strip_diacritics(str(value)).lower()
+    return [
+        stem(token)
+        for token in _TOKEN_RE.findall(normalized)
+        if token not in STOP_WORDS
+    ]
+
+
+def tokens_to_text(tokens) -> str:
+    return " ".join(tokens)
@@ -20,6 +20,16 @@ from .stock_availability import (
 from .compat import get_product_cover_image_url
 
 
+def _resolve_is_favorite(obj, request) -> bool:
+    """Prefer the ``is_favorite`` annotation (favorites.services.annotate_is_favorite)."""
+    annotated = getattr(obj, 'is_favorite', None)
+    if annotated is not None:
+        return bool(annotated)
+    if request and request.user.is_authenticated:
+        return Favorite.objects.filter(user=request.user, product=obj).exists()
+    return False
+
+
 class ProductParameterSerializer(serializers.ModelSerializer):
     class Meta:
         model = ProductParameter
@@ -102,6 +112,28 @@ class BaseProductImageSerializer(serializers.ModelSerializer):
         return None
 
 
+def serialize_category_tree(tree, request, node_ids=None) -> list[dict]:
+    """
+    Same payload as ``CategorySerializer`` built from ``product.category_tree``
+    nodes, without touching the database.
+    """
+    storage = Category._meta.get_field('image').storage
+    data = []
+    for node_id in tree.root_ids if node_ids is None else node_ids:
+        node = tree.nodes[node_id]
+        data.append({
+            'id': node.id,
+            'name': node.name,
+            'parent': node.parent_id,
+            'image_url': (
+                request.build_absolute_uri(storage.url(node.image))
+                if node.image and request else None
+            ),
+            'children': serialize_category_tree(tree, request, node.children_ids) or None,
+        })
+    return data
+
+
 class ProductVariantSerializer(serializers.ModelSerializer):
     price = serializers.DecimalField(source="price_with_acquiring", max_digits=10, decimal_places=2)
     price_without_vat = serializers.SerializerMethodField()
@@ -191,11 +223,7 @@ class BaseProductDetailSerializer(serializers.ModelSerializer):
         return None
 
     def get_is_favorite(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            user = request.user
-            return Favorite.objects.filter(user=user, product=obj).exists()
-        return False
+        return _resolve_is_favorite(obj, self.context.get('request'))
 
     def get_can_review(self, obj):
         request = self.context.get('request')
@@ -276,11 +304,7 @@ class BaseProductListSerializer(serializers.ModelSerializer):
         return get_product_cover_image_url(obj, request=request, absolute=True) if request else None
 
     def get_is_favorite(self, obj):
-        request = self.context.get('request')
-        if request and request.user.is_authenticated:
-            user = request.user
-            return Favorite.objects.filter(user=user, product=obj).exists()
-        return False
+        return _resolve_is_favorite(obj, self.context.get('request'))
 
 
 class CategorySearchViewSerializer(serializers.ModelSerializer):
@@ -298,8 +322,9 @@ class CategorySerializer(serializers.ModelSerializer):
         fields = ['id', 'name', 'parent', 'image_url', 'children']
 
     def get_children(self, obj):
-        if obj.children.exists():
-            return CategorySerializer(obj.children.all(), many=True, context=self.context).data
+        children = obj.children.all()
+        if children:
+            return CategorySerializer(children, many=True, context=self.context).data
         return None
 
     def get_image_url(self, obj):
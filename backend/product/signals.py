@@ -1,9 +1,50 @@
+import threading
 from decimal import Decimal
+from django.db import transaction
 from django.dispatch import receiver
 from django.db.models import Avg
-from django.db.models.signals import post_save
+from django.db.models.signals import post_delete, post_save, pre_save
 
+from order.models import OrderProduct
 from reviews.models import Review
+from warehouses.models import WarehouseItem
+
+from .attribute_schema import invalidate_attribute_schemas
+from .catalog_listing import (
+    refresh_catalog_listings,
+    refresh_catalog_listings_for_categories,
+    refresh_catalog_listings_for_stock,
+)
+from .category_tree import invalidate_category_tree
+from .models import (
+    BaseProduct,
+    BaseProductImage,
+    Brand,
+    Category,
+    CategoryAttributeDefinition,
+    CategoryAttributeOption,
+    ProductAttributeValue,
+    ProductParameter,
+    ProductVariant,
+)
+from .response_cache import (
+    ATTRIBUTE_SCHEMA_SCOPE,
+    CATEGORY_TREE_SCOPE,
+    bump_catalog_versions,
+    bump_category_versions,
+    bump_definition_versions,
+    bump_product_versions,
+    bump_stock_versions,
+    category_scope,
+    product_scope,
+)
+from .search_index import (
+    refresh_search_documents,
+    refresh_search_documents_for_categories,
+    refresh_search_documents_for_definitions,
+    refresh_search_documents_for_options,
+)
+from .stock_availability import refresh_variant_availability
 
 
 @receiver(post_save, sender=Review)
@@ -22,3 +63,242 @@ def update_product_rating_and_reviews(sender, instance, created, **kwargs):
         product.rating = avg_rating
         product.total_reviews = reviews.count()
         product.save()
+
+
+# ---------------------------------------------------------------------------
+# CatalogListing maintenance
+#
+# Product, variant and image saves refresh synchronously so list endpoints see
+# the change immediately.
+# Deletes defer to on_commit: during a cascade delete of BaseProduct the parent
+# row still exists when child post_delete fires, and an immediate upsert would
+# resurrect the listing row of a product that is about to disappear.
+# Stock and sales rows are saved many times per transaction (checkout, order
+# status changes), so their refresh also runs on commit, once for all variants
+# queued by the transaction.
+# ---------------------------------------------------------------------------
+
+_pending = threading.local()
+
+
+def _refresh_on_commit(refresh, ids):
+    transaction.on_commit(lambda: refresh(ids))
+
+
+def _refresh_on_commit_batched(refresh, ids):
+    """
+    Queue ``ids`` for ``refresh`` after commit. Ids queued by one transaction
+    are merged, and the first callback to run refreshes them all; the rest find
+    the queue empty. Ids left by a rolled-back transaction are refreshed with
+    the next commit in the thread, which is harmless.
+    """
+    queues = _pending.__dict__.setdefault("queues", {})
+    queues.setdefault(refresh, set()).update(pk for pk in ids if pk is not None)
+
+    def flush():
+        queued = queues.pop(refresh, None)
+        if queued:
+            refresh(sorted(queued))
+
+    transaction.on_commit(flush)
+
+
+def _refresh_sales_read_models(variant_ids):
+    bump_stock_versions(*refresh_catalog_listings_for_stock(variant_ids))
+
+
+def _refresh_stock_read_models(variant_ids):
+    # The listing total is summed from the availability snapshot: refresh it first.
+    refresh_variant_availability(variant_ids)
+    _refresh_sales_read_models(variant_ids)
+
+
+@receiver(post_save, sender=BaseProduct)
+def refresh_read_models_on_product_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_catalog_listings([instance.pk])
+    refresh_search_documents([instance.pk])
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_save, sender=BaseProductImage)
+def refresh_listing_on_product_child_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_catalog_listings([instance.product_id])
+
+
+@receiver(post_delete, sender=ProductVariant)
+@receiver(post_delete, sender=BaseProductImage)
+def refresh_listing_on_product_child_delete(sender, instance, **kwargs):
+    _refresh_on_commit(refresh_catalog_listings, [instance.product_id])
+
+
+@receiver(post_save, sender=WarehouseItem)
+def refresh_listing_on_stock_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    # Reservations in the same transaction read the snapshot: keep it exact now.
+    refresh_variant_availability([instance.product_variant_id])
+    _refresh_on_commit_batched(_refresh_stock_read_models, [instance.product_variant_id])
+
+
+@receiver(post_delete, sender=WarehouseItem)
+def refresh_listing_on_stock_delete(sender, instance, **kwargs):
+    _refresh_on_commit_batched(_refresh_stock_read_models, [instance.product_variant_id])
+
+
+@receiver(post_save, sender=OrderProduct)
+def refresh_listing_on_order_product_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _refresh_on_commit_batched(_refresh_sales_read_models, [instance.product_id])
+
+
+@receiver(post_delete, sender=OrderProduct)
+def refresh_listing_on_order_product_delete(sender, instance, **kwargs):
+    _refresh_on_commit_batched(_refresh_sales_read_models, [instance.product_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category_tree_on_change(sender, **kwargs):
+    # Other processes notice the change through the tree key (see category_tree.py)
+    # and the category-tree version bumped below.
+    invalidate_category_tree()
+    invalidate_attribute_schemas()
+
+
+@receiver(post_save, sender=CategoryAttributeDefinition)
+@receiver(post_delete, sender=CategoryAttributeDefinition)
+@receiver(post_save, sender=CategoryAttributeOption)
+@receiver(post_delete, sender=CategoryAttributeOption)
+def invalidate_attribute_schemas_on_change(sender, raw=False, **kwargs):
+    invalidate_attribute_schemas()
+    if not raw:
+        _refresh_on_commit(bump_catalog_versions, [ATTRIBUTE_SCHEMA_SCOPE])
+
+
+@receiver(post_save, sender=Category)
+def refresh_read_models_on_category_save(sender, instance, created, raw=False, **kwargs):
+    # A new category has no products yet; renames/moves change category_path.
+    if raw or created:
+        return
+    refresh_catalog_listings_for_categories([instance.pk])
+    refresh_search_documents_for_categories([instance.pk])
+
+
+# ---------------------------------------------------------------------------
+# ProductSearchDocument maintenance (same save/delete split as above)
+# ---------------------------------------------------------------------------
+
+
+@receiver(post_save, sender=ProductParameter)
+@receiver(post_save, sender=ProductAttributeValue)
+def refresh_search_on_product_text_save(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    refresh_search_documents([instance.product_id])
+
+
+@receiver(post_delete, sender=ProductParameter)
+@receiver(post_delete, sender=ProductAttributeValue)
+def refresh_search_on_product_text_delete(sender, instance, **kwargs):
+    _refresh_on_commit(refresh_search_documents, [instance.product_id])
+
+
+@receiver(post_save, sender=CategoryAttributeDefinition)
+def refresh_search_on_definition_save(sender, instance, created, raw=False, **kwargs):
+    # is_active / is_public decide whether values of this attribute are searchable.
+    if raw or created:
+        return
+    refresh_search_documents_for_definitions([instance.pk])
+
+
+@receiver(post_save, sender=CategoryAttributeOption)
+def refresh_search_on_option_save(sender, instance, created, raw=False, **kwargs):
+    if raw or created:
+        return
+    refresh_search_documents_for_options([instance.pk])
+
+
+# ---------------------------------------------------------------------------
+# Catalog response cache versions (product/response_cache.py)
+#
+# Always bumped on commit: the version must not become visible before the data
+# it describes, and version rows must not be locked by long write transactions.
+# Stock and sales versions are bumped by the listing refresh above, which knows
+# whether the product's state in category lists changed.
+# ---------------------------------------------------------------------------
+
+
+@receiver(pre_save, sender=BaseProduct)
+def remember_previous_product_category(sender, instance, raw=False, **kwargs):
+    if raw or instance.pk is None:
+        return
+    instance._previous_category_id = (
+        BaseProduct.objects.filter(pk=instance.pk).values_list("category_id", flat=True).first()
+    )
+
+
+@receiver(post_save, sender=BaseProduct)
+@receiver(post_delete, sender=BaseProduct)
+def bump_cache_versions_on_product_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    scopes = [product_scope(instance.pk)]
+    for category_id in {instance.category_id, getattr(instance, "_previous_category_id", None)}:
+        if category_id is not None:
+            scopes.append(category_scope(category_id))
+    _refresh_on_commit(bump_catalog_versions, scopes)
+
+
+@receiver(post_save, sender=ProductVariant)
+@receiver(post_delete, sender=ProductVariant)
+@receiver(post_save, sender=BaseProductImage)
+@receiver(post_delete, sender=BaseProductImage)
+@receiver(post_save, sender=ProductParameter)
+@receiver(post_delete, sender=ProductParameter)
+@receiver(post_save, sender=ProductAttributeValue)
+@receiver(post_delete, sender=ProductAttributeValue)
+def bump_cache_versions_on_product_child_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _refresh_on_commit(bump_product_versions, [instance.product_id])
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def bump_cache_versions_on_category_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _refresh_on_commit(bump_catalog_versions, [CATEGORY_TREE_SCOPE, category_scope(instance.pk)])
+    _refresh_on_commit(bump_category_versions, [instance.pk])
+
+
+@receiver(post_save, sender=CategoryAttributeDefinition)
+@receiver(post_delete, sender=CategoryAttributeDefinition)
+def bump_cache_versions_on_definition_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _refresh_on_commit(bump_category_versions, [instance.category_id])
+
+
+@receiver(post_save, sender=CategoryAttributeOption)
+@receiver(post_delete, sender=CategoryAttributeOption)
+def bump_cache_versions_on_option_change(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _refresh_on_commit(bump_definition_versions, [instance.attribute_definition_id])
+
+
+@receiver(post_save, sender=Brand)
+def bump_cache_versions_on_brand_change(sender, instance, created, raw=False, **kwargs):
+    # Brand status/name show up in facets and filters of every category using it.
+    if raw or created:
+        return
+    _refresh_on_commit(
+        bump_product_versions,
+        list(BaseProduct.objects.filter(brand=instance).values_list("pk", flat=True)),
+    )
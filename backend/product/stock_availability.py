@@ -1,18 +1,31 @@
 """
 Public stock availability helpers for catalog API (Task 020).
 
-Formula: available = max(0, quantity_in_stock - reserved_quantity) per WarehouseItem row,
-aggregated per variant (sum across warehouses) and per BaseProduct (sum across variants).
+Formula: available = max(0, quantity_in_stock - reserved_quantity - shard reservations)
+per WarehouseItem row, aggregated per variant (sum across warehouses) and per BaseProduct
+(sum across variants).  Shard reservations only exist on hot items with ``shard_count > 0``
+(warehouses/services/sharding.py).
+
+Catalog reads do not aggregate WarehouseItem: they read the ``VariantAvailability``
+snapshot, which ``refresh_variant_availability`` recomputes for the variants a
+write touched.  WarehouseItem saves (seller stock edits, admin) refresh it from
+product/signals.py inside the writing transaction; StockReservationService
+refreshes it in the reservation transaction for row-locked items and after
+commit for sharded ones, so hot variants do not serialize on the snapshot row.
 
 ``reserved_quantity`` is never exposed in API responses.
 """
 from __future__ import annotations
 
+from typing import Iterable
+
 from django.conf import settings
-from django.db.models import F, OuterRef, QuerySet, Subquery, Sum
+from django.db.models import Case, F, IntegerField, OuterRef, QuerySet, Subquery, Sum, Value, When
 from django.db.models.functions import Coalesce, Greatest
 
-from warehouses.models import WarehouseItem
+from warehouses.models import WarehouseItem, WarehouseItemShard
+
+from .models import ProductVariant, VariantAvailability
 
 STOCK_STATUS_IN_STOCK = "in_stock"
 STOCK_STATUS_FEW_LEFT = "few_left"
@@ -34,50 +47,105 @@ def compute_is_available(available_quantity: int) -> bool:
 
 
 def variant_available_quantity(variant) -> int:
-    """Sum available units for a variant; missing WarehouseItem rows → 0."""
+    """Available units of a variant from the snapshot; no snapshot row → 0."""
     annotated = getattr(variant, "available_quantity", None)
     if annotated is not None:
         return max(0, int(annotated))
+    return get_variant_availability([variant.pk]).get(variant.pk, 0)
 
-    prefetched = getattr(variant, "_prefetched_objects_cache", {}).get("warehouseitem_set")
-    if prefetched is not None:
-        items = prefetched
-    else:
-        items = variant.warehouseitem_set.all()
 
-    total = 0
-    for wi in items:
-        total += max(0, wi.quantity_in_stock - wi.reserved_quantity)
-    return total
+def _warehouse_item_available():
+    """Per-row available units; the shard sum is only evaluated for sharded rows."""
+    shard_reserved = (
+        WarehouseItemShard.objects.filter(warehouse_item_id=OuterRef("pk"))
+        .values("warehouse_item_id")
+        .annotate(total=Sum("reserved_quantity"))
+        .values("total")[:1]
+    )
+    return Greatest(
+        F("quantity_in_stock")
+        - F("reserved_quantity")
+        - Case(
+            When(shard_count=0, then=Value(0)),
+            default=Coalesce(Subquery(shard_reserved), 0),
+            output_field=IntegerField(),
+        ),
+        0,
+        output_field=IntegerField(),
+    )
 
 
-def annotate_variant_queryset_with_available(qs: QuerySet) -> QuerySet:
-    return qs.annotate(
-        available_quantity=Coalesce(
-            Sum(
-                Greatest(
-                    F("warehouseitem__quantity_in_stock") - F("warehouseitem__reserved_quantity"),
-                    0,
-                )
-            ),
-            0,
-        )
+def annotate_variant_queryset_with_live_available(qs: QuerySet) -> QuerySet:
+    """Aggregate ``available_quantity`` from WarehouseItem (the snapshot's source)."""
+    available_sq = (
+        WarehouseItem.objects.filter(product_variant_id=OuterRef("pk"))
+        .values("product_variant_id")
+        .annotate(total=Sum(_warehouse_item_available()))
+        .values("total")[:1]
     )
+    return qs.annotate(available_quantity=Coalesce(Subquery(available_sq), 0))
+
+
+def refresh_variant_availability(variant_ids: Iterable[int]) -> int:
+    """
+    Recompute and upsert VariantAvailability rows for the given variants.
+
+    One aggregate query and one upsert regardless of the number of variants.
+    Unknown / deleted variant IDs are ignored.  Returns the number of rows written.
+    """
+    ids = sorted({int(pk) for pk in variant_ids if pk is not None})
+    if not ids:
+        return 0
+    rows = [
+        VariantAvailability(variant_id=pk, product_id=product_id, available_quantity=max(0, int(available)))
+        for pk, product_id, available in annotate_variant_queryset_with_live_available(
+            ProductVariant.objects.filter(pk__in=ids).order_by("pk")
+        ).values_list("pk", "product_id", "available_quantity")
+    ]
+    VariantAvailability.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["variant"],
+        update_fields=["product", "available_quantity", "updated_at"],
+    )
+    return len(rows)
+
+
+def get_variant_availability(variant_ids: Iterable[int]) -> dict[int, int]:
+    """Bulk lookup: ``{variant_id: available units}``; every requested ID is present."""
+    ids = {int(pk) for pk in variant_ids if pk is not None}
+    if not ids:
+        return {}
+    found = dict(
+        VariantAvailability.objects.filter(variant_id__in=ids).values_list("variant_id", "available_quantity")
+    )
+    return {pk: found.get(pk, 0) for pk in ids}
+
+
+def get_product_availability(product_ids: Iterable[int]) -> dict[int, int]:
+    """Bulk lookup: ``{product_id: available units over all variants}``."""
+    ids = {int(pk) for pk in product_ids if pk is not None}
+    if not ids:
+        return {}
+    found = dict(
+        VariantAvailability.objects.filter(product_id__in=ids)
+        .values("product_id")
+        .annotate(total=Sum("available_quantity"))
+        .values_list("product_id", "total")
+    )
+    return {pk: int(found.get(pk) or 0) for pk in ids}
+
+
+def annotate_variant_queryset_with_available(qs: QuerySet) -> QuerySet:
+    return qs.annotate(available_quantity=Coalesce(F("availability_snapshot__available_quantity"), 0))
 
 
 def annotate_products_with_total_available(qs: QuerySet) -> QuerySet:
     """Add ``total_available_quantity`` (int) on BaseProduct queryset."""
     total_sq = (
-        WarehouseItem.objects.filter(product_variant__product_id=OuterRef("pk"))
-        .values("product_variant__product_id")
-        .annotate(
-            total=Sum(
-                Greatest(
-                    F("quantity_in_stock") - F("reserved_quantity"),
-                    0,
-                )
-            )
-        )
+        VariantAvailability.objects.filter(product_id=OuterRef("pk"))
+        .values("product_id")
+        .annotate(total=Sum("available_quantity"))
         .values("total")[:1]
     )
     return qs.annotate(
@@ -0,0 +1,133 @@
+"""
+Stock availability snapshot (VariantAvailability, product/stock_availability.py).
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from accounts.choices import UserRole
+from accounts.models import CustomUser
+from product.models import BaseProduct, CatalogListing, ProductStatus, ProductVariant, VariantAvailability
+from product.stock_availability import (
+    annotate_products_with_total_available,
+    annotate_variant_queryset_with_available,
+    get_product_availability,
+    get_variant_availability,
+    variant_available_quantity,
+)
+from sellers.models import SellerProfile
+from warehouses.models import Warehouse, WarehouseItem
+from warehouses.services.reservation import StockReservationService
+
+
+class VariantAvailabilitySnapshotTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller_user = CustomUser.objects.create_user(
+            email="snapshot-seller@example.com",
+            password="x",
+            first_name="S",
+            last_name="N",
+            role=UserRole.SELLER,
+            phone_number="+420730000051",
+        )
+        seller_profile = SellerProfile.objects.get(user=seller_user)
+        cls.wh_a = Warehouse.objects.create(name="WH-Snap-A", street="S", city="Praha", zip_code="10000", country="CZ")
+        cls.wh_b = Warehouse.objects.create(name="WH-Snap-B", street="S", city="Brno", zip_code="60200", country="CZ")
+        cls.product = BaseProduct.objects.create(
+            name="Snapshot Product",
+            product_description="D",
+            seller=seller_profile,
+            vat_rate=Decimal("21.00"),
+            status=ProductStatus.APPROVED,
+            is_active=True,
+        )
+        cls.variant = ProductVariant.objects.create(
+            product=cls.product, name="V", text="a", price=Decimal("10.00"), weight_grams=100,
+        )
+        cls.other_variant = ProductVariant.objects.create(
+            product=cls.product, name="V", text="b", price=Decimal("10.00"), weight_grams=100,
+        )
+        cls.empty_variant = ProductVariant.objects.create(
+            product=cls.product, name="V", text="c", price=Decimal("10.00"), weight_grams=100,
+        )
+
+    def setUp(self):
+        self.item_a = WarehouseItem.objects.create(
+            warehouse=self.wh_a, product_variant=self.variant, quantity_in_stock=5, reserved_quantity=1,
+        )
+        self.item_b = WarehouseItem.objects.create(
+            warehouse=self.wh_b, product_variant=self.variant, quantity_in_stock=3,
+        )
+        WarehouseItem.objects.create(warehouse=self.wh_a, product_variant=self.other_variant, quantity_in_stock=2)
+
+    def _reserve(self, session_key, quantity):
+        return StockReservationService.create_reservation(
+            session_key=session_key,
+            payment_system="stripe",
+            groups=[{"products": [{"sku": self.variant.sku, "quantity": quantity}]}],
+            variant_map={self.variant.sku: self.variant},
+        )
+
+    def test_bulk_lookups(self):
+        ids = [self.variant.id, self.other_variant.id, self.empty_variant.id]
+        self.assertEqual(
+            get_variant_availability(ids),
+            {self.variant.id: 7, self.other_variant.id: 2, self.empty_variant.id: 0},
+        )
+        self.assertEqual(get_product_availability([self.product.id, 0]), {self.product.id: 9, 0: 0})
+
+    def test_stock_save_and_delete_refresh_snapshot(self):
+        self.item_b.quantity_in_stock = 10
+        self.item_b.save(update_fields=["quantity_in_stock"])
+        self.assertEqual(variant_available_quantity(self.variant), 14)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.item_a.delete()
+        self.assertEqual(variant_available_quantity(self.variant), 10)
+        self.assertEqual(CatalogListing.objects.get(pk=self.product.pk).total_available_quantity, 12)
+
+    def test_reservation_lifecycle_updates_snapshot_inside_the_transaction(self):
+        # No on-commit callbacks run here: locked rows refresh the snapshot in the transaction.
+        self._reserve("snap-confirm", 4)
+        self.assertEqual(get_variant_availability([self.variant.id])[self.variant.id], 3)
+
+        self._reserve("snap-release", 2)
+        StockReservationService.release_reservation("snap-release")
+        self.assertEqual(get_variant_availability([self.variant.id])[self.variant.id], 3)
+
+        StockReservationService.confirm_reservation("snap-confirm")
+        self.assertEqual(get_variant_availability([self.variant.id])[self.variant.id], 3)
+        self.assertEqual(get_product_availability([self.product.id])[self.product.id], 5)
+
+    def test_catalog_reads_do_not_touch_warehouse_items(self):
+        with CaptureQueriesContext(connection) as ctx:
+            variants = list(annotate_variant_queryset_with_available(ProductVariant.objects.filter(product=self.product)))
+            product = annotate_products_with_total_available(BaseProduct.objects.filter(pk=self.product.pk)).get()
+
+        self.assertFalse(any("warehouses_warehouseitem" in query["sql"] for query in ctx.captured_queries))
+        self.assertEqual(
+            {variant.id: variant.available_quantity for variant in variants},
+            {self.variant.id: 7, self.other_variant.id: 2, self.empty_variant.id: 0},
+        )
+        self.assertEqual(product.total_available_quantity, 9)
+
+    def test_rebuild_command_repairs_drift(self):
+        # QuerySet.update() skips the signals that maintain the snapshot.
+        WarehouseItem.objects.filter(pk=self.item_a.pk).update(reserved_quantity=5)
+        VariantAvailability.objects.filter(variant=self.other_variant).delete()
+
+        out = StringIO()
+        call_command("rebuild_stock_availability", stdout=out)
+
+        self.assertIn("VariantAvailability rows refreshed: 3", out.getvalue())
+        self.assertEqual(
+            get_variant_availability([self.variant.id, self.other_variant.id]),
+            {self.variant.id: 3, self.other_variant.id: 2},
+        )
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
+import gzip
 import io
+import os
 import shutil
 import tempfile
 from decimal import Decimal
@@ -23,7 +25,7 @@ from product.compat import (
     kg_to_grams,
     mm_to_cm,
 )
-from product.models import BaseProduct, BaseProductImage, ProductStatus, ProductVariant
+from product.models import BaseProduct, BaseProductImage, GMCFeedItem, ProductStatus, ProductVariant
 from product.serializers import BaseProductListSerializer
 from sellers.models import SellerProfile
 from sellers.serializers import ProductListSerializer as SellerProductListSerializer
@@ -148,6 +150,56 @@ class CatalogCompatibilityTestCase(TestCase):
         self.assertEqual(xml.count("<g:mpn>3000000001</g:mpn>"), 2)
         self.assertEqual(xml.count("<g:availability>in stock</g:availability>"), 2)
 
+    def _generate_feed(self, **options) -> str:
+        stdout = io.StringIO()
+        with override_settings(GMC_ONLY_SELLER_IDS=[self.seller_profile.id]):
+            call_command("generate_gmc_feed", stdout=stdout, **options)
+        return stdout.getvalue()
+
+    def test_gmc_feed_gzip_output_is_swapped_in_atomically(self):
+        self._add_image("cover.png", (0, 0, 255))
+        variant = self._add_variant(text="A")
+
+        self._generate_feed(gzip=True)
+
+        feed_dir = f"{self._media_root}/feeds"
+        self.assertEqual(os.listdir(feed_dir), ["google.xml.gz"])
+        with gzip.open(f"{feed_dir}/google.xml.gz", "rt", encoding="utf-8") as feed_file:
+            xml = feed_file.read()
+        self.assertTrue(xml.startswith('<?xml version="1.0" encoding="UTF-8"?>'))
+        self.assertIn(f"<g:id>{variant.sku}</g:id>", xml)
+        self.assertTrue(xml.endswith("</rss>\n"))
+
+    def test_gmc_feed_incremental_rebuilds_only_changed_products(self):
+        self._add_image("cover.png", (0, 0, 255))
+        variant = self._add_variant(text="A", price="10.00")
+        feed_path = f"{self._media_root}/feeds/google.xml"
+
+        output = self._generate_feed(incremental=True)
+        self.assertIn("Rebuilt products: 1 | Items rewritten: 1", output)
+        first_hash = GMCFeedItem.objects.get(variant=variant).content_hash
+
+        output = self._generate_feed(incremental=True)
+        self.assertIn("Items: 1 |", output)
+        self.assertIn("Rebuilt products: 0 | Items rewritten: 0", output)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            variant.price = Decimal("20.00")
+            variant.save()
+        output = self._generate_feed(incremental=True)
+        self.assertIn("Rebuilt products: 1 | Items rewritten: 1", output)
+        self.assertNotEqual(GMCFeedItem.objects.get(variant=variant).content_hash, first_hash)
+        with open(feed_path, encoding="utf-8") as feed_file:
+            self.assertEqual(feed_file.read().count("<item>"), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.product.is_active = False
+            self.product.save()
+        self._generate_feed(incremental=True)
+        self.assertFalse(GMCFeedItem.objects.exists())
+        with open(feed_path, encoding="utf-8") as feed_file:
+            self.assertNotIn("<item>", feed_file.read())
+
     def test_dimension_conversion_helpers_are_loss_safe_for_ui_units(self):
         self.assertEqual(cm_to_mm("12.3"), 123)
         self.assertEqual(mm_to_cm(123), Decimal("12.3"))
@@ -0,0 +1,180 @@
+"""
+CatalogListing read model: maintenance from write paths and list endpoint reads.
+"""
+from decimal import Decimal
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.choices import UserRole
+from accounts.models import CustomUser
+from favorites.models import Favorite
+from order.models import DeliveryType, Order, OrderProduct, OrderStatus
+from product.models import BaseProduct, CatalogListing, Category, ProductStatus, ProductVariant
+from sellers.models import SellerProfile
+from warehouses.models import Warehouse, WarehouseItem
+
+
+class CatalogListingTestCase(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.wh = Warehouse.objects.create(
+            name="WH-Listing",
+            street="S",
+            city="Praha",
+            zip_code="10000",
+            country="CZ",
+        )
+        cls.seller_user = CustomUser.objects.create_user(
+            email="seller-listing@example.com",
+            password="pass12345",
+            first_name="S",
+            last_name="L",
+            role=UserRole.SELLER,
+            phone_number="+420730000311",
+        )
+        cls.seller_profile = SellerProfile.objects.get(user=cls.seller_user)
+        cls.customer = CustomUser.objects.create_user(
+            email="customer-listing@example.com",
+            password="pass12345",
+            first_name="C",
+            last_name="L",
+            role=UserRole.CUSTOMER,
+            phone_number="+420730000312",
+        )
+
+        cls.root = Category.objects.create(name="ListingRoot")
+        cls.leaf = Category.objects.create(name="ListingLeaf", parent=cls.root)
+
+        cls.product = BaseProduct.objects.create(
+            name="Listing Product",
+            product_description="Listing read model.",
+            seller=cls.seller_profile,
+            category=cls.leaf,
+            article="3100000001",
+            vat_rate=Decimal("21.00"),
+            status=ProductStatus.APPROVED,
+            is_active=True,
+        )
+        cls.variant = ProductVariant.objects.create(
+            product=cls.product,
+            name="Size",
+            text="S",
+            price=Decimal("10.00"),
+            weight_grams=100,
+            length_mm=50,
+            width_mm=50,
+            height_mm=50,
+        )
+        cls.variant_b = ProductVariant.objects.create(
+            product=cls.product,
+            name="Size",
+            text="M",
+            price=Decimal("20.00"),
+            weight_grams=100,
+            length_mm=50,
+            width_mm=50,
+            height_mm=50,
+        )
+        # Stock and sales refresh the listing on commit.
+        with cls.captureOnCommitCallbacks(execute=True):
+            cls.wi = WarehouseItem.objects.create(
+                warehouse=cls.wh,
+                product_variant=cls.variant,
+                quantity_in_stock=8,
+                reserved_quantity=3,
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _listing(self):
+        return CatalogListing.objects.get(product=self.product)
+
+    def test_listing_tracks_variant_prices_and_stock(self):
+        listing = self._listing()
+        self.assertEqual(listing.base_min_price, Decimal("10.00"))
+        self.assertEqual(listing.final_min_price, Decimal("10.40"))
+        self.assertEqual(listing.total_available_quantity, 5)
+        self.assertEqual(listing.category_path, "ListingRoot > ListingLeaf")
+        self.assertEqual(listing.status, ProductStatus.APPROVED)
+
+        self.variant.price = Decimal("30.00")
+        self.variant.save()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.wi.reserved_quantity = 0
+            self.wi.save(update_fields=["reserved_quantity"])
+
+        listing = self._listing()
+        self.assertEqual(listing.base_min_price, Decimal("20.00"))
+        self.assertEqual(listing.total_available_quantity, 8)
+
+    def test_stock_saves_refresh_the_listing_once_on_commit(self):
+        with patch("product.signals.refresh_catalog_listings_for_stock", return_value=([], [])) as refresh:
+            with self.captureOnCommitCallbacks(execute=True):
+                for reserved in (2, 1, 0):
+                    self.wi.reserved_quantity = reserved
+                    self.wi.save(update_fields=["reserved_quantity"])
+                WarehouseItem.objects.create(warehouse=self.wh, product_variant=self.variant_b, quantity_in_stock=1)
+                refresh.assert_not_called()
+
+        refresh.assert_called_once_with(sorted([self.variant.id, self.variant_b.id]))
+
+    def test_listing_tracks_orders_visibility_and_category_rename(self):
+        order = Order.objects.create(
+            user=self.customer,
+            customer_email=self.customer.email,
+            total_amount=Decimal("10.40"),
+            delivery_type=DeliveryType.objects.create(name="Listing courier"),
+            order_status=OrderStatus.objects.create(name="Listing pending"),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderProduct.objects.create(
+                order=order,
+                product=self.variant,
+                quantity=4,
+                seller_profile=self.seller_profile,
+                warehouse=self.wh,
+            )
+        self.product.is_active = False
+        self.product.save(update_fields=["is_active"])
+        self.root.name = "ListingRootRenamed"
+        self.root.save()
+
+        listing = self._listing()
+        self.assertEqual(listing.ordered_quantity, 4)
+        self.assertFalse(listing.is_active)
+        self.assertEqual(listing.category_path, "ListingRootRenamed > ListingLeaf")
+
+    def test_category_list_serves_listing_values(self):
+        url = reverse("category-products", kwargs={"category_id": self.leaf.id})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        row = response.data["results"][0]
+        self.assertEqual(row["id"], self.product.id)
+        self.assertEqual(row["price"], "10.40")
+        self.assertEqual(row["total_available_quantity"], 5)
+        self.assertIsNone(row["image"])
+
+    def test_seller_and_favorite_lists_expose_price(self):
+        response = self.client.get(reverse("seller-products", kwargs={"seller_id": self.seller_profile.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["price"], "10.40")
+
+        Favorite.objects.create(user=self.customer, product=self.product)
+        self.client.force_authenticate(self.customer)
+        response = self.client.get(reverse("favorite-products"), {"sort_by": "price_asc"})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"][0]["price"], "10.40")
+
+    def test_rebuild_command_recreates_missing_rows(self):
+        CatalogListing.objects.all().delete()
+        out = StringIO()
+        call_command("rebuild_catalog_listing", stdout=out)
+        self.assertIn("CatalogListing rows refreshed: 1", out.getvalue())
+        self.assertEqual(self._listing().base_min_price, Decimal("10.00"))
@@ -19,6 +19,7 @@ from product.models import (
     BaseProduct,
     BaseProductImage,
     Brand,
+    CatalogListing,
     Category,
     CategoryAttributeDefinition,
     CategoryAttributeOption,
@@ -184,11 +185,13 @@ class CatalogRegressionSmokeTestCase(TestCase):
         self.assertEqual(attributes[1]["inherited_from_id"], parent_material_definition.id)
         self.assertEqual(attributes[1]["options"][0]["value"], "cotton")
 
-        stock_response = seller_client.put(
-            f"/api/sellers/products/{product.id}/variants/{variant.id}/stock/",
-            {"quantity_in_stock": 11},
-            format="json",
-        )
+        # Stock changes reach CatalogListing on commit.
+        with self.captureOnCommitCallbacks(execute=True):
+            stock_response = seller_client.put(
+                f"/api/sellers/products/{product.id}/variants/{variant.id}/stock/",
+                {"quantity_in_stock": 11},
+                format="json",
+            )
         self.assertEqual(stock_response.status_code, status.HTTP_200_OK)
         self.assertEqual(stock_response.data["quantity_in_stock"], 11)
         self.assertEqual(stock_response.data["reserved_quantity"], 0)
@@ -236,22 +239,24 @@ class CatalogRegressionSmokeTestCase(TestCase):
         found_ids = {item["id"] for item in search_response.data["results"]["products"]}
         self.assertIn(product.id, found_ids)
 
-        StockReservationService.create_reservation(
-            session_key="catalog-regression-smoke",
-            payment_system="stripe",
-            groups=[{"products": [{"sku": variant.sku, "quantity": 3}]}],
-            variant_map={variant.sku: variant},
-        )
+        # Catalog response cache versions are bumped on commit.
+        with self.captureOnCommitCallbacks(execute=True):
+            StockReservationService.create_reservation(
+                session_key="catalog-regression-smoke",
+                payment_system="stripe",
+                groups=[{"products": [{"sku": variant.sku, "quantity": 3}]}],
+                variant_map={variant.sku: variant},
+            )
         warehouse_item = WarehouseItem.objects.get(warehouse=default_warehouse, product_variant=variant)
         self.assertEqual(warehouse_item.quantity_in_stock, 11)
         self.assertEqual(warehouse_item.reserved_quantity, 3)
 
-        category_after_reservation = public_client.get(
-            reverse("category-products", kwargs={"category_id": leaf.id}),
+        # Stock moves bump only the product scope while the product stays
+        # available: the listing row and the detail page show the new count.
+        self.assertEqual(CatalogListing.objects.get(product=product).total_available_quantity, 8)
+        detail_after_reservation = public_client.get(
+            reverse("product-detail", kwargs={"id": product.id}),
             format="json",
         )
-        row_after_reservation = next(
-            item for item in category_after_reservation.data["results"] if item["id"] == product.id
-        )
-        self.assertEqual(row_after_reservation["total_available_quantity"], 8)
-        self.assertNotIn("reserved_quantity", row_after_reservation)
+        self.assertEqual(detail_after_reservation.data["variants"][0]["available_quantity"], 8)
+        self.assertNotIn("reserved_quantity", detail_after_reservation.data["variants"][0])
@@ -15,6 +15,7 @@ from accounts.models import CustomUser
 from product.admin import ProductAttributeValueAdminForm
 from product.attribute_schema import (
     category_allows_products,
+    get_category_attribute_schema,
     get_effective_attribute_schema,
     replace_product_attribute_values,
 )
@@ -126,6 +127,46 @@ class CategoryAttributeSchemaTestCase(TestCase):
         self.assertEqual(get_effective_attribute_schema(product.category), [])
         self.assertEqual(get_effective_attribute_schema(None), [])
 
+    def test_schema_is_memoized_with_code_and_id_maps(self):
+        definition = CategoryAttributeDefinition.objects.create(
+            category=self.root,
+            code="finish",
+            name="Finish",
+            data_type=CategoryAttributeDefinition.DataType.ENUM,
+        )
+        CategoryAttributeOption.objects.create(attribute_definition=definition, value="matte", label="Matte")
+
+        schema = get_category_attribute_schema(self.leaf)
+        self.assertEqual(schema.by_code["finish"], definition)
+        self.assertEqual(schema.by_id[definition.id], definition)
+
+        with self.assertNumQueries(1):  # version lookup only
+            again = get_category_attribute_schema(self.leaf)
+            self.assertEqual([option.value for option in again.by_code["finish"].options.all()], ["matte"])
+        self.assertIs(again, schema)
+
+    def test_schema_memo_follows_definition_option_and_tree_changes(self):
+        definition = CategoryAttributeDefinition.objects.create(
+            category=self.child,
+            code="finish",
+            name="Finish",
+            data_type=CategoryAttributeDefinition.DataType.ENUM,
+        )
+        self.assertEqual(list(get_category_attribute_schema(self.leaf).by_code), ["finish"])
+
+        CategoryAttributeOption.objects.create(attribute_definition=definition, value="gloss", label="Gloss")
+        options = get_category_attribute_schema(self.leaf).by_code["finish"].options.all()
+        self.assertEqual([option.value for option in options], ["gloss"])
+
+        definition.is_active = False
+        definition.save(update_fields=["is_active"])
+        self.assertEqual(len(get_category_attribute_schema(self.leaf)), 0)
+
+        definition.is_active = True
+        definition.save(update_fields=["is_active"])
+        self.leaf.move_to(self.root)
+        self.assertEqual(len(get_category_attribute_schema(Category.objects.get(pk=self.leaf.pk))), 0)
+
     def test_non_leaf_category_behavior_is_explicit(self):
         self.assertFalse(category_allows_products(self.root))
 
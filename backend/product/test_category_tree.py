@@ -0,0 +1,94 @@
+"""
+In-memory category tree and its consumers.
+"""
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from product.attribute_schema import get_effective_attribute_schema
+from product.category_tree import CategoryTree, get_category_tree
+from product.models import Category, CategoryAttributeDefinition
+
+
+def _row(pk, name, parent_id, tree_id, lft, rght, level):
+    return {
+        "id": pk,
+        "name": name,
+        "parent_id": parent_id,
+        "image": "",
+        "allows_product_assignment": False,
+        "tree_id": tree_id,
+        "lft": lft,
+        "rght": rght,
+        "level": level,
+    }
+
+
+class CategoryTreeBuildTests(SimpleTestCase):
+    def setUp(self):
+        self.tree = CategoryTree.build([
+            _row(1, "Home", None, 1, 1, 8, 0),
+            _row(2, "Doors", 1, 1, 2, 5, 1),
+            _row(3, "Sliding", 2, 1, 3, 4, 2),
+            _row(4, "Garden", 1, 1, 6, 7, 1),
+            _row(5, "Toys", None, 2, 1, 2, 0),
+        ])
+
+    def test_paths_ancestors_and_children(self):
+        self.assertEqual(self.tree.root_ids, (1, 5))
+        self.assertEqual(self.tree.path(3), "Home > Doors > Sliding")
+        self.assertEqual(self.tree.ancestor_ids(3, include_self=True), [1, 2, 3])
+        self.assertEqual([node.id for node in self.tree.children(1)], [2, 4])
+
+    def test_descendants_stay_within_tree(self):
+        self.assertEqual(sorted(self.tree.descendant_ids(1)), [2, 3, 4])
+        self.assertEqual(self.tree.descendant_ids(5, include_self=True), [5])
+
+
+class CategoryTreeConsumersTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.root = Category.objects.create(name="TreeRoot")
+        cls.mid = Category.objects.create(name="TreeMid", parent=cls.root)
+        cls.leaf = Category.objects.create(name="TreeLeaf", parent=cls.mid)
+        cls.deep = Category.objects.create(name="TreeDeep", parent=cls.leaf)
+        cls.deeper = Category.objects.create(name="TreeDeeper", parent=cls.deep)
+
+    def test_category_list_serves_full_depth_with_constant_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = APIClient().get(reverse("category-list"))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        root = next(item for item in response.data if item["id"] == self.root.id)
+        node, depth = root, 1
+        while node["children"]:
+            node = node["children"][0]
+            depth += 1
+        self.assertEqual(depth, 5)
+        self.assertEqual(node["id"], self.deeper.id)
+        self.assertEqual(node["parent"], self.deep.id)
+        self.assertIsNone(node["children"])
+        self.assertLessEqual(len(queries), 3)
+
+    def test_tree_follows_renames_and_moves(self):
+        self.assertEqual(get_category_tree().path(self.deep.id), "TreeRoot > TreeMid > TreeLeaf > TreeDeep")
+
+        self.mid.name = "TreeMiddle"
+        self.mid.save()
+        self.assertEqual(get_category_tree().path(self.deep.id), "TreeRoot > TreeMiddle > TreeLeaf > TreeDeep")
+
+        self.leaf.move_to(self.root)
+        self.assertEqual(get_category_tree().ancestor_ids(self.deep.id), [self.root.id, self.leaf.id])
+
+    def test_effective_schema_reads_ancestors_from_tree(self):
+        CategoryAttributeDefinition.objects.create(
+            category=self.root,
+            code="tree_width",
+            name="Width",
+            data_type=CategoryAttributeDefinition.DataType.NUMBER,
+        )
+        codes = [item.definition.code for item in get_effective_attribute_schema(self.deeper)]
+        self.assertEqual(codes, ["tree_width"])
@@ -0,0 +1,120 @@
+"""
+Opt-in keyset (cursor) pagination on category and search listings.
+"""
+from decimal import Decimal
+
+from django.test import TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.choices import UserRole
+from accounts.models import CustomUser
+from product.models import BaseProduct, Category, ProductStatus, ProductVariant
+from sellers.models import SellerProfile
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller_user = CustomUser.objects.create_user(
+            email="seller-keyset@example.com",
+            password="pass12345",
+            first_name="S",
+            last_name="K",
+            role=UserRole.SELLER,
+            phone_number="+420730000711",
+        )
+        cls.seller_profile = SellerProfile.objects.get(user=seller_user)
+        cls.category = Category.objects.create(name="KeysetCategory")
+        # Duplicate prices and ratings exercise the id tiebreaker; one NULL rating.
+        prices = ["10.00", "20.00", "20.00", "20.00", "30.00", "40.00", "40.00"]
+        ratings = ["4.0", "3.0", "3.0", None, "5.0", "1.0", "3.0"]
+        cls.products = [
+            cls._product(f"Keyset {index}", f"35000000{index:02d}", price, rating)
+            for index, (price, rating) in enumerate(zip(prices, ratings))
+        ]
+
+    @classmethod
+    def _product(cls, name, article, price, rating):
+        product = BaseProduct.objects.create(
+            name=name,
+            product_description="keyset paging",
+            seller=cls.seller_profile,
+            category=cls.category,
+            article=article,
+            vat_rate=Decimal("21.00"),
+            status=ProductStatus.APPROVED,
+            is_active=True,
+            rating=None if rating is None else Decimal(rating),
+        )
+        ProductVariant.objects.create(
+            product=product,
+            name="V",
+            text="t",
+            price=Decimal(price),
+            weight_grams=100,
+            length_mm=50,
+            width_mm=50,
+            height_mm=50,
+        )
+        return product
+
+    def setUp(self):
+        self.client = APIClient()
+
+    def _walk(self, url, params):
+        ids, pages = [], 0
+        response = self.client.get(url, {**params, "pagination": "cursor", "page_size": 2})
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            results = response.data["results"]
+            if isinstance(results, dict):
+                results = results["products"]
+            ids += [row["id"] for row in results]
+            pages += 1
+            self.assertEqual(response.data["count"], len(self.products))
+            self.assertIsNone(response.data["previous"])
+            if not response.data["next"]:
+                return ids, pages
+            response = self.client.get(response.data["next"])
+
+    def _expected(self, ordering):
+        page_response = self.client.get(
+            reverse("category-products", kwargs={"category_id": self.category.id}),
+            {"ordering": ordering, "page_size": 100},
+        )
+        return [row["id"] for row in page_response.data["results"]]
+
+    def test_cursor_walk_matches_full_ordering(self):
+        url = reverse("category-products", kwargs={"category_id": self.category.id})
+        for ordering in ["price", "-price", "min_price", "-rating", "rating"]:
+            with self.subTest(ordering=ordering):
+                ids, pages = self._walk(url, {"ordering": ordering})
+                self.assertEqual(len(ids), len(self.products))
+                self.assertEqual(len(set(ids)), len(self.products))
+                self.assertEqual(pages, 4)
+                expected = self._expected(ordering)
+                self.assertEqual(sorted(ids), sorted(expected))
+
+    def test_cursor_walk_orders_ties_by_id(self):
+        url = reverse("category-products", kwargs={"category_id": self.category.id})
+        ids, _ = self._walk(url, {"ordering": "price"})
+        middle = [self.products[1].id, self.products[2].id, self.products[3].id]
+        self.assertEqual(ids[1:4], sorted(middle))
+
+        ids, _ = self._walk(url, {"ordering": "-rating"})
+        self.assertEqual(ids[-1], self.products[3].id)  # NULL rating last
+
+    def test_search_supports_cursor_mode(self):
+        ids, _ = self._walk(reverse("search"), {"q": "keyset", "ordering": "-price"})
+        self.assertEqual(len(set(ids)), len(self.products))
+
+    def test_invalid_cursor_is_404_and_default_mode_unchanged(self):
+        url = reverse("category-products", kwargs={"category_id": self.category.id})
+        self.assertEqual(self.client.get(url, {"cursor": "!!"}).status_code, status.HTTP_404_NOT_FOUND)
+
+        response = self.client.get(url, {"page_size": 2, "page": 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["count"], len(self.products))
+        self.assertIsNotNone(response.data["previous"])
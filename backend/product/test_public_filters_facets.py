@@ -2,6 +2,8 @@ from __future__ import annotations
 
 from decimal import Decimal
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APIClient
@@ -9,6 +11,7 @@ from django.test import TestCase
 
 from accounts.choices import UserRole
 from accounts.models import CustomUser
+from product.attribute_schema import invalidate_attribute_schemas
 from product.constants import ACQUIRING_RATE
 from product.models import (
     BaseProduct,
@@ -231,12 +234,13 @@ class PublicFiltersFacetsSearchTestCase(TestCase):
             height_mm=50,
         )
         if stock is not None:
-            WarehouseItem.objects.create(
-                warehouse=cls.warehouse,
-                product_variant=variant,
-                quantity_in_stock=stock,
-                reserved_quantity=reserved,
-            )
+            with cls.captureOnCommitCallbacks(execute=True):
+                WarehouseItem.objects.create(
+                    warehouse=cls.warehouse,
+                    product_variant=variant,
+                    quantity_in_stock=stock,
+                    reserved_quantity=reserved,
+                )
         return product
 
     @classmethod
@@ -378,3 +382,81 @@ class PublicFiltersFacetsSearchTestCase(TestCase):
         typed_ids = {item["id"] for item in typed_response.data["results"]["products"]}
         self.assertIn(self.product_steel.id, typed_ids)
         self.assertNotIn(self.pending_product.id, typed_ids)
+
+    def test_facet_counts_are_disjunctive_over_applied_filters(self):
+        response = self.client.get(
+            self._facets_url(),
+            {"attr[door_material]": "steel", "attr[recyclable]": "true"},
+            format="json",
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        attributes_by_code = {item["code"]: item for item in response.data["attributes"]}
+
+        material_counts = {
+            item["value"]: item["count"] for item in attributes_by_code["door_material"]["options"]
+        }
+        self.assertEqual(material_counts, {"steel": 1, "wood": 0})
+
+        recyclable_counts = {
+            item["value"]: item["count"] for item in attributes_by_code["recyclable"]["options"]
+        }
+        self.assertEqual(recyclable_counts, {True: 1, False: 0})
+        self.assertEqual(attributes_by_code["width_cm"]["min"], attributes_by_code["width_cm"]["max"])
+
+        response = self.client.get(self._facets_url(), {"attr[door_material]": "steel"}, format="json")
+        attributes_by_code = {item["code"]: item for item in response.data["attributes"]}
+        material_counts = {
+            item["value"]: item["count"] for item in attributes_by_code["door_material"]["options"]
+        }
+        self.assertEqual(material_counts, {"steel": 1, "wood": 1})
+
+    def test_facet_price_range_ignores_price_filter(self):
+        response = self.client.get(self._facets_url(), {"max_price": "60", "min_rating": "4"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(Decimal(response.data["price"]["min"]), Decimal("50.00") * ACQUIRING_RATE)
+        self.assertEqual(Decimal(response.data["price"]["max"]), Decimal("100.00") * ACQUIRING_RATE)
+        self.assertEqual(Decimal(response.data["rating"]["min"]), Decimal("5.0"))
+
+    def test_facet_query_count_does_not_grow_with_attributes(self):
+        # Compare cold schema builds on both sides.
+        invalidate_attribute_schemas()
+        with CaptureQueriesContext(connection) as baseline:
+            self.client.get(self._facets_url(), format="json")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            for index in range(5):
+                definition = CategoryAttributeDefinition.objects.create(
+                    category=self.leaf,
+                    code=f"extra_{index}",
+                    name=f"Extra {index}",
+                    data_type=CategoryAttributeDefinition.DataType.ENUM,
+                    is_filterable=True,
+                    is_public=True,
+                    sort_order=100 + index,
+                )
+                CategoryAttributeOption.objects.create(attribute_definition=definition, value="x", label="X")
+
+        invalidate_attribute_schemas()
+        with CaptureQueriesContext(connection) as extended:
+            response = self.client.get(self._facets_url(), format="json")
+        self.assertEqual(len(response.data["attributes"]), 9)
+        self.assertEqual(len(extended), len(baseline))
+
+    def test_combined_attribute_filters_use_exists_without_row_multiplication(self):
+        params = {
+            "attr[door_material]": "Steel",
+            "attr[recyclable]": "true",
+            "attr[width_cm_min]": "70",
+            "attr[width_cm_max]": "90",
+        }
+        with CaptureQueriesContext(connection) as queries:
+            ids, response = self._category_ids(params)
+        self.assertEqual(ids, {self.product_steel.id})
+        self.assertEqual(response.data["count"], 1)
+
+        list_sql = next(
+            query["sql"] for query in queries.captured_queries
+            if "product_productattributevalue" in query["sql"] and "LIMIT" in query["sql"]
+        )
+        self.assertEqual(list_sql.count("EXISTS"), 3)
+        self.assertNotIn("JOIN \"product_productattributevalue\"", list_sql)
@@ -0,0 +1,162 @@
+"""
+Versioned response cache for public catalog endpoints.
+"""
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.choices import UserRole
+from accounts.models import CustomUser
+from product.models import (
+    BaseProduct,
+    CatalogCacheVersion,
+    Category,
+    CategoryAttributeDefinition,
+    ProductStatus,
+    ProductVariant,
+)
+from sellers.models import SellerProfile
+from warehouses.models import Warehouse, WarehouseItem
+
+
+class VersionedResponseCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller_user = CustomUser.objects.create_user(
+            email="seller-response-cache@example.com",
+            password="pass12345",
+            first_name="S",
+            last_name="C",
+            role=UserRole.SELLER,
+            phone_number="+420730000611",
+        )
+        cls.customer = CustomUser.objects.create_user(
+            email="customer-response-cache@example.com",
+            password="pass12345",
+            first_name="C",
+            last_name="C",
+            role=UserRole.CUSTOMER,
+            phone_number="+420730000612",
+        )
+        cls.seller_profile = SellerProfile.objects.get(user=seller_user)
+        cls.root = Category.objects.create(name="CacheRoot")
+        cls.leaf = Category.objects.create(name="CacheLeaf", parent=cls.root)
+        cls.product = BaseProduct.objects.create(
+            name="Cached product",
+            product_description="d",
+            seller=cls.seller_profile,
+            category=cls.leaf,
+            article="3400000001",
+            vat_rate=Decimal("21.00"),
+            status=ProductStatus.APPROVED,
+            is_active=True,
+        )
+        cls.variant = ProductVariant.objects.create(
+            product=cls.product,
+            name="V",
+            text="t",
+            price=Decimal("10.00"),
+            weight_grams=100,
+            length_mm=50,
+            width_mm=50,
+            height_mm=50,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.url = reverse("category-products", kwargs={"category_id": self.leaf.id})
+
+    def test_repeated_anonymous_request_is_served_from_cache(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.status_code, status.HTTP_200_OK)
+        self.assertIn("ETag", first)
+        self.assertIn("public", first["Cache-Control"])
+
+        with CaptureQueriesContext(connection) as queries:
+            second = self.client.get(self.url)
+        self.assertEqual(len(queries), 1)  # version lookup only
+        self.assertEqual(second.data, first.data)
+        self.assertEqual(second["ETag"], first["ETag"])
+
+        not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_host_and_scheme_are_part_of_the_key(self):
+        first = self.client.get(self.url)
+
+        for extra in ({"HTTP_HOST": "localhost"}, {"secure": True}):
+            with CaptureQueriesContext(connection) as queries:
+                other = self.client.get(self.url, **extra)
+            self.assertGreater(len(queries), 1)
+            self.assertNotEqual(other["ETag"], first["ETag"])
+
+    def test_write_bumps_version_and_changes_response(self):
+        first = self.client.get(self.url)
+        self.assertEqual(first.data["results"][0]["price"], "10.40")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.variant.price = Decimal("20.00")
+            self.variant.save()
+
+        second = self.client.get(self.url)
+        self.assertEqual(second.data["results"][0]["price"], "20.80")
+        self.assertNotEqual(second["ETag"], first["ETag"])
+        self.assertIn("Last-Modified", second)
+        self.assertTrue(
+            CatalogCacheVersion.objects.filter(scope=f"product:{self.product.id}").exists()
+        )
+
+    def test_stock_changes_bump_the_category_only_when_availability_crosses_zero(self):
+        warehouse = Warehouse.objects.create(name="WH-Cache", street="S", city="Praha", zip_code="10000", country="CZ")
+
+        def versions():
+            return dict(CatalogCacheVersion.objects.values_list("scope", "updated_at"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item = WarehouseItem.objects.create(warehouse=warehouse, product_variant=self.variant, quantity_in_stock=5)
+        in_stock = versions()
+        self.assertIn(f"category:{self.leaf.id}", in_stock)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item.quantity_in_stock = 3
+            item.save(update_fields=["quantity_in_stock"])
+        restocked = versions()
+        self.assertGreater(restocked[f"product:{self.product.id}"], in_stock[f"product:{self.product.id}"])
+        self.assertEqual(restocked[f"category:{self.leaf.id}"], in_stock[f"category:{self.leaf.id}"])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            item.quantity_in_stock = 0
+            item.save(update_fields=["quantity_in_stock"])
+        self.assertGreater(versions()[f"category:{self.leaf.id}"], restocked[f"category:{self.leaf.id}"])
+
+    def test_parent_definition_change_invalidates_child_facets(self):
+        url = reverse("category-facets", kwargs={"category_id": self.leaf.id})
+        self.assertEqual(self.client.get(url).data["attributes"], [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            CategoryAttributeDefinition.objects.create(
+                category=self.root,
+                code="cache_width",
+                name="Width",
+                data_type=CategoryAttributeDefinition.DataType.NUMBER,
+                is_filterable=True,
+                is_public=True,
+            )
+
+        codes = [item["code"] for item in self.client.get(url).data["attributes"]]
+        self.assertEqual(codes, ["cache_width"])
+
+    def test_personalized_views_bypass_cache_for_authenticated_users(self):
+        self.client.force_authenticate(self.customer)
+        response = self.client.get(reverse("product-detail", kwargs={"id": self.product.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertNotIn("ETag", response)
+
+        response = self.client.get(reverse("category-list"))
+        self.assertIn("ETag", response)
+        self.assertIn("private", response["Cache-Control"])
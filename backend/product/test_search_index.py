@@ -0,0 +1,134 @@
+"""
+Full-text product search: tokenization, document maintenance and SearchView.
+"""
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from rest_framework import status
+from rest_framework.test import APIClient
+
+from accounts.choices import UserRole
+from accounts.models import CustomUser
+from product.models import (
+    BaseProduct,
+    Category,
+    CategoryAttributeDefinition,
+    CategoryAttributeOption,
+    ProductAttributeValue,
+    ProductParameter,
+    ProductSearchDocument,
+    ProductStatus,
+    ProductVariant,
+)
+from product.search_index import InvertedIndex
+from product.search_text import tokenize
+from sellers.models import SellerProfile
+
+
+class SearchTextTests(SimpleTestCase):
+    def test_diacritics_and_czech_endings_share_a_stem(self):
+        self.assertEqual(tokenize("Dveře"), tokenize("dvere"))
+        self.assertEqual(tokenize("dřevěné"), tokenize("drevena"))
+
+    def test_english_inflections_and_stop_words(self):
+        self.assertEqual(tokenize("The running shoes"), tokenize("running shoe"))
+        self.assertEqual(tokenize("of and the"), [])
+
+    def test_inverted_index_prefix_and_weights(self):
+        index = InvertedIndex.build([
+            (1, "steel door", "", ""),
+            (2, "", "steel", "door for garden"),
+        ])
+        self.assertEqual(set(index.search(["ste"])), {1, 2})
+        scores = index.search(["steel", "door"])
+        self.assertGreater(scores[1], scores[2])
+        self.assertEqual(index.search(["steel", "window"]), {})
+
+
+class SearchViewTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller_user = CustomUser.objects.create_user(
+            email="seller-search-index@example.com",
+            password="pass12345",
+            first_name="S",
+            last_name="I",
+            role=UserRole.SELLER,
+            phone_number="+420730000411",
+        )
+        cls.seller_profile = SellerProfile.objects.get(user=seller_user)
+        cls.category = Category.objects.create(name="Interiérové dveře")
+
+        cls.title_match = cls._product("Dveře Posuvné", "Kvalitní výrobek.", "3200000001")
+        cls.body_match = cls._product("Zárubeň", "Hodí se ke dveřím i oknům.", "3200000002")
+
+    @classmethod
+    def _product(cls, name, description, article):
+        product = BaseProduct.objects.create(
+            name=name,
+            product_description=description,
+            seller=cls.seller_profile,
+            category=cls.category,
+            article=article,
+            vat_rate=Decimal("21.00"),
+            status=ProductStatus.APPROVED,
+            is_active=True,
+        )
+        ProductVariant.objects.create(
+            product=product,
+            name="V",
+            text="t",
+            price=Decimal("100.00"),
+            weight_grams=100,
+            length_mm=50,
+            width_mm=50,
+            height_mm=50,
+        )
+        return product
+
+    def _search(self, params):
+        response = APIClient().get(reverse("search"), params, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [row["id"] for row in response.data["results"]["products"]]
+
+    def test_query_without_diacritics_and_prefix_matches(self):
+        ids = self._search({"q": "dvere posuv"})
+        self.assertEqual(ids, [self.title_match.id])
+
+    def test_relevance_ordering_prefers_title_matches(self):
+        ids = self._search({"q": "dver", "ordering": "relevance"})
+        self.assertEqual(ids[:2], [self.title_match.id, self.body_match.id])
+
+    def test_documents_follow_parameter_and_attribute_writes(self):
+        ProductParameter.objects.create(product=self.body_match, name="Barva", value="Antracit")
+        self.assertEqual(self._search({"q": "antracit"}), [self.body_match.id])
+
+        definition = CategoryAttributeDefinition.objects.create(
+            category=self.category,
+            code="povrch",
+            name="Povrch",
+            data_type=CategoryAttributeDefinition.DataType.ENUM,
+        )
+        option = CategoryAttributeOption.objects.create(
+            attribute_definition=definition,
+            value="dub-bielony",
+            label="Dub bělený",
+        )
+        ProductAttributeValue.objects.create(
+            product=self.title_match,
+            attribute_definition=definition,
+            value_option=option,
+        )
+        self.assertEqual(self._search({"q": "beleny"}), [self.title_match.id])
+
+        definition.is_public = False
+        definition.save(update_fields=["is_public"])
+        self.assertEqual(self._search({"q": "beleny"}), [])
+
+    def test_product_rename_rebuilds_document(self):
+        self.body_match.name = "Kování Chromové"
+        self.body_match.save(update_fields=["name"])
+        document = ProductSearchDocument.objects.get(product=self.body_match)
+        self.assertIn("chrom", document.title_tokens)
+        self.assertEqual(self._search({"q": "chromov"}), [self.body_match.id])
@@ -64,12 +64,13 @@ class StockAvailabilityApiTestCase(TestCase):
             width_mm=50,
             height_mm=50,
         )
-        WarehouseItem.objects.create(
-            warehouse=cls.wh,
-            product_variant=cls.variant_single,
-            quantity_in_stock=10,
-            reserved_quantity=0,
-        )
+        with cls.captureOnCommitCallbacks(execute=True):
+            WarehouseItem.objects.create(
+                warehouse=cls.wh,
+                product_variant=cls.variant_single,
+                quantity_in_stock=10,
+                reserved_quantity=0,
+            )
 
         cls.product_multi = BaseProduct.objects.create(
             name="MultiVariant Mix",
@@ -101,18 +102,19 @@ class StockAvailabilityApiTestCase(TestCase):
             width_mm=50,
             height_mm=50,
         )
-        WarehouseItem.objects.create(
-            warehouse=cls.wh,
-            product_variant=cls.variant_multi_a,
-            quantity_in_stock=3,
-            reserved_quantity=0,
-        )
-        WarehouseItem.objects.create(
-            warehouse=cls.wh,
-            product_variant=cls.variant_multi_b,
-            quantity_in_stock=7,
-            reserved_quantity=0,
-        )
+        with cls.captureOnCommitCallbacks(execute=True):
+            WarehouseItem.objects.create(
+                warehouse=cls.wh,
+                product_variant=cls.variant_multi_a,
+                quantity_in_stock=3,
+                reserved_quantity=0,
+            )
+            WarehouseItem.objects.create(
+                warehouse=cls.wh,
+                product_variant=cls.variant_multi_b,
+                quantity_in_stock=7,
+                reserved_quantity=0,
+            )
 
         cls.product_reserved = BaseProduct.objects.create(
             name="ReservedStock Product",
@@ -134,12 +136,13 @@ class StockAvailabilityApiTestCase(TestCase):
             width_mm=50,
             height_mm=50,
         )
-        WarehouseItem.objects.create(
-            warehouse=cls.wh,
-            product_variant=cls.variant_reserved,
-            quantity_in_stock=8,
-            reserved_quantity=5,
-        )
+        with cls.captureOnCommitCallbacks(execute=True):
+            WarehouseItem.objects.create(
+                warehouse=cls.wh,
+                product_variant=cls.variant_reserved,
+                quantity_in_stock=8,
+                reserved_quantity=5,
+            )
 
         cls.product_no_wh = BaseProduct.objects.create(
             name="NoWarehouseItem Product",
@@ -182,12 +185,13 @@ class StockAvailabilityApiTestCase(TestCase):
             width_mm=50,
             height_mm=50,
         )
-        WarehouseItem.objects.create(
-            warehouse=cls.wh,
-            product_variant=cls.variant_few,
-            quantity_in_stock=3,
-            reserved_quantity=0,
-        )
+        with cls.captureOnCommitCallbacks(execute=True):
+            WarehouseItem.objects.create(
+                warehouse=cls.wh,
+                product_variant=cls.variant_few,
+                quantity_in_stock=3,
+                reserved_quantity=0,
+            )
 
     def setUp(self):
         self.client = APIClient()
@@ -7,10 +7,9 @@ from drf_spectacular.types import OpenApiTypes
 from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiParameter, OpenApiExample
 from rest_framework.response import Response
 from django_filters.rest_framework import DjangoFilterBackend
-from django.db.models import Q, Min, F, Sum, DecimalField, ExpressionWrapper, OuterRef, Subquery, Value, Prefetch
-from django.db.models.functions import Coalesce
+from django.db.models import F, Prefetch
 
-from .pagination import StandardResultsSetPagination
+from .pagination import CatalogPagination
 from .filters import BaseProductFilter
 from .models import (
     BaseProduct,
@@ -22,20 +21,26 @@ from .serializers import (
     BaseProductDetailSerializer,
     CategorySerializer,
     CategorySearchViewSerializer,
+    serialize_category_tree,
 )
-from order.models import OrderProduct
 from accounts.choices import UserRole
+from favorites.services import annotate_is_favorite
 
-from .constants import ACQUIRING_RATE
+from .catalog_listing import annotate_with_catalog_listing
+from .category_tree import get_category_tree
 from .models import ProductVariant
-from .stock_availability import (
-    annotate_products_with_total_available,
-    annotate_variant_queryset_with_available,
-)
+from .stock_availability import annotate_variant_queryset_with_available
 from .public_catalog_filters import (
     apply_public_catalog_filters,
     build_category_facets,
 )
+from .response_cache import (
+    CATEGORY_TREE_SCOPE,
+    category_scope,
+    product_scope,
+    versioned_response_cache,
+)
+from .search_index import search_products
 
 
 def build_public_products_queryset(base_qs):
@@ -43,42 +48,17 @@ def build_public_products_queryset(base_qs):
     Единая логика для:
     - category list
     - search
-    Гарантирует одинаковое поведение и ordered_count
-    """
-
-    # 1. Минимальная цена без эквайринга
-    qs = base_qs.annotate(
-        base_min_price=Min("variants__price"),
-    ).filter(
-        base_min_price__isnull=False
-    )
-
-    # 2. Финальная цена с эквайрингом
-    qs = qs.annotate(
-        final_min_price=ExpressionWrapper(
-            F("base_min_price") * Value(ACQUIRING_RATE),
-            output_field=DecimalField(max_digits=10, decimal_places=2),
-        )
-    )
+    - seller products
+    - favorites
+    Гарантирует одинаковое поведение и ordered_count.
 
-    # 3. ordered_count (без зависимости от related_name)
-    ordered_total_sq = (
-        OrderProduct.objects
-        .filter(product__product=OuterRef("pk"))
-        .values("product__product")
-        .annotate(total=Sum("quantity"))
-        .values("total")[:1]
-    )
-
-    qs = qs.annotate(
-        ordered_quantity=Coalesce(Subquery(ordered_total_sq), 0)
-    )
-
-    qs = annotate_products_with_total_available(qs)
+    Цены, ordered_quantity, total_available_quantity и обложка читаются из
+    CatalogListing (см. product/catalog_listing.py), а не считаются агрегатами
+    на каждый запрос.
+    """
+    qs = annotate_with_catalog_listing(base_qs)
 
-    return qs.prefetch_related(
-        "images",
-        "variants",
+    return qs.select_related("seller").prefetch_related(
         "product_parameters",
     ).distinct()
 
@@ -93,16 +73,17 @@ class PublicVisibilityMixin:
     - видят всё (обратная совместимость)
     """
 
-    def apply_public_visibility(self, qs):
+    def is_staff_like_request(self) -> bool:
         user = getattr(self.request, "user", None)
         role = getattr(user, "role", None)
 
-        is_staff_like = (
+        return (
                 bool(getattr(user, "is_staff", False))
                 or role in (UserRole.ADMIN, UserRole.MANAGER)
         )
 
-        if is_staff_like:
+    def apply_public_visibility(self, qs):
+        if self.is_staff_like_request():
             return qs
 
         return qs.filter(
@@ -137,10 +118,26 @@ class PublicVisibilityMixin:
         ),
         OpenApiParameter(
             name='ordering',
-            description='Sort by price or rating (price includes acquiring fee). Use "-" prefix for descending order.',
+            description=(
+                'Sort by price or rating (price includes acquiring fee), or by full-text relevance. '
+                'Use "-" prefix for descending order.'
+            ),
+            required=False,
+            type=OpenApiTypes.STR,
+            enum=['price', '-price', 'rating', '-rating', 'relevance']
+        ),
+        OpenApiParameter(
+            name='pagination',
+            description='Set to "cursor" for keyset pagination (price/rating orderings); follow `next` for further pages.',
+            required=False,
+            type=OpenApiTypes.STR,
+            enum=['cursor'],
+        ),
+        OpenApiParameter(
+            name='cursor',
+            description='Opaque keyset cursor taken from `next` in cursor pagination mode.',
             required=False,
             type=OpenApiTypes.STR,
-            enum=['price', '-price', 'rating', '-rating']
         ),
     ],
     responses={
@@ -204,49 +201,29 @@ class PublicVisibilityMixin:
 )
 class SearchView(PublicVisibilityMixin, generics.ListAPIView):
     serializer_class = BaseProductListSerializer
-    pagination_class = StandardResultsSetPagination
+    pagination_class = CatalogPagination
     filter_backends = [DjangoFilterBackend]
     filterset_class = BaseProductFilter
 
-    ALLOWED_ORDERING_FIELDS = ["price", "rating", "min_price"]
+    ALLOWED_ORDERING_FIELDS = ["price", "rating", "min_price", "relevance"]
 
     def get_queryset(self):
         query = self.request.query_params.get("q", "").strip()
         if not query:
             return BaseProduct.objects.none()
 
-        qs = BaseProduct.objects.filter(
-            Q(name__icontains=query) |
-            Q(product_description__icontains=query) |
-            Q(product_parameters__name__icontains=query) |
-            Q(product_parameters__value__icontains=query) |
-            Q(category__name__icontains=query) |
-            Q(
-                attribute_values__attribute_definition__is_active=True,
-                attribute_values__attribute_definition__is_public=True,
-                attribute_values__value_text__icontains=query,
-            ) |
-            Q(
-                attribute_values__attribute_definition__is_active=True,
-                attribute_values__attribute_definition__is_public=True,
-                attribute_values__value_option__is_active=True,
-                attribute_values__value_option__value__icontains=query,
-            ) |
-            Q(
-                attribute_values__attribute_definition__is_active=True,
-                attribute_values__attribute_definition__is_public=True,
-                attribute_values__value_option__is_active=True,
-                attribute_values__value_option__label__icontains=query,
-            )
-        )
+        # Full-text index over name, description, category, parameters and
+        # public attribute values (see product/search_index.py).
+        qs = search_products(BaseProduct.objects.all(), query)
 
         qs = self.apply_public_visibility(qs)
         qs = build_public_products_queryset(qs)
+        qs = annotate_is_favorite(qs, self.request.user)
 
         ordering = self.request.query_params.get("ordering", "-rating")
         return self.apply_ordering(qs, ordering)
 
-    def apply_ordering(self, qs, ordering):
+    def resolve_ordering(self, ordering):
         field = ordering.lstrip("-")
         desc = ordering.startswith("-")
 
@@ -254,12 +231,24 @@ class SearchView(PublicVisibilityMixin, generics.ListAPIView):
             field = "rating"
             desc = True
 
+        if field == "relevance":
+            # Higher rank first regardless of the "-" prefix.
+            return "search_rank", True
         if field == "price":
-            db_field = "final_min_price"
-        elif field == "min_price":
-            db_field = "base_min_price"
-        else:
-            db_field = field
+            return "final_min_price", desc
+        if field == "min_price":
+            return "base_min_price", desc
+        return field, desc
+
+    def get_keyset_ordering(self):
+        return self.resolve_ordering(self.request.query_params.get("ordering", "-rating"))
+
+    def apply_ordering(self, qs, ordering):
+        db_field, desc = self.resolve_ordering(ordering)
+
+        if db_field == "search_rank":
+            # id keeps ties stable.
+            return qs.order_by(F("search_rank").desc(), "id")
 
         return qs.order_by(
             F(db_field).desc(nulls_last=True)
@@ -321,6 +310,19 @@ class SearchView(PublicVisibilityMixin, generics.ListAPIView):
         OpenApiParameter(name='min_price', description='Minimum price (includes acquiring fee)', required=False, type=float),
         OpenApiParameter(name='max_price', description='Maximum price (includes acquiring fee)', required=False, type=float),
         OpenApiParameter(name='rating', description='Minimum rating to filter products', required=False, type=float),
+        OpenApiParameter(
+            name='pagination',
+            description='Set to "cursor" for keyset pagination (price/rating orderings); follow `next` for further pages.',
+            required=False,
+            type=OpenApiTypes.STR,
+            enum=['cursor'],
+        ),
+        OpenApiParameter(
+            name='cursor',
+            description='Opaque keyset cursor taken from `next` in cursor pagination mode.',
+            required=False,
+            type=OpenApiTypes.STR,
+        ),
     ],
     responses={
         200: OpenApiResponse(
@@ -333,12 +335,19 @@ class SearchView(PublicVisibilityMixin, generics.ListAPIView):
 )
 class CategoryBaseProductListView(PublicVisibilityMixin, generics.ListAPIView):
     serializer_class = BaseProductListSerializer
-    pagination_class = StandardResultsSetPagination
+    pagination_class = CatalogPagination
     filter_backends = [DjangoFilterBackend]
     filterset_class = BaseProductFilter
 
     ALLOWED_ORDERING_FIELDS = ["price", "rating", "min_price"]
 
+    def get_response_cache_scopes(self):
+        return [category_scope(self.kwargs["category_id"])]
+
+    @versioned_response_cache(personalized=True)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def get_queryset(self):
         category = get_object_or_404(Category, id=self.kwargs["category_id"])
 
@@ -346,11 +355,12 @@ class CategoryBaseProductListView(PublicVisibilityMixin, generics.ListAPIView):
         qs = self.apply_public_visibility(qs)
         qs = build_public_products_queryset(qs)
         qs = apply_public_catalog_filters(qs, self.request.query_params, category)
+        qs = annotate_is_favorite(qs, self.request.user)
 
         ordering = self.request.query_params.get("ordering", "-rating")
         return self.apply_ordering(qs, ordering)
 
-    def apply_ordering(self, qs, ordering):
+    def resolve_ordering(self, ordering):
         field = ordering.lstrip("-")
         desc = ordering.startswith("-")
 
@@ -359,11 +369,16 @@ class CategoryBaseProductListView(PublicVisibilityMixin, generics.ListAPIView):
             desc = True
 
         if field == "price":
-            db_field = "final_min_price"
-        elif field == "min_price":
-            db_field = "base_min_price"
-        else:
-            db_field = field
+            return "final_min_price", desc
+        if field == "min_price":
+            return "base_min_price", desc
+        return field, desc
+
+    def get_keyset_ordering(self):
+        return self.resolve_ordering(self.request.query_params.get("ordering", "-rating"))
+
+    def apply_ordering(self, qs, ordering):
+        db_field, desc = self.resolve_ordering(ordering)
 
         return qs.order_by(
             F(db_field).desc(nulls_last=True)
@@ -373,17 +388,28 @@ class CategoryBaseProductListView(PublicVisibilityMixin, generics.ListAPIView):
 
 
 class CategoryFacetMetadataView(PublicVisibilityMixin, APIView):
+    def get_response_cache_scopes(self):
+        return [category_scope(self.kwargs["category_id"])]
+
     @extend_schema(
-        description="Retrieve public filter/facet metadata for a category.",
+        description=(
+            "Retrieve public filter/facet metadata for a category. Accepts the same filter "
+            "parameters as the category product list; counts and ranges are disjunctive "
+            "(each facet ignores its own filter and respects all others)."
+        ),
         responses={200: OpenApiResponse(description="Category facet metadata.")},
         tags=["Product"],
     )
+    @versioned_response_cache()
     def get(self, request, category_id, *args, **kwargs):
         category = get_object_or_404(Category, id=category_id)
         qs = BaseProduct.objects.filter(category=category)
         qs = self.apply_public_visibility(qs)
         qs = build_public_products_queryset(qs)
-        return Response(build_category_facets(category, qs), status=status.HTTP_200_OK)
+        return Response(
+            build_category_facets(category, qs, request.query_params),
+            status=status.HTTP_200_OK,
+        )
 
 
 @extend_schema(
@@ -464,6 +490,13 @@ class BaseProductDetailAPIView(PublicVisibilityMixin, generics.RetrieveAPIView):
     serializer_class = BaseProductDetailSerializer
     lookup_field = 'id'
 
+    def get_response_cache_scopes(self):
+        return [product_scope(self.kwargs["id"])]
+
+    @versioned_response_cache(personalized=True)
+    def get(self, request, *args, **kwargs):
+        return super().get(request, *args, **kwargs)
+
     def get_queryset(self):
         qs = (
             BaseProduct.objects
@@ -482,11 +515,15 @@ class BaseProductDetailAPIView(PublicVisibilityMixin, generics.RetrieveAPIView):
             )
             .distinct()
         )
+        qs = annotate_is_favorite(qs, self.request.user)
 
         return self.apply_public_visibility(qs)
 
 
 class CategoryListView(APIView):
+    def get_response_cache_scopes(self):
+        return [CATEGORY_TREE_SCOPE]
+
     @extend_schema(
         summary="Retrieve all categories with their subcategories",
         description=(
@@ -498,10 +535,10 @@ class CategoryListView(APIView):
         responses={200: CategorySerializer(many=True)},
         tags=["Category"],
     )
+    @versioned_response_cache()
     def get(self, request, *args, **kwargs):
         """
         Retrieves all root categories and their nested subcategories.
         """
-        categories = Category.objects.filter(parent__isnull=True).prefetch_related("children__children__children")
-        serializer = CategorySerializer(categories, many=True, context={'request': request})
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        data = serialize_category_tree(get_category_tree(), request)
+        return Response(data, status=status.HTTP_200_OK)
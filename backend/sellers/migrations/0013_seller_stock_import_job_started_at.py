@@ -0,0 +1,18 @@
+# Generated by Django 5.1 on 2026-10-18 18:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sellers', '0012_seller_stock_import_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='sellerstockimportjob',
+            name='started_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
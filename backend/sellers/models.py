@@ -488,3 +488,39 @@ class OnboardingAuditLog(models.Model):
 
     def __str__(self) -> str:
         return f"OnboardingAuditLog({self.pk}) {self.event_type} app={self.application_id}"
+
+
+class StockImportStatus(models.TextChoices):
+    QUEUED = "queued", "Queued"
+    RUNNING = "running", "Running"
+    COMPLETED = "completed", "Completed"
+    FAILED = "failed", "Failed"
+
+
+class SellerStockImportJob(models.Model):
+    """
+    Asynchronous bulk stock import (sellers/stock_import.py).
+
+    ``rows`` holds the submitted rows until the job finishes; ``report`` the
+    per-row results.  Progress is polled through ``processed_rows``.  A job
+    left running by a worker that died is failed when it is next read
+    (``fail_stale_stock_import_job``).
+    """
+
+    seller = models.ForeignKey(SellerProfile, on_delete=models.CASCADE, related_name="stock_import_jobs")
+    status = models.CharField(max_length=16, choices=StockImportStatus.choices, default=StockImportStatus.QUEUED)
+    rows = models.JSONField(default=list, blank=True)
+    total_rows = models.PositiveIntegerField(default=0)
+    processed_rows = models.PositiveIntegerField(default=0)
+    summary = models.JSONField(default=dict, blank=True)
+    report = models.JSONField(default=list, blank=True)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    def __str__(self) -> str:
+        return f"SellerStockImportJob({self.pk}) {self.status} {self.processed_rows}/{self.total_rows}"
@@ -24,7 +24,7 @@ from product.compat import get_product_cover_image_url
 from warehouses.models import Warehouse, WarehouseItem
 
 from .brand_services import normalize_brand_name, resolve_brand_from_text, validate_brand_name_length
-from .models import SellerProfile
+from .models import SellerProfile, SellerStockImportJob
 
 
 def _get_seller_default_warehouse_id(user) -> int | None:
@@ -238,6 +238,50 @@ class ProductVariantStockReadSerializer(serializers.ModelSerializer):
         ]
 
 
+class StockImportRowSerializer(serializers.Serializer):
+    """
+    One stock import row (sellers/stock_import.py validates every row with it).
+
+    ``quantity`` is accepted for ``quantity_in_stock``; an empty ``warehouse_id``
+    means the seller's default warehouse.
+    """
+
+    sku = serializers.CharField()
+    warehouse_id = serializers.IntegerField(required=False, allow_null=True, default=None)
+    quantity_in_stock = serializers.IntegerField(min_value=0)
+
+    def to_internal_value(self, data):
+        if isinstance(data, dict):
+            data = dict(data)
+            if "quantity_in_stock" not in data and "quantity" in data:
+                data["quantity_in_stock"] = data["quantity"]
+            if data.get("warehouse_id") == "":
+                data["warehouse_id"] = None
+        return super().to_internal_value(data)
+
+
+class StockImportRequestSerializer(serializers.Serializer):
+    rows = StockImportRowSerializer(many=True)
+
+
+class SellerStockImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SellerStockImportJob
+        fields = [
+            "id",
+            "status",
+            "total_rows",
+            "processed_rows",
+            "summary",
+            "report",
+            "error",
+            "created_at",
+            "started_at",
+            "finished_at",
+        ]
+        read_only_fields = fields
+
+
 class ProductVariantSwaggerSerializer(serializers.Serializer):
     id = serializers.IntegerField(read_only=True)
     sku = serializers.CharField(read_only=True)
@@ -0,0 +1,370 @@
+"""
+Bulk stock import for sellers.
+
+``import_stock(seller_profile, rows)`` sets ``quantity_in_stock`` for up to
+``MAX_ROWS`` ``(sku, warehouse_id, quantity_in_stock)`` rows:
+
+- rows are validated up front with ``StockImportRowSerializer`` (the same
+  serializer documents the endpoint); SKU ownership is checked with one
+  ``sku__in`` query per chunk, and the seller's warehouses are read once;
+- every chunk of ``CHUNK_SIZE`` rows runs in its own transaction.  It locks the
+  existing WarehouseItems in the reservation lock order, updates them with one
+  ``bulk_update`` and inserts new ones with one upsert;
+- a quantity below the units held by pending reservations (row and shard
+  reservations) is rejected for that row, never clamped;
+- bulk writes skip the WarehouseItem signals, so each chunk refreshes the
+  availability snapshot in its transaction and, after commit, the catalog
+  listings, response cache versions and shard allotments.
+
+The result is a per-row report: ``created``, ``updated``, ``unchanged`` or
+``error`` with messages.  Large imports can run in the background as a
+``SellerStockImportJob`` (``start_stock_import_job``) and be polled; a job
+whose worker died is failed on read (``fail_stale_stock_import_job``).
+"""
+from __future__ import annotations
+
+import csv
+import io
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from typing import Callable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from product.catalog_listing import refresh_catalog_listings_for_stock
+from product.models import ProductVariant
+from product.response_cache import bump_stock_versions
+from product.stock_availability import refresh_variant_availability
+from warehouses.models import WarehouseItem
+from warehouses.services.sharding import _rebalance_locked
+
+from .models import SellerProfile, SellerStockImportJob, StockImportStatus
+from .serializers import StockImportRowSerializer
+
+logger = logging.getLogger(__name__)
+
+MAX_ROWS = 50_000
+CHUNK_SIZE = 1_000
+# A job queued or running longer than this is taken as lost (worker restarted).
+_STALE_MINUTES: int = getattr(settings, "STOCK_IMPORT_STALE_MINUTES", 30)
+
+ROW_CREATED = "created"
+ROW_UPDATED = "updated"
+ROW_UNCHANGED = "unchanged"
+ROW_ERROR = "error"
+
+ProgressFn = Callable[[int], None]
+
+
+class StockImportError(ValueError):
+    """The payload as a whole cannot be imported (format, size)."""
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
+
+
+def parse_stock_csv(text: str) -> list[dict]:
+    """
+    Read ``sku,warehouse_id,quantity_in_stock`` rows (header required).
+
+    ``quantity`` is accepted for ``quantity_in_stock``; ``warehouse_id`` may be
+    omitted or empty to use the default warehouse.
+    """
+    reader = csv.DictReader(io.StringIO(text.lstrip("﻿")))
+    fields = {(name or "").strip().lower() for name in reader.fieldnames or []}
+    if "sku" not in fields or not fields & {"quantity_in_stock", "quantity"}:
+        raise StockImportError("CSV header must contain sku and quantity_in_stock columns.")
+    rows = []
+    for raw in reader:
+        record = {(key or "").strip().lower(): (value or "").strip() for key, value in raw.items()}
+        rows.append({
+            "sku": record.get("sku", ""),
+            "warehouse_id": record.get("warehouse_id") or None,
+            "quantity_in_stock": record.get("quantity_in_stock", record.get("quantity", "")),
+        })
+        if len(rows) > MAX_ROWS:
+            break
+    return rows
+
+
+def _row_errors(detail) -> list[str]:
+    if isinstance(detail, dict):
+        return [
+            message if field == "non_field_errors" else f"{field}: {message}"
+            for field, messages in detail.items()
+            for message in _row_errors(messages)
+        ]
+    if isinstance(detail, list):
+        return [message for item in detail for message in _row_errors(item)]
+    return [str(detail)]
+
+
+def _normalize(rows: list) -> tuple[list[dict], list[dict]]:
+    """Split input into valid rows and report entries for invalid ones."""
+    if not isinstance(rows, list):
+        raise StockImportError("Expected a list of rows.")
+    if not rows:
+        raise StockImportError("No rows to import.")
+    if len(rows) > MAX_ROWS:
+        raise StockImportError(f"At most {MAX_ROWS} rows per import.")
+
+    valid, invalid = [], []
+    for number, raw in enumerate(rows, start=1):
+        serializer = StockImportRowSerializer(data=raw)
+        if serializer.is_valid():
+            valid.append({"row": number, **serializer.validated_data})
+            continue
+        raw = raw if isinstance(raw, dict) else {}
+        invalid.append({
+            "row": number,
+            "sku": str(raw.get("sku") or "").strip(),
+            "warehouse_id": raw.get("warehouse_id") or None,
+            "quantity_in_stock": raw.get("quantity_in_stock", raw.get("quantity")),
+            "status": ROW_ERROR,
+            "errors": _row_errors(serializer.errors),
+        })
+    return valid, invalid
+
+
+# ---------------------------------------------------------------------------
+# Import
+# ---------------------------------------------------------------------------
+
+
+def _resolve(seller_profile: SellerProfile, rows: list[dict]) -> tuple[list[dict], list[dict]]:
+    """Attach variant and warehouse IDs; reject foreign SKUs, warehouses and duplicates."""
+    allowed_warehouses = set(seller_profile.warehouses.values_list("pk", flat=True))
+    default_warehouse_id = seller_profile.default_warehouse_id
+    if default_warehouse_id is not None:
+        allowed_warehouses.add(default_warehouse_id)
+
+    skus = sorted({row["sku"] for row in rows})
+    variant_ids: dict[str, int] = {}
+    for start in range(0, len(skus), CHUNK_SIZE):
+        variant_ids.update(
+            ProductVariant.objects.filter(
+                sku__in=skus[start:start + CHUNK_SIZE],
+                product__seller=seller_profile,
+            ).values_list("sku", "pk")
+        )
+
+    resolved, rejected = [], []
+    seen: dict[tuple[int, int], int] = {}
+    for row in rows:
+        warehouse_id = row["warehouse_id"] if row["warehouse_id"] is not None else default_warehouse_id
+        error = None
+        if row["sku"] not in variant_ids:
+            error = "Unknown SKU or the variant does not belong to this seller."
+        elif warehouse_id is None:
+            error = "Seller has no default warehouse. Provide an allowed warehouse_id."
+        elif warehouse_id not in allowed_warehouses:
+            error = "Warehouse is not available for this seller."
+        else:
+            key = (warehouse_id, variant_ids[row["sku"]])
+            if key in seen:
+                error = f"Duplicate of row {seen[key]} for the same SKU and warehouse."
+            else:
+                seen[key] = row["row"]
+        if error:
+            rejected.append({**row, "warehouse_id": warehouse_id, "status": ROW_ERROR, "errors": [error]})
+        else:
+            resolved.append({**row, "warehouse_id": warehouse_id, "variant_id": variant_ids[row["sku"]]})
+    return resolved, rejected
+
+
+def _apply_chunk(rows: list[dict]) -> list[dict]:
+    results = []
+    with transaction.atomic():
+        pairs = Q()
+        for row in rows:
+            pairs |= Q(warehouse_id=row["warehouse_id"], product_variant_id=row["variant_id"])
+        # Same lock order as StockReservationService (warehouse, variant).
+        existing = {
+            (wi.warehouse_id, wi.product_variant_id): wi
+            for wi in WarehouseItem.objects.select_for_update(of=("self",))
+            .filter(pairs)
+            .prefetch_related("shards")
+            .order_by("warehouse_id", "product_variant_id")
+        }
+
+        to_update, to_create, sharded = [], [], []
+        for row in rows:
+            wi = existing.get((row["warehouse_id"], row["variant_id"]))
+            quantity = row["quantity_in_stock"]
+            entry = {key: row[key] for key in ("row", "sku", "warehouse_id", "quantity_in_stock")}
+            if wi is None:
+                to_create.append(
+                    WarehouseItem(
+                        warehouse_id=row["warehouse_id"],
+                        product_variant_id=row["variant_id"],
+                        quantity_in_stock=quantity,
+                    )
+                )
+                results.append({**entry, "status": ROW_CREATED})
+                continue
+            held = wi.reserved_quantity + wi.shard_reserved_quantity
+            if quantity < held:
+                results.append({
+                    **entry,
+                    "status": ROW_ERROR,
+                    "errors": [f"quantity_in_stock cannot be below the {held} unit(s) held by pending reservations."],
+                })
+            elif quantity == wi.quantity_in_stock:
+                results.append({**entry, "status": ROW_UNCHANGED})
+            else:
+                wi.quantity_in_stock = quantity
+                to_update.append(wi)
+                if wi.shard_count:
+                    sharded.append(wi.pk)
+                results.append({**entry, "status": ROW_UPDATED})
+
+        WarehouseItem.objects.bulk_update(to_update, ["quantity_in_stock"])
+        # A concurrent import may have created the row since the lock query.
+        WarehouseItem.objects.bulk_create(
+            to_create,
+            update_conflicts=True,
+            unique_fields=["warehouse", "product_variant"],
+            update_fields=["quantity_in_stock"],
+        )
+
+        # bulk_update/bulk_create skip the WarehouseItem signals (product/signals.py,
+        # warehouses/signals.py); mirror them once for the chunk.  Shards are
+        # re-sliced under the row locks taken above, before the new stock commits.
+        for pk in sorted(sharded):
+            _rebalance_locked(pk)
+        variant_ids = sorted({wi.product_variant_id for wi in to_update + to_create})
+        refresh_variant_availability(variant_ids)
+
+        def refresh():
+            bump_stock_versions(*refresh_catalog_listings_for_stock(variant_ids))
+
+        if variant_ids:
+            transaction.on_commit(refresh)
+    return results
+
+
+def import_stock(seller_profile: SellerProfile, rows: list, *, progress: ProgressFn | None = None) -> dict:
+    """
+    Import ``rows`` for ``seller_profile`` and return ``{"summary", "rows"}``.
+
+    ``progress(processed)`` is called after every chunk.  Raises
+    ``StockImportError`` if the payload as a whole is unusable.
+    """
+    valid, report = _normalize(rows)
+    resolved, rejected = _resolve(seller_profile, valid)
+    report.extend(rejected)
+    processed = len(report)
+    if progress:
+        progress(processed)
+
+    resolved.sort(key=lambda row: (row["warehouse_id"], row["variant_id"]))
+    for start in range(0, len(resolved), CHUNK_SIZE):
+        chunk = resolved[start:start + CHUNK_SIZE]
+        report.extend(_apply_chunk(chunk))
+        processed += len(chunk)
+        if progress:
+            progress(processed)
+
+    report.sort(key=lambda entry: entry["row"])
+    summary: dict[str, int] = defaultdict(int)
+    for entry in report:
+        summary[entry["status"]] += 1
+    summary = {status: summary.get(status, 0) for status in (ROW_CREATED, ROW_UPDATED, ROW_UNCHANGED, ROW_ERROR)}
+    summary["total"] = len(report)
+    logger.info("import_stock: seller=%s %s", seller_profile.pk, summary)
+    return {"summary": summary, "rows": report}
+
+
+# ---------------------------------------------------------------------------
+# Background jobs
+# ---------------------------------------------------------------------------
+
+
+def run_stock_import_job(job_id: int) -> None:
+    """Execute a queued job; called from the background pool (or inline in tests)."""
+    job = SellerStockImportJob.objects.select_related("seller").get(pk=job_id)
+    SellerStockImportJob.objects.filter(pk=job.pk).update(
+        status=StockImportStatus.RUNNING,
+        started_at=timezone.now(),
+    )
+
+    def progress(processed: int) -> None:
+        SellerStockImportJob.objects.filter(pk=job.pk).update(processed_rows=processed)
+
+    try:
+        result = import_stock(job.seller, job.rows, progress=progress)
+    except Exception as exc:  # noqa: BLE001 — reported on the job
+        logger.exception("run_stock_import_job: job %s failed", job.pk)
+        SellerStockImportJob.objects.filter(pk=job.pk).update(
+            status=StockImportStatus.FAILED,
+            error=str(exc),
+            rows=[],
+            finished_at=timezone.now(),
+        )
+        return
+    SellerStockImportJob.objects.filter(pk=job.pk).update(
+        status=StockImportStatus.COMPLETED,
+        processed_rows=result["summary"]["total"],
+        summary=result["summary"],
+        report=result["rows"],
+        rows=[],
+        finished_at=timezone.now(),
+    )
+
+
+def start_stock_import_job(seller_profile: SellerProfile, rows: list) -> SellerStockImportJob:
+    """Queue ``rows`` and run them on the shared background pool after commit."""
+    if not isinstance(rows, list) or not rows:
+        raise StockImportError("No rows to import.")
+    if len(rows) > MAX_ROWS:
+        raise StockImportError(f"At most {MAX_ROWS} rows per import.")
+    # Imported lazily: payment.async_pool is an application-wide executor.
+    from payment.async_pool import executor
+
+    job = SellerStockImportJob.objects.create(seller=seller_profile, rows=rows, total_rows=len(rows))
+    transaction.on_commit(lambda: executor.submit(run_stock_import_job, job.pk))
+    return job
+
+
+def fail_stale_stock_import_job(job: SellerStockImportJob) -> SellerStockImportJob:
+    """
+    Mark ``job`` failed if its worker is gone and return it.
+
+    The background pool lives in the web process: a restart drops queued jobs
+    and stops running ones without a final status.  A job still queued
+    (since ``created_at``) or running (since ``started_at``) after
+    ``STOCK_IMPORT_STALE_MINUTES`` is reported as failed when it is read.
+    Rows already applied by finished chunks stay applied.
+    """
+    cutoff = timezone.now() - timedelta(minutes=_STALE_MINUTES)
+    if job.status == StockImportStatus.RUNNING:
+        stale = job.started_at is None or job.started_at < cutoff
+    elif job.status == StockImportStatus.QUEUED:
+        stale = job.created_at < cutoff
+    else:
+        return job
+    if not stale:
+        return job
+
+    now = timezone.now()
+    error = "Import was interrupted; rows from finished chunks were applied. Check stock and retry."
+    updated = SellerStockImportJob.objects.filter(pk=job.pk, status=job.status).update(
+        status=StockImportStatus.FAILED,
+        error=error,
+        rows=[],
+        finished_at=now,
+    )
+    if updated:
+        logger.warning("fail_stale_stock_import_job: job %s was %s since %s", job.pk, job.status,
+                       job.started_at or job.created_at)
+        job.status, job.error, job.finished_at = StockImportStatus.FAILED, error, now
+    else:
+        job.refresh_from_db(fields=["status", "processed_rows", "summary", "report", "error", "finished_at"])
+    return job
+
@@ -9,6 +9,7 @@ from rest_framework.test import APIClient, APITestCase
 from accounts.choices import UserRole
 from accounts.models import CustomUser
 from product.models import BaseProduct, Category, ProductStatus, ProductVariant
+from product.stock_availability import get_product_availability, get_variant_availability
 from sellers.models import SellerProfile
 from warehouses.models import Warehouse, WarehouseItem
 from warehouses.services.reservation import StockReservationService
@@ -248,12 +249,13 @@ class SellerProductStockApiTestCase(APITestCase):
         self.assertIn("warehouse_id", response.data)
 
     def test_public_stock_fields_reflect_seller_stock_and_hide_reserved_quantity(self):
-        WarehouseItem.objects.create(
-            warehouse=self.default_wh,
-            product_variant=self.variant,
-            quantity_in_stock=9,
-            reserved_quantity=2,
-        )
+        with self.captureOnCommitCallbacks(execute=True):
+            WarehouseItem.objects.create(
+                warehouse=self.default_wh,
+                product_variant=self.variant,
+                quantity_in_stock=9,
+                reserved_quantity=2,
+            )
 
         url = reverse("category-products", kwargs={"category_id": self.category.id})
         response = self.client.get(url, format="json")
@@ -319,3 +321,10 @@ class SellerProductStockApiTestCase(APITestCase):
 
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertEqual(response.data["quantity_in_stock"], 14)
+
+    def test_stock_edit_updates_availability_snapshot(self):
+        self.client.put(self._stock_url(), {"quantity_in_stock": 9}, format="json")
+        self.client.put(self._stock_url(), {"quantity_in_stock": 4}, format="json")
+
+        self.assertEqual(get_variant_availability([self.variant.id]), {self.variant.id: 4})
+        self.assertEqual(get_product_availability([self.product.id]), {self.product.id: 4})
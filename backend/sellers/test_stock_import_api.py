@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+from datetime import timedelta
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.test import APIClient, APITestCase
+
+from accounts.choices import UserRole
+from accounts.models import CustomUser
+from product.models import BaseProduct, Category, ProductStatus, ProductVariant
+from product.stock_availability import get_variant_availability
+from sellers import stock_import
+from sellers.models import SellerProfile, SellerStockImportJob, StockImportStatus
+from warehouses.models import Warehouse, WarehouseItem
+from warehouses.services.sharding import configure_shards
+
+
+class SellerStockImportApiTestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.category = Category.objects.create(name="StockImportCat")
+        cls.default_wh = cls._create_warehouse("Import Default WH", "11000")
+        cls.allowed_wh = cls._create_warehouse("Import Allowed WH", "11001")
+        cls.foreign_wh = cls._create_warehouse("Import Foreign WH", "11002")
+
+        cls.seller_user = cls._create_seller("stock-import@example.com", "+420730300001")
+        cls.seller_profile = SellerProfile.objects.get(user=cls.seller_user)
+        cls.seller_profile.default_warehouse = cls.default_wh
+        cls.seller_profile.save(update_fields=["default_warehouse"])
+        cls.seller_profile.warehouses.add(cls.allowed_wh)
+
+        cls.other_user = cls._create_seller("stock-import-other@example.com", "+420730300002")
+        cls.other_profile = SellerProfile.objects.get(user=cls.other_user)
+
+        product = cls._create_product(cls.seller_profile, "Import Product", "5000000001")
+        cls.variant = cls._create_variant(product, "A")
+        cls.second_variant = cls._create_variant(product, "B")
+        foreign_product = cls._create_product(cls.other_profile, "Foreign Import Product", "5000000002")
+        cls.foreign_variant = cls._create_variant(foreign_product, "F")
+
+    @staticmethod
+    def _create_warehouse(name: str, zip_code: str) -> Warehouse:
+        return Warehouse.objects.create(name=name, street="Street", city="Praha", zip_code=zip_code, country="CZ")
+
+    @staticmethod
+    def _create_seller(email: str, phone: str) -> CustomUser:
+        return CustomUser.objects.create_user(
+            email=email,
+            password="pass12345",
+            first_name="Seller",
+            last_name="Import",
+            role=UserRole.SELLER,
+            phone_number=phone,
+        )
+
+    @classmethod
+    def _create_product(cls, seller, name: str, article: str) -> BaseProduct:
+        return BaseProduct.objects.create(
+            name=name,
+            product_description=f"{name} description",
+            seller=seller,
+            category=cls.category,
+            article=article,
+            vat_rate=Decimal("21.00"),
+            status=ProductStatus.APPROVED,
+            is_active=True,
+        )
+
+    @staticmethod
+    def _create_variant(product: BaseProduct, text: str) -> ProductVariant:
+        return ProductVariant.objects.create(
+            product=product,
+            name="Size",
+            text=text,
+            price=Decimal("20.00"),
+            weight_grams=100,
+            length_mm=50,
+            width_mm=50,
+            height_mm=50,
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.seller_user)
+        self.url = reverse("seller-stock-import")
+
+    def _statuses(self, response) -> list[str]:
+        return [row["status"] for row in response.data["rows"]]
+
+    def test_json_import_creates_updates_and_reports_unchanged(self):
+        WarehouseItem.objects.create(warehouse=self.default_wh, product_variant=self.variant, quantity_in_stock=4)
+        WarehouseItem.objects.create(warehouse=self.allowed_wh, product_variant=self.variant, quantity_in_stock=6)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url,
+                [
+                    {"sku": self.variant.sku, "quantity_in_stock": 10},
+                    {"sku": self.variant.sku, "warehouse_id": self.allowed_wh.id, "quantity_in_stock": 6},
+                    {"sku": self.second_variant.sku, "warehouse_id": self.allowed_wh.id, "quantity_in_stock": 3},
+                ],
+                format="json",
+            )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._statuses(response), ["updated", "unchanged", "created"])
+        self.assertEqual(
+            response.data["summary"],
+            {"created": 1, "updated": 1, "unchanged": 1, "error": 0, "total": 3},
+        )
+        self.assertEqual(
+            WarehouseItem.objects.get(warehouse=self.default_wh, product_variant=self.variant).quantity_in_stock, 10,
+        )
+        self.assertEqual(
+            WarehouseItem.objects.get(warehouse=self.allowed_wh, product_variant=self.second_variant).quantity_in_stock,
+            3,
+        )
+        self.assertEqual(
+            get_variant_availability([self.variant.id, self.second_variant.id]),
+            {self.variant.id: 16, self.second_variant.id: 3},
+        )
+
+    def test_sharded_item_is_rebalanced_before_the_import_commits(self):
+        item = WarehouseItem.objects.create(
+            warehouse=self.default_wh, product_variant=self.variant, quantity_in_stock=12
+        )
+        configure_shards(item.pk, 3)
+
+        with self.captureOnCommitCallbacks(execute=False):
+            response = self.client.post(self.url, [{"sku": self.variant.sku, "quantity_in_stock": 4}], format="json")
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(sorted(item.shards.values_list("allotment", flat=True)), [1, 1, 2])
+
+    def test_rejects_foreign_sku_warehouse_duplicates_and_bad_values(self):
+        response = self.client.post(
+            self.url,
+            {
+                "rows": [
+                    {"sku": self.foreign_variant.sku, "quantity_in_stock": 5},
+                    {"sku": self.variant.sku, "warehouse_id": self.foreign_wh.id, "quantity_in_stock": 5},
+                    {"sku": self.variant.sku, "quantity_in_stock": -1},
+                    {"sku": self.variant.sku, "quantity_in_stock": 2},
+                    {"sku": self.variant.sku, "warehouse_id": self.default_wh.id, "quantity_in_stock": 3},
+                ]
+            },
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._statuses(response), ["error", "error", "error", "created", "error"])
+        self.assertIn("Duplicate of row 4", response.data["rows"][4]["errors"][0])
+        self.assertFalse(WarehouseItem.objects.filter(product_variant=self.foreign_variant).exists())
+        self.assertFalse(WarehouseItem.objects.filter(warehouse=self.foreign_wh).exists())
+        self.assertEqual(
+            WarehouseItem.objects.get(warehouse=self.default_wh, product_variant=self.variant).quantity_in_stock, 2,
+        )
+
+    def test_quantity_below_reserved_is_rejected(self):
+        WarehouseItem.objects.create(
+            warehouse=self.default_wh,
+            product_variant=self.variant,
+            quantity_in_stock=10,
+            reserved_quantity=4,
+        )
+
+        response = self.client.post(
+            self.url,
+            [
+                {"sku": self.variant.sku, "quantity_in_stock": 3},
+            ],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._statuses(response), ["error"])
+        self.assertIn("4 unit(s)", response.data["rows"][0]["errors"][0])
+        item = WarehouseItem.objects.get(warehouse=self.default_wh, product_variant=self.variant)
+        self.assertEqual((item.quantity_in_stock, item.reserved_quantity), (10, 4))
+
+    def test_csv_body_and_file_upload(self):
+        csv_text = (
+            "sku,warehouse_id,quantity_in_stock\n"
+            f"{self.variant.sku},,7\n"
+            f"{self.second_variant.sku},{self.allowed_wh.id},2\n"
+        )
+        response = self.client.post(self.url, csv_text, content_type="text/csv")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._statuses(response), ["created", "created"])
+
+        upload = SimpleUploadedFile(
+            "stock.csv",
+            f"sku,quantity\n{self.variant.sku},9\n".encode(),
+            content_type="text/csv",
+        )
+        response = self.client.post(self.url, {"file": upload}, format="multipart")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._statuses(response), ["updated"])
+        self.assertEqual(
+            WarehouseItem.objects.get(warehouse=self.default_wh, product_variant=self.variant).quantity_in_stock, 9,
+        )
+
+    def test_csv_without_required_header_is_rejected(self):
+        response = self.client.post(self.url, "code,qty\nA,1\n", content_type="text/csv")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_too_many_rows_is_rejected(self):
+        with patch.object(stock_import, "MAX_ROWS", 1):
+            response = self.client.post(
+                self.url,
+                [{"sku": self.variant.sku, "quantity_in_stock": 1}] * 2,
+                format="json",
+            )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(WarehouseItem.objects.filter(product_variant=self.variant).exists())
+
+    def test_rows_span_several_chunks(self):
+        with patch.object(stock_import, "CHUNK_SIZE", 1), self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                self.url,
+                [
+                    {"sku": self.variant.sku, "quantity_in_stock": 1},
+                    {"sku": self.second_variant.sku, "quantity_in_stock": 2},
+                ],
+                format="json",
+            )
+        self.assertEqual(self._statuses(response), ["created", "created"])
+        self.assertEqual(WarehouseItem.objects.filter(warehouse=self.default_wh).count(), 2)
+
+    def test_async_import_runs_job_and_is_polled_by_owner_only(self):
+        with patch("payment.async_pool.executor.submit", side_effect=lambda fn, *args: fn(*args)):
+            with self.captureOnCommitCallbacks(execute=True):
+                response = self.client.post(
+                    f"{self.url}?async=true",
+                    [{"sku": self.variant.sku, "quantity_in_stock": 5}],
+                    format="json",
+                )
+
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        job = SellerStockImportJob.objects.get(pk=response.data["job_id"])
+        self.assertEqual(job.status, StockImportStatus.COMPLETED)
+        self.assertEqual(job.rows, [])
+
+        poll = self.client.get(response.data["status_url"])
+        self.assertEqual(poll.status_code, status.HTTP_200_OK)
+        self.assertEqual(poll.data["status"], StockImportStatus.COMPLETED)
+        self.assertEqual(poll.data["processed_rows"], 1)
+        self.assertEqual(poll.data["report"][0]["status"], "created")
+
+        self.client.force_authenticate(self.other_user)
+        self.assertEqual(self.client.get(response.data["status_url"]).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_rows_are_validated_by_the_row_serializer(self):
+        response = self.client.post(
+            self.url,
+            [
+                {"sku": " ", "warehouse_id": "x", "quantity_in_stock": True},
+                {"sku": self.variant.sku, "warehouse_id": "", "quantity": "4"},
+            ],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self._statuses(response), ["error", "created"])
+        errors = response.data["rows"][0]["errors"]
+        self.assertEqual([message.split(":")[0] for message in errors], ["sku", "warehouse_id", "quantity_in_stock"])
+        self.assertEqual(response.data["rows"][1]["warehouse_id"], self.default_wh.id)
+
+    def test_stale_running_job_is_failed_when_polled(self):
+        stale = SellerStockImportJob.objects.create(
+            seller=self.seller_profile,
+            status=StockImportStatus.RUNNING,
+            started_at=timezone.now() - timedelta(hours=2),
+            rows=[{"sku": self.variant.sku, "quantity_in_stock": 1}],
+            total_rows=1,
+        )
+        fresh = SellerStockImportJob.objects.create(
+            seller=self.seller_profile, status=StockImportStatus.RUNNING, started_at=timezone.now(), total_rows=1,
+        )
+
+        poll = self.client.get(reverse("seller-stock-import-job", kwargs={"pk": stale.pk}))
+        self.assertEqual(poll.data["status"], StockImportStatus.FAILED)
+        self.assertIn("interrupted", poll.data["error"])
+        stale.refresh_from_db()
+        self.assertEqual((stale.status, stale.rows), (StockImportStatus.FAILED, []))
+
+        poll = self.client.get(reverse("seller-stock-import-job", kwargs={"pk": fresh.pk}))
+        self.assertEqual(poll.data["status"], StockImportStatus.RUNNING)
+
+    def test_non_seller_is_forbidden(self):
+        buyer = CustomUser.objects.create_user(
+            email="stock-import-buyer@example.com",
+            password="pass12345",
+            first_name="Buyer",
+            last_name="Import",
+            phone_number="+420730300003",
+        )
+        self.client.force_authenticate(buyer)
+        response = self.client.post(self.url, [], format="json")
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
@@ -12,6 +12,8 @@ from .views import (
     SellerProductListView,
     SellerSalesStatisticsView,
     SellerBaseProductListView,
+    SellerStockImportAPIView,
+    SellerStockImportJobAPIView,
 )
 from .views_onboarding import (
     SellerOnboardingStateAPIView,
@@ -76,6 +78,8 @@ urlpatterns = [
     path('my-products/', SellerProductListView.as_view(), name='seller-product-list'),
     path('statistics/sales/', SellerSalesStatisticsView.as_view(), name='seller-sales-statistics'),
     path("<int:seller_id>/products/", SellerBaseProductListView.as_view(), name="seller-products"),
+    path("stock/import/", SellerStockImportAPIView.as_view(), name="seller-stock-import"),
+    path("stock/import/<int:pk>/", SellerStockImportJobAPIView.as_view(), name="seller-stock-import-job"),
 
     # --- Onboarding (Seller) ---
     path("onboarding/state/", SellerOnboardingStateAPIView.as_view(), name="seller-onboarding-state"),
@@ -6,10 +6,13 @@ from rest_framework.views import APIView
 from rest_framework.filters import OrderingFilter, SearchFilter
 from rest_framework.generics import ListAPIView
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.exceptions import PermissionDenied, ValidationError
 from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.parsers import BaseParser, JSONParser, MultiPartParser
+from rest_framework.exceptions import ParseError
 from django_filters.rest_framework import DjangoFilterBackend
 from drf_spectacular.utils import (
     extend_schema,
@@ -19,8 +22,15 @@ from drf_spectacular.utils import (
 )
 from django.db.models import Min, Sum, F
 
-from .models import SellerProfile
+from .models import SellerProfile, SellerStockImportJob
 from .services import get_seller_sales_statistics
+from .stock_import import (
+    StockImportError,
+    fail_stale_stock_import_job,
+    import_stock,
+    parse_stock_csv,
+    start_stock_import_job,
+)
 from .permissions import IsSellerOwner
 from .serializers import (
     ProductListSerializer,
@@ -38,7 +48,10 @@ from .serializers import (
     ProductVariantPatchSwaggerSerializer,
     LicenseFileReadSerializer,
     LicenseFileWriteSerializer,
+    SellerStockImportJobSerializer,
+    StockImportRequestSerializer,
 )
+from favorites.services import annotate_is_favorite
 from product.models import (
     BaseProduct,
     Category,
@@ -53,8 +66,10 @@ from product.attribute_schema import (
     get_effective_attribute_schema,
     replace_product_attribute_values,
 )
+from product.catalog_listing import annotate_with_catalog_listing
 from product.filters import BaseProductFilter
 from product.pagination import StandardResultsSetPagination
+from product.search_index import refresh_search_documents
 from product.serializers import (
     BaseProductListSerializer,
     CategoryAttributeDefinitionSerializer,
@@ -349,6 +364,8 @@ class ProductParameterViewSet(ModelViewSet):
             objs_to_create.append(ProductParameter(product=product, **valid_data))
 
         created_objs = ProductParameter.objects.bulk_create(objs_to_create)
+        # bulk_create bypasses post_save, so refresh the search document explicitly.
+        refresh_search_documents([product.pk])
 
         output_data = self.get_serializer(created_objs, many=True).data
         return Response(output_data, status=status.HTTP_201_CREATED)
@@ -1155,7 +1172,7 @@ class SellerProductListView(ListAPIView):
             ordered_quantity=Sum('variants__orderproduct__quantity')
         ).filter(min_price__isnull=False).distinct()
 
-        return qs
+        return annotate_is_favorite(qs, user)
 
 
 @extend_schema(
@@ -1305,17 +1322,15 @@ class SellerBaseProductListView(ListAPIView):
     def get_base_queryset(self):
         seller_id = self.kwargs.get('seller_id')
         qs = (
-            BaseProduct.objects
-            .filter(seller_id=seller_id, is_active=True)
-            .annotate(
-                # минимальная цена варианта (эквайринг добавляется в сериализаторе)
-                min_price=Min('variants__price'),
-                ordered_quantity=Sum('variants__orderproduct__quantity')
+            annotate_with_catalog_listing(
+                BaseProduct.objects.filter(seller_id=seller_id, is_active=True)
             )
-            .filter(min_price__isnull=False)
-            .prefetch_related('images', 'variants', 'product_parameters')
-            .distinct()
+            # минимальная цена варианта без эквайринга (CatalogListing)
+            .annotate(min_price=F('base_min_price'))
+            .select_related('seller')
+            .prefetch_related('product_parameters')
         )
+        qs = annotate_is_favorite(qs, self.request.user)
 
         ordering = self.request.query_params.get('ordering', '-rating')
         if ordering.lstrip('-') in self.ALLOWED_ORDERING_FIELDS:
@@ -1338,3 +1353,129 @@ class SellerBaseProductListView(ListAPIView):
         if page is not None:
             return self.get_paginated_response(serializer.data)
         return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+class StockCsvParser(BaseParser):
+    """``text/csv`` request body for the stock import endpoint."""
+
+    media_type = "text/csv"
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        try:
+            return parse_stock_csv(stream.read().decode("utf-8-sig"))
+        except UnicodeDecodeError as exc:
+            raise ParseError("CSV must be UTF-8 encoded.") from exc
+        except StockImportError as exc:
+            raise ParseError(str(exc)) from exc
+
+
+@extend_schema(
+    tags=["Seller Stock"],
+    operation_id="seller_stock_import",
+    description=(
+        "Bulk set `quantity_in_stock` for the seller's variants (up to 50 000 rows).\n\n"
+        "Send a JSON array of rows (or `{\"rows\": [...]}`), a `text/csv` body, or a "
+        "multipart `file` with the header `sku,warehouse_id,quantity_in_stock`. "
+        "An empty `warehouse_id` means the seller default warehouse.\n\n"
+        "Rows are applied in chunks. A row fails (and the rest still apply) if the SKU is "
+        "not the seller's, the warehouse is not allowed, the row duplicates an earlier one, "
+        "or the quantity is below the units held by pending reservations.\n\n"
+        "With `?async=true` the import runs in the background: the response is `202` with "
+        "`job_id`; poll `status_url` for progress and the per-row report."
+    ),
+    parameters=[
+        OpenApiParameter(name="async", type=bool, required=False, description="Run in the background."),
+    ],
+    request={
+        "application/json": StockImportRequestSerializer,
+        "text/csv": OpenApiTypes.STR,
+        "multipart/form-data": {"type": "object", "properties": {"file": {"type": "string", "format": "binary"}}},
+    },
+    responses={
+        200: OpenApiResponse(
+            description="Summary and per-row report.",
+            examples=[
+                OpenApiExample(
+                    name="StockImportReport",
+                    value={
+                        "summary": {"created": 1, "updated": 0, "unchanged": 0, "error": 1, "total": 2},
+                        "rows": [
+                            {"row": 1, "sku": "123456789", "warehouse_id": 3,
+                             "quantity_in_stock": 10, "status": "created"},
+                            {"row": 2, "sku": "987654321", "warehouse_id": 3, "quantity_in_stock": 1,
+                             "status": "error",
+                             "errors": ["quantity_in_stock cannot be below the 2 unit(s) held by pending reservations."]},
+                        ],
+                    },
+                )
+            ],
+        ),
+        202: OpenApiResponse(description="Job queued: `job_id`, `status`, `status_url`."),
+        400: OpenApiResponse(description="Malformed payload or too many rows."),
+    },
+)
+class SellerStockImportAPIView(APIView):
+    permission_classes = [IsAuthenticated, IsSellerOwner]
+    parser_classes = [JSONParser, StockCsvParser, MultiPartParser]
+
+    def _rows(self, request):
+        upload = request.FILES.get("file")
+        if upload is not None:
+            try:
+                return parse_stock_csv(upload.read().decode("utf-8-sig"))
+            except UnicodeDecodeError as exc:
+                raise ValidationError({"file": ["CSV must be UTF-8 encoded."]}) from exc
+            except StockImportError as exc:
+                raise ValidationError({"file": [str(exc)]}) from exc
+        data = request.data
+        if isinstance(data, dict):
+            data = data.get("rows")
+        if not isinstance(data, list):
+            raise ValidationError({"rows": ["Expected a list of rows or a CSV file."]})
+        return data
+
+    def post(self, request, *args, **kwargs):
+        seller_profile = get_object_or_404(SellerProfile, user=request.user)
+        rows = self._rows(request)
+        run_async = request.query_params.get("async", "").lower() in ("1", "true", "yes")
+
+        try:
+            if run_async:
+                job = start_stock_import_job(seller_profile, rows)
+            else:
+                result = import_stock(seller_profile, rows)
+        except StockImportError as exc:
+            raise ValidationError({"rows": [str(exc)]}) from exc
+
+        if run_async:
+            return Response(
+                {
+                    "job_id": job.id,
+                    "status": job.status,
+                    "status_url": reverse("seller-stock-import-job", kwargs={"pk": job.id}, request=request),
+                },
+                status=status.HTTP_202_ACCEPTED,
+            )
+        return Response(result, status=status.HTTP_200_OK)
+
+
+@extend_schema(
+    tags=["Seller Stock"],
+    operation_id="seller_stock_import_job",
+    description=(
+        "Progress of a background stock import; `report` is filled once `status` is `completed`. "
+        "A job that stopped without finishing (e.g. a server restart) is reported as `failed`."
+    ),
+    responses={200: SellerStockImportJobSerializer},
+)
+class SellerStockImportJobAPIView(APIView):
+    permission_classes = [IsAuthenticated, IsSellerOwner]
+
+    def get(self, request, pk, *args, **kwargs):
+        job = get_object_or_404(
+            SellerStockImportJob.objects.defer("rows"),
+            pk=pk,
+            seller__user=request.user,
+        )
+        job = fail_stale_stock_import_job(job)
+        return Response(SellerStockImportJobSerializer(job).data, status=status.HTTP_200_OK)
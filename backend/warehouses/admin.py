@@ -32,6 +32,7 @@ class WarehouseItemAdmin(admin.ModelAdmin):
         "product_variant",
         "quantity_in_stock",
         "reserved_quantity",
+        "shard_count",
     )
     list_filter = ("warehouse",)
     search_fields = ("product_variant__sku",)
@@ -40,7 +41,7 @@ class WarehouseItemAdmin(admin.ModelAdmin):
 class StockReservationItemInline(admin.TabularInline):
     model = StockReservationItem
     extra = 0
-    readonly_fields = ("warehouse_item", "quantity")
+    readonly_fields = ("warehouse_item", "quantity", "shard_quantities")
 
 
 @admin.register(StockReservation)
@@ -15,3 +15,22 @@ class InsufficientStockError(Exception):
         self.detail = detail or {}
         message = str(self.detail) if self.detail else "Insufficient stock"
         super().__init__(message)
+
+
+class StockLockTimeoutError(Exception):
+    """
+    Raised when reservation row locks could not be acquired within the lock
+    policy (warehouses/services/locking.py), after all retries.
+
+    The stock may well be available; the caller should ask the client to try
+    again.  ``detail``:
+        {
+            "skus":        list[str],  # SKUs of the contended cart
+            "retry_after": int,        # suggested wait in seconds
+        }
+    """
+
+    def __init__(self, detail: dict | None = None):
+        self.detail = detail or {}
+        message = str(self.detail) if self.detail else "Stock is locked, try again"
+        super().__init__(message)
@@ -0,0 +1,105 @@
+"""
+Load-test the stock reservation lifecycle and print a JSON report.
+
+Example (PostgreSQL, never against production):
+  python manage.py benchmark_stock_reservations --workers 16 --sessions 200 \\
+    --skus 40 --hot-skus 4 --overlap 0.8 --cart-size 3 --output bench.json
+
+Single-row vs sharded counters on the same load:
+  python manage.py benchmark_stock_reservations --workers 16 --sessions 200 \\
+    --hot-skus 1 --overlap 1 --cart-size 1 --shards 8 --compare-shards
+
+Exits with an error after writing the report if the stock invariants were
+violated.
+"""
+from __future__ import annotations
+
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from warehouses.reservation_benchmark import BenchmarkConfig, run_reservation_benchmark
+from warehouses.services.allocation import STRATEGIES
+
+
+class Command(BaseCommand):
+    help = "Benchmark concurrent create/confirm/release of stock reservations (JSON report)."
+
+    def add_arguments(self, parser):
+        defaults = BenchmarkConfig()
+        parser.add_argument("--workers", type=int, default=defaults.workers)
+        parser.add_argument(
+            "--processes",
+            action="store_true",
+            help="Run workers as forked processes instead of threads.",
+        )
+        parser.add_argument("--sessions", type=int, default=defaults.sessions, help="Checkouts per worker.")
+        parser.add_argument("--skus", type=int, default=defaults.skus)
+        parser.add_argument("--hot-skus", type=int, default=defaults.hot_skus, help="SKUs shared by all workers.")
+        parser.add_argument(
+            "--overlap",
+            type=float,
+            default=defaults.overlap,
+            help="Probability that a cart line uses a hot SKU (0..1).",
+        )
+        parser.add_argument("--cart-size", type=int, default=defaults.cart_size)
+        parser.add_argument("--quantity", type=int, default=defaults.quantity, help="Units per cart line.")
+        parser.add_argument("--warehouses", type=int, default=defaults.warehouses)
+        parser.add_argument("--stock", type=int, default=defaults.stock, help="Units per WarehouseItem.")
+        parser.add_argument(
+            "--confirm-ratio",
+            type=float,
+            default=defaults.confirm_ratio,
+            help="Share of reservations confirmed; the rest are released.",
+        )
+        parser.add_argument("--strategy", choices=sorted(STRATEGIES), default=None)
+        parser.add_argument("--shards", type=int, default=defaults.shards, help="Shard the hot SKUs' items.")
+        parser.add_argument(
+            "--compare-shards",
+            action="store_true",
+            help="Run the load on single-row counters first and report the sharded speed-up.",
+        )
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--output", default=None, help="Write the JSON report to this file.")
+
+    def handle(self, *args, **options):
+        config = BenchmarkConfig(
+            workers=options["workers"],
+            processes=options["processes"],
+            sessions=options["sessions"],
+            skus=options["skus"],
+            hot_skus=options["hot_skus"],
+            overlap=options["overlap"],
+            cart_size=options["cart_size"],
+            quantity=options["quantity"],
+            warehouses=options["warehouses"],
+            stock=options["stock"],
+            confirm_ratio=options["confirm_ratio"],
+            strategy=options["strategy"],
+            shards=options["shards"],
+            compare_shards=options["compare_shards"],
+            seed=options["seed"],
+        )
+        try:
+            config.validate()
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        if connection.vendor != "postgresql" and (config.workers > 1 or config.processes):
+            raise CommandError("Concurrent runs need PostgreSQL (row-level locks); use --workers 1 elsewhere.")
+
+        log = self.stderr.write if options["verbosity"] > 1 else (lambda _msg: None)
+        report = run_reservation_benchmark(config, log=log)
+        payload = json.dumps(report, indent=2, sort_keys=True)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as fh:
+                fh.write(payload + "\n")
+            self.stderr.write(f"Report written to {options['output']}")
+        else:
+            self.stdout.write(payload)
+
+        violations = report["invariants"]["violations"] + report.get("baseline", {}).get("invariants", {}).get(
+            "violations", []
+        )
+        if violations:
+            raise CommandError("Stock invariants violated: " + "; ".join(violations[:10]))
@@ -0,0 +1,56 @@
+"""
+Rebalance (or configure) sharded stock counters of hot WarehouseItems.
+
+Recommended cron (every minute during promotions):
+    * * * * * python manage.py rebalance_stock_shards
+
+Shard a hot item / turn sharding off:
+    python manage.py rebalance_stock_shards --item 123 --shards 8
+    python manage.py rebalance_stock_shards --item 123 --shards 0
+"""
+from __future__ import annotations
+
+from django.core.management.base import BaseCommand, CommandError
+
+from warehouses.models import WarehouseItem
+from warehouses.services.sharding import MAX_SHARDS, configure_shards, rebalance_shards
+
+
+class Command(BaseCommand):
+    help = "Redistribute free stock over WarehouseItemShard counters."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--item",
+            type=int,
+            action="append",
+            dest="items",
+            metavar="WAREHOUSE_ITEM_ID",
+            help="Limit to these WarehouseItem ids (repeatable).",
+        )
+        parser.add_argument(
+            "--shards",
+            type=int,
+            default=None,
+            metavar="N",
+            help=f"Set the shard count (0–{MAX_SHARDS}) of the given --item before rebalancing.",
+        )
+
+    def handle(self, *args, **options):
+        items: list[int] | None = options["items"]
+        shards: int | None = options["shards"]
+
+        if shards is not None:
+            if not items:
+                raise CommandError("--shards requires at least one --item.")
+            for item_id in items:
+                try:
+                    configure_shards(item_id, shards)
+                except WarehouseItem.DoesNotExist as exc:
+                    raise CommandError(f"WarehouseItem {item_id} does not exist.") from exc
+                except ValueError as exc:
+                    raise CommandError(str(exc)) from exc
+                self.stdout.write(f"WarehouseItem {item_id}: shard_count={shards}")
+
+        count = rebalance_shards(items)
+        self.stdout.write(self.style.SUCCESS(f"Rebalanced {count} sharded item(s)."))
@@ -3,20 +3,27 @@ Release PENDING stock reservations whose TTL has elapsed.
 
 Recommended cron (every 5 minutes):
     */5 * * * * python manage.py release_expired_reservations
+
+Reservations are claimed in batches with SKIP LOCKED (see
+warehouses/services/expiry.py), so overlapping runs are safe; after an outage
+several copies can be started to drain the backlog faster.  Each run also
+prunes reservation metric minutes past their retention
+(warehouses/services/metrics.py).
 """
 from __future__ import annotations
 
 import logging
 
 from django.core.management.base import BaseCommand
-from django.db import transaction
 from django.utils import timezone
 
-from payment.services.reservation_payment import (
-    expire_provider_checkout_after_reservation_release,
-)
 from warehouses.models import StockReservation
-from warehouses.services.reservation import StockReservationService
+from warehouses.services.expiry import (
+    DEFAULT_BATCH_SIZE,
+    DEFAULT_WORKERS,
+    sweep_expired_reservations,
+)
+from warehouses.services.metrics import prune_reservation_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -40,6 +47,20 @@ class Command(BaseCommand):
             metavar="N",
             help="Maximum number of reservations to process in this run.",
         )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=DEFAULT_BATCH_SIZE,
+            metavar="N",
+            help="Reservations claimed and released per transaction.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=DEFAULT_WORKERS,
+            metavar="N",
+            help="Threads for Stripe/PayPal expire calls (0 = inline).",
+        )
 
     def handle(self, *args, **options):
         dry_run: bool = options["dry_run"]
@@ -72,31 +93,17 @@ class Command(BaseCommand):
             )
             return
 
-        with transaction.atomic():
-            lock_qs = base_qs.select_for_update(skip_locked=True)
-            if limit is not None:
-                lock_qs = lock_qs[:limit]
-            reservations = list(lock_qs)
-
-        released = 0
-        for reservation in reservations:
-            provider_id = reservation.provider_checkout_id
-            payment_system = reservation.payment_system
-            StockReservationService.release_reservation(
-                reservation.session_key,
-                final_status=StockReservation.Status.EXPIRED,
-            )
-            expire_provider_checkout_after_reservation_release(
-                session_key=reservation.session_key,
-                payment_system=payment_system,
-                provider_checkout_id=provider_id,
-            )
-            released += 1
-            logger.info(
-                "release_expired_reservations: expired session_key=%s",
-                reservation.session_key,
-            )
+        stats = sweep_expired_reservations(
+            batch_size=max(1, options["batch_size"]),
+            workers=max(0, options["workers"]),
+            limit=limit,
+        )
+        logger.info("release_expired_reservations: %s", stats.summary())
+        pruned = prune_reservation_metrics()
 
         self.stdout.write(
-            self.style.SUCCESS(f"Released {released} expired reservation(s).")
+            self.style.SUCCESS(f"Released {stats.released} expired reservation(s).")
         )
+        if options["verbosity"] > 1:
+            self.stdout.write(stats.summary())
+            self.stdout.write(f"Pruned {pruned} reservation metric row(s).")
@@ -4,6 +4,11 @@ Print stock-reservation health metrics for staging/production monitoring.
 Example:
   python manage.py report_stock_reservation_health
   python manage.py report_stock_reservation_health --json
+  python manage.py report_stock_reservation_health --resync-metrics
+
+This command scans StockReservation and WarehouseItem.  For frequent
+monitoring, scrape /metrics/stock-reservations/ instead, which reads the
+rolling counters (warehouses/services/metrics.py).
 """
 from __future__ import annotations
 
@@ -14,6 +19,7 @@ from django.db.models import Count, F
 from django.utils import timezone
 
 from warehouses.models import StockReservation, WarehouseItem
+from warehouses.services.metrics import resync_reservation_metrics
 
 
 class Command(BaseCommand):
@@ -25,8 +31,20 @@ class Command(BaseCommand):
             action="store_true",
             help="Output machine-readable JSON instead of human text.",
         )
+        parser.add_argument(
+            "--resync-metrics",
+            action="store_true",
+            help="Recompute the lifetime event/unit metric counters from the tables.",
+        )
 
     def handle(self, *args, **options):
+        if options["resync_metrics"]:
+            totals = resync_reservation_metrics()
+            for key, value in sorted(totals.items()):
+                self.stdout.write(f"  {key}: {value}")
+            self.stdout.write(self.style.SUCCESS("Reservation metric counters resynced."))
+            return
+
         now = timezone.now()
         as_json = options["json"]
 
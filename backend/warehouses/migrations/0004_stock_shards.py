@@ -0,0 +1,37 @@
+# Generated by Django 5.1 on 2026-10-18 16:12
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouses', '0003_stockreservation_provider_checkout_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stockreservationitem',
+            name='shard_quantities',
+            field=models.JSONField(blank=True, default=dict, help_text='Shard index → units, when reserved on WarehouseItemShard counters.'),
+        ),
+        migrations.AddField(
+            model_name='warehouseitem',
+            name='shard_count',
+            field=models.PositiveSmallIntegerField(default=0, help_text='Number of WarehouseItemShard counters used for new reservations (0 = reserve on this row). See warehouses/services/sharding.py.'),
+        ),
+        migrations.CreateModel(
+            name='WarehouseItemShard',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('index', models.PositiveSmallIntegerField()),
+                ('allotment', models.PositiveIntegerField(default=0)),
+                ('reserved_quantity', models.PositiveIntegerField(default=0)),
+                ('warehouse_item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='shards', to='warehouses.warehouseitem')),
+            ],
+            options={
+                'unique_together': {('warehouse_item', 'index')},
+            },
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1 on 2026-10-18 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouses', '0004_stock_shards'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockReservationMetric',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(max_length=64)),
+                ('minute', models.DateTimeField()),
+                ('shard', models.PositiveSmallIntegerField(default=0)),
+                ('value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Stock Reservation Metric',
+                'verbose_name_plural': 'Stock Reservation Metrics',
+                'indexes': [models.Index(fields=['minute'], name='stockres_metric_minute_idx')],
+                'constraints': [models.UniqueConstraint(fields=('key', 'minute', 'shard'), name='stockres_metric_uniq')],
+            },
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Seed the lifetime reservation metric counters from existing reservations,
+# so that the pending gauges start out right.
+#
+# Uses historical models only; live counting happens in
+# warehouses/services/reservation.py.  Recompute at any time with
+# `manage.py report_stock_reservation_health --resync-metrics`.
+
+from datetime import datetime, timezone
+
+from django.db import migrations
+from django.db.models import Count, Sum
+
+LIFETIME = datetime(1970, 1, 1, tzinfo=timezone.utc)
+TERMINAL = ('confirmed', 'released', 'expired')
+
+
+def seed_reservation_metrics(apps, schema_editor):
+    StockReservation = apps.get_model('warehouses', 'StockReservation')
+    StockReservationItem = apps.get_model('warehouses', 'StockReservationItem')
+    StockReservationMetric = apps.get_model('warehouses', 'StockReservationMetric')
+
+    by_status = dict(
+        StockReservation.objects.values('status').annotate(total=Count('id')).values_list('status', 'total')
+    )
+    units_by_status = dict(
+        StockReservationItem.objects.values('reservation__status')
+        .annotate(total=Sum('quantity'))
+        .values_list('reservation__status', 'total')
+    )
+    totals = {
+        'events:created': sum(by_status.values()),
+        'units:created': sum(int(value or 0) for value in units_by_status.values()),
+    }
+    for status in TERMINAL:
+        totals[f'events:{status}'] = by_status.get(status, 0)
+        totals[f'units:{status}'] = int(units_by_status.get(status) or 0)
+
+    StockReservationMetric.objects.bulk_create(
+        [StockReservationMetric(key=key, minute=LIFETIME, shard=0, value=value) for key, value in totals.items()],
+        ignore_conflicts=True,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouses', '0005_stock_reservation_metrics'),
+    ]
+
+    operations = [
+        migrations.RunPython(seed_reservation_metrics, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,38 @@
+# Fold the lifetime per-SKU lock contention counters (lock_<kind>:<sku>) into
+# one lifetime counter per kind.  Per-SKU counters are now minute rows only,
+# so they are pruned with the other minute rows and the series stay bounded.
+
+from datetime import datetime, timezone
+
+from django.db import migrations
+from django.db.models import Sum
+
+LIFETIME = datetime(1970, 1, 1, tzinfo=timezone.utc)
+LOCK_NAMES = ('lock_waits', 'lock_retries', 'lock_timeouts', 'lock_wait_ms')
+
+
+def fold_lock_contention(apps, schema_editor):
+    StockReservationMetric = apps.get_model('warehouses', 'StockReservationMetric')
+
+    for name in LOCK_NAMES:
+        per_sku = StockReservationMetric.objects.filter(minute=LIFETIME, key__startswith=f'{name}:')
+        total = per_sku.aggregate(total=Sum('value'))['total']
+        if not total:
+            continue
+        row, _ = StockReservationMetric.objects.get_or_create(
+            key=name, minute=LIFETIME, shard=0, defaults={'value': 0},
+        )
+        row.value += total
+        row.save(update_fields=['value'])
+        per_sku.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('warehouses', '0006_seed_stock_reservation_metrics'),
+    ]
+
+    operations = [
+        migrations.RunPython(fold_lock_contention, migrations.RunPython.noop),
+    ]
@@ -35,6 +35,13 @@ class WarehouseItem(models.Model):
             "available_quantity = quantity_in_stock - reserved_quantity."
         ),
     )
+    shard_count = models.PositiveSmallIntegerField(
+        default=0,
+        help_text=(
+            "Number of WarehouseItemShard counters used for new reservations "
+            "(0 = reserve on this row). See warehouses/services/sharding.py."
+        ),
+    )
 
     class Meta:
         unique_together = ('warehouse', 'product_variant')
@@ -42,10 +49,48 @@ class WarehouseItem(models.Model):
     def __str__(self):
         return f"{self.product_variant} in {self.warehouse.name} -> {self.quantity_in_stock}"
 
+    @property
+    def shard_reserved_quantity(self) -> int:
+        """Units held by pending reservations on this item's shards."""
+        if not self.shard_count:
+            return 0
+        shards = getattr(self, "_prefetched_objects_cache", {}).get("shards")
+        if shards is not None:
+            return sum(shard.reserved_quantity for shard in shards)
+        return self.shards.aggregate(total=models.Sum("reserved_quantity"))["total"] or 0
+
     @property
     def available_quantity(self) -> int:
         """Units available for new reservations (never negative)."""
-        return max(0, self.quantity_in_stock - self.reserved_quantity)
+        return max(0, self.quantity_in_stock - self.reserved_quantity - self.shard_reserved_quantity)
+
+
+class WarehouseItemShard(models.Model):
+    """
+    One slice of a hot WarehouseItem's reservable stock.
+
+    Reservations for a sharded item increment ``reserved_quantity`` of a random
+    shard (spilling over to the next ones) instead of locking the WarehouseItem
+    row. ``allotment`` is the shard's share of the stock, reserved units included;
+    the rebalancer redistributes allotments so that
+    ``sum(allotment - reserved_quantity) = quantity_in_stock - reserved_quantity
+    - sum(reserved_quantity)``.
+    """
+
+    warehouse_item = models.ForeignKey(
+        WarehouseItem,
+        on_delete=models.CASCADE,
+        related_name="shards",
+    )
+    index = models.PositiveSmallIntegerField()
+    allotment = models.PositiveIntegerField(default=0)
+    reserved_quantity = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("warehouse_item", "index")
+
+    def __str__(self):
+        return f"{self.warehouse_item_id}#{self.index}: {self.reserved_quantity}/{self.allotment}"
 
 
 class StockReservation(models.Model):
@@ -129,6 +174,11 @@ class StockReservationItem(models.Model):
         related_name="reservation_items",
     )
     quantity = models.PositiveIntegerField()
+    shard_quantities = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text="Shard index → units, when reserved on WarehouseItemShard counters.",
+    )
 
     class Meta:
         verbose_name = "Stock Reservation Item"
@@ -140,3 +190,33 @@ class StockReservationItem(models.Model):
             f"{self.quantity}× {self.warehouse_item.product_variant} "
             f"for reservation {self.reservation_id}"
         )
+
+
+class StockReservationMetric(models.Model):
+    """
+    Rolling counter for stock reservation metrics (warehouses/services/metrics.py).
+
+    ``key`` names the series, e.g. ``events:confirmed`` or
+    ``age_bucket:expired:1800``.  ``minute`` is the start of a one-minute
+    window, or ``LIFETIME`` (1970-01-01) for running totals.  Writers add to a
+    random ``shard`` row so concurrent commits do not queue on one row;
+    readers sum the shards.
+    """
+
+    key = models.CharField(max_length=64)
+    minute = models.DateTimeField()
+    shard = models.PositiveSmallIntegerField(default=0)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        verbose_name = "Stock Reservation Metric"
+        verbose_name_plural = "Stock Reservation Metrics"
+        constraints = [
+            models.UniqueConstraint(fields=("key", "minute", "shard"), name="stockres_metric_uniq"),
+        ]
+        indexes = [
+            models.Index(fields=("minute",), name="stockres_metric_minute_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.key} @ {self.minute.isoformat()} [{self.shard}] = {self.value}"
@@ -0,0 +1,539 @@
+"""
+Load test for the stock reservation lifecycle.
+
+Used by ``python manage.py benchmark_stock_reservations``.  Creates a throwaway
+catalog (``skus`` variants, each stocked in ``warehouses`` warehouses), then
+runs ``workers`` threads or processes that each go through ``sessions``
+checkouts: ``create_reservation`` for a cart of ``cart_size`` lines, followed by
+``confirm_reservation`` (with probability ``confirm_ratio``) or
+``release_reservation``.
+
+SKU overlap decides how much the workers contend: each cart line comes from
+the shared hot set (the first ``hot_skus`` SKUs) with probability ``overlap``
+and otherwise from SKUs private to the worker.  ``overlap=1`` puts every
+worker on the same rows; ``overlap=0`` measures the uncontended path.
+
+The result is a JSON-serializable dict with throughput, per-operation latency
+percentiles, error counts (deadlocks, lock timeouts, insufficient stock) and
+the stock invariants checked on the fixture after the run.  On PostgreSQL a
+sampler thread also counts backends waiting on locks (``pg_stat_activity``)
+and the run's delta of ``pg_stat_database.deadlocks``; both are database-wide.
+
+``shards`` splits the hot SKUs' WarehouseItems into that many shard counters
+(warehouses/services/sharding.py).  With ``compare_shards`` the same load runs
+twice, first on plain rows and then sharded; the single-row report is added
+under ``baseline`` together with the ``shard_speedup`` of reservations/s.
+
+Needs PostgreSQL for ``workers > 1``; with one worker the run happens in the
+calling thread and works on any backend.
+"""
+from __future__ import annotations
+
+import math
+import multiprocessing
+import random
+import threading
+import time
+import uuid
+from collections import defaultdict
+from dataclasses import asdict, dataclass, replace
+from decimal import Decimal
+from typing import Callable
+
+from django.db import DatabaseError, connection, connections, transaction
+from django.db.models import Sum
+
+from accounts.choices import UserRole
+from accounts.models import CustomUser
+from product.models import BaseProduct, ProductStatus, ProductVariant
+from product.stock_availability import (
+    annotate_variant_queryset_with_live_available,
+    get_variant_availability,
+    refresh_variant_availability,
+)
+from sellers.models import SellerProfile
+from warehouses.exceptions import InsufficientStockError, StockLockTimeoutError
+from warehouses.models import StockReservation, StockReservationItem, Warehouse, WarehouseItem, WarehouseItemShard
+from warehouses.services.reservation import StockReservationService
+from warehouses.services.sharding import MAX_SHARDS, configure_shards
+
+LogFn = Callable[[str], None]
+
+OPERATIONS = ("create", "confirm", "release")
+ERROR_KINDS = (
+    "deadlock",
+    "lock_timeout",
+    "serialization_failure",
+    "statement_timeout",
+    "insufficient_stock",
+    "database_error",
+    "other_error",
+)
+
+# SQLSTATE codes reported separately from other database errors.
+_DEADLOCK = "40P01"
+_LOCK_TIMEOUT = "55P03"
+_SERIALIZATION = "40001"
+_QUERY_CANCELED = "57014"  # statement_timeout
+
+_LOCK_WAITS_SQL = (
+    "SELECT count(*) FROM pg_stat_activity "
+    "WHERE datname = current_database() AND wait_event_type = 'Lock'"
+)
+_DEADLOCKS_SQL = "SELECT deadlocks FROM pg_stat_database WHERE datname = current_database()"
+
+
+def _noop_log(_msg: str) -> None:
+    pass
+
+
+@dataclass(frozen=True)
+class BenchmarkConfig:
+    workers: int = 8
+    processes: bool = False
+    sessions: int = 50
+    skus: int = 20
+    hot_skus: int = 4
+    overlap: float = 0.5
+    cart_size: int = 3
+    quantity: int = 1
+    warehouses: int = 2
+    stock: int = 10_000
+    confirm_ratio: float = 0.5
+    strategy: str | None = None
+    shards: int = 0
+    compare_shards: bool = False
+    seed: int | None = None
+
+    def validate(self) -> None:
+        if self.workers < 1 or self.sessions < 1 or self.cart_size < 1 or self.quantity < 1:
+            raise ValueError("workers, sessions, cart_size and quantity must be positive")
+        if self.warehouses < 1 or self.stock < 0:
+            raise ValueError("warehouses must be positive and stock non-negative")
+        if not 1 <= self.hot_skus <= self.skus:
+            raise ValueError("hot_skus must be between 1 and skus")
+        if not 0 <= self.overlap <= 1 or not 0 <= self.confirm_ratio <= 1:
+            raise ValueError("overlap and confirm_ratio must be between 0 and 1")
+        if not 0 <= self.shards <= MAX_SHARDS:
+            raise ValueError(f"shards must be between 0 and {MAX_SHARDS}")
+        if self.compare_shards and not self.shards:
+            raise ValueError("compare_shards needs shards > 0")
+
+
+def _percentile(ordered: list[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not ordered:
+        return 0.0
+    rank = max(1, min(len(ordered), math.ceil(q / 100 * len(ordered))))
+    return ordered[rank - 1]
+
+
+def _latency_summary(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    ms = lambda value: round(value * 1000, 3)  # noqa: E731
+    return {
+        "count": len(ordered),
+        "mean_ms": ms(sum(ordered) / len(ordered)) if ordered else 0.0,
+        "p50_ms": ms(_percentile(ordered, 50)),
+        "p95_ms": ms(_percentile(ordered, 95)),
+        "p99_ms": ms(_percentile(ordered, 99)),
+        "max_ms": ms(ordered[-1]) if ordered else 0.0,
+    }
+
+
+def _classify(exc: Exception) -> str:
+    if isinstance(exc, InsufficientStockError):
+        return "insufficient_stock"
+    if isinstance(exc, StockLockTimeoutError):
+        return "lock_timeout"
+    if isinstance(exc, DatabaseError):
+        cause = exc.__cause__
+        code = getattr(cause, "pgcode", None) or getattr(cause, "sqlstate", None)
+        return {
+            _DEADLOCK: "deadlock",
+            _LOCK_TIMEOUT: "lock_timeout",
+            _SERIALIZATION: "serialization_failure",
+            _QUERY_CANCELED: "statement_timeout",
+        }.get(code, "database_error")
+    return "other_error"
+
+
+# ---------------------------------------------------------------------------
+# Fixture
+# ---------------------------------------------------------------------------
+
+
+def _create_fixture(slug: str, config: BenchmarkConfig) -> dict:
+    warehouses = [
+        Warehouse.objects.create(
+            name=f"WH-Bench-{slug}-{index}",
+            street="Bench 1",
+            city="Praha",
+            zip_code=f"{10000 + index * 100}",
+            country="CZ",
+        )
+        for index in range(config.warehouses)
+    ]
+    seller_user = CustomUser.objects.create_user(
+        email=f"seller-{slug}@bench.example.com",
+        password="unused",
+        first_name="B",
+        last_name="M",
+        role=UserRole.SELLER,
+        phone_number=f"+420732{abs(hash(slug)) % 10_000_000:07d}",
+    )
+    product = BaseProduct.objects.create(
+        name=f"Bench Product {slug}",
+        product_description="Benchmark",
+        seller=SellerProfile.objects.get(user=seller_user),
+        vat_rate=Decimal("21.00"),
+        status=ProductStatus.APPROVED,
+        is_active=True,
+    )
+    variants = [
+        ProductVariant.objects.create(
+            product=product,
+            name="V",
+            text=f"bench-{index}",
+            price=Decimal("10.00"),
+            weight_grams=100,
+        )
+        for index in range(config.skus)
+    ]
+    items = WarehouseItem.objects.bulk_create([
+        WarehouseItem(warehouse=warehouse, product_variant=variant, quantity_in_stock=config.stock)
+        for variant in variants
+        for warehouse in warehouses
+    ])
+    if config.shards:
+        hot_ids = {variant.pk for variant in variants[:config.hot_skus]}
+        for item in items:
+            if item.product_variant_id in hot_ids:
+                configure_shards(item.pk, config.shards)
+    # bulk_create skips the signals that maintain the availability snapshot.
+    refresh_variant_availability([variant.pk for variant in variants])
+    return {
+        "seller_user": seller_user,
+        "product": product,
+        "warehouses": warehouses,
+        "variants": [(variant.pk, variant.sku) for variant in variants],
+        "initial_stock": {item.pk: config.stock for item in items},
+    }
+
+
+def _drop_fixture(slug: str, fixture: dict) -> None:
+    StockReservation.objects.filter(session_key__startswith=slug).delete()
+    fixture["product"].delete()
+    for warehouse in fixture["warehouses"]:
+        warehouse.delete()
+    fixture["seller_user"].delete()
+
+
+# ---------------------------------------------------------------------------
+# Workers
+# ---------------------------------------------------------------------------
+
+
+def _cart(rng: random.Random, config: BenchmarkConfig, hot: list, private: list) -> list[tuple[int, str]]:
+    lines: dict[str, tuple[int, str]] = {}
+    for _ in range(config.cart_size):
+        pool = hot if not private or rng.random() < config.overlap else private
+        variant_id, sku = rng.choice(pool)
+        lines[sku] = (variant_id, sku)
+    return list(lines.values())
+
+
+def _run_worker(index: int, slug: str, config: BenchmarkConfig, variants: list, start_at: float) -> dict:
+    """One worker's sessions; returns raw latencies and outcome counts."""
+    rng = random.Random(None if config.seed is None else config.seed + index)
+    hot = variants[:config.hot_skus]
+    cold = variants[config.hot_skus:]
+    private = cold[index::config.workers]
+    latencies: dict[str, list[float]] = {op: [] for op in OPERATIONS}
+    outcomes: dict[str, int] = defaultdict(int)
+    proxies = {variant_id: ProductVariant(pk=variant_id, sku=sku) for variant_id, sku in variants}
+
+    def timed(op, call):
+        started = time.perf_counter()
+        try:
+            result = call()
+        except Exception as exc:  # noqa: BLE001 — counted, the run keeps going
+            outcomes[f"{op}.{_classify(exc)}"] += 1
+            return False, None
+        finally:
+            latencies[op].append(time.perf_counter() - started)
+        outcomes[f"{op}.ok"] += 1
+        return True, result
+
+    try:
+        delay = start_at - time.time()
+        if delay > 0:
+            time.sleep(delay)
+        for number in range(config.sessions):
+            session_key = f"{slug}-{index}-{number}"
+            lines = _cart(rng, config, hot, private)
+            groups = [{"products": [{"sku": sku, "quantity": config.quantity} for _, sku in lines]}]
+            variant_map = {sku: proxies[variant_id] for variant_id, sku in lines}
+            created, _ = timed(
+                "create",
+                lambda: StockReservationService.create_reservation(
+                    session_key=session_key,
+                    payment_system="stripe",
+                    groups=groups,
+                    variant_map=variant_map,
+                    strategy=config.strategy,
+                ),
+            )
+            if not created:
+                continue
+            if rng.random() < config.confirm_ratio:
+                timed("confirm", lambda: StockReservationService.confirm_reservation(session_key))
+            else:
+                timed("release", lambda: StockReservationService.release_reservation(session_key))
+    finally:
+        if config.workers > 1:
+            connection.close()
+    return {"latencies": latencies, "outcomes": dict(outcomes)}
+
+
+def _process_entry(queue, *args) -> None:
+    try:
+        queue.put(_run_worker(*args))
+    except Exception as exc:  # noqa: BLE001 — reported to the parent
+        queue.put({"latencies": {}, "outcomes": {f"worker.{_classify(exc)}": 1}})
+
+
+def _run_workers(slug: str, config: BenchmarkConfig, variants: list) -> list[dict]:
+    start_at = time.time() + (0.5 if config.workers > 1 else 0)
+    if config.workers == 1 and not config.processes:
+        return [_run_worker(0, slug, config, variants, start_at)]
+
+    if config.processes:
+        # Children must open their own connections, never share the parent's
+        # socket.  Forked children leave through os._exit, so the sampler's
+        # inherited connection is never closed from a child.
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        queue = context.Queue()
+        children = [
+            context.Process(target=_process_entry, args=(queue, index, slug, config, variants, start_at))
+            for index in range(config.workers)
+        ]
+        for child in children:
+            child.start()
+        results = [queue.get() for _ in children]
+        for child in children:
+            child.join()
+        return results
+
+    results: list[dict] = [None] * config.workers
+
+    def target(index):
+        results[index] = _run_worker(index, slug, config, variants, start_at)
+
+    threads = [threading.Thread(target=target, args=(index,)) for index in range(config.workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
+
+
+class _LockWaitSampler(threading.Thread):
+    """Polls ``pg_stat_activity`` for backends waiting on a lock."""
+
+    def __init__(self, interval: float = 0.05):
+        super().__init__(daemon=True)
+        self.interval = interval
+        self.samples: list[int] = []
+        self._done = threading.Event()
+
+    def run(self):
+        try:
+            with connection.cursor() as cursor:
+                while not self._done.is_set():
+                    cursor.execute(_LOCK_WAITS_SQL)
+                    self.samples.append(cursor.fetchone()[0])
+                    self._done.wait(self.interval)
+        finally:
+            connection.close()
+
+    def stop(self) -> dict:
+        self._done.set()
+        self.join()
+        waiting = [count for count in self.samples if count]
+        return {
+            "samples": len(self.samples),
+            "samples_with_waiters": len(waiting),
+            "max_waiters": max(self.samples, default=0),
+            "mean_waiters": round(sum(self.samples) / len(self.samples), 3) if self.samples else 0.0,
+        }
+
+
+def _pg_deadlocks() -> int | None:
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute(_DEADLOCKS_SQL)
+        row = cursor.fetchone()
+    return int(row[0]) if row else None
+
+
+# ---------------------------------------------------------------------------
+# Invariants
+# ---------------------------------------------------------------------------
+
+
+def check_invariants(fixture: dict) -> dict:
+    """
+    Compare the fixture's stock counters with its reservations.
+
+    For every WarehouseItem: ``quantity_in_stock`` equals the initial stock
+    minus confirmed units, ``reserved_quantity`` equals the units of PENDING
+    unsharded reservation items, shard counters hold exactly the PENDING shard
+    units, and the availability snapshot matches a live aggregate.
+    """
+    item_ids = list(fixture["initial_stock"])
+    items = {item.pk: item for item in WarehouseItem.objects.filter(pk__in=item_ids)}
+    confirmed: dict[int, int] = defaultdict(int)
+    row_pending: dict[int, int] = defaultdict(int)
+    shard_pending: dict[int, int] = defaultdict(int)
+    reservation_items = StockReservationItem.objects.filter(
+        warehouse_item_id__in=item_ids,
+    ).values_list("warehouse_item_id", "quantity", "shard_quantities", "reservation__status")
+    for item_id, quantity, shard_quantities, status in reservation_items:
+        if status == StockReservation.Status.CONFIRMED:
+            confirmed[item_id] += quantity
+        elif status == StockReservation.Status.PENDING:
+            if shard_quantities:
+                shard_pending[item_id] += sum(int(qty) for qty in shard_quantities.values())
+            else:
+                row_pending[item_id] += quantity
+    shard_reserved = dict(
+        WarehouseItemShard.objects.filter(warehouse_item_id__in=item_ids)
+        .values("warehouse_item_id")
+        .annotate(total=Sum("reserved_quantity"))
+        .values_list("warehouse_item_id", "total")
+    )
+
+    violations = []
+    for item_id, initial in sorted(fixture["initial_stock"].items()):
+        item = items[item_id]
+        expected_stock = initial - confirmed[item_id]
+        if item.quantity_in_stock != expected_stock:
+            violations.append(
+                f"item {item_id}: quantity_in_stock={item.quantity_in_stock}, expected {expected_stock}"
+            )
+        if item.reserved_quantity != row_pending[item_id]:
+            violations.append(
+                f"item {item_id}: reserved_quantity={item.reserved_quantity}, expected {row_pending[item_id]}"
+            )
+        if item.reserved_quantity > item.quantity_in_stock:
+            violations.append(f"item {item_id}: reserved_quantity exceeds quantity_in_stock")
+        if (shard_reserved.get(item_id) or 0) != shard_pending[item_id]:
+            violations.append(
+                f"item {item_id}: shard reserved={shard_reserved.get(item_id) or 0}, "
+                f"expected {shard_pending[item_id]}"
+            )
+
+    variant_ids = [variant_id for variant_id, _ in fixture["variants"]]
+    live = dict(
+        annotate_variant_queryset_with_live_available(ProductVariant.objects.filter(pk__in=variant_ids))
+        .values_list("pk", "available_quantity")
+    )
+    for variant_id, available in sorted(get_variant_availability(variant_ids).items()):
+        if available != live.get(variant_id, 0):
+            violations.append(f"variant {variant_id}: snapshot={available}, live={live.get(variant_id, 0)}")
+
+    return {
+        "ok": not violations,
+        "violations": violations,
+        "confirmed_units": sum(confirmed.values()),
+        "pending_units": sum(row_pending.values()) + sum(shard_pending.values()),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Entry point
+# ---------------------------------------------------------------------------
+
+
+def run_reservation_benchmark(config: BenchmarkConfig, *, log: LogFn = _noop_log) -> dict:
+    """Run the load test described by ``config`` and return the JSON report."""
+    config.validate()
+    if not config.compare_shards:
+        return _run(config, log)
+
+    log("baseline: single-row counters")
+    baseline = _run(replace(config, shards=0, compare_shards=False), log)
+    log(f"sharded: {config.shards} shard(s) per hot item")
+    report = _run(config, log)
+    single = baseline["throughput"]["reservations_per_second"]
+    sharded = report["throughput"]["reservations_per_second"]
+    report["baseline"] = baseline
+    report["shard_speedup"] = round(sharded / single, 2) if single and sharded else None
+    return report
+
+
+def _run(config: BenchmarkConfig, log: LogFn) -> dict:
+    slug = f"rbench-{uuid.uuid4().hex[:8]}"
+    with transaction.atomic():
+        fixture = _create_fixture(slug, config)
+    log(
+        f"fixture: {config.skus} SKU(s) × {config.warehouses} warehouse(s), "
+        f"{config.workers} {'process' if config.processes else 'thread'}(s) × {config.sessions} session(s)"
+    )
+
+    is_postgres = connection.vendor == "postgresql"
+    sampler = None
+    try:
+        deadlocks_before = _pg_deadlocks()
+        if is_postgres and config.workers > 1:
+            sampler = _LockWaitSampler()
+            sampler.start()
+        started = time.perf_counter()
+        results = _run_workers(slug, config, fixture["variants"])
+        elapsed = time.perf_counter() - started
+        lock_waits = sampler.stop() if sampler else None
+        sampler = None
+        deadlocks_after = _pg_deadlocks()
+
+        latencies: dict[str, list[float]] = {op: [] for op in OPERATIONS}
+        outcomes: dict[str, int] = defaultdict(int)
+        for result in results:
+            for op, samples in result["latencies"].items():
+                latencies[op].extend(samples)
+            for key, count in result["outcomes"].items():
+                outcomes[key] += count
+
+        operations = sum(len(samples) for samples in latencies.values())
+        sessions = outcomes.get("create.ok", 0)
+        invariants = check_invariants(fixture)
+        report = {
+            "config": asdict(config),
+            "database": connection.vendor,
+            "seconds": round(elapsed, 3),
+            "throughput": {
+                "operations_per_second": round(operations / elapsed, 1) if elapsed else None,
+                "reservations_per_second": round(sessions / elapsed, 1) if elapsed else None,
+            },
+            "latency": {op: _latency_summary(samples) for op, samples in latencies.items()},
+            "outcomes": dict(sorted(outcomes.items())),
+            "errors": {
+                kind: sum(count for key, count in outcomes.items() if key.endswith(f".{kind}"))
+                for kind in ERROR_KINDS
+            },
+            "lock_waits": lock_waits,
+            "pg_deadlocks": (
+                deadlocks_after - deadlocks_before
+                if deadlocks_before is not None and deadlocks_after is not None
+                else None
+            ),
+            "invariants": invariants,
+        }
+        log(f"done in {report['seconds']}s, invariants {'ok' if invariants['ok'] else 'VIOLATED'}")
+        return report
+    finally:
+        if sampler is not None:
+            sampler.stop()
+        _drop_fixture(slug, fixture)
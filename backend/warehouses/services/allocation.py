@@ -0,0 +1,228 @@
+"""
+Warehouse allocation strategies for stock reservations.
+
+``StockReservationService.create_reservation`` hands every cart line and the
+locked ``WarehouseItem`` rows of its variant to a strategy, which decides how
+many units each warehouse contributes.  A line may be split across warehouses;
+each part becomes its own ``StockReservationItem``.
+
+Strategies
+----------
+fewest_shipments  (default) Prefer one warehouse per line, and among those the
+                  warehouse that can also serve most other lines of the cart.
+                  Lines no single warehouse can cover are split starting from
+                  the largest stock, so they use as few warehouses as possible.
+nearest           Prefer warehouses in the destination country, then by
+                  distance between numeric ZIP codes (a cheap proxy for
+                  distance within CZ/SK postal areas).
+balance_stock     Take units from the fullest warehouses so that their
+                  remaining availability is levelled.  This spreads hot SKUs
+                  over several rows instead of always draining one.
+warehouse_order   Fill in warehouse_id order.  This matches the legacy
+                  behaviour but can split a line.
+
+Select a strategy with ``STOCK_ALLOCATION_STRATEGY`` (a name above or the
+dotted path of an ``AllocationStrategy`` subclass), or per call.
+"""
+from __future__ import annotations
+
+import logging
+import re
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+from warehouses.exceptions import InsufficientStockError
+
+if TYPE_CHECKING:  # pragma: no cover
+    from warehouses.models import WarehouseItem
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STRATEGY = "fewest_shipments"
+
+
+@dataclass(frozen=True)
+class AllocationLine:
+    """One consolidated cart line: ``quantity`` units of a variant."""
+
+    sku: str
+    variant_id: int
+    quantity: int
+    destination_country: str | None = None
+    destination_zip: str | None = None
+
+
+Allocation = list[tuple["WarehouseItem", int]]
+
+
+class AllocationStrategy:
+    """
+    Base strategy: rank a line's warehouse items and fill greedily in that order.
+
+    Subclasses override ``rank`` (order of preference) or ``split`` (the whole
+    per-line decision).  ``candidates`` are the locked rows of the line's
+    variant; only ``available_quantity`` and the warehouse are consulted.
+    """
+
+    name = ""
+
+    def allocate(
+        self,
+        lines: list[AllocationLine],
+        stock: dict[int, list["WarehouseItem"]],
+    ) -> dict[str, Allocation]:
+        """
+        Return ``{sku: [(warehouse_item, qty), ...]}`` covering every line.
+
+        Raises ``InsufficientStockError`` for the first line whose variant does
+        not have enough stock across all warehouses.
+        """
+        self.prepare(lines, stock)
+        result: dict[str, Allocation] = {}
+        for line in lines:
+            candidates = [wi for wi in stock.get(line.variant_id, []) if wi.available_quantity > 0]
+            total = sum(wi.available_quantity for wi in candidates)
+            if total < line.quantity:
+                logger.warning(
+                    "allocate[%s]: insufficient stock for SKU %s: requested=%s available=%s",
+                    self.name,
+                    line.sku,
+                    line.quantity,
+                    total,
+                )
+                raise InsufficientStockError(
+                    detail={
+                        "sku": line.sku,
+                        "requested": line.quantity,
+                        "available": total,
+                    }
+                )
+            result[line.sku] = [(wi, qty) for wi, qty in self.split(line, candidates) if qty > 0]
+        return result
+
+    def prepare(self, lines: list[AllocationLine], stock: dict[int, list["WarehouseItem"]]) -> None:
+        """Hook for cart-level state; called once before the lines are split."""
+
+    def rank(self, line: AllocationLine, candidates: list["WarehouseItem"]) -> list["WarehouseItem"]:
+        return sorted(candidates, key=lambda wi: wi.warehouse_id)
+
+    def split(self, line: AllocationLine, candidates: list["WarehouseItem"]) -> Allocation:
+        remaining = line.quantity
+        parts: Allocation = []
+        for wi in self.rank(line, candidates):
+            if remaining <= 0:
+                break
+            take = min(wi.available_quantity, remaining)
+            parts.append((wi, take))
+            remaining -= take
+        return parts
+
+
+class WarehouseOrderStrategy(AllocationStrategy):
+    name = "warehouse_order"
+
+
+class FewestShipmentsStrategy(AllocationStrategy):
+    name = "fewest_shipments"
+
+    def prepare(self, lines, stock):
+        # How many cart lines each warehouse could ship on its own.
+        self._coverage: dict[int, int] = defaultdict(int)
+        for line in lines:
+            for wi in stock.get(line.variant_id, []):
+                if wi.available_quantity >= line.quantity:
+                    self._coverage[wi.warehouse_id] += 1
+
+    def rank(self, line, candidates):
+        return sorted(
+            candidates,
+            key=lambda wi: (
+                wi.available_quantity < line.quantity,
+                -self._coverage.get(wi.warehouse_id, 0),
+                -wi.available_quantity,
+                wi.warehouse_id,
+            ),
+        )
+
+
+_DIGITS = re.compile(r"\D+")
+
+
+def _zip_number(value: str | None) -> int | None:
+    digits = _DIGITS.sub("", value or "")
+    return int(digits) if digits else None
+
+
+class NearestStrategy(AllocationStrategy):
+    name = "nearest"
+
+    def rank(self, line, candidates):
+        country = (line.destination_country or "").upper()
+        destination_zip = _zip_number(line.destination_zip)
+
+        def distance(wi):
+            warehouse = wi.warehouse
+            warehouse_zip = _zip_number(warehouse.zip_code)
+            zip_distance = (
+                abs(warehouse_zip - destination_zip)
+                if warehouse_zip is not None and destination_zip is not None
+                else float("inf")
+            )
+            return (bool(country) and warehouse.country.upper() != country, zip_distance, wi.warehouse_id)
+
+        return sorted(candidates, key=distance)
+
+
+class BalanceStockStrategy(AllocationStrategy):
+    name = "balance_stock"
+
+    def split(self, line, candidates):
+        # Water-filling: lower the fullest warehouses to a common level.
+        ordered = sorted(candidates, key=lambda wi: (-wi.available_quantity, wi.warehouse_id))
+        available = [wi.available_quantity for wi in ordered]
+        remaining = line.quantity
+        count = 0
+        level = available[0] if available else 0
+        while remaining > 0:
+            while count < len(ordered) and available[count] >= level:
+                count += 1
+            next_level = available[count] if count < len(ordered) else 0
+            step = min(level - next_level, remaining // count) if count else 0
+            if step <= 0:
+                break
+            level -= step
+            remaining -= step * count
+        takes = [max(0, value - level) for value in available]
+        # Spread the indivisible remainder over the fullest warehouses.
+        for index in range(len(ordered)):
+            if remaining <= 0:
+                break
+            if available[index] - takes[index] > 0:
+                takes[index] += 1
+                remaining -= 1
+        return list(zip(ordered, takes))
+
+
+STRATEGIES: dict[str, type[AllocationStrategy]] = {
+    strategy.name: strategy
+    for strategy in (
+        FewestShipmentsStrategy,
+        NearestStrategy,
+        BalanceStockStrategy,
+        WarehouseOrderStrategy,
+    )
+}
+
+
+def get_allocation_strategy(name: str | None = None) -> AllocationStrategy:
+    """Instantiate a strategy by name or dotted path (default from settings)."""
+    name = name or getattr(settings, "STOCK_ALLOCATION_STRATEGY", DEFAULT_STRATEGY)
+    if name in STRATEGIES:
+        return STRATEGIES[name]()
+    if "." in name:
+        return import_string(name)()
+    raise ValueError(f"Unknown stock allocation strategy: {name!r}")
@@ -0,0 +1,157 @@
+"""
+Batched sweeper for expired stock reservations.
+
+Used by ``manage.py release_expired_reservations``.  Each batch is one
+transaction:
+
+1. claim up to ``batch_size`` PENDING reservations past ``expires_at`` with
+   ``SELECT ... FOR UPDATE SKIP LOCKED`` (oldest first),
+2. release them together via ``StockReservationService.release_reservations``
+   (one aggregated UPDATE for WarehouseItem counters, one for statuses).
+
+After the batch commits, the Stripe/PayPal expire calls go to a bounded thread
+pool so that slow PSP round-trips do not hold locks or stall the next batch.
+SKIP LOCKED lets several sweepers run at once: each claims a disjoint set of
+rows, and rows a webhook is confirming at that moment are skipped.
+"""
+from __future__ import annotations
+
+import logging
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+
+from django.db import transaction
+from django.utils import timezone
+
+from payment.services.reservation_payment import (
+    expire_provider_checkout_after_reservation_release,
+)
+from warehouses.models import StockReservation
+from warehouses.services.reservation import StockReservationService
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 200
+DEFAULT_WORKERS = 4
+
+
+@dataclass
+class SweepStats:
+    batches: int = 0
+    released: int = 0
+    provider_calls: int = 0
+    provider_failures: int = 0
+    db_seconds: float = 0.0
+    seconds: float = 0.0
+    batch_seconds: list[float] = field(default_factory=list)
+
+    @property
+    def reservations_per_second(self) -> float:
+        return self.released / self.seconds if self.seconds else 0.0
+
+    def summary(self) -> str:
+        slowest = max(self.batch_seconds, default=0.0)
+        return (
+            f"batches={self.batches} released={self.released} "
+            f"provider_calls={self.provider_calls} provider_failures={self.provider_failures} "
+            f"db={self.db_seconds:.3f}s total={self.seconds:.3f}s "
+            f"throughput={self.reservations_per_second:.1f}/s slowest_batch={slowest:.3f}s"
+        )
+
+
+def _expired_queryset(cutoff):
+    return StockReservation.objects.filter(
+        status=StockReservation.Status.PENDING,
+        expires_at__lt=cutoff,
+    ).order_by("expires_at")
+
+
+def _expire_provider_checkout(reservation: StockReservation) -> None:
+    expire_provider_checkout_after_reservation_release(
+        session_key=reservation.session_key,
+        payment_system=reservation.payment_system,
+        provider_checkout_id=reservation.provider_checkout_id,
+    )
+
+
+def sweep_expired_reservations(
+    *,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    workers: int = DEFAULT_WORKERS,
+    limit: int | None = None,
+) -> SweepStats:
+    """
+    Expire PENDING reservations past their TTL in batches.
+
+    ``workers=0`` runs the PSP calls inline.  ``limit`` caps the number of
+    reservations handled in this run.
+    """
+    stats = SweepStats()
+    cutoff = timezone.now()
+    started = time.perf_counter()
+    pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="expire-psp") if workers else None
+    pending: set[Future] = set()
+
+    def collect(done):
+        for future in done:
+            pending.discard(future)
+            if future.exception() is not None:
+                stats.provider_failures += 1
+                logger.warning("sweep_expired_reservations: PSP expire failed: %s", future.exception())
+
+    try:
+        while limit is None or stats.released < limit:
+            size = batch_size if limit is None else min(batch_size, limit - stats.released)
+            batch_started = time.perf_counter()
+            with transaction.atomic():
+                claimed = list(
+                    _expired_queryset(cutoff)
+                    .select_for_update(skip_locked=True)
+                    .only("id", "session_key", "status", "created_at", "payment_system", "provider_checkout_id")[:size]
+                )
+                if not claimed:
+                    break
+                released = StockReservationService.release_reservations(
+                    claimed,
+                    final_status=StockReservation.Status.EXPIRED,
+                )
+            elapsed = time.perf_counter() - batch_started
+            stats.batches += 1
+            stats.released += released
+            stats.db_seconds += elapsed
+            stats.batch_seconds.append(elapsed)
+            logger.info(
+                "sweep_expired_reservations: batch %d released %d reservation(s) in %.3fs (%.1f/s)",
+                stats.batches,
+                released,
+                elapsed,
+                released / elapsed if elapsed else 0.0,
+            )
+
+            for reservation in claimed:
+                if reservation.status != StockReservation.Status.EXPIRED or not reservation.provider_checkout_id:
+                    continue
+                stats.provider_calls += 1
+                if pool is None:
+                    try:
+                        _expire_provider_checkout(reservation)
+                    except Exception as exc:  # noqa: BLE001 — best effort, stock is released
+                        stats.provider_failures += 1
+                        logger.warning("sweep_expired_reservations: PSP expire failed: %s", exc)
+                    continue
+                # Bound the backlog of queued PSP calls to a few per worker.
+                while len(pending) >= workers * 4:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                pending.add(pool.submit(_expire_provider_checkout, reservation))
+
+            if len(claimed) < size:
+                break
+    finally:
+        if pool is not None:
+            done, _ = wait(pending)
+            collect(done)
+            pool.shutdown(wait=True)
+        stats.seconds = time.perf_counter() - started
+    return stats
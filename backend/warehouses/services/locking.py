@@ -0,0 +1,153 @@
+"""
+Bounded lock acquisition for checkout reservations.
+
+``create_reservation`` row-locks the WarehouseItems of the cart.  With an
+unbounded wait, a burst of checkouts for the same SKUs can block all gunicorn
+workers, and the storefront stops responding.  ``STOCK_LOCK_MODE`` bounds the wait:
+
+    wait     block until the lock is granted (previous behaviour)
+    timeout  ``SET LOCAL lock_timeout = STOCK_LOCK_TIMEOUT_MS`` for the transaction
+    nowait   ``SELECT ... FOR UPDATE NOWAIT``; also sets a short lock_timeout
+             for the guarded UPDATEs of sharded items
+
+Both bounded modes fail with SQLSTATE 55P03 (lock_not_available).
+``run_with_lock_retry`` runs the whole reservation transaction again up to
+``STOCK_LOCK_RETRIES`` times, sleeping with full-jitter exponential backoff
+(``STOCK_LOCK_BACKOFF_MS`` base).  After the last attempt it raises
+``StockLockTimeoutError``, which checkout turns into a "try again" response.
+
+Lock waits longer than ``STOCK_LOCK_WAIT_THRESHOLD_MS``, retries and timeouts
+are counted per SKU in the reservation metrics (warehouses/services/metrics.py).
+
+SQLite has no row locks, so the policy is a no-op there.
+"""
+from __future__ import annotations
+
+import logging
+import random
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Iterable, TypeVar
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+
+from warehouses.exceptions import StockLockTimeoutError
+from warehouses.services.metrics import record_lock_contention
+
+logger = logging.getLogger(__name__)
+
+LOCK_WAIT = "wait"
+LOCK_TIMEOUT = "timeout"
+LOCK_NOWAIT = "nowait"
+LOCK_MODES = (LOCK_WAIT, LOCK_TIMEOUT, LOCK_NOWAIT)
+
+_LOCK_NOT_AVAILABLE = "55P03"
+# lock_timeout under NOWAIT: shard UPDATEs cannot use NOWAIT, so they get a short bound instead.
+_NOWAIT_UPDATE_TIMEOUT_MS = 50
+
+T = TypeVar("T")
+
+
+@dataclass(frozen=True)
+class LockPolicy:
+    mode: str = LOCK_TIMEOUT
+    timeout_ms: int = 2000
+    retries: int = 2
+    backoff_ms: int = 50
+    wait_threshold_ms: int = 50
+
+    @property
+    def nowait(self) -> bool:
+        return self.mode == LOCK_NOWAIT
+
+
+def get_lock_policy() -> LockPolicy:
+    mode = getattr(settings, "STOCK_LOCK_MODE", LOCK_TIMEOUT)
+    if mode not in LOCK_MODES:
+        raise ValueError(f"STOCK_LOCK_MODE must be one of {', '.join(LOCK_MODES)}, got {mode!r}")
+    return LockPolicy(
+        mode=mode,
+        timeout_ms=max(1, int(getattr(settings, "STOCK_LOCK_TIMEOUT_MS", 2000))),
+        retries=max(0, int(getattr(settings, "STOCK_LOCK_RETRIES", 2))),
+        backoff_ms=max(0, int(getattr(settings, "STOCK_LOCK_BACKOFF_MS", 50))),
+        wait_threshold_ms=max(0, int(getattr(settings, "STOCK_LOCK_WAIT_THRESHOLD_MS", 50))),
+    )
+
+
+def is_lock_not_available(exc: BaseException) -> bool:
+    cause = exc.__cause__
+    return (getattr(cause, "pgcode", None) or getattr(cause, "sqlstate", None)) == _LOCK_NOT_AVAILABLE
+
+
+def apply_lock_timeout(policy: LockPolicy) -> None:
+    """Bound lock waits for the rest of the current transaction (PostgreSQL only)."""
+    if connection.vendor != "postgresql" or policy.mode == LOCK_WAIT:
+        return
+    timeout_ms = _NOWAIT_UPDATE_TIMEOUT_MS if policy.nowait else policy.timeout_ms
+    with connection.cursor() as cursor:
+        # SET does not take bind parameters; timeout_ms is an int from settings.
+        cursor.execute(f"SET LOCAL lock_timeout = '{int(timeout_ms)}ms'")
+
+
+@contextmanager
+def timed_lock(skus: Iterable[str], policy: LockPolicy):
+    """Count the enclosed lock acquisition as a wait if it exceeds the threshold."""
+    started = time.perf_counter()
+    yield
+    waited_ms = (time.perf_counter() - started) * 1000
+    if waited_ms >= policy.wait_threshold_ms:
+        record_lock_contention(skus, "wait", waited_ms=waited_ms)
+
+
+def backoff_seconds(attempt: int, policy: LockPolicy) -> float:
+    """Full-jitter exponential backoff: uniform(0, base * 2**attempt)."""
+    return random.uniform(0, policy.backoff_ms * (2 ** attempt)) / 1000
+
+
+def run_with_lock_retry(
+    fn: Callable[[], T],
+    *,
+    skus: Iterable[str],
+    policy: LockPolicy | None = None,
+) -> T:
+    """
+    Call ``fn`` (one whole transaction), retrying when a row lock is not available.
+
+    ``fn`` must open its own ``transaction.atomic()`` so that a failed
+    attempt is rolled back before the retry.
+    """
+    policy = policy or get_lock_policy()
+    skus = sorted(set(skus))
+    attempt = 0
+    while True:
+        try:
+            return fn()
+        except DatabaseError as exc:
+            if not is_lock_not_available(exc):
+                raise
+            if attempt >= policy.retries:
+                record_lock_contention(skus, "timeout")
+                logger.warning(
+                    "run_with_lock_retry: gave up after %d attempt(s) (mode=%s) skus=%s",
+                    attempt + 1,
+                    policy.mode,
+                    ",".join(skus),
+                )
+                raise StockLockTimeoutError(
+                    detail={
+                        "skus": skus,
+                        "retry_after": max(1, round(policy.backoff_ms * (2 ** (attempt + 1)) / 1000)),
+                    }
+                ) from exc
+            record_lock_contention(skus, "retry")
+            delay = backoff_seconds(attempt, policy)
+            logger.info(
+                "run_with_lock_retry: lock not available (attempt %d, mode=%s), retrying in %.3fs",
+                attempt + 1,
+                policy.mode,
+                delay,
+            )
+            time.sleep(delay)
+            attempt += 1
@@ -0,0 +1,417 @@
+"""
+Rolling stock reservation metrics.
+
+``StockReservationService`` records every state change (created, confirmed,
+released, expired) after its transaction commits.  Each record adds to
+``StockReservationMetric`` counters with a single upsert:
+
+    events:<event>              reservations            per minute + lifetime
+    units:<event>               reserved units          per minute + lifetime
+    age_bucket:<event>:<le>     reservation age at the  lifetime
+                                change, histogram bucket
+    age_sum_ms:<event>          sum of those ages       lifetime
+    lock_<kind>                 row lock waits, retries lifetime
+                                and timeouts, per SKU
+                                of the cart
+    lock_wait_ms                time spent in those     lifetime
+                                waits, per SKU
+    lock_<kind>:<sku>           the same for one SKU    per minute
+    lock_wait_ms:<sku>
+
+Gauges are derived from the lifetime totals: pending = created − confirmed −
+released − expired, and the same for units.  Reads therefore touch a few
+hundred counter rows (lifetime rows plus the last minutes) and never scan
+StockReservation or WarehouseItem.
+
+Per-SKU lock counters exist only as minute rows, so they are pruned like the
+other minute rows.  Reads sum them over the last
+``STOCK_METRICS_LOCK_WINDOW_MINUTES``, report the
+``STOCK_METRICS_LOCK_TOP_SKUS`` SKUs with the most contention and add up the
+rest as ``sku="__other__"``: the number of series stays bounded however many
+SKUs see contention.
+
+Writers add to one of ``METRIC_SHARDS`` rows per series, chosen at random, so
+concurrent commits do not queue on one row.  Minute rows older than
+``STOCK_METRICS_RETENTION_HOURS`` are pruned by ``release_expired_reservations``.
+Lifetime rows were seeded from existing reservations by a migration.  If a
+process dies between commit and record, ``report_stock_reservation_health
+--resync-metrics`` recomputes the event and unit totals from the tables.
+"""
+from __future__ import annotations
+
+import logging
+import random
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Iterable
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+
+from warehouses.models import StockReservation, StockReservationItem, StockReservationMetric
+
+logger = logging.getLogger(__name__)
+
+EVENT_CREATED = "created"
+EVENTS = (
+    EVENT_CREATED,
+    StockReservation.Status.CONFIRMED.value,
+    StockReservation.Status.RELEASED.value,
+    StockReservation.Status.EXPIRED.value,
+)
+TERMINAL_EVENTS = EVENTS[1:]
+
+# Seconds; the default reservation TTL is 35 minutes.
+AGE_BUCKETS = (30, 60, 300, 900, 1800, 2100, 3600)
+METRIC_SHARDS = 8
+LIFETIME = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+RATE_WINDOWS = (1, 5, 15)
+LOCK_KEYS = {"wait": "lock_waits", "retry": "lock_retries", "timeout": "lock_timeouts"}
+LOCK_FIELDS = {"lock_waits": "waits", "lock_retries": "retries", "lock_timeouts": "timeouts"}
+LOCK_OTHER = "__other__"
+
+# (reserved units, age in seconds or None) of one reservation.
+Entry = tuple[int, float | None]
+
+
+def _minute(moment: datetime) -> datetime:
+    return moment.replace(second=0, microsecond=0)
+
+
+def _age_bucket(age: float) -> str:
+    for le in AGE_BUCKETS:
+        if age <= le:
+            return str(le)
+    return "+Inf"
+
+
+def _increments(event: str, entries: list[Entry], now: datetime) -> dict[tuple[str, datetime], int]:
+    minute = _minute(now)
+    units = sum(quantity for quantity, _ in entries)
+    increments: dict[tuple[str, datetime], int] = defaultdict(int)
+    for when in (LIFETIME, minute):
+        increments[(f"events:{event}", when)] += len(entries)
+        increments[(f"units:{event}", when)] += units
+    for _, age in entries:
+        if age is None:
+            continue
+        increments[(f"age_bucket:{event}:{_age_bucket(age)}", LIFETIME)] += 1
+        increments[(f"age_sum_ms:{event}", LIFETIME)] += int(age * 1000)
+    return increments
+
+
+def _add(increments: dict[tuple[str, datetime], int]) -> None:
+    """``INSERT ... ON CONFLICT DO UPDATE SET value = value + EXCLUDED.value``.
+
+    The ORM's ``bulk_create(update_conflicts=True)`` can only overwrite, not
+    add; this statement is valid on both PostgreSQL and SQLite.
+    """
+    if not increments:
+        return
+    qn = connection.ops.quote_name
+    table = qn(StockReservationMetric._meta.db_table)
+    columns = ", ".join(qn(column) for column in ("key", "minute", "shard"))
+    shard = random.randrange(METRIC_SHARDS)
+    rows = sorted(increments.items())
+    params: list = []
+    for (key, minute), value in rows:
+        params.extend([key, connection.ops.adapt_datetimefield_value(minute), shard, value])
+    placeholders = ", ".join(["(%s, %s, %s, %s)"] * len(rows))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}, {qn('value')}) VALUES {placeholders} "
+            f"ON CONFLICT ({columns}) DO UPDATE SET {qn('value')} = {table}.{qn('value')} + EXCLUDED.{qn('value')}",
+            params,
+        )
+
+
+def record_reservation_events(event: str, entries: Iterable[Entry]) -> None:
+    """
+    Count ``entries`` as ``event`` once the current transaction commits.
+
+    Metric failures are logged and never reach the reservation flow.
+    """
+    entries = list(entries)
+    if not entries:
+        return
+    now = timezone.now()
+
+    def flush():
+        try:
+            _add(_increments(event, entries, now))
+        except Exception:  # noqa: BLE001 — metrics are best effort
+            logger.exception("record_reservation_events: failed to record %s", event)
+
+    transaction.on_commit(flush)
+
+
+def record_lock_contention(skus: Iterable[str], kind: str, *, waited_ms: float = 0.0) -> None:
+    """
+    Count a lock ``wait``, ``retry`` or ``timeout`` for every SKU of a cart,
+    in the lifetime total and in the SKU's minute row.
+
+    Waits happen inside the reservation transaction and are recorded after it
+    commits, so that the metric rows are not locked while the transaction runs.
+    Retries and timeouts happen after the attempt was rolled back, so they are
+    written at once.  As with the reservation events, failures are only logged.
+    """
+    minute = _minute(timezone.now())
+    increments: dict[tuple[str, datetime], int] = defaultdict(int)
+    for sku in set(skus):
+        for key, when in ((LOCK_KEYS[kind], LIFETIME), (f"{LOCK_KEYS[kind]}:{sku}", minute)):
+            increments[(key, when)] += 1
+        if waited_ms:
+            for key, when in (("lock_wait_ms", LIFETIME), (f"lock_wait_ms:{sku}", minute)):
+                increments[(key, when)] += int(waited_ms)
+    if not increments:
+        return
+
+    def flush():
+        try:
+            _add(increments)
+        except Exception:  # noqa: BLE001 — metrics are best effort
+            logger.exception("record_lock_contention: failed to record %s", kind)
+
+    if kind == "wait":
+        transaction.on_commit(flush)
+    else:
+        flush()
+
+
+def reservation_age(reservation: StockReservation, now: datetime | None = None) -> float | None:
+    if reservation.created_at is None:
+        return None
+    return max(0.0, ((now or timezone.now()) - reservation.created_at).total_seconds())
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+
+def collect_reservation_metrics(now: datetime | None = None) -> dict:
+    """Lifetime totals, per-minute rates, gauges and age histograms."""
+    now = now or timezone.now()
+    current = _minute(now)
+    totals = dict(
+        StockReservationMetric.objects.filter(minute=LIFETIME)
+        .values("key")
+        .annotate(total=Sum("value"))
+        .values_list("key", "total")
+    )
+    recent: dict[str, int] = defaultdict(int)
+    windows: dict[int, dict[str, int]] = {window: defaultdict(int) for window in RATE_WINDOWS}
+    minute_rows = (
+        StockReservationMetric.objects.filter(
+            minute__gte=current - timedelta(minutes=max(RATE_WINDOWS)),
+            minute__lt=current,
+            key__startswith="events:",
+        )
+        .values("key", "minute")
+        .annotate(total=Sum("value"))
+        .values_list("key", "minute", "total")
+    )
+    for key, minute, total in minute_rows:
+        event = key.split(":", 1)[1]
+        for window in RATE_WINDOWS:
+            if minute >= current - timedelta(minutes=window):
+                windows[window][event] += total
+    for key, total in StockReservationMetric.objects.filter(
+        minute=current, key__startswith="events:",
+    ).values("key").annotate(total=Sum("value")).values_list("key", "total"):
+        recent[key.split(":", 1)[1]] = total
+
+    events = {event: int(totals.get(f"events:{event}", 0)) for event in EVENTS}
+    units = {event: int(totals.get(f"units:{event}", 0)) for event in EVENTS}
+    histograms = {}
+    for event in TERMINAL_EVENTS:
+        running = 0
+        buckets = []
+        for le in (*map(str, AGE_BUCKETS), "+Inf"):
+            running += int(totals.get(f"age_bucket:{event}:{le}", 0))
+            buckets.append((le, running))
+        histograms[event] = {
+            "buckets": buckets,
+            "count": running,
+            "sum_seconds": int(totals.get(f"age_sum_ms:{event}", 0)) / 1000,
+        }
+
+    lock_window = _lock_window_minutes()
+    return {
+        "events_total": events,
+        "units_total": units,
+        "events_per_minute": {
+            f"{window}m": {event: windows[window].get(event, 0) / window for event in EVENTS}
+            for window in RATE_WINDOWS
+        },
+        "events_current_minute": {event: recent.get(event, 0) for event in EVENTS},
+        "pending": max(0, events[EVENT_CREATED] - sum(events[e] for e in TERMINAL_EVENTS)),
+        "pending_units": max(0, units[EVENT_CREATED] - sum(units[e] for e in TERMINAL_EVENTS)),
+        "age_seconds": histograms,
+        "lock_contention_total": _lock_counters(
+            (name, total) for name, total in totals.items() if name.startswith("lock_")
+        ),
+        "lock_contention_window": f"{lock_window}m",
+        "lock_contention": _lock_contention_by_sku(now - timedelta(minutes=lock_window)),
+    }
+
+
+def _lock_window_minutes() -> int:
+    window = int(getattr(settings, "STOCK_METRICS_LOCK_WINDOW_MINUTES", 60))
+    retention = int(getattr(settings, "STOCK_METRICS_RETENTION_HOURS", 24)) * 60
+    return max(1, min(window, retention))
+
+
+def _lock_counters(rows: Iterable[tuple[str, int]]) -> dict[str, float]:
+    counters = {"waits": 0, "wait_seconds": 0.0, "retries": 0, "timeouts": 0}
+    for name, total in rows:
+        if name == "lock_wait_ms":
+            counters["wait_seconds"] += int(total) / 1000
+        elif name in LOCK_FIELDS:
+            counters[LOCK_FIELDS[name]] += int(total)
+    return counters
+
+
+def _lock_contention_by_sku(since: datetime) -> dict[str, dict[str, float]]:
+    """
+    Lock contention since ``since`` for the ``STOCK_METRICS_LOCK_TOP_SKUS``
+    SKUs with the most timeouts, then retries, then waits; the remaining SKUs
+    are summed under ``LOCK_OTHER``.
+    """
+    by_sku: dict[str, list[tuple[str, int]]] = defaultdict(list)
+    for key, total in (
+        StockReservationMetric.objects.filter(minute__gte=_minute(since), key__startswith="lock_")
+        .values("key")
+        .annotate(total=Sum("value"))
+        .values_list("key", "total")
+    ):
+        name, sku = key.split(":", 1)
+        by_sku[sku].append((name, total))
+
+    ranked = sorted(
+        ((sku, _lock_counters(rows)) for sku, rows in by_sku.items()),
+        key=lambda item: (-item[1]["timeouts"], -item[1]["retries"], -item[1]["waits"], item[0]),
+    )
+    top = int(getattr(settings, "STOCK_METRICS_LOCK_TOP_SKUS", 20))
+    contention = dict(sorted(ranked[:top]))
+    if ranked[top:]:
+        contention[LOCK_OTHER] = _lock_counters(row for sku, _ in ranked[top:] for row in by_sku[sku])
+    return contention
+
+
+def _format(value) -> str:
+    return str(int(value)) if float(value).is_integer() else f"{value:.6g}"
+
+
+def _escape_label(value) -> str:
+    """Label value escaping of the text exposition format."""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(metrics: dict) -> str:
+    """Prometheus text exposition format (version 0.0.4)."""
+    lines: list[str] = []
+
+    def family(name, kind, help_text, samples):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for labels, value in samples:
+            label_text = ",".join(f'{key}="{_escape_label(val)}"' for key, val in labels)
+            lines.append(f"{name}{{{label_text}}} {_format(value)}" if label_text else f"{name} {_format(value)}")
+
+    family(
+        "stock_reservation_events_total", "counter", "Reservation state changes.",
+        [((("event", event),), count) for event, count in metrics["events_total"].items()],
+    )
+    family(
+        "stock_reservation_units_total", "counter", "Units in reservations by state change.",
+        [((("event", event),), count) for event, count in metrics["units_total"].items()],
+    )
+    family(
+        "stock_reservation_events_per_minute", "gauge",
+        "Average state changes per minute over the last complete minutes.",
+        [
+            ((("event", event), ("window", window)), rate)
+            for window, rates in metrics["events_per_minute"].items()
+            for event, rate in rates.items()
+        ],
+    )
+    family("stock_reservation_pending", "gauge", "Reservations currently pending.", [((), metrics["pending"])])
+    family(
+        "stock_reservation_pending_units", "gauge", "Units held by pending reservations.",
+        [((), metrics["pending_units"])],
+    )
+
+    window = metrics["lock_contention_window"]
+    for field, name, help_text in (
+        ("waits", "stock_reservation_lock_waits", "Reservation row lock waits over the threshold, per cart SKU."),
+        ("wait_seconds", "stock_reservation_lock_wait_seconds", "Time spent in those lock waits, per cart SKU."),
+        ("retries", "stock_reservation_lock_retries", "Reservations retried after a lock timeout, per cart SKU."),
+        ("timeouts", "stock_reservation_lock_timeouts", "Reservations that gave up on locks, per cart SKU."),
+    ):
+        family(f"{name}_total", "counter", help_text, [((), metrics["lock_contention_total"][field])])
+        family(
+            f"{name}_by_sku", "gauge",
+            f"{help_text} Top SKUs over the window, the others summed as {LOCK_OTHER}.",
+            [
+                ((("sku", sku), ("window", window)), counters[field])
+                for sku, counters in metrics["lock_contention"].items()
+            ],
+        )
+
+    name = "stock_reservation_age_seconds"
+    lines.append(f"# HELP {name} Reservation age when it was confirmed, released or expired.")
+    lines.append(f"# TYPE {name} histogram")
+    for event, histogram in metrics["age_seconds"].items():
+        event = _escape_label(event)
+        for le, count in histogram["buckets"]:
+            lines.append(f'{name}_bucket{{event="{event}",le="{le}"}} {count}')
+        lines.append(f'{name}_sum{{event="{event}"}} {_format(histogram["sum_seconds"])}')
+        lines.append(f'{name}_count{{event="{event}"}} {histogram["count"]}')
+    return "\n".join(lines) + "\n"
+
+
+# ---------------------------------------------------------------------------
+# Maintenance
+# ---------------------------------------------------------------------------
+
+
+def prune_reservation_metrics(now: datetime | None = None) -> int:
+    """Drop minute rows past the retention window; returns rows deleted."""
+    hours = getattr(settings, "STOCK_METRICS_RETENTION_HOURS", 24)
+    cutoff = _minute(now or timezone.now()) - timedelta(hours=hours)
+    deleted, _ = StockReservationMetric.objects.filter(minute__lt=cutoff).exclude(minute=LIFETIME).delete()
+    return deleted
+
+
+def resync_reservation_metrics() -> dict[str, int]:
+    """
+    Recompute lifetime ``events:*`` / ``units:*`` totals from the tables.
+
+    Scans StockReservation and StockReservationItem; run it off-peak.  Age
+    histograms and minute rows are left alone.
+    """
+    by_status = dict(
+        StockReservation.objects.values("status").annotate(total=Count("id")).values_list("status", "total")
+    )
+    units_by_status = dict(
+        StockReservationItem.objects.values("reservation__status")
+        .annotate(total=Sum("quantity"))
+        .values_list("reservation__status", "total")
+    )
+    totals = {
+        f"events:{EVENT_CREATED}": sum(by_status.values()),
+        f"units:{EVENT_CREATED}": sum(int(value or 0) for value in units_by_status.values()),
+    }
+    for event in TERMINAL_EVENTS:
+        totals[f"events:{event}"] = by_status.get(event, 0)
+        totals[f"units:{event}"] = int(units_by_status.get(event) or 0)
+
+    with transaction.atomic():
+        StockReservationMetric.objects.filter(minute=LIFETIME, key__in=list(totals)).delete()
+        StockReservationMetric.objects.bulk_create(
+            [StockReservationMetric(key=key, minute=LIFETIME, shard=0, value=value) for key, value in totals.items()]
+        )
+    return totals
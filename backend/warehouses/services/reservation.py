@@ -23,7 +23,23 @@ Concurrency
 -----------
 WarehouseItem rows are locked with ``select_for_update()`` in a deterministic
 order (warehouse_id ASC, product_variant_id ASC) to prevent deadlocks when
-multiple sessions compete for overlapping SKUs.
+multiple sessions compete for overlapping SKUs.  ``create_reservation`` bounds
+the wait for those locks according to ``STOCK_LOCK_MODE`` and retries the whole
+transaction with jittered backoff (warehouses/services/locking.py).  Checkout
+therefore gets ``StockLockTimeoutError`` instead of a blocked worker.  Confirm
+and release still wait: they run from webhooks and must eventually succeed.
+
+Writes are set-based: reservation items go in with one ``bulk_create`` and the
+WarehouseItem counters of the whole cart change in one ``UPDATE`` (per-row
+quantities via ``CASE id WHEN ...``) guarded by the same availability checks,
+so the number of statements run under the row locks does not grow with cart
+size.  Items with ``shard_count > 0`` are not locked at all: their units are
+taken from WarehouseItemShard counters (warehouses/services/sharding.py) and
+recorded in ``StockReservationItem.shard_quantities``.  Bulk writes skip
+WarehouseItem signals, so the service maintains the read models itself: the
+availability snapshot (product/stock_availability.py) of row-locked variants is
+refreshed inside the transaction, while sharded variants, catalog listings and
+response cache versions are refreshed after commit.
 
 Note on decrease_stock()
 ------------------------
@@ -43,10 +59,19 @@ from datetime import timedelta
 from typing import TYPE_CHECKING
 
 from django.conf import settings
-from django.db import transaction
+from django.db import models, transaction
+from django.db.models import Case, F, Value, When
+from django.db.models.functions import Greatest
 from django.utils import timezone
 
+from product.catalog_listing import refresh_catalog_listings_for_stock
+from product.response_cache import bump_stock_versions
+from product.stock_availability import refresh_variant_availability
 from warehouses.exceptions import InsufficientStockError
+from warehouses.services.allocation import AllocationLine, get_allocation_strategy
+from warehouses.services.locking import apply_lock_timeout, get_lock_policy, run_with_lock_retry, timed_lock
+from warehouses.services.metrics import EVENT_CREATED, record_reservation_events, reservation_age
+from warehouses.services.sharding import release_shard_quantities, reserve_on_shards
 from warehouses.models import StockReservation, StockReservationItem, WarehouseItem
 
 if TYPE_CHECKING:  # pragma: no cover
@@ -60,6 +85,44 @@ _TTL_MINUTES: int = getattr(settings, "STOCK_RESERVATION_TTL_MINUTES", 35)
 _RELEASABLE = frozenset({StockReservation.Status.PENDING})
 
 
+def _per_item(quantities: dict[int, int]) -> Case:
+    """``CASE id WHEN <warehouse_item_id> THEN <qty> ... END`` for one UPDATE."""
+    return Case(
+        *(When(pk=pk, then=Value(qty)) for pk, qty in quantities.items()),
+        default=Value(0),
+        output_field=models.PositiveIntegerField(),
+    )
+
+
+def _decrease(field: str, quantities: dict[int, int]) -> Greatest:
+    """``max(0, <field> - qty)``, matching the clamp of the former per-row saves."""
+    return Greatest(
+        F(field) - _per_item(quantities),
+        Value(0),
+        output_field=models.PositiveIntegerField(),
+    )
+
+
+def _refresh_stock_read_models(warehouse_items) -> None:
+    # QuerySet.update() bypasses the WarehouseItem post_save handlers in
+    # product/signals.py; mirror them once for the whole batch.  Rows of
+    # unsharded items are locked by the caller, so their snapshot is exact and
+    # commits together with the stock change.  Sharded items are refreshed
+    # after commit, keeping concurrent checkouts off the snapshot row.
+    locked: set[int] = set()
+    sharded: set[int] = set()
+    for wi in warehouse_items:
+        (sharded if wi.shard_count else locked).add(wi.product_variant_id)
+    refresh_variant_availability(locked)
+    variant_ids = sorted(locked | sharded)
+
+    def refresh():
+        refresh_variant_availability(sharded)
+        bump_stock_versions(*refresh_catalog_listings_for_stock(variant_ids))
+
+    transaction.on_commit(refresh)
+
+
 class StockReservationService:
     """
     Manages the full lifecycle of a stock reservation:
@@ -78,6 +141,7 @@ class StockReservationService:
         payment_system: str,
         groups: list,
         variant_map: dict[str, "ProductVariant"],
+        strategy: str | None = None,
     ) -> StockReservation:
         """
         Atomically reserve stock for a payment session.
@@ -89,6 +153,9 @@ class StockReservationService:
         groups:         List of product groups from invoice_data.  Each group has
                         a ``"products"`` list of ``{"sku": str, "quantity": int}``.
         variant_map:    Dict mapping sku → ProductVariant (pre-loaded by session builder).
+        strategy:       Allocation strategy name (see warehouses/services/allocation.py);
+                        defaults to ``STOCK_ALLOCATION_STRATEGY``.  A line may be
+                        split into several StockReservationItems, one per warehouse.
 
         Returns
         -------
@@ -97,8 +164,12 @@ class StockReservationService:
 
         Raises
         ------
-        InsufficientStockError  if any SKU lacks sufficient available stock.
+        InsufficientStockError  if any SKU lacks sufficient available stock
+            across all warehouses.
             ``.detail`` contains {"sku", "requested", "available"}.
+        StockLockTimeoutError  if the WarehouseItem row locks were not granted
+            within the lock policy after all retries.
+            ``.detail`` contains {"skus", "retry_after"}.
         """
         # -- Idempotency check (outside transaction — fast path) -----------
         existing = StockReservation.objects.filter(session_key=session_key).first()
@@ -112,108 +183,150 @@ class StockReservationService:
 
         # -- Build consolidated sku → quantity map -------------------------
         sku_qty: dict[str, int] = {}
+        destinations: dict[str, dict] = {}
         for group in groups:
             for p in group.get("products", []):
                 sku = str(p.get("sku", ""))
                 qty = int(p.get("quantity", 0))
                 if sku and qty > 0 and sku in variant_map:
                     sku_qty[sku] = sku_qty.get(sku, 0) + qty
-
-        variant_id_to_sku: dict[int, str] = {
-            variant_map[sku].id: sku for sku in sku_qty
-        }
-
-        with transaction.atomic():
-            # -- Lock WarehouseItems in deterministic order ----------------
-            # Locks ALL items for the relevant variants to prevent deadlocks
-            # when concurrent sessions share SKUs.
-            all_wh_items = list(
-                WarehouseItem.objects
-                .select_for_update()
-                .filter(product_variant_id__in=list(variant_id_to_sku.keys()))
-                .order_by("warehouse_id", "product_variant_id")
+                    destinations.setdefault(sku, group.get("delivery_address") or {})
+
+        lines = [
+            AllocationLine(
+                sku=sku,
+                variant_id=variant_map[sku].id,
+                quantity=qty,
+                destination_country=destinations[sku].get("country"),
+                destination_zip=destinations[sku].get("zip"),
             )
-
-            # Group by variant_id; order within each group is warehouse_id ASC
-            wh_items_by_variant: dict[int, list[WarehouseItem]] = defaultdict(list)
-            for wi in all_wh_items:
-                wh_items_by_variant[wi.product_variant_id].append(wi)
-
-            # -- Check availability and pick WarehouseItem per SKU ---------
-            reservation_candidates: list[tuple[WarehouseItem, int]] = []
-
-            for sku, qty in sku_qty.items():
-                variant = variant_map[sku]
-                candidates = wh_items_by_variant.get(variant.id, [])
-
-                if not candidates:
-                    logger.warning(
-                        "create_reservation: no WarehouseItem for SKU %s — "
-                        "strict policy: available=0 session_key=%s",
-                        sku,
-                        session_key,
-                    )
-                    raise InsufficientStockError(
-                        detail={
-                            "sku": sku,
-                            "requested": qty,
-                            "available": 0,
-                        }
+            for sku, qty in sku_qty.items()
+        ]
+        allocator = get_allocation_strategy(strategy)
+
+        policy = get_lock_policy()
+
+        def reserve() -> StockReservation:
+            with transaction.atomic():
+                apply_lock_timeout(policy)
+
+                # -- Lock WarehouseItems in deterministic order ----------------
+                # Locks ALL items for the relevant variants to prevent deadlocks
+                # when concurrent sessions share SKUs.  Warehouse rows are read
+                # (for location-aware strategies) but not locked.
+                variant_ids = [line.variant_id for line in lines]
+                with timed_lock(sku_qty, policy):
+                    all_wh_items = list(
+                        WarehouseItem.objects
+                        .select_for_update(of=("self",), nowait=policy.nowait)
+                        .select_related("warehouse")
+                        .filter(product_variant_id__in=variant_ids, shard_count=0)
+                        .order_by("warehouse_id", "product_variant_id")
                     )
+                # Sharded (hot) items are not locked: their units are taken from
+                # shard counters with guarded increments below.
+                all_wh_items.extend(
+                    WarehouseItem.objects
+                    .select_related("warehouse")
+                    .prefetch_related("shards")
+                    .filter(product_variant_id__in=variant_ids, shard_count__gt=0)
+                )
+                all_wh_items.sort(key=lambda wi: (wi.warehouse_id, wi.product_variant_id))
+
+                # Group by variant_id; order within each group is warehouse_id ASC
+                wh_items_by_variant: dict[int, list[WarehouseItem]] = defaultdict(list)
+                for wi in all_wh_items:
+                    wh_items_by_variant[wi.product_variant_id].append(wi)
+
+                for line in lines:
+                    if line.variant_id not in wh_items_by_variant:
+                        logger.warning(
+                            "create_reservation: no WarehouseItem for SKU %s — "
+                            "strict policy: available=0 session_key=%s",
+                            line.sku,
+                            session_key,
+                        )
+                        raise InsufficientStockError(
+                            detail={
+                                "sku": line.sku,
+                                "requested": line.quantity,
+                                "available": 0,
+                            }
+                        )
+
+                # -- Split lines across warehouses (may raise InsufficientStockError)
+                allocation = allocator.allocate(lines, wh_items_by_variant)
+                reservation_candidates: list[tuple[WarehouseItem, int]] = sorted(
+                    (part for parts in allocation.values() for part in parts),
+                    key=lambda part: (part[0].warehouse_id, part[0].product_variant_id),
+                )
+
+                # -- Create reservation ----------------------------------------
+                reservation = StockReservation.objects.create(
+                    session_key=session_key,
+                    payment_system=payment_system,
+                    status=StockReservation.Status.PENDING,
+                    expires_at=timezone.now() + timedelta(minutes=_TTL_MINUTES),
+                )
 
-                # Pick first warehouse item with sufficient availability
-                chosen: WarehouseItem | None = None
-                for wi in candidates:
-                    if wi.available_quantity >= qty:
-                        chosen = wi
-                        break
-
-                if chosen is None:
-                    best_available = max(wi.available_quantity for wi in candidates)
-                    logger.warning(
-                        "create_reservation: insufficient stock for SKU %s: "
-                        "requested=%s available=%s session_key=%s",
-                        sku,
-                        qty,
-                        best_available,
-                        session_key,
+                sku_by_variant = {line.variant_id: line.sku for line in lines}
+                reservation_items: list[StockReservationItem] = []
+                quantities: dict[int, int] = {}
+                for wi, qty in reservation_candidates:
+                    shard_quantities: dict[str, int] = {}
+                    if wi.shard_count:
+                        shard_quantities, shortfall = reserve_on_shards(wi, qty)
+                        if shortfall:
+                            raise InsufficientStockError(
+                                detail={
+                                    "sku": sku_by_variant[wi.product_variant_id],
+                                    "requested": qty,
+                                    "available": qty - shortfall,
+                                }
+                            )
+                    else:
+                        quantities[wi.id] = qty
+                    reservation_items.append(
+                        StockReservationItem(
+                            reservation=reservation,
+                            warehouse_item=wi,
+                            quantity=qty,
+                            shard_quantities=shard_quantities,
+                        )
                     )
-                    raise InsufficientStockError(
-                        detail={
-                            "sku": sku,
-                            "requested": qty,
-                            "available": best_available,
-                        }
+                StockReservationItem.objects.bulk_create(reservation_items)
+
+                if quantities:
+                    updated = (
+                        WarehouseItem.objects
+                        .filter(
+                            pk__in=list(quantities),
+                            quantity_in_stock__gte=F("reserved_quantity") + _per_item(quantities),
+                        )
+                        .update(reserved_quantity=F("reserved_quantity") + _per_item(quantities))
                     )
+                    if updated != len(quantities):
+                        # Rows are locked and were checked above; only reachable if
+                        # stock changed without taking the lock.
+                        raise InsufficientStockError()
+                if reservation_candidates:
+                    _refresh_stock_read_models(wi for wi, _ in reservation_candidates)
+                record_reservation_events(
+                    EVENT_CREATED, [(sum(qty for _, qty in reservation_candidates), None)],
+                )
 
-                reservation_candidates.append((chosen, qty))
-
-            # -- Create reservation ----------------------------------------
-            reservation = StockReservation.objects.create(
-                session_key=session_key,
-                payment_system=payment_system,
-                status=StockReservation.Status.PENDING,
-                expires_at=timezone.now() + timedelta(minutes=_TTL_MINUTES),
-            )
-
-            for wi, qty in reservation_candidates:
-                StockReservationItem.objects.create(
-                    reservation=reservation,
-                    warehouse_item=wi,
-                    quantity=qty,
+                logger.info(
+                    "create_reservation: created reservation %s for session_key=%s "
+                    "(%d item(s), expires_at=%s)",
+                    reservation.pk,
+                    session_key,
+                    len(reservation_candidates),
+                    reservation.expires_at,
                 )
-                wi.reserved_quantity += qty
-                wi.save(update_fields=["reserved_quantity"])
+                return reservation
 
-            logger.info(
-                "create_reservation: created reservation %s for session_key=%s "
-                "(%d item(s), expires_at=%s)",
-                reservation.pk,
-                session_key,
-                len(reservation_candidates),
-                reservation.expires_at,
-            )
-            return reservation
+        # A bounded lock wait fails the attempt; the whole transaction is retried.
+        return run_with_lock_retry(reserve, skus=sku_qty, policy=policy)
 
     # ------------------------------------------------------------------
     # confirm_reservation
@@ -281,19 +394,39 @@ class StockReservationService:
                 if wi.quantity_in_stock < item.quantity:
                     raise InsufficientStockError(
                         detail={
-                            "sku": wi.product_variant.sku,
+                            "sku": item.warehouse_item.product_variant.sku,
                             "requested": item.quantity,
                             "available": wi.quantity_in_stock,
                         }
                     )
-                wi.quantity_in_stock -= item.quantity
-                wi.reserved_quantity = max(0, wi.reserved_quantity - item.quantity)
-                wi.save(update_fields=["quantity_in_stock", "reserved_quantity"])
+
+            quantities = {item.warehouse_item_id: item.quantity for item in items}
+            # Units held on shards are returned there; the row only holds the rest.
+            row_reserved = {
+                item.warehouse_item_id: item.quantity for item in items if not item.shard_quantities
+            }
+            if quantities:
+                updated = (
+                    WarehouseItem.objects
+                    .filter(pk__in=list(quantities), quantity_in_stock__gte=_per_item(quantities))
+                    .update(
+                        quantity_in_stock=F("quantity_in_stock") - _per_item(quantities),
+                        reserved_quantity=_decrease("reserved_quantity", row_reserved),
+                    )
+                )
+                if updated != len(quantities):
+                    raise InsufficientStockError()
+                release_shard_quantities(items, consume=True)
+                _refresh_stock_read_models(locked_wi.values())
 
             now = timezone.now()
             reservation.status = StockReservation.Status.CONFIRMED
             reservation.confirmed_at = now
             reservation.save(update_fields=["status", "confirmed_at"])
+            record_reservation_events(
+                reservation.status,
+                [(sum(item.quantity for item in items), reservation_age(reservation, now))],
+            )
 
             logger.info(
                 "confirm_reservation: session_key=%s confirmed (%d item(s))",
@@ -344,32 +477,17 @@ class StockReservationService:
                 )
                 return
 
-            # Load items and lock WarehouseItems in deterministic order
-            items = list(
-                reservation.items.select_related("warehouse_item")
-                .order_by(
-                    "warehouse_item__warehouse_id",
-                    "warehouse_item__product_variant_id",
-                )
-            )
-
-            wi_ids = [item.warehouse_item_id for item in items]
-            if wi_ids:
-                locked_wi: dict[int, WarehouseItem] = {
-                    wi.id: wi
-                    for wi in WarehouseItem.objects.select_for_update()
-                    .filter(id__in=wi_ids)
-                    .order_by("warehouse_id", "product_variant_id")
-                }
-                for item in items:
-                    wi = locked_wi[item.warehouse_item_id]
-                    wi.reserved_quantity = max(0, wi.reserved_quantity - item.quantity)
-                    wi.save(update_fields=["reserved_quantity"])
+            items = list(reservation.items.select_related("warehouse_item"))
+            cls._restore_reserved_quantities(items)
 
             now = timezone.now()
             reservation.status = final_status
             reservation.released_at = now
             reservation.save(update_fields=["status", "released_at"])
+            record_reservation_events(
+                final_status,
+                [(sum(item.quantity for item in items), reservation_age(reservation, now))],
+            )
 
             logger.info(
                 "release_reservation: session_key=%s → %s (%d item(s))",
@@ -377,3 +495,78 @@ class StockReservationService:
                 final_status,
                 len(items),
             )
+
+    @classmethod
+    def release_reservations(
+        cls,
+        reservations: list[StockReservation],
+        *,
+        final_status: str = StockReservation.Status.RELEASED,
+    ) -> int:
+        """
+        Release many PENDING reservations with aggregated writes.
+
+        The caller must hold the reservation rows (``select_for_update`` inside
+        ``transaction.atomic()``), as the expiry sweeper does; rows that are no
+        longer releasable are skipped.  Reserved quantities of all reservations
+        are summed per WarehouseItem and restored in one UPDATE, statuses in
+        another.  Returns the number of reservations released.
+        """
+        reservations = [r for r in reservations if r.status in _RELEASABLE]
+        if not reservations:
+            return 0
+
+        items = list(
+            StockReservationItem.objects
+            .filter(reservation__in=reservations)
+            .select_related("warehouse_item")
+        )
+        cls._restore_reserved_quantities(items)
+
+        now = timezone.now()
+        StockReservation.objects.filter(pk__in=[r.pk for r in reservations]).update(
+            status=final_status,
+            released_at=now,
+        )
+        for reservation in reservations:
+            reservation.status = final_status
+            reservation.released_at = now
+
+        units: dict[int, int] = defaultdict(int)
+        for item in items:
+            units[item.reservation_id] += item.quantity
+        record_reservation_events(
+            final_status,
+            [(units[reservation.pk], reservation_age(reservation, now)) for reservation in reservations],
+        )
+
+        logger.info(
+            "release_reservations: %d reservation(s) → %s (%d item(s))",
+            len(reservations),
+            final_status,
+            len(items),
+        )
+        return len(reservations)
+
+    @staticmethod
+    def _restore_reserved_quantities(items: list[StockReservationItem]) -> None:
+        """Give back the units held by ``items`` (row counters and shards)."""
+        quantities: dict[int, int] = defaultdict(int)
+        for item in items:
+            if not item.shard_quantities:
+                quantities[item.warehouse_item_id] += item.quantity
+        release_shard_quantities(items, consume=False)
+        if quantities:
+            # Lock in deterministic order first; the UPDATE alone would lock
+            # rows in whatever order the planner visits them.
+            list(
+                WarehouseItem.objects.select_for_update()
+                .filter(id__in=list(quantities))
+                .order_by("warehouse_id", "product_variant_id")
+                .values_list("id", flat=True)
+            )
+            WarehouseItem.objects.filter(pk__in=list(quantities)).update(
+                reserved_quantity=_decrease("reserved_quantity", quantities),
+            )
+        if items:
+            _refresh_stock_read_models(item.warehouse_item for item in items)
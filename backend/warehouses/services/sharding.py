@@ -0,0 +1,214 @@
+"""
+Sharded stock counters for hot WarehouseItems.
+
+Every checkout for a popular variant normally locks the same WarehouseItem row
+in ``create_reservation``, so concurrent checkouts queue behind each other.
+With ``shard_count = N`` the item's reservable stock is split into N
+``WarehouseItemShard`` slices. A reservation increments ``reserved_quantity``
+on a randomly chosen shard with a guarded UPDATE (``reserved + qty <=
+allotment``), spills over to the shards in index order when that one cannot
+cover it, and never locks the WarehouseItem row. Concurrent checkouts therefore contend on
+different rows.
+
+Invariants
+----------
+- ``WarehouseItem.quantity_in_stock`` stays authoritative. ``reserved_quantity``
+  on the row keeps only reservations made while the item was not sharded.
+- Availability is ``quantity_in_stock - reserved_quantity - sum(shard.reserved_quantity)``
+  (see ``WarehouseItem.available_quantity`` and product/stock_availability.py).
+- ``rebalance_shards`` spreads that availability evenly over the active shards.
+  Run it periodically with ``manage.py rebalance_stock_shards``. It also runs
+  in the transaction that saves a sharded WarehouseItem, e.g. a seller's stock
+  edit, so a lowered stock is never reserved from the old allotments.
+  Confirm and release keep allotments consistent on their own.
+
+Lock order is always WarehouseItem row → shards (index ASC). Reservations skip
+the row and hold either their one random shard or shards in index order.
+"""
+from __future__ import annotations
+
+import logging
+import random
+from collections import defaultdict
+from typing import Iterable
+
+from django.db import models, transaction
+from django.db.models import Case, F, Q, Value, When
+from django.db.models.functions import Greatest
+
+from warehouses.models import StockReservation, StockReservationItem, WarehouseItem, WarehouseItemShard
+
+logger = logging.getLogger(__name__)
+
+MAX_SHARDS = 64
+
+
+def configure_shards(warehouse_item_id: int, shard_count: int) -> None:
+    """
+    Switch a WarehouseItem to ``shard_count`` shards (0 turns sharding off).
+
+    Turning sharding off folds shard reservations back into the row's
+    ``reserved_quantity``. When the count shrinks, shards above the new count
+    stop taking reservations and are dropped once they drain.
+    """
+    if not 0 <= shard_count <= MAX_SHARDS:
+        raise ValueError(f"shard_count must be between 0 and {MAX_SHARDS}")
+
+    with transaction.atomic():
+        item = WarehouseItem.objects.select_for_update().get(pk=warehouse_item_id)
+        shards = list(item.shards.select_for_update().order_by("index"))
+
+        if shard_count == 0:
+            held = sum(shard.reserved_quantity for shard in shards)
+            WarehouseItem.objects.filter(pk=item.pk).update(
+                shard_count=0,
+                reserved_quantity=F("reserved_quantity") + held,
+            )
+            item.shards.all().delete()
+            StockReservationItem.objects.filter(
+                warehouse_item=item,
+                reservation__status=StockReservation.Status.PENDING,
+            ).exclude(shard_quantities={}).update(shard_quantities={})
+            logger.info("configure_shards: item %s unsharded (%d unit(s) folded back)", item.pk, held)
+            return
+
+        existing = {shard.index for shard in shards}
+        WarehouseItemShard.objects.bulk_create([
+            WarehouseItemShard(warehouse_item=item, index=index)
+            for index in range(shard_count)
+            if index not in existing
+        ])
+        WarehouseItem.objects.filter(pk=item.pk).update(shard_count=shard_count)
+        _rebalance_locked(item.pk)
+        logger.info("configure_shards: item %s now has %d shard(s)", item.pk, shard_count)
+
+
+def rebalance_shards(warehouse_item_ids: Iterable[int] | None = None) -> int:
+    """Redistribute free stock evenly over active shards; returns items rebalanced."""
+    qs = WarehouseItem.objects.filter(shard_count__gt=0)
+    if warehouse_item_ids is not None:
+        qs = qs.filter(pk__in=list(warehouse_item_ids))
+    count = 0
+    for pk in qs.order_by("pk").values_list("pk", flat=True):
+        with transaction.atomic():
+            if _rebalance_locked(pk):
+                count += 1
+    return count
+
+
+def _rebalance_locked(warehouse_item_id: int) -> bool:
+    item = WarehouseItem.objects.select_for_update().filter(pk=warehouse_item_id).first()
+    if item is None or not item.shard_count:
+        return False
+    shards = list(WarehouseItemShard.objects.select_for_update().filter(warehouse_item=item).order_by("index"))
+    active = [shard for shard in shards if shard.index < item.shard_count]
+    retired = [shard for shard in shards if shard.index >= item.shard_count]
+
+    WarehouseItemShard.objects.filter(pk__in=[s.pk for s in retired if not s.reserved_quantity]).delete()
+    retired = [shard for shard in retired if shard.reserved_quantity]
+    for shard in retired:
+        shard.allotment = shard.reserved_quantity
+
+    held = sum(shard.reserved_quantity for shard in shards)
+    free = max(0, item.quantity_in_stock - item.reserved_quantity - held)
+    base, extra = divmod(free, len(active)) if active else (0, 0)
+    for position, shard in enumerate(active):
+        shard.allotment = shard.reserved_quantity + base + (1 if position < extra else 0)
+
+    WarehouseItemShard.objects.bulk_update(active + retired, ["allotment"])
+    return True
+
+
+def _take(shard_pk: int, take: int) -> bool:
+    return bool(
+        WarehouseItemShard.objects.filter(
+            pk=shard_pk,
+            reserved_quantity__lte=F("allotment") - take,
+        ).update(reserved_quantity=F("reserved_quantity") + take)
+    )
+
+
+def reserve_on_shards(item: WarehouseItem, quantity: int) -> tuple[dict[str, int], int]:
+    """
+    Reserve ``quantity`` units on ``item``'s shards without locking the item.
+
+    Tries a random shard for the whole quantity first. If it cannot cover it,
+    nothing is held on that shard and the units are taken from the shards in
+    index order, so checkouts that spill over lock the shards in the same
+    order. Returns ``({shard_index: units}, shortfall)``. The caller raises
+    on a shortfall, and its transaction rolls back the partial increments.
+    """
+    cached = getattr(item, "_prefetched_objects_cache", {}).get("shards")
+    shards = list(cached) if cached is not None else list(item.shards.all())
+    shards = sorted((s for s in shards if s.index < item.shard_count), key=lambda s: s.index)
+    if not shards:
+        return {}, quantity
+
+    first = random.choice(shards)
+    if first.allotment - first.reserved_quantity >= quantity and _take(first.pk, quantity):
+        return {str(first.index): quantity}, 0
+
+    # The prefetched counters may be stale: re-read them once, and re-read a
+    # single shard when its guarded UPDATE misses.
+    free_by_pk = dict(
+        WarehouseItemShard.objects.filter(pk__in=[s.pk for s in shards])
+        .annotate(free=F("allotment") - F("reserved_quantity"))
+        .values_list("pk", "free")
+    )
+    taken: dict[str, int] = {}
+    remaining = quantity
+    for shard in shards:
+        if remaining <= 0:
+            break
+        free = free_by_pk.get(shard.pk, 0)
+        for retry in (False, True):
+            if retry:
+                free = (
+                    WarehouseItemShard.objects.filter(pk=shard.pk)
+                    .annotate(free=F("allotment") - F("reserved_quantity"))
+                    .values_list("free", flat=True)
+                    .first()
+                ) or 0
+            take = min(free, remaining)
+            if take <= 0:
+                break
+            if _take(shard.pk, take):
+                taken[str(shard.index)] = take
+                remaining -= take
+                break
+    return taken, remaining
+
+
+def release_shard_quantities(items: Iterable[StockReservationItem], *, consume: bool) -> None:
+    """
+    Give back the shard units held by ``items`` in one UPDATE.
+
+    ``consume=True`` (confirm) also shrinks the shards' allotments, because
+    the units leave ``quantity_in_stock``.
+    """
+    parts: dict[tuple[int, int], int] = defaultdict(int)
+    for item in items:
+        for index, qty in (item.shard_quantities or {}).items():
+            parts[(item.warehouse_item_id, int(index))] += int(qty)
+    if not parts:
+        return
+
+    per_shard = Case(
+        *(When(warehouse_item_id=wi_id, index=index, then=Value(qty)) for (wi_id, index), qty in parts.items()),
+        default=Value(0),
+        output_field=models.PositiveIntegerField(),
+    )
+    match = Q()
+    for wi_id, index in parts:
+        match |= Q(warehouse_item_id=wi_id, index=index)
+
+    changes = {
+        "reserved_quantity": Greatest(
+            F("reserved_quantity") - per_shard, Value(0), output_field=models.PositiveIntegerField(),
+        ),
+    }
+    if consume:
+        changes["allotment"] = Greatest(
+            F("allotment") - per_shard, Value(0), output_field=models.PositiveIntegerField(),
+        )
+    WarehouseItemShard.objects.filter(match).update(**changes)
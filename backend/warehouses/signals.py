@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import WarehouseItem
+from .services.sharding import _rebalance_locked
+
+
+@receiver(post_save, sender=WarehouseItem)
+def rebalance_shards_on_stock_save(sender, instance, created, raw=False, **kwargs):
+    # Shard allotments are slices of quantity_in_stock; re-slice after edits.
+    # In the saving transaction: until then, shards still hand out the old stock.
+    if raw or created or not instance.shard_count:
+        return
+    with transaction.atomic():
+        _rebalance_locked(instance.pk)
@@ -0,0 +1,169 @@
+"""
+Warehouse allocation strategies and split reservations.
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+
+from django.test import SimpleTestCase, TestCase, override_settings
+
+from accounts.choices import UserRole
+from accounts.models import CustomUser
+from product.models import BaseProduct, ProductStatus, ProductVariant
+from sellers.models import SellerProfile
+from warehouses.exceptions import InsufficientStockError
+from warehouses.models import StockReservationItem, Warehouse, WarehouseItem
+from warehouses.services.allocation import AllocationLine, get_allocation_strategy
+from warehouses.services.reservation import StockReservationService
+
+
+def _stock(*rows):
+    """rows: (warehouse_id, country, zip, available) for variant 1."""
+    items = []
+    for warehouse_id, country, zip_code, available in rows:
+        warehouse = Warehouse(id=warehouse_id, name=f"W{warehouse_id}", country=country, zip_code=zip_code)
+        items.append(
+            WarehouseItem(
+                id=warehouse_id * 100,
+                warehouse=warehouse,
+                product_variant_id=1,
+                quantity_in_stock=available,
+            )
+        )
+    return {1: items}
+
+
+def _split(strategy, stock, quantity, **destination):
+    line = AllocationLine(sku="S1", variant_id=1, quantity=quantity, **destination)
+    parts = get_allocation_strategy(strategy).allocate([line], stock)["S1"]
+    return {wi.warehouse_id: qty for wi, qty in parts}
+
+
+class AllocationStrategyTests(SimpleTestCase):
+    def test_fewest_shipments_prefers_single_warehouse_then_largest(self):
+        stock = _stock((1, "CZ", "10000", 3), (2, "CZ", "60200", 8), (3, "CZ", "70000", 5))
+        self.assertEqual(_split("fewest_shipments", stock, 5), {2: 5})
+        self.assertEqual(_split("fewest_shipments", stock, 12), {2: 8, 3: 4})
+
+    def test_fewest_shipments_keeps_cart_in_one_warehouse(self):
+        stock = _stock((1, "CZ", "10000", 10), (2, "CZ", "60200", 10))
+        stock[2] = [
+            WarehouseItem(id=201, warehouse=stock[1][1].warehouse, product_variant_id=2, quantity_in_stock=4),
+        ]
+        lines = [
+            AllocationLine(sku="S1", variant_id=1, quantity=2),
+            AllocationLine(sku="S2", variant_id=2, quantity=2),
+        ]
+        allocation = get_allocation_strategy("fewest_shipments").allocate(lines, stock)
+        self.assertEqual([wi.warehouse_id for wi, _ in allocation["S1"]], [2])
+
+    def test_nearest_orders_by_country_then_zip(self):
+        stock = _stock((1, "SK", "81101", 10), (2, "CZ", "10000", 2), (3, "CZ", "60200", 10))
+        self.assertEqual(
+            _split("nearest", stock, 4, destination_country="CZ", destination_zip="602 00"),
+            {3: 4},
+        )
+        self.assertEqual(
+            _split("nearest", stock, 4, destination_country="cz", destination_zip="110 00"),
+            {2: 2, 3: 2},
+        )
+
+    def test_balance_stock_levels_remaining_availability(self):
+        stock = _stock((1, "CZ", "10000", 10), (2, "CZ", "60200", 6), (3, "CZ", "70000", 2))
+        parts = _split("balance_stock", stock, 7)
+        self.assertEqual(sum(parts.values()), 7)
+        remaining = sorted(
+            wi.available_quantity - parts.get(wi.warehouse_id, 0) for wi in stock[1]
+        )
+        self.assertEqual(remaining, [2, 4, 5])
+
+    def test_insufficient_total_reports_sum_across_warehouses(self):
+        stock = _stock((1, "CZ", "10000", 3), (2, "CZ", "60200", 4))
+        with self.assertRaises(InsufficientStockError) as ctx:
+            _split("warehouse_order", stock, 8)
+        self.assertEqual(ctx.exception.detail, {"sku": "S1", "requested": 8, "available": 7})
+
+    def test_unknown_strategy_is_rejected(self):
+        with self.assertRaises(ValueError):
+            get_allocation_strategy("cheapest")
+
+
+class SplitReservationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller_user = CustomUser.objects.create_user(
+            email="alloc-seller@example.com",
+            password="x",
+            first_name="A",
+            last_name="S",
+            role=UserRole.SELLER,
+            phone_number="+420730000031",
+        )
+        seller_profile = SellerProfile.objects.get(user=seller_user)
+        product = BaseProduct.objects.create(
+            name="Alloc Product",
+            product_description="D",
+            seller=seller_profile,
+            vat_rate=Decimal("21.00"),
+            status=ProductStatus.APPROVED,
+            is_active=True,
+        )
+        cls.variant = ProductVariant.objects.create(
+            product=product,
+            name="V",
+            text="alloc",
+            price=Decimal("10.00"),
+            weight_grams=100,
+        )
+        cls.items = [
+            WarehouseItem.objects.create(
+                warehouse=Warehouse.objects.create(
+                    name=f"WH-Alloc-{index}",
+                    street="A",
+                    city="Praha",
+                    zip_code=zip_code,
+                    country="CZ",
+                ),
+                product_variant=cls.variant,
+                quantity_in_stock=quantity,
+            )
+            for index, (zip_code, quantity) in enumerate([("10000", 3), ("60200", 4)])
+        ]
+
+    def _reserve(self, session_key, quantity, **kwargs):
+        return StockReservationService.create_reservation(
+            session_key=session_key,
+            payment_system="stripe",
+            groups=[{
+                "products": [{"sku": self.variant.sku, "quantity": quantity}],
+                "delivery_address": {"country": "CZ", "zip": "60200"},
+            }],
+            variant_map={self.variant.sku: self.variant},
+            **kwargs,
+        )
+
+    def test_line_larger_than_any_warehouse_is_split(self):
+        reservation = self._reserve("alloc-split", 6)
+
+        parts = dict(
+            StockReservationItem.objects.filter(reservation=reservation)
+            .values_list("warehouse_item_id", "quantity")
+        )
+        self.assertEqual(parts, {self.items[1].id: 4, self.items[0].id: 2})
+
+        StockReservationService.confirm_reservation("alloc-split")
+        stock = {wi.id: wi.quantity_in_stock for wi in WarehouseItem.objects.filter(product_variant=self.variant)}
+        self.assertEqual(stock, {self.items[0].id: 1, self.items[1].id: 0})
+
+    @override_settings(STOCK_ALLOCATION_STRATEGY="nearest")
+    def test_strategy_from_settings_and_per_call(self):
+        nearest = self._reserve("alloc-nearest", 2)
+        self.assertEqual(
+            list(nearest.items.values_list("warehouse_item_id", flat=True)),
+            [self.items[1].id],
+        )
+        ordered = self._reserve("alloc-ordered", 1, strategy="warehouse_order")
+        self.assertEqual(
+            list(ordered.items.values_list("warehouse_item_id", flat=True)),
+            [self.items[0].id],
+        )
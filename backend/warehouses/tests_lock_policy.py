@@ -0,0 +1,184 @@
+"""
+Bounded lock waits for checkout reservations (warehouses/services/locking.py).
+
+SQLite has no row locks, so lock_not_available (SQLSTATE 55P03) is simulated.
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.db import OperationalError
+from django.test import TestCase, override_settings
+
+from accounts.choices import UserRole
+from accounts.models import CustomUser
+from payment.services.checkout_shared import (
+    CheckoutSessionBuildError,
+    create_checkout_stock_reservation_if_enabled,
+)
+from product.models import BaseProduct, ProductStatus, ProductVariant
+from sellers.models import SellerProfile
+from warehouses.exceptions import StockLockTimeoutError
+from warehouses.models import StockReservation, Warehouse, WarehouseItem
+from warehouses.services.locking import LockPolicy, get_lock_policy, run_with_lock_retry
+from warehouses.services.metrics import collect_reservation_metrics, render_prometheus
+from warehouses.services.reservation import StockReservationService
+
+
+def _lock_not_available() -> OperationalError:
+    cause = Exception("canceling statement due to lock timeout")
+    cause.pgcode = "55P03"
+    error = OperationalError("canceling statement due to lock timeout")
+    error.__cause__ = cause
+    return error
+
+
+@patch("warehouses.services.locking.time.sleep")
+class LockRetryTests(TestCase):
+    policy = LockPolicy(mode="timeout", timeout_ms=100, retries=2, backoff_ms=10)
+
+    def test_retries_until_lock_is_granted(self, sleep):
+        calls = []
+
+        def attempt():
+            calls.append(1)
+            if len(calls) < 3:
+                raise _lock_not_available()
+            return "ok"
+
+        self.assertEqual(run_with_lock_retry(attempt, skus=["111"], policy=self.policy), "ok")
+        self.assertEqual(len(calls), 3)
+        self.assertEqual(sleep.call_count, 2)
+        self.assertEqual(collect_reservation_metrics()["lock_contention"]["111"]["retries"], 2)
+
+    def test_gives_up_with_try_again_error(self, sleep):
+        def attempt():
+            raise _lock_not_available()
+
+        with self.assertRaises(StockLockTimeoutError) as ctx:
+            run_with_lock_retry(attempt, skus=["222", "111", "222"], policy=self.policy)
+
+        self.assertEqual(ctx.exception.detail["skus"], ["111", "222"])
+        self.assertGreaterEqual(ctx.exception.detail["retry_after"], 1)
+        contention = collect_reservation_metrics()["lock_contention"]
+        self.assertEqual(contention["111"]["retries"], 2)
+        self.assertEqual(contention["222"]["timeouts"], 1)
+        text = render_prometheus(collect_reservation_metrics())
+        self.assertIn('stock_reservation_lock_timeouts_by_sku{sku="222",window="60m"} 1', text)
+        self.assertIn("stock_reservation_lock_timeouts_total 2\n", text)
+
+    def test_other_database_errors_are_not_retried(self, sleep):
+        def attempt():
+            raise OperationalError("disk full")
+
+        with self.assertRaises(OperationalError):
+            run_with_lock_retry(attempt, skus=["111"], policy=self.policy)
+        sleep.assert_not_called()
+
+    def test_backoff_grows_with_attempts(self, sleep):
+        with patch("warehouses.services.locking.random.uniform", side_effect=lambda low, high: high):
+            with self.assertRaises(StockLockTimeoutError):
+                run_with_lock_retry(lambda: (_ for _ in ()).throw(_lock_not_available()), skus=[], policy=self.policy)
+        self.assertEqual([call.args[0] for call in sleep.call_args_list], [0.01, 0.02])
+
+    @override_settings(STOCK_LOCK_MODE="forever")
+    def test_unknown_mode_is_rejected(self, sleep):
+        with self.assertRaises(ValueError):
+            get_lock_policy()
+
+    @override_settings(STOCK_LOCK_MODE="nowait", STOCK_LOCK_RETRIES=0)
+    def test_policy_from_settings(self, sleep):
+        policy = get_lock_policy()
+        self.assertTrue(policy.nowait)
+        self.assertEqual(policy.retries, 0)
+
+
+@patch("warehouses.services.locking.time.sleep")
+class ReservationLockPolicyTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller_user = CustomUser.objects.create_user(
+            email="lock-policy-seller@example.com",
+            password="x",
+            first_name="L",
+            last_name="P",
+            role=UserRole.SELLER,
+            phone_number="+420730000081",
+        )
+        cls.warehouse = Warehouse.objects.create(
+            name="WH-Lock", street="S", city="Praha", zip_code="10000", country="CZ",
+        )
+        product = BaseProduct.objects.create(
+            name="Lock Product",
+            product_description="D",
+            seller=SellerProfile.objects.get(user=seller_user),
+            vat_rate=Decimal("21.00"),
+            status=ProductStatus.APPROVED,
+            is_active=True,
+        )
+        cls.variant = ProductVariant.objects.create(
+            product=product, name="V", text="l", price=Decimal("10.00"), weight_grams=100,
+        )
+        cls.item = WarehouseItem.objects.create(
+            warehouse=cls.warehouse, product_variant=cls.variant, quantity_in_stock=10,
+        )
+
+    def _reserve(self, session_key="lock-1"):
+        with self.captureOnCommitCallbacks(execute=True):
+            return StockReservationService.create_reservation(
+                session_key=session_key,
+                payment_system="stripe",
+                groups=[{"products": [{"sku": self.variant.sku, "quantity": 2}]}],
+                variant_map={self.variant.sku: self.variant},
+            )
+
+    @override_settings(STOCK_LOCK_RETRIES=1)
+    def test_failed_attempt_is_rolled_back_and_retried(self, sleep):
+        with patch(
+            "warehouses.services.reservation.apply_lock_timeout",
+            side_effect=[_lock_not_available(), None],
+        ):
+            reservation = self._reserve()
+
+        self.assertEqual(reservation.status, StockReservation.Status.PENDING)
+        self.assertEqual(StockReservation.objects.count(), 1)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.reserved_quantity, 2)
+
+    @override_settings(STOCK_LOCK_RETRIES=0)
+    def test_timeout_leaves_stock_untouched(self, sleep):
+        with patch(
+            "warehouses.services.reservation.apply_lock_timeout",
+            side_effect=_lock_not_available(),
+        ), self.assertRaises(StockLockTimeoutError):
+            self._reserve()
+
+        self.assertFalse(StockReservation.objects.exists())
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.reserved_quantity, 0)
+
+    @override_settings(STOCK_RESERVATION_ENABLED=True)
+    def test_checkout_maps_timeout_to_503(self, sleep):
+        with patch.object(
+            StockReservationService,
+            "create_reservation",
+            side_effect=StockLockTimeoutError(detail={"skus": [self.variant.sku], "retry_after": 1}),
+        ), self.assertRaises(CheckoutSessionBuildError) as ctx:
+            create_checkout_stock_reservation_if_enabled(
+                session_key="lock-checkout",
+                payment_system="stripe",
+                groups=[],
+                variant_map={},
+                error_cls=CheckoutSessionBuildError,
+            )
+
+        self.assertEqual(ctx.exception.http_status, 503)
+        self.assertEqual(ctx.exception.detail["stock"]["retry_after"], 1)
+
+    @override_settings(STOCK_LOCK_WAIT_THRESHOLD_MS=0)
+    def test_lock_waits_are_counted_per_sku(self, sleep):
+        self._reserve()
+        contention = collect_reservation_metrics()["lock_contention"][self.variant.sku]
+        self.assertEqual(contention["waits"], 1)
+        self.assertEqual(contention["timeouts"], 0)
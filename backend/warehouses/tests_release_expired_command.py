@@ -5,12 +5,14 @@ from __future__ import annotations
 
 from datetime import timedelta
 from io import StringIO
+from unittest.mock import patch
 
 from django.core.management import call_command
 from django.test import TestCase
 from django.utils import timezone
 
 from warehouses.models import StockReservation, WarehouseItem
+from warehouses.services.expiry import sweep_expired_reservations
 from warehouses.services.reservation import StockReservationService
 from warehouses.tests_reservation import ReservationTestMixin
 
@@ -150,3 +152,64 @@ class ReleaseExpiredReservationsCommandTests(ReservationTestMixin, TestCase):
         ).count()
         self.assertEqual(expired_count, 1)
         self.assertEqual(pending_expired, 1)
+
+    def _create_expired(self, count: int, qty: int = 1) -> list[StockReservation]:
+        self._make_wh_item(100)
+        reservations = []
+        for index in range(count):
+            reservation = StockReservationService.create_reservation(
+                session_key=self._session_key(),
+                payment_system="stripe",
+                groups=self._groups(qty),
+                variant_map=self.variant_map,
+            )
+            reservation.provider_checkout_id = f"cs_sweep_{index}"
+            reservation.save(update_fields=["provider_checkout_id"])
+            self._expire(reservation)
+            reservations.append(reservation)
+        return reservations
+
+    @patch("payment.services.reservation_payment.stripe.checkout.Session.expire")
+    def test_batches_aggregate_releases_and_expire_psp_sessions_in_pool(self, mock_expire):
+        self._create_expired(5, qty=2)
+
+        stats = sweep_expired_reservations(batch_size=2, workers=2)
+
+        self.assertEqual((stats.batches, stats.released, stats.provider_calls), (3, 5, 5))
+        self.assertEqual(stats.provider_failures, 0)
+        self.assertEqual(mock_expire.call_count, 5)
+        self.assertEqual(
+            {call.args[0] for call in mock_expire.call_args_list},
+            {f"cs_sweep_{index}" for index in range(5)},
+        )
+        wi = WarehouseItem.objects.get(warehouse=self.warehouse, product_variant=self.variant)
+        self.assertEqual(wi.reserved_quantity, 0)
+        self.assertFalse(StockReservation.objects.filter(status=StockReservation.Status.PENDING).exists())
+
+    @patch(
+        "payment.services.reservation_payment.stripe.checkout.Session.expire",
+        side_effect=RuntimeError("psp down"),
+    )
+    def test_psp_failures_are_counted_and_do_not_undo_release(self, _mock_expire):
+        self._create_expired(2)
+
+        out = StringIO()
+        call_command("release_expired_reservations", "--workers", "0", "--verbosity", "2", stdout=out)
+
+        self.assertIn("Released 2 expired reservation(s).", out.getvalue())
+        self.assertIn("provider_failures=2", out.getvalue())
+        self.assertEqual(
+            StockReservation.objects.filter(status=StockReservation.Status.EXPIRED).count(), 2,
+        )
+
+    def test_batch_release_statement_count_is_independent_of_batch_size(self):
+        reservations = self._create_expired(6)
+        # items, lock, counters UPDATE, availability snapshot (aggregate + upsert), statuses
+        with self.assertNumQueries(6):
+            StockReservationService.release_reservations(
+                reservations[:2], final_status=StockReservation.Status.EXPIRED,
+            )
+        with self.assertNumQueries(6):
+            StockReservationService.release_reservations(
+                reservations[2:], final_status=StockReservation.Status.EXPIRED,
+            )
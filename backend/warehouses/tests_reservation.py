@@ -20,12 +20,13 @@ from decimal import Decimal
 from django.conf import settings
 from django.db import connection
 from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 from unittest import skipUnless
 
 from accounts.choices import UserRole
 from accounts.models import CustomUser
-from product.models import BaseProduct, ProductStatus, ProductVariant
+from product.models import BaseProduct, CatalogListing, ProductStatus, ProductVariant
 from sellers.models import SellerProfile
 from warehouses.exceptions import InsufficientStockError
 from warehouses.models import StockReservation, StockReservationItem, Warehouse, WarehouseItem
@@ -404,6 +405,77 @@ class StockReservationReleaseTests(ReservationTestMixin, TestCase):
         StockReservationService.release_reservation("nonexistent-key")
 
 
+# ---------------------------------------------------------------------------
+# Set-based writes
+# ---------------------------------------------------------------------------
+
+class StockReservationBulkWriteTests(ReservationTestMixin, TestCase):
+
+    def _cart(self, size: int) -> tuple[list, dict]:
+        variants = [
+            ProductVariant.objects.create(
+                product=self.base_product,
+                name="V",
+                text=f"bulk-{uuid.uuid4().hex[:8]}",
+                price=Decimal("10.00"),
+                weight_grams=100,
+            )
+            for _ in range(size)
+        ]
+        for variant in variants:
+            WarehouseItem.objects.create(
+                warehouse=self.warehouse,
+                product_variant=variant,
+                quantity_in_stock=10,
+            )
+        groups = [{"products": [{"sku": v.sku, "quantity": 2} for v in variants]}]
+        return groups, {v.sku: v for v in variants}
+
+    def _statements(self, action) -> int:
+        with CaptureQueriesContext(connection) as ctx:
+            action()
+        return len(ctx.captured_queries)
+
+    def test_statement_count_does_not_grow_with_cart_size(self):
+        counts = {}
+        for size in (1, 8):
+            groups, variant_map = self._cart(size)
+            sk = self._session_key()
+            counts[size] = (
+                self._statements(lambda: StockReservationService.create_reservation(
+                    session_key=sk, payment_system="stripe", groups=groups, variant_map=variant_map,
+                )),
+                self._statements(lambda: StockReservationService.confirm_reservation(sk)),
+            )
+            release_sk = self._session_key()
+            StockReservationService.create_reservation(
+                session_key=release_sk, payment_system="stripe", groups=groups, variant_map=variant_map,
+            )
+            counts[size] += (
+                self._statements(lambda: StockReservationService.release_reservation(release_sk)),
+            )
+        self.assertEqual(counts[1], counts[8])
+
+    def test_bulk_writes_update_every_line_and_refresh_listing(self):
+        groups, variant_map = self._cart(3)
+        sk = self._session_key()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StockReservationService.create_reservation(
+                session_key=sk, payment_system="stripe", groups=groups, variant_map=variant_map,
+            )
+        items = WarehouseItem.objects.filter(product_variant__in=variant_map.values())
+        self.assertEqual({(wi.quantity_in_stock, wi.reserved_quantity) for wi in items}, {(10, 2)})
+        listing = CatalogListing.objects.get(product=self.base_product)
+        self.assertEqual(listing.total_available_quantity, 3 * 8)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StockReservationService.confirm_reservation(sk)
+        self.assertEqual({(wi.quantity_in_stock, wi.reserved_quantity) for wi in items.all()}, {(8, 0)})
+        listing.refresh_from_db()
+        self.assertEqual(listing.total_available_quantity, 3 * 8)
+
+
 # ---------------------------------------------------------------------------
 # Concurrency — PostgreSQL only
 # ---------------------------------------------------------------------------
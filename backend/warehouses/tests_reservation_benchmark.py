@@ -0,0 +1,133 @@
+"""
+Reservation load-test harness (warehouses/reservation_benchmark.py).
+
+Concurrent runs need PostgreSQL; these tests use the single-worker inline mode.
+"""
+from __future__ import annotations
+
+import json
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase
+
+from accounts.choices import UserRole
+from accounts.models import CustomUser
+from product.models import BaseProduct, ProductStatus, ProductVariant
+from sellers.models import SellerProfile
+from warehouses.models import StockReservation, Warehouse, WarehouseItem
+from warehouses.reservation_benchmark import _percentile, check_invariants
+
+
+def _benchmark(*args):
+    out = StringIO()
+    call_command(
+        "benchmark_stock_reservations",
+        "--workers", "1",
+        "--sessions", "12",
+        "--skus", "5",
+        "--hot-skus", "2",
+        "--cart-size", "3",
+        "--seed", "7",
+        *args,
+        stdout=out,
+    )
+    return json.loads(out.getvalue())
+
+
+class ReservationBenchmarkTests(TestCase):
+    def _run(self, *args):
+        return _benchmark(*args)
+
+    def test_single_worker_report(self):
+        report = self._run("--confirm-ratio", "0.5")
+
+        self.assertEqual(report["database"], "sqlite")
+        self.assertEqual(report["outcomes"]["create.ok"], 12)
+        self.assertEqual(report["latency"]["create"]["count"], 12)
+        self.assertEqual(
+            report["latency"]["confirm"]["count"] + report["latency"]["release"]["count"], 12,
+        )
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            self.assertIn(key, report["latency"]["create"])
+        self.assertEqual(report["errors"]["deadlock"], 0)
+        self.assertTrue(report["invariants"]["ok"], report["invariants"]["violations"])
+        self.assertGreater(report["throughput"]["reservations_per_second"], 0)
+        self.assertIsNone(report["lock_waits"])
+
+        # The throwaway fixture is removed.
+        self.assertFalse(BaseProduct.objects.filter(name__startswith="Bench Product rbench-").exists())
+        self.assertFalse(Warehouse.objects.filter(name__startswith="WH-Bench-rbench-").exists())
+        self.assertFalse(StockReservation.objects.filter(session_key__startswith="rbench-").exists())
+
+    def test_insufficient_stock_is_counted(self):
+        report = self._run("--stock", "1", "--confirm-ratio", "1")
+
+        self.assertGreater(report["errors"]["insufficient_stock"], 0)
+        self.assertTrue(report["invariants"]["ok"], report["invariants"]["violations"])
+
+    def test_concurrent_run_requires_postgres(self):
+        with self.assertRaises(CommandError):
+            call_command("benchmark_stock_reservations", "--workers", "2", stdout=StringIO())
+
+    def test_invariant_violations_are_reported(self):
+        item = WarehouseItem.objects.create(
+            warehouse=Warehouse.objects.create(name="WH-Inv", street="S", city="P", zip_code="1", country="CZ"),
+            product_variant=self._variant(),
+            quantity_in_stock=5,
+            reserved_quantity=2,
+        )
+        result = check_invariants({"initial_stock": {item.pk: 5}, "variants": []})
+
+        self.assertFalse(result["ok"])
+        self.assertIn(f"item {item.pk}: reserved_quantity=2, expected 0", result["violations"])
+
+    def test_percentile_nearest_rank(self):
+        values = [float(value) for value in range(1, 101)]
+        self.assertEqual(_percentile(values, 50), 50.0)
+        self.assertEqual(_percentile(values, 99), 99.0)
+        self.assertEqual(_percentile([3.0], 95), 3.0)
+        self.assertEqual(_percentile([], 50), 0.0)
+
+    def _variant(self):
+        user = CustomUser.objects.create_user(
+            email="bench-inv@example.com",
+            password="x",
+            first_name="B",
+            last_name="I",
+            role=UserRole.SELLER,
+            phone_number="+420730000061",
+        )
+        product = BaseProduct.objects.create(
+            name="Inv",
+            product_description="D",
+            seller=SellerProfile.objects.get(user=user),
+            vat_rate=Decimal("21.00"),
+            status=ProductStatus.APPROVED,
+            is_active=True,
+        )
+        return ProductVariant.objects.create(
+            product=product, name="V", text="inv", price=Decimal("1.00"), weight_grams=1,
+        )
+
+
+class ShardComparisonBenchmarkTests(TransactionTestCase):
+    # Sharded reservations refresh the availability snapshot on commit, which
+    # needs real commits for the invariant check.
+    def _run(self, *args):
+        return _benchmark(*args)
+
+    def test_compare_shards_reports_the_single_row_baseline(self):
+        report = self._run("--shards", "2", "--compare-shards", "--confirm-ratio", "1")
+
+        self.assertEqual(report["config"]["shards"], 2)
+        self.assertEqual(report["baseline"]["config"]["shards"], 0)
+        self.assertEqual(report["baseline"]["outcomes"]["create.ok"], 12)
+        self.assertTrue(report["invariants"]["ok"], report["invariants"]["violations"])
+        self.assertTrue(report["baseline"]["invariants"]["ok"], report["baseline"]["invariants"]["violations"])
+        self.assertGreater(report["shard_speedup"], 0)
+
+        with self.assertRaisesMessage(CommandError, "compare_shards needs shards > 0"):
+            self._run("--compare-shards")
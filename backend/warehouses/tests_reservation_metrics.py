@@ -0,0 +1,213 @@
+"""
+Rolling stock reservation metrics (warehouses/services/metrics.py).
+"""
+from __future__ import annotations
+
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.choices import UserRole
+from accounts.models import CustomUser
+from product.models import BaseProduct, ProductStatus, ProductVariant
+from sellers.models import SellerProfile
+from warehouses.models import StockReservation, StockReservationMetric, Warehouse, WarehouseItem
+from warehouses.services.metrics import (
+    LIFETIME,
+    LOCK_OTHER,
+    collect_reservation_metrics,
+    prune_reservation_metrics,
+    record_lock_contention,
+    render_prometheus,
+)
+from warehouses.services.reservation import StockReservationService
+
+METRICS_URL = "/metrics/stock-reservations/"
+
+
+class ReservationMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller_user = CustomUser.objects.create_user(
+            email="metrics-seller@example.com",
+            password="x",
+            first_name="M",
+            last_name="S",
+            role=UserRole.SELLER,
+            phone_number="+420730000071",
+        )
+        cls.warehouse = Warehouse.objects.create(
+            name="WH-Metrics", street="S", city="Praha", zip_code="10000", country="CZ",
+        )
+        product = BaseProduct.objects.create(
+            name="Metrics Product",
+            product_description="D",
+            seller=SellerProfile.objects.get(user=seller_user),
+            vat_rate=Decimal("21.00"),
+            status=ProductStatus.APPROVED,
+            is_active=True,
+        )
+        cls.variant = ProductVariant.objects.create(
+            product=product, name="V", text="m", price=Decimal("10.00"), weight_grams=100,
+        )
+        WarehouseItem.objects.create(warehouse=cls.warehouse, product_variant=cls.variant, quantity_in_stock=50)
+        cls.staff = CustomUser.objects.create_user(
+            email="metrics-staff@example.com",
+            password="x",
+            first_name="M",
+            last_name="A",
+            phone_number="+420730000072",
+            is_staff=True,
+        )
+
+    def _reserve(self, session_key, quantity):
+        with self.captureOnCommitCallbacks(execute=True):
+            StockReservationService.create_reservation(
+                session_key=session_key,
+                payment_system="stripe",
+                groups=[{"products": [{"sku": self.variant.sku, "quantity": quantity}]}],
+                variant_map={self.variant.sku: self.variant},
+            )
+
+    def _run_lifecycle(self):
+        for key, quantity in (("m-confirm", 2), ("m-release", 3), ("m-expire", 4), ("m-pending", 5)):
+            self._reserve(key, quantity)
+        with self.captureOnCommitCallbacks(execute=True):
+            StockReservationService.confirm_reservation("m-confirm")
+        with self.captureOnCommitCallbacks(execute=True):
+            StockReservationService.release_reservation("m-release")
+        StockReservation.objects.filter(session_key="m-expire").update(
+            created_at=timezone.now() - timedelta(minutes=40),
+            expires_at=timezone.now() - timedelta(minutes=5),
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command("release_expired_reservations", "--workers", "0", stdout=StringIO())
+
+    def test_lifecycle_counters_and_gauges(self):
+        self._run_lifecycle()
+
+        metrics = collect_reservation_metrics()
+        self.assertEqual(
+            metrics["events_total"], {"created": 4, "confirmed": 1, "released": 1, "expired": 1},
+        )
+        self.assertEqual(metrics["units_total"], {"created": 14, "confirmed": 2, "released": 3, "expired": 4})
+        self.assertEqual((metrics["pending"], metrics["pending_units"]), (1, 5))
+        self.assertEqual(metrics["events_current_minute"]["created"], 4)
+
+        expired = dict(metrics["age_seconds"]["expired"]["buckets"])
+        self.assertEqual((expired["2100"], expired["3600"], expired["+Inf"]), (0, 1, 1))
+        self.assertEqual(dict(metrics["age_seconds"]["confirmed"]["buckets"])["30"], 1)
+
+    def test_rates_cover_complete_minutes(self):
+        now = timezone.now().replace(second=30, microsecond=0)
+        minute = now.replace(second=0)
+        StockReservationMetric.objects.bulk_create([
+            StockReservationMetric(key="events:created", minute=minute - timedelta(minutes=1), shard=0, value=6),
+            StockReservationMetric(key="events:created", minute=minute - timedelta(minutes=1), shard=3, value=4),
+            StockReservationMetric(key="events:created", minute=minute - timedelta(minutes=4), shard=1, value=5),
+            StockReservationMetric(key="events:created", minute=minute - timedelta(minutes=20), shard=1, value=99),
+        ])
+
+        rates = collect_reservation_metrics(now)["events_per_minute"]
+        self.assertEqual(rates["1m"]["created"], 10)
+        self.assertEqual(rates["5m"]["created"], 3)
+        self.assertEqual(rates["15m"]["created"], 1)
+
+    def test_prune_keeps_lifetime_rows(self):
+        old = timezone.now() - timedelta(days=3)
+        StockReservationMetric.objects.bulk_create([
+            StockReservationMetric(key="events:created", minute=old.replace(second=0, microsecond=0), value=1),
+            StockReservationMetric(key="events:created", minute=LIFETIME, shard=5, value=1),
+        ])
+        self.assertEqual(prune_reservation_metrics(), 1)
+        self.assertTrue(StockReservationMetric.objects.filter(minute=LIFETIME).exists())
+
+    @override_settings(STOCK_METRICS_LOCK_TOP_SKUS=2, STOCK_METRICS_LOCK_WINDOW_MINUTES=30)
+    def test_lock_contention_reports_top_skus_and_sums_the_rest(self):
+        now = timezone.now()
+        minute = now.replace(second=0, microsecond=0)
+        StockReservationMetric.objects.bulk_create([
+            StockReservationMetric(key="lock_timeouts:A", minute=minute - timedelta(minutes=5), value=3),
+            StockReservationMetric(key="lock_waits:B", minute=minute, value=9),
+            StockReservationMetric(key="lock_waits:C", minute=minute, shard=2, value=4),
+            StockReservationMetric(key="lock_wait_ms:C", minute=minute, value=1500),
+            StockReservationMetric(key="lock_waits:D", minute=minute - timedelta(minutes=1), value=1),
+            StockReservationMetric(key="lock_timeouts:E", minute=minute - timedelta(minutes=45), value=50),
+        ])
+        for sku in ("B", "C", "D"):
+            record_lock_contention([sku], "retry")
+
+        metrics = collect_reservation_metrics(now)
+        contention = metrics["lock_contention"]
+        self.assertEqual(list(contention), ["A", "B", LOCK_OTHER])
+        self.assertEqual(contention["B"]["waits"], 9)
+        self.assertEqual(contention[LOCK_OTHER], {"waits": 5, "wait_seconds": 1.5, "retries": 2, "timeouts": 0})
+        self.assertEqual(metrics["lock_contention_total"]["retries"], 3)
+        self.assertIn(
+            f'stock_reservation_lock_waits_by_sku{{sku="{LOCK_OTHER}",window="30m"}} 5', render_prometheus(metrics)
+        )
+
+    def test_prune_drops_per_sku_lock_rows(self):
+        record_lock_contention(["A"], "timeout")
+        StockReservationMetric.objects.exclude(minute=LIFETIME).update(minute=LIFETIME + timedelta(days=1))
+
+        prune_reservation_metrics()
+
+        self.assertEqual(
+            list(StockReservationMetric.objects.filter(key__startswith="lock_").values_list("key", flat=True)),
+            ["lock_timeouts"],
+        )
+        self.assertEqual(collect_reservation_metrics()["lock_contention"], {})
+
+    def test_label_values_are_escaped(self):
+        record_lock_contention(['say "hi"\\\n'], "timeout")
+
+        text = render_prometheus(collect_reservation_metrics())
+
+        self.assertIn(
+            'stock_reservation_lock_timeouts_by_sku{sku="say \\"hi\\"\\\\\\n",window="60m"} 1', text
+        )
+        self.assertNotIn('"hi"', text)
+
+    def test_resync_recomputes_lifetime_totals(self):
+        self._run_lifecycle()
+        StockReservationMetric.objects.filter(minute=LIFETIME, key__startswith="events:").update(value=0)
+
+        call_command("report_stock_reservation_health", "--resync-metrics", stdout=StringIO())
+
+        metrics = collect_reservation_metrics()
+        self.assertEqual(metrics["pending"], 1)
+        self.assertEqual(metrics["events_total"]["expired"], 1)
+
+    @override_settings(STOCK_METRICS_TOKEN="scrape-secret")
+    def test_endpoint_requires_token_and_reads_only_counters(self):
+        self._run_lifecycle()
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(METRICS_URL, HTTP_AUTHORIZATION="Bearer scrape-secret")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain; version=0.0.4"))
+        body = response.content.decode()
+        self.assertIn('stock_reservation_events_total{event="created"} 4', body)
+        self.assertIn("stock_reservation_pending 1\n", body)
+        self.assertIn('stock_reservation_age_seconds_count{event="expired"} 1', body)
+        for table in ('"warehouses_stockreservation"', '"warehouses_warehouseitem"'):
+            self.assertFalse(any(table in query["sql"] for query in ctx.captured_queries), table)
+
+    def test_endpoint_without_token_is_staff_only(self):
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 403)
+        self.client.force_login(self.staff)
+        self.assertEqual(self.client.get(METRICS_URL).status_code, 200)
+
+    def test_render_is_valid_for_empty_counters(self):
+        body = render_prometheus(collect_reservation_metrics())
+        self.assertIn('stock_reservation_age_seconds_bucket{event="released",le="+Inf"} 0', body)
+        self.assertIn("stock_reservation_pending_units 0", body)
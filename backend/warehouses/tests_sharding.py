@@ -0,0 +1,178 @@
+"""
+Sharded stock counters (warehouses/services/sharding.py).
+"""
+from __future__ import annotations
+
+from decimal import Decimal
+from unittest.mock import patch
+
+from django.test import TestCase
+
+from accounts.choices import UserRole
+from accounts.models import CustomUser
+from product.models import BaseProduct, ProductStatus, ProductVariant
+from product.stock_availability import (
+    annotate_products_with_total_available,
+    annotate_variant_queryset_with_available,
+)
+from sellers.models import SellerProfile
+from warehouses.exceptions import InsufficientStockError
+from warehouses.models import StockReservation, Warehouse, WarehouseItem, WarehouseItemShard
+from warehouses.services.reservation import StockReservationService
+from warehouses.services import sharding
+from warehouses.services.sharding import configure_shards, rebalance_shards, reserve_on_shards
+
+
+class StockShardTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        seller_user = CustomUser.objects.create_user(
+            email="shard-seller@example.com",
+            password="x",
+            first_name="S",
+            last_name="H",
+            role=UserRole.SELLER,
+            phone_number="+420730000041",
+        )
+        seller_profile = SellerProfile.objects.get(user=seller_user)
+        cls.warehouse = Warehouse.objects.create(
+            name="WH-Shard",
+            street="S",
+            city="Praha",
+            zip_code="10000",
+            country="CZ",
+        )
+        cls.product = BaseProduct.objects.create(
+            name="Shard Product",
+            product_description="D",
+            seller=seller_profile,
+            vat_rate=Decimal("21.00"),
+            status=ProductStatus.APPROVED,
+            is_active=True,
+        )
+        cls.variant = ProductVariant.objects.create(
+            product=cls.product,
+            name="V",
+            text="hot",
+            price=Decimal("10.00"),
+            weight_grams=100,
+        )
+
+    def setUp(self):
+        self.item = WarehouseItem.objects.create(
+            warehouse=self.warehouse,
+            product_variant=self.variant,
+            quantity_in_stock=10,
+            reserved_quantity=1,
+        )
+        configure_shards(self.item.pk, 3)
+
+    def _reserve(self, session_key, quantity):
+        # Snapshots of sharded variants are refreshed after commit.
+        with self.captureOnCommitCallbacks(execute=True):
+            return StockReservationService.create_reservation(
+                session_key=session_key,
+                payment_system="stripe",
+                groups=[{"products": [{"sku": self.variant.sku, "quantity": quantity}]}],
+                variant_map={self.variant.sku: self.variant},
+            )
+
+    def _allotments(self):
+        return list(
+            WarehouseItemShard.objects.filter(warehouse_item=self.item)
+            .order_by("index")
+            .values_list("allotment", "reserved_quantity")
+        )
+
+    def _available(self):
+        variant = annotate_variant_queryset_with_available(ProductVariant.objects.filter(pk=self.variant.pk)).get()
+        product = annotate_products_with_total_available(BaseProduct.objects.filter(pk=self.product.pk)).get()
+        item = WarehouseItem.objects.get(pk=self.item.pk)
+        self.assertEqual(variant.available_quantity, item.available_quantity)
+        self.assertEqual(product.total_available_quantity, item.available_quantity)
+        return item.available_quantity
+
+    def test_configure_splits_free_stock_evenly(self):
+        self.assertEqual(self._allotments(), [(3, 0), (3, 0), (3, 0)])
+        self.assertEqual(self._available(), 9)
+
+    def test_reservation_uses_shards_and_spills_over(self):
+        reservation = self._reserve("shard-spill", 7)
+
+        item = reservation.items.get()
+        self.assertEqual(sum(item.shard_quantities.values()), 7)
+        self.assertGreaterEqual(len(item.shard_quantities), 3)
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.reserved_quantity, 1)
+        self.assertEqual(self._available(), 2)
+
+        with self.assertRaises(InsufficientStockError):
+            self._reserve("shard-too-much", 3)
+        self.assertFalse(StockReservation.objects.filter(session_key="shard-too-much").exists())
+        self.assertEqual(self._available(), 2)
+
+    def test_spill_over_takes_shards_in_index_order(self):
+        WarehouseItemShard.objects.filter(warehouse_item=self.item, index=0).update(reserved_quantity=2)
+        item = WarehouseItem.objects.prefetch_related("shards").get(pk=self.item.pk)
+        last = max(item.shards.all(), key=lambda shard: shard.index)
+        touched = []
+        original_take = sharding._take
+
+        def take(shard_pk, quantity):
+            touched.append(WarehouseItemShard.objects.get(pk=shard_pk).index)
+            return original_take(shard_pk, quantity)
+
+        with (
+            patch.object(sharding.random, "choice", return_value=last),
+            patch.object(sharding, "_take", side_effect=take),
+        ):
+            self.assertEqual(reserve_on_shards(item, 2), ({"2": 2}, 0))
+            self.assertEqual(reserve_on_shards(item, 4), ({"0": 1, "1": 3}, 0))
+            self.assertEqual(reserve_on_shards(item, 2), ({"2": 1}, 1))
+
+        # The last call misses on its stale random shard, then spills over from index 0.
+        self.assertEqual(touched, [2, 0, 1, 2, 2])
+
+    def test_release_and_confirm_keep_shards_consistent(self):
+        self._reserve("shard-release", 4)
+        self._reserve("shard-confirm", 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StockReservationService.release_reservation("shard-release")
+        self.assertEqual(self._available(), 7)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StockReservationService.confirm_reservation("shard-confirm")
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.quantity_in_stock, self.item.reserved_quantity), (8, 1))
+        self.assertEqual(sum(allotment for allotment, _ in self._allotments()), 7)
+        self.assertEqual(sum(reserved for _, reserved in self._allotments()), 0)
+        self.assertEqual(self._available(), 7)
+
+    def test_stock_edit_rebalances_in_the_saving_transaction(self):
+        self._reserve("shard-edit", 2)
+        with self.captureOnCommitCallbacks(execute=False):
+            self.item.refresh_from_db()
+            self.item.quantity_in_stock = 31
+            self.item.save()
+
+        allotments = self._allotments()
+        self.assertEqual(sum(allotment - reserved for allotment, reserved in allotments), 28)
+        self.assertLessEqual(
+            max(a - r for a, r in allotments) - min(a - r for a, r in allotments), 1,
+        )
+        self.assertEqual(rebalance_shards(), 1)
+
+    def test_unsharding_folds_reservations_back_into_the_row(self):
+        self._reserve("shard-fold", 5)
+        configure_shards(self.item.pk, 0)
+
+        self.item.refresh_from_db()
+        self.assertEqual((self.item.shard_count, self.item.reserved_quantity), (0, 6))
+        self.assertFalse(WarehouseItemShard.objects.filter(warehouse_item=self.item).exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            StockReservationService.release_reservation("shard-fold")
+        self.item.refresh_from_db()
+        self.assertEqual(self.item.reserved_quantity, 1)
+        self.assertEqual(self._available(), 9)
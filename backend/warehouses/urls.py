@@ -0,0 +1,7 @@
+from django.urls import path
+
+from .views import stock_reservation_metrics
+
+urlpatterns = [
+    path("stock-reservations/", stock_reservation_metrics, name="stock-reservation-metrics"),
+]
@@ -1,3 +1,29 @@
-from django.shortcuts import render
+import hmac
 
-# Create your views here.
+from django.conf import settings
+from django.http import HttpResponse
+from django.views.decorators.http import require_GET
+
+from warehouses.services.metrics import collect_reservation_metrics, render_prometheus
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _metrics_authorized(request) -> bool:
+    token = getattr(settings, "STOCK_METRICS_TOKEN", "")
+    if token:
+        header = request.headers.get("Authorization", "")
+        return hmac.compare_digest(header.encode(), f"Bearer {token}".encode())
+    return request.user.is_authenticated and request.user.is_staff
+
+
+@require_GET
+def stock_reservation_metrics(request):
+    """Rolling reservation counters in the Prometheus text format.
+
+    Reads only the StockReservationMetric counters (no StockReservation or
+    WarehouseItem scans), so it is cheap enough to scrape every few seconds.
+    """
+    if not _metrics_authorized(request):
+        return HttpResponse("Forbidden\n", status=403, content_type="text/plain")
+    return HttpResponse(render_prometheus(collect_reservation_metrics()), content_type=PROMETHEUS_CONTENT_TYPE)